@@ -0,0 +1,95 @@
+"""
+Django management command to recalculate the financial fields of bills.
+
+Usage:
+    python manage.py recalculate_bills                            # recompute every bill
+    python manage.py recalculate_bills --dry-run                  # only show what would change
+    python manage.py recalculate_bills --tds-percentage 2.5       # apply a new TDS rate, then recompute
+    python manage.py recalculate_bills --gr 3 --lwc-percentage 1  # only bills of GR 3
+
+Amounts with their override flag set are kept as entered; everything else is
+recomputed exactly as Bill.save() would.
+"""
+from decimal import Decimal, InvalidOperation
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.bill.models import Bill
+from apps.bill.services import recalculate_bills
+
+
+def percentage(value):
+    try:
+        value = Decimal(value)
+    except InvalidOperation:
+        raise ValueError(value)
+    if not 0 <= value <= 100:
+        raise ValueError(value)
+    return value
+
+
+class Command(BaseCommand):
+    help = 'Recalculate GST, totals, TDS, LWC and net amounts of bills in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bill', type=int, nargs='+', help='Only process the given bill IDs')
+        parser.add_argument('--tender', type=int, nargs='+', help='Only process bills of the given tender IDs')
+        parser.add_argument('--gr', type=int, nargs='+', help='Only process bills of the given GR IDs')
+        parser.add_argument('--gst-percentage', type=percentage, help='New GST rate to set before recalculating')
+        parser.add_argument('--tds-percentage', type=percentage, help='New TDS rate to set before recalculating')
+        parser.add_argument(
+            '--gst-on-workportion-percentage',
+            type=percentage,
+            help='New GST-on-work-portion rate to set before recalculating',
+        )
+        parser.add_argument('--lwc-percentage', type=percentage, help='New LWC rate to set before recalculating')
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Print the changes without saving them',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Bills fetched and written per batch (default 1000)',
+        )
+
+    def handle(self, *args, **options):
+        queryset = Bill.objects.all()
+        if options['bill']:
+            queryset = queryset.filter(id__in=options['bill'])
+        if options['tender']:
+            queryset = queryset.filter(tender_id__in=options['tender'])
+        if options['gr']:
+            queryset = queryset.filter(gr_id__in=options['gr'])
+
+        percentages = {
+            field: options[field]
+            for field in ('gst_percentage', 'tds_percentage', 'gst_on_workportion_percentage', 'lwc_percentage')
+            if options[field] is not None
+        }
+        if options['batch_size'] <= 0:
+            raise CommandError('--batch-size must be positive')
+
+        dry_run = options['dry_run']
+        processed, changed, changes = recalculate_bills(
+            queryset,
+            percentages=percentages,
+            dry_run=dry_run,
+            batch_size=options['batch_size'],
+        )
+
+        if dry_run:
+            for bill, differences in changes:
+                self.stdout.write(self.style.MIGRATE_HEADING(f'Bill {bill.pk} ({bill.bill_number})'))
+                for field, (old, new) in differences.items():
+                    self.stdout.write(f'  {field}: {old} -> {new}')
+            self.stdout.write(self.style.WARNING(
+                f'Dry run: {changed} of {processed} bill(s) would change. Nothing was saved.'
+            ))
+            return
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Recalculated {processed} bill(s), {changed} updated.'
+        ))
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.7 on 2026-10-16 23:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bill', '0007_bill_is_demo'),
+        ('gr', '0006_gr_gr_demo_date_idx'),
+        ('tender', '0009_tender_tender_demo_created_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bill',
+            index=models.Index(fields=['is_demo', '-created_at', '-id'], name='bill_demo_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bill',
+            index=models.Index(fields=['tender', 'is_demo'], name='bill_tender_demo_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bill',
+            index=models.Index(condition=models.Q(('is_demo', False), ('payment_done_from_gr__isnull', True)), fields=['tender'], name='bill_live_unpaid_idx'),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.7 on 2026-10-16 23:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bill', '0008_bill_bill_demo_created_idx_bill_bill_tender_demo_idx_and_more'),
+        ('gr', '0006_gr_gr_demo_date_idx'),
+        ('tender', '0009_tender_tender_demo_created_idx_and_more'),
+        ('works', '0005_spill_spill_demo_created_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bill',
+            name='effective_is_cancelled',
+            field=models.BooleanField(default=False, editable=False, help_text='True if the Work is cancelled'),
+        ),
+        migrations.AddField(
+            model_name='bill',
+            name='effective_is_demo',
+            field=models.BooleanField(default=False, editable=False, help_text='True if this bill or any record above it is demo data'),
+        ),
+        migrations.AddField(
+            model_name='bill',
+            name='gr',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='gr.gr'),
+        ),
+        migrations.AddField(
+            model_name='bill',
+            name='work',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='works.work'),
+        ),
+        migrations.AddIndex(
+            model_name='bill',
+            index=models.Index(condition=models.Q(('effective_is_demo', False)), fields=['-created_at', '-id'], name='bill_live_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bill',
+            index=models.Index(condition=models.Q(('effective_is_demo', False)), fields=['gr', '-created_at', '-id'], name='bill_live_gr_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bill',
+            index=models.Index(condition=models.Q(('effective_is_demo', False)), fields=['work', '-created_at', '-id'], name='bill_live_work_created_idx'),
+        ),
+    ]
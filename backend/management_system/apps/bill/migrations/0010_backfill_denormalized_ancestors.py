@@ -0,0 +1,60 @@
+from django.db import migrations
+from django.db.models import BooleanField, Exists, ExpressionWrapper, OuterRef, Q, Subquery
+
+
+def backfill_denormalized_ancestors(apps, schema_editor):
+    """Fill gr/work/effective_* on existing rows (same UPDATEs as apps/rollup/ancestors.py)"""
+    Work = apps.get_model('works', 'Work')
+    TechnicalSanction = apps.get_model('technical_sanction', 'TechnicalSanction')
+    Tender = apps.get_model('tender', 'Tender')
+    Bill = apps.get_model('bill', 'Bill')
+
+    works = Work.objects.filter(pk=OuterRef('work_id'))
+    demo_work = Exists(works.filter(Q(is_demo=True) | Q(gr__is_demo=True)))
+    cancelled_work = Exists(works.filter(is_cancelled=True))
+
+    TechnicalSanction.objects.update(
+        gr=Subquery(works.values('gr_id')[:1]),
+        effective_is_demo=ExpressionWrapper(Q(is_demo=True) | demo_work, output_field=BooleanField()),
+        effective_is_cancelled=cancelled_work,
+    )
+    Tender.objects.update(
+        gr=Subquery(works.values('gr_id')[:1]),
+        effective_is_demo=ExpressionWrapper(
+            Q(is_demo=True)
+            | demo_work
+            | Exists(TechnicalSanction.objects.filter(pk=OuterRef('technical_sanction_id'), is_demo=True)),
+            output_field=BooleanField(),
+        ),
+        effective_is_cancelled=cancelled_work,
+    )
+
+    tenders = Tender.objects.filter(pk=OuterRef('tender_id'))
+    Bill.objects.update(
+        work=Subquery(tenders.values('work_id')[:1]),
+        gr=Subquery(tenders.values('work__gr_id')[:1]),
+        effective_is_demo=ExpressionWrapper(
+            Q(is_demo=True)
+            | Exists(tenders.filter(
+                Q(is_demo=True)
+                | Q(work__is_demo=True)
+                | Q(work__gr__is_demo=True)
+                | Q(technical_sanction__is_demo=True)
+            )),
+            output_field=BooleanField(),
+        ),
+        effective_is_cancelled=Exists(tenders.filter(work__is_cancelled=True)),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bill', '0009_bill_denormalized_ancestors'),
+        ('tender', '0010_tender_denormalized_ancestors'),
+        ('technical_sanction', '0007_technicalsanction_denormalized_ancestors'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_denormalized_ancestors, migrations.RunPython.noop),
+    ]
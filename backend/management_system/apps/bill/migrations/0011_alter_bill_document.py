@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-17 00:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bill', '0010_backfill_denormalized_ancestors'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='bill',
+            name='document',
+            field=models.FileField(blank=True, max_length=255, null=True, upload_to='Bill documents/%Y/%m/'),
+        ),
+    ]
@@ -2,6 +2,7 @@ from django.db import models
 from django.utils import timezone
 from apps.tender.models import Tender
 from apps.gr.models import GR
+from apps.works.models import Work
 from decimal import Decimal
 from django.core.validators import MinValueValidator, MaxValueValidator
 
@@ -35,7 +36,7 @@ class Bill(models.Model):
     
     net_amount = models.DecimalField(max_digits=15, decimal_places=2, default=0, blank=True)
         
-    document = models.FileField(upload_to='Bill documents/%Y/%m/', null=True, blank=True)
+    document = models.FileField(upload_to='Bill documents/%Y/%m/', max_length=255, null=True, blank=True)
     
     # ✅ ADD: Override flags
     override_gst = models.BooleanField(default=False)
@@ -47,12 +48,34 @@ class Bill(models.Model):
     
     is_demo = models.BooleanField(default=False, verbose_name="Is Demo", help_text="Mark this record as demo data for testing")
 
+    # Denormalized from the Tender/Work/GR/TS chain (kept in sync by apps/rollup/ancestors.py)
+    work = models.ForeignKey(Work, on_delete=models.CASCADE, null=True, blank=True, editable=False, related_name='+')
+    gr = models.ForeignKey(GR, on_delete=models.CASCADE, null=True, blank=True, editable=False, related_name='+')
+    effective_is_demo = models.BooleanField(default=False, editable=False, help_text="True if this bill or any record above it is demo data")
+    effective_is_cancelled = models.BooleanField(default=False, editable=False, help_text="True if the Work is cancelled")
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         verbose_name = "Bill"
         verbose_name_plural = "Bills"
+        indexes = [
+            # List endpoint: filter on is_demo, newest first (matches cursor pagination)
+            models.Index(fields=['is_demo', '-created_at', '-id'], name='bill_demo_created_idx'),
+            # ?tender= filter and joins from Tender
+            models.Index(fields=['tender', 'is_demo'], name='bill_tender_demo_idx'),
+            # Live list endpoint on the denormalized flags (no joins)
+            models.Index(fields=['-created_at', '-id'], name='bill_live_created_idx', condition=models.Q(effective_is_demo=False)),
+            models.Index(fields=['gr', '-created_at', '-id'], name='bill_live_gr_created_idx', condition=models.Q(effective_is_demo=False)),
+            models.Index(fields=['work', '-created_at', '-id'], name='bill_live_work_created_idx', condition=models.Q(effective_is_demo=False)),
+            # Dashboard "pending payment" counts on live bills
+            models.Index(
+                fields=['tender'],
+                name='bill_live_unpaid_idx',
+                condition=models.Q(is_demo=False, payment_done_from_gr__isnull=True),
+            ),
+        ]
     
     def calculate_gst(self):
         # Ensure both are Decimal
@@ -114,11 +137,11 @@ class Bill(models.Model):
             - royalty
         )
     
-    def save(self, *args, **kwargs):
-        # Auto-fill date with today if not provided
-        if not self.date:
-            self.date = timezone.now().date()
-
+    def recalculate(self):
+        """
+        Normalize the percentages and recalculate every non-overridden amount.
+        Called by save(); also used by apps/bill/services.recalculate_bills.
+        """
         # Convert and set defaults for percentage fields
         if not self.gst_percentage or self.gst_percentage == 0:
             self.gst_percentage = Decimal('18.00')
@@ -158,7 +181,13 @@ class Bill(models.Model):
         
         if not self.override_net_amount:
             self.net_amount = self.calculate_net_amount()
-            
+    
+    def save(self, *args, **kwargs):
+        # Auto-fill date with today if not provided
+        if not self.date:
+            self.date = timezone.now().date()
+
+        self.recalculate()
         super().save(*args, **kwargs)
     
     def __str__(self):
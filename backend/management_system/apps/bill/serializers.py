@@ -1,11 +1,16 @@
 # apps/bill/serializers.py
 from rest_framework import serializers
+from django.utils import timezone
+from management_system.bulk import BulkListSerializer, BulkSerializerMixin
+from management_system.sparse_fields import DynamicFieldsMixin
 from .models import Bill
+from .services import CALCULATED_FIELDS, PERCENTAGE_FIELDS
 from apps.tender.models import Tender
 from apps.gr.models import GR
+from apps.previews.fields import PreviewURLField
 
 
-class BillSerializer(serializers.ModelSerializer):
+class BillSerializer(BulkSerializerMixin, DynamicFieldsMixin, serializers.ModelSerializer):
     # For reads
     tenderId = serializers.IntegerField(source='tender.id', read_only=True)
     tenderNumber = serializers.CharField(source='tender.tender_id', read_only=True)
@@ -36,6 +41,7 @@ class BillSerializer(serializers.ModelSerializer):
     Royalty = serializers.DecimalField(source='royalty', max_digits=15, decimal_places=2, read_only=True)
     netAmount = serializers.DecimalField(source='net_amount', max_digits=15, decimal_places=2, read_only=True)
     documentUrl = serializers.FileField(source='document', read_only=True)
+    documentPreviewUrl = PreviewURLField(source='document')
     paymentDoneFromGrId = serializers.IntegerField(source='payment_done_from_gr.id', read_only=True, allow_null=True)
     paymentDoneFromGrNumber = serializers.CharField(source='payment_done_from_gr.gr_number', read_only=True, allow_null=True)
 
@@ -125,7 +131,7 @@ class BillSerializer(serializers.ModelSerializer):
             'RoyaltyAndTesting', 'Insurance', 'SecurityDeposit', 'ReimbursementOfInsurance', 'Royalty',
             'id','document',
             'billNumber', 'billDate', 
-            'gstAmount', 'billTotal', 'tdsAmount', 'gstOnWorkPortion', 'lwcAmount', 'netAmount', 'documentUrl',
+            'gstAmount', 'billTotal', 'tdsAmount', 'gstOnWorkPortion', 'lwcAmount', 'netAmount', 'documentUrl', 'documentPreviewUrl',
             'paymentDoneFromGrId', 'paymentDoneFromGrNumber',
 
             # Write fields
@@ -142,37 +148,34 @@ class BillSerializer(serializers.ModelSerializer):
             'created_at', 'updated_at',
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
+        list_serializer_class = BulkListSerializer
+
+    # Columns Bill.save() may change besides the submitted ones (for bulk_update)
+    bulk_derived_fields = (
+        'date', *PERCENTAGE_FIELDS, *CALCULATED_FIELDS,
+        *(f'override_{field}' for field in CALCULATED_FIELDS),
+    )
+
+    def get_override_flags(self, validated_data):
+        """override_* flags for the calculated amounts the user entered manually"""
+        return {f'override_{field}': True for field in CALCULATED_FIELDS if field in validated_data}
 
     def create(self, validated_data):
         """Set override flags when user provides manual values"""
-        if 'gst' in validated_data:
-            validated_data['override_gst'] = True
-        if 'bill_total' in validated_data:
-            validated_data['override_bill_total'] = True
-        if 'tds' in validated_data:
-            validated_data['override_tds'] = True
-        if 'gst_on_workportion' in validated_data:
-            validated_data['override_gst_on_workportion'] = True
-        if 'lwc' in validated_data:
-            validated_data['override_lwc'] = True
-        if 'net_amount' in validated_data:
-            validated_data['override_net_amount'] = True
-        
+        validated_data.update(self.get_override_flags(validated_data))
         return super().create(validated_data)
     
     def update(self, instance, validated_data):
         """Set override flags when user provides manual values"""
-        if 'gst' in validated_data:
-            instance.override_gst = True
-        if 'bill_total' in validated_data:
-            instance.override_bill_total = True
-        if 'tds' in validated_data:
-            instance.override_tds = True
-        if 'gst_on_workportion' in validated_data:
-            instance.override_gst_on_workportion = True
-        if 'lwc' in validated_data:
-            instance.override_lwc = True
-        if 'net_amount' in validated_data:
-            instance.override_net_amount = True
-        
+        for flag, value in self.get_override_flags(validated_data).items():
+            setattr(instance, flag, value)
         return super().update(instance, validated_data)
+
+    def bulk_attrs(self, validated_data):
+        return {**validated_data, **self.get_override_flags(validated_data)}
+
+    def apply_save_rules(self, instance):
+        # Same as Bill.save()
+        if not instance.date:
+            instance.date = timezone.now().date()
+        instance.recalculate()
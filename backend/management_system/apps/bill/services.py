@@ -0,0 +1,111 @@
+"""
+Batch recalculation of Bill financials
+"""
+from decimal import Decimal, ROUND_HALF_EVEN, ROUND_HALF_UP
+
+from django.db import transaction
+from django.utils import timezone
+
+from apps.rollup.services import mark_rollups_dirty
+from .models import Bill
+
+# Amounts computed by Bill.recalculate() unless their override_* flag is set
+CALCULATED_FIELDS = ('gst', 'bill_total', 'tds', 'gst_on_workportion', 'lwc', 'net_amount')
+# Rates Bill.recalculate() normalizes (0/empty -> default)
+PERCENTAGE_FIELDS = ('gst_percentage', 'tds_percentage', 'gst_on_workportion_percentage', 'lwc_percentage')
+# Inputs read by the calculations
+INPUT_FIELDS = (
+    'work_portion', 'royalty_and_testing', 'reimbursement_of_insurance',
+    'security_deposit', 'insurance', 'royalty',
+    'override_gst', 'override_bill_total', 'override_tds',
+    'override_gst_on_workportion', 'override_lwc', 'override_net_amount',
+)
+
+CENTS = Decimal('0.01')
+
+
+def _stored(value):
+    """Value as the decimal(…, 2) column will hold it (numeric rounds half away from zero)"""
+    return Decimal(str(value)).quantize(CENTS, rounding=ROUND_HALF_UP)
+
+
+def _unchanged(old, new):
+    """
+    True if the stored value already is `new` rounded to cents. Half-even is
+    accepted too: SQLite keeps decimals as floats and rounds them that way on read.
+    """
+    new = Decimal(str(new))
+    return old in (new.quantize(CENTS, rounding=ROUND_HALF_UP), new.quantize(CENTS, rounding=ROUND_HALF_EVEN))
+
+
+def recalculate_bills(queryset=None, percentages=None, dry_run=False, batch_size=1000):
+    """
+    Recompute the calculated amounts of many bills in one pass.
+
+    Every bill goes through Bill.recalculate() - the same code as Bill.save() -
+    so overridden amounts are kept and the results are identical to saving the
+    bills one by one. Only bills whose stored values change are written, with
+    one bulk_update per batch inside a single transaction.
+
+    Args:
+        queryset: Bills to process (default: all bills)
+        percentages: Optional new rates to apply first, e.g. {'tds_percentage': Decimal('2.50')}
+        dry_run: Compute the changes without writing them
+        batch_size: Rows fetched and written per batch
+
+    Returns:
+        (processed count, changed count, changes) where changes is a list of
+        (bill, {field: (old, new)}) for every bill that differs - collected
+        on dry runs only, so a real run keeps no more than one batch in memory
+    """
+    if queryset is None:
+        queryset = Bill.objects.all()
+    percentages = percentages or {}
+    unknown = set(percentages) - set(PERCENTAGE_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown percentage field(s): {', '.join(sorted(unknown))}")
+
+    compared_fields = PERCENTAGE_FIELDS + CALCULATED_FIELDS
+    bills = queryset.only(
+        'bill_number', 'gr', *INPUT_FIELDS, *compared_fields
+    ).order_by('pk').iterator(chunk_size=batch_size)
+
+    processed = 0
+    changed = 0
+    changes = []
+    with transaction.atomic():
+        batch = []
+        for bill in bills:
+            processed += 1
+            old = {field: _stored(getattr(bill, field)) for field in compared_fields}
+            for field, value in percentages.items():
+                setattr(bill, field, value)
+            bill.recalculate()
+
+            differences = {}
+            for field in compared_fields:
+                new = getattr(bill, field)
+                if not _unchanged(old[field], new):
+                    differences[field] = (old[field], _stored(new))
+            if not differences:
+                continue
+            changed += 1
+            if dry_run:
+                changes.append((bill, differences))
+                continue
+            batch.append(bill)
+            if len(batch) >= batch_size:
+                _write_batch(batch)
+                batch = []
+        if batch:
+            _write_batch(batch)
+    return processed, changed, changes
+
+
+def _write_batch(bills):
+    now = timezone.now()
+    for bill in bills:
+        bill.updated_at = now
+    Bill.objects.bulk_update(bills, [*PERCENTAGE_FIELDS, *CALCULATED_FIELDS, 'updated_at'])
+    # bulk_update sends no signals - refresh the expenditure totals of the affected GRs
+    mark_rollups_dirty({bill.gr_id for bill in bills})
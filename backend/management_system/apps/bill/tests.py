@@ -1,3 +1,570 @@
-from django.test import TestCase
+import csv
+import datetime
+import io
+import os
+import shutil
+import tempfile
+from decimal import Decimal
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.db import connection
+from django.test import AsyncRequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.bill.models import Bill
+from apps.bill.services import CALCULATED_FIELDS as BILL_CALCULATED_FIELDS
+from apps.bill.services import INPUT_FIELDS as BILL_INPUT_FIELDS
+from apps.bill.services import PERCENTAGE_FIELDS as BILL_PERCENTAGE_FIELDS
+from apps.bill.services import recalculate_bills
+from apps.bill.views import BillViewSet
+from apps.gr.models import GR
+from apps.previews.models import DocumentPreview
+from apps.previews.services import preview_name
+from apps.rollup import services as rollup_services
+from apps.rollup.models import WorkflowRollup
+from apps.rollup.services import find_rollup_drift, rebuild_rollups
+from apps.technical_sanction.models import TechnicalSanction
+from apps.tender.models import Tender
+from apps.works.models import Work
+from authentication.models import User
+from management_system.exports import XLSX_CONTENT_TYPE
+
+
+class BillListTestCase(TestCase):
+    """Three bills covering the list's edge cases, a generated preview and an authenticated client"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='parity@example.com', username='parity', password='x', first_name='P', last_name='T'
+        )
+        gr = GR.objects.create(gr_number='GR/1', date=datetime.date(2025, 4, 1))
+        paying_gr = GR.objects.create(gr_number='GR/2', date=datetime.date(2025, 5, 2))
+        work = Work.objects.create(gr=gr, name_of_work='Road', aa=Decimal('1000000.55'), date=datetime.date(2025, 4, 3))
+        ts = TechnicalSanction.objects.create(
+            work=work, work_portion=Decimal('5000.10'), gst_percentage=Decimal('18.00'),
+            contingency_percentage=Decimal('4.00'), labour_insurance_percentage=Decimal('1.00'),
+        )
+        tender = Tender.objects.create(
+            work=work, technical_sanction=ts, tender_id='T-1', agency_name='Agency', work_order='Tender work orders/2025/04/wo.pdf',
+        )
+
+        # Paid, with a document that has a generated preview
+        Bill.objects.create(
+            tender=tender, bill_number='B-1', date=datetime.date(2025, 6, 30), payment_done_from_gr=paying_gr,
+            work_portion=Decimal('12345.67'), royalty_and_testing=Decimal('0.01'), gst_percentage=Decimal('12.50'),
+            security_deposit=Decimal('99.99'), document='Bill documents/2025/06/scan.pdf',
+        )
+        # Unpaid (null FK), a document without preview, overridden amounts
+        Bill.objects.create(
+            tender=tender, bill_number='B-2', work_portion=Decimal('0.03'),
+            override_tds=True, tds=Decimal('-7.10'), override_net_amount=True, net_amount=Decimal('1.00'),
+            document='Bill documents/2025/07/no-preview.pdf',
+        )
+        # No document at all
+        Bill.objects.create(tender=tender, bill_number='B-3', work_portion=Decimal('100'))
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        media = override_settings(MEDIA_ROOT=self.media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+        # Preview of B-1's document (saving the bill queued it)
+        name = preview_name('Bill documents/2025/06/scan.pdf')
+        path = os.path.join(self.media_root, name)
+        os.makedirs(os.path.dirname(path))
+        with open(path, 'wb') as file:
+            file.write(b'jpeg')
+        DocumentPreview.objects.update_or_create(
+            name=name,
+            defaults={
+                'document': 'Bill documents/2025/06/scan.pdf',
+                'status': DocumentPreview.STATUS_DONE,
+                'generated_at': timezone.now(),
+            },
+        )
+
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def get_response(self, url, values_list):
+        with override_settings(API_VALUES_LIST=values_list):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def rows(self, response):
+        # ?page_size=all returns a plain list, other pages {'results': [...], ...}
+        data = response.json()
+        return data['results'] if isinstance(data, dict) else data
+
+    def get_rows(self, url, values_list):
+        return self.rows(self.get_response(url, values_list))
+
+
+class BillValuesListParityTests(BillListTestCase):
+    """The .values() list path (ValuesListMixin) renders exactly what BillSerializer renders"""
+
+    def assert_same_rows(self, url):
+        values_response = self.get_response(url, values_list=True)
+        model_response = self.get_response(url, values_list=False)
+        # The rendered bytes: same keys in the same order, numbers and dates formatted alike
+        self.assertEqual(values_response.content.decode(), model_response.content.decode())
+        return self.rows(values_response)
+
+    def test_list_matches_model_serializer(self):
+        rows = self.assert_same_rows('/api/bills/?page_size=all')
+        by_number = {row['billNumber']: row for row in rows}
+        # The cases the fixtures are meant to cover
+        self.assertIsNotNone(by_number['B-1']['paymentDoneFromGrId'])
+        self.assertIsNone(by_number['B-2']['paymentDoneFromGrId'])
+        self.assertIsNotNone(by_number['B-1']['documentPreviewUrl'])
+        self.assertIsNone(by_number['B-2']['documentPreviewUrl'])
+        self.assertIsNotNone(by_number['B-2']['documentUrl'])
+        self.assertIsNone(by_number['B-3']['documentUrl'])
+        self.assertEqual(by_number['B-1']['workPortion'], '12345.67')
+        self.assertEqual(by_number['B-1']['billDate'], '2025-06-30')
+
+    def test_sparse_list_matches_model_serializer(self):
+        self.assert_same_rows('/api/bills/?page_size=all&fields=id,billNumber,paymentDoneFromGrNumber,documentPreviewUrl')
+        self.assert_same_rows('/api/bills/?page_size=all&omit=documentUrl,netAmount')
+
+    def test_paginated_list_matches_model_serializer(self):
+        rows = self.assert_same_rows('/api/bills/?page_size=2')
+        self.assertEqual(len(rows), 2)
+
+
+class BillPreviewStatusTests(BillListTestCase):
+    """documentPreviewUrl comes from one DocumentPreview lookup per list"""
+
+    def preview_lookups(self, queries):
+        # The ETag's preview aggregate aside
+        return [
+            query for query in queries
+            if 'previews_documentpreview' in query['sql'] and 'COUNT(' not in query['sql'].upper()
+        ]
+
+    def test_preview_status_is_read_once_per_list(self):
+        for values_list in (True, False):
+            with self.subTest(values_list=values_list), CaptureQueriesContext(connection) as queries:
+                rows = self.get_rows('/api/bills/?page_size=all', values_list=values_list)
+            self.assertEqual(len(self.preview_lookups(queries)), 1)
+            self.assertEqual(sum(row['documentPreviewUrl'] is not None for row in rows), 1)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/bills/export/')
+            content = b''.join(response.streaming_content).decode()
+        self.assertEqual(len(self.preview_lookups(queries)), 1)
+        self.assertEqual(content.count('/media/previews/'), 1)
+
+    def test_preview_url_follows_the_preview_status(self):
+        DocumentPreview.objects.filter(status=DocumentPreview.STATUS_DONE).update(status=DocumentPreview.STATUS_PENDING)
+        rows = self.get_rows('/api/bills/?page_size=all', values_list=True)
+        self.assertEqual(rows, self.get_rows('/api/bills/?page_size=all', values_list=False))
+        self.assertEqual([row['documentPreviewUrl'] for row in rows], [None, None, None])
+
+
+class BillAsgiStreamingTests(BillListTestCase):
+    """Exports and media are streamed through async iterators under ASGI"""
+
+    def asgi_headers(self):
+        return {'authorization': f'Bearer {AccessToken.for_user(self.user)}'}
+
+    async def test_asgi_export_is_streamed_asynchronously(self):
+        response = await self.async_client.get('/api/bills/export/', headers=self.asgi_headers())
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_async)
+        content = b''.join([chunk async for chunk in response.streaming_content]).decode()
+        self.assertEqual(content.count('B-'), 3)
+
+    async def test_asgi_media_is_streamed_asynchronously(self):
+        path = os.path.join(self.media_root, 'Bill documents/2025/06/scan.pdf')
+        os.makedirs(os.path.dirname(path))
+        data = os.urandom(200 * 1024)
+        with open(path, 'wb') as file:
+            file.write(data)
+
+        url = '/media/Bill%20documents/2025/06/scan.pdf'
+        response = await self.async_client.get(url, headers=self.asgi_headers())
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_async)
+        chunks = [chunk async for chunk in response.streaming_content]
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(b''.join(chunks), data)
+
+        response = await self.async_client.get(url, headers={**self.asgi_headers(), 'range': 'bytes=100-199'})
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b''.join([chunk async for chunk in response.streaming_content]), data[100:200])
+
+
+class BillConditionalGetTests(BillListTestCase):
+    """ETag / If-None-Match on the bill list and detail (ConditionalGetMixin)"""
+
+    def etag(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response['ETag']
+
+    def assertNotModified(self, url, etag):
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['ETag'], etag)
+
+    def assertModified(self, url, etag):
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def save(self, instance, **fields):
+        for field, value in fields.items():
+            setattr(instance, field, value)
+        with self.captureOnCommitCallbacks(execute=True):
+            instance.save()
+
+    def test_matching_etag_is_not_modified(self):
+        bill = Bill.objects.get(bill_number='B-1')
+        for url in ('/api/bills/', '/api/bills/?page_size=all', f'/api/bills/{bill.pk}/'):
+            with self.subTest(url=url):
+                etag = self.etag(url)
+                self.assertTrue(etag.startswith('W/"'))
+                self.assertNotModified(url, etag)
+                self.assertModified(url, 'W/"stale"')
+        # Different rows, different ETag
+        self.assertNotEqual(self.etag('/api/bills/'), self.etag(f'/api/bills/?tender={bill.tender_id + 1}'))
+
+    def test_updated_row_changes_the_etag(self):
+        bill = Bill.objects.get(bill_number='B-2')
+        list_etag, detail_etag = self.etag('/api/bills/'), self.etag(f'/api/bills/{bill.pk}/')
+        self.save(bill, work_portion=Decimal('0.04'))
+        self.assertModified('/api/bills/', list_etag)
+        self.assertModified(f'/api/bills/{bill.pk}/', detail_etag)
+
+    def test_deleted_row_changes_the_etag(self):
+        etag = self.etag('/api/bills/')
+        # Neither the latest bill nor the paid one: only the row count moves
+        latest = Bill.objects.latest('updated_at').updated_at
+        with self.captureOnCommitCallbacks(execute=True):
+            Bill.objects.get(bill_number='B-2').delete()
+        self.assertEqual(Bill.objects.latest('updated_at').updated_at, latest)
+        self.assertModified('/api/bills/', etag)
+
+    def test_related_row_changes_the_etag(self):
+        bill = Bill.objects.get(bill_number='B-1')
+        urls = ('/api/bills/', f'/api/bills/{bill.pk}/')
+        etags = [self.etag(url) for url in urls]
+        # workName is read from tender.work
+        self.save(bill.tender.work, name_of_work='Renamed road')
+        for url, etag in zip(urls, etags):
+            with self.subTest(url=url):
+                self.assertModified(url, etag)
+        self.assertEqual(self.client.get(urls[1]).json()['workName'], 'Renamed road')
+
+        etags = [self.etag(url) for url in urls]
+        self.save(bill.payment_done_from_gr, gr_number='GR/2 renamed')
+        for url, etag in zip(urls, etags):
+            with self.subTest(url=url):
+                self.assertModified(url, etag)
+
+    def rename_work(self):
+        self.save(Work.objects.get(name_of_work='Road'), name_of_work='Renamed road')
+
+    async def aget(self, action, url, **kwargs):
+        """Response of the async handler (alist / aretrieve) the ASGI deployment dispatches to"""
+        with override_settings(ASYNC_VIEWS=True):
+            view = BillViewSet.as_view({'get': action})
+        headers = {'authorization': f'Bearer {AccessToken.for_user(self.user)}', **kwargs}
+        return await view(AsyncRequestFactory().get(url, headers=headers), **self.url_kwargs(url))
+
+    def url_kwargs(self, url):
+        pk = url.rstrip('/').rsplit('/', 1)[-1]
+        return {'pk': pk} if pk.isdigit() else {}
+
+    async def test_async_list_and_detail(self):
+        bill = await Bill.objects.aget(bill_number='B-1')
+        for action, url in (('list', '/api/bills/'), ('retrieve', f'/api/bills/{bill.pk}/')):
+            with self.subTest(action=action):
+                response = await self.aget(action, url)
+                self.assertEqual(response.status_code, 200)
+                etag = response['ETag']
+                # Same validators as the sync handlers
+                self.assertEqual(etag, await sync_to_async(self.etag)(url))
+
+                response = await self.aget(action, url, if_none_match=etag)
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response['ETag'], etag)
+
+                await sync_to_async(self.rename_work)()
+                response = await self.aget(action, url, if_none_match=etag)
+                self.assertEqual(response.status_code, 200)
+                self.assertNotEqual(response['ETag'], etag)
+                await Work.objects.filter(name_of_work='Renamed road').aupdate(name_of_work='Road')
+
+
+class BillCursorPaginationTests(TestCase):
+    """Keyset pages of /api/bills/ from model instances and from .values() rows (ValuesListMixin)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='pages@example.com', username='pages', password='x', first_name='P', last_name='T'
+        )
+        gr = GR.objects.create(gr_number='GR/1')
+        work = Work.objects.create(gr=gr, name_of_work='Road', aa=Decimal('1000.00'))
+        ts = TechnicalSanction.objects.create(
+            work=work, gst_percentage=Decimal('18.00'),
+            contingency_percentage=Decimal('4.00'), labour_insurance_percentage=Decimal('1.00'),
+        )
+        tender = Tender.objects.create(work=work, technical_sanction=ts, tender_id='T-1', agency_name='Agency')
+        for number in range(5):
+            Bill.objects.create(tender=tender, bill_number=f'B-{number}', work_portion=Decimal('100'))
+        # Timestamp ties are ordered by id
+        Bill.objects.update(created_at=timezone.now())
+        cls.expected = list(Bill.objects.order_by('-created_at', '-id').values_list('pk', flat=True))
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def walk(self, url, link):
+        pages = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            pages.append([row['id'] for row in response.data['results']])
+            url = response.data[link]
+        return pages
+
+    def test_values_rows_and_instances_page_the_same(self):
+        for values_list in (True, False):
+            with self.subTest(values_list=values_list), override_settings(API_VALUES_LIST=values_list):
+                pages = self.walk('/api/bills/?page_size=2', 'next')
+                self.assertEqual(pages, [self.expected[:2], self.expected[2:4], self.expected[4:]])
+
+                # And back from the last page
+                response = self.client.get('/api/bills/?page_size=2')
+                last = self.client.get(self.client.get(response.data['next']).data['next'])
+                back = self.walk(last.data['previous'], 'previous')
+                self.assertEqual(back, [self.expected[2:4], self.expected[:2]])
+
+
+class BillExportTests(TestCase):
+    """GET /api/bills/export/ (ExportMixin) writes the JSON list's columns and rows"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='export@example.com', username='export', password='x', first_name='E', last_name='X'
+        )
+        cls.gr = GR.objects.create(gr_number='GR/1', date=datetime.date(2025, 4, 1))
+        other_gr = GR.objects.create(gr_number='GR/2', date=datetime.date(2025, 4, 2))
+        cls.work = Work.objects.create(gr=cls.gr, name_of_work='Road, "phase" ₹', aa=Decimal('1000.00'))
+        other_work = Work.objects.create(gr=other_gr, name_of_work='Bridge', aa=Decimal('10.00'), is_cancelled=True)
+        tenders = []
+        for number, work in enumerate((cls.work, cls.work, other_work)):
+            ts = TechnicalSanction.objects.create(
+                work=work, gst_percentage=Decimal('18.00'),
+                contingency_percentage=Decimal('4.00'), labour_insurance_percentage=Decimal('1.00'),
+            )
+            tenders.append(Tender.objects.create(work=work, technical_sanction=ts, tender_id=f'T-{number}', agency_name='Agency'))
+        cls.tender = tenders[0]
+        Bill.objects.create(
+            tender=tenders[0], bill_number='B-1', date=datetime.date(2025, 6, 30), payment_done_from_gr=other_gr,
+            work_portion=Decimal('12345.67'),
+        )
+        Bill.objects.create(tender=tenders[0], bill_number='B-2', work_portion=Decimal('0.03'))
+        Bill.objects.create(tender=tenders[1], bill_number='B-3', work_portion=Decimal('100'))
+        Bill.objects.create(tender=tenders[2], bill_number='B-4', work_portion=Decimal('5'))
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def export(self, query=''):
+        response = self.client.get(f'/api/bills/export/{query}')
+        self.assertEqual(response.status_code, 200)
+        return response, b''.join(response.streaming_content)
+
+    def json_rows(self, query=''):
+        separator = '&' if query else '?'
+        response = self.client.get(f'/api/bills/{query}{separator}page_size=all')
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def assert_csv_matches_json(self, query=''):
+        response, content = self.export(query)
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertRegex(response['Content-Disposition'], r'^attachment; filename="bills-\d{4}-\d{2}-\d{2}\.csv"$')
+        text = content.decode('utf-8')
+        self.assertTrue(text.startswith('\ufeff'))
+        header, *lines = csv.reader(io.StringIO(text[1:]))
+
+        rows = self.json_rows(query)
+        self.assertEqual(header, list(rows[0]))
+        # CSV cells are the JSON values as text, empty for null
+        self.assertEqual(lines, [['' if value is None else str(value) for value in row.values()] for row in rows])
+        return rows
+
+    def test_csv_matches_json_list(self):
+        rows = self.assert_csv_matches_json()
+        self.assertEqual([row['billNumber'] for row in rows], ['B-4', 'B-3', 'B-2', 'B-1'])
+
+    def test_csv_applies_list_filters(self):
+        for query, numbers in (
+            (f'?gr={self.gr.pk}', {'B-1', 'B-2', 'B-3'}),
+            (f'?work={self.work.pk}', {'B-1', 'B-2', 'B-3'}),
+            (f'?tender={self.tender.pk}', {'B-1', 'B-2'}),
+            (f'?gr={self.gr.pk}&tender={self.tender.pk}', {'B-1', 'B-2'}),
+        ):
+            with self.subTest(query=query):
+                rows = self.assert_csv_matches_json(query)
+                self.assertEqual({row['billNumber'] for row in rows}, numbers)
+
+    def test_csv_applies_sparse_fieldsets(self):
+        rows = self.assert_csv_matches_json('?fields=id,billNumber,workName,netAmount')
+        # Columns keep the serializer's order
+        self.assertEqual(list(rows[0]), ['id', 'workName', 'billNumber', 'netAmount'])
+        rows = self.assert_csv_matches_json('?omit=documentUrl,documentPreviewUrl')
+        self.assertNotIn('documentUrl', rows[0])
+
+    def test_xlsx_cells_are_typed(self):
+        from openpyxl import load_workbook
+
+        fields = '?fields=id,billNumber,billDate,workPortion,workName'
+        response, content = self.export(f'{fields}&file_format=xlsx')
+        self.assertEqual(response['Content-Type'], XLSX_CONTENT_TYPE)
+        sheet = load_workbook(io.BytesIO(content), read_only=True).active
+        header, *lines = [list(row) for row in sheet.iter_rows(values_only=True)]
+        self.assertEqual(header, list(self.json_rows(fields)[0]))
+
+        by_number = {row['billNumber']: row for row in (dict(zip(header, line)) for line in lines)}
+        self.assertEqual(set(by_number), {'B-1', 'B-2', 'B-3', 'B-4'})
+        bill = by_number['B-1']
+        self.assertIsInstance(bill['id'], int)
+        self.assertEqual(bill['billDate'], datetime.datetime(2025, 6, 30))
+        self.assertEqual(bill['workPortion'], 12345.67)
+        self.assertEqual(bill['workName'], 'Road, "phase" ₹')
+
+    def test_unknown_file_format_is_bad_request(self):
+        response = self.client.get('/api/bills/export/?file_format=pdf')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('pdf', response.data['error'])
+
+
+class BillBulkWriteTests(TestCase):
+    """POST / PATCH /api/bills/bulk/ apply Bill.save()'s rules without calling it"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='bulk@example.com', username='bulk', password='x', first_name='B', last_name='U'
+        )
+        cls.gr = GR.objects.create(gr_number='GR/1', date=datetime.date(2025, 4, 1))
+        work = Work.objects.create(gr=cls.gr, name_of_work='Road', aa=Decimal('1000.00'))
+        ts = TechnicalSanction.objects.create(
+            work=work, gst_percentage=Decimal('18.00'),
+            contingency_percentage=Decimal('4.00'), labour_insurance_percentage=Decimal('1.00'),
+        )
+        cls.tender = Tender.objects.create(work=work, technical_sanction=ts, tender_id='T-1', agency_name='Agency')
+        cls.bill = Bill.objects.create(tender=cls.tender, bill_number='B-1', work_portion=Decimal('100'))
+        rebuild_rollups()
+
+    def setUp(self):
+        # GRs marked by setUpTestData, whose transaction never commits
+        rollup_services._pending.rollups = None
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def bulk(self, method, items):
+        with self.captureOnCommitCallbacks(execute=True):
+            return getattr(self.client, method)('/api/bills/bulk/', items, format='json')
+
+    def item(self, bill_number, **fields):
+        """A bill as the form submits it: every input, 0 for the rates that take their defaults"""
+        amounts = [field for field in BILL_INPUT_FIELDS if not field.startswith('override_')]
+        inputs = dict.fromkeys([*amounts, *BILL_PERCENTAGE_FIELDS], '0')
+        return {**inputs, 'tender': self.tender.pk, 'bill_number': bill_number, **fields}
+
+    def assertSameAsSave(self, bill):
+        """The stored amounts are those Bill.save() computes from the same inputs"""
+        stored = {field: getattr(bill, field) for field in (*BILL_CALCULATED_FIELDS, *BILL_PERCENTAGE_FIELDS, 'date')}
+        bill.save()
+        bill.refresh_from_db()
+        self.assertEqual(stored, {field: getattr(bill, field) for field in stored})
+
+    def test_create_computes_amounts_and_override_flags(self):
+        response = self.bulk('post', [
+            self.item('B-2', work_portion='12345.67', royalty_and_testing='0.01', gst_percentage='12.50'),
+            self.item('B-3', work_portion='50.00', tds='3.00'),
+        ])
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual([row['billNumber'] for row in response.data], ['B-2', 'B-3'])
+
+        computed, overridden = Bill.objects.get(bill_number='B-2'), Bill.objects.get(bill_number='B-3')
+        self.assertEqual(computed.date, timezone.now().date())
+        self.assertFalse(computed.override_tds)
+        # A manually entered amount is kept and flagged, an empty rate gets its default
+        self.assertTrue(overridden.override_tds)
+        self.assertEqual(overridden.tds, Decimal('3.00'))
+        self.assertNotEqual(overridden.tds_percentage, 0)
+        for bill in (computed, overridden):
+            self.assertSameAsSave(bill)
+
+        self.assertEqual((computed.gr, computed.work), (self.gr, self.tender.work))
+        self.assertEqual(WorkflowRollup.objects.get(gr=self.gr, is_demo=False).bills, 3)
+        self.assertEqual(find_rollup_drift(), [])
+
+    def test_update_recomputes_amounts(self):
+        response = self.bulk('patch', [{'id': self.bill.pk, 'work_portion': '200.00', 'net_amount': '1.00'}])
+        self.assertEqual(response.status_code, 200, response.data)
+        bill = Bill.objects.get(pk=self.bill.pk)
+        self.assertEqual(bill.work_portion, Decimal('200.00'))
+        self.assertEqual((bill.override_net_amount, bill.net_amount), (True, Decimal('1.00')))
+        self.assertEqual(response.data[0]['billTotal'], str(bill.bill_total))
+        self.assertSameAsSave(bill)
+        self.assertEqual(WorkflowRollup.objects.get(gr=self.gr, is_demo=False).total_expenditure, bill.bill_total)
+
+    def test_an_invalid_item_writes_nothing(self):
+        response = self.bulk('post', [self.item('B-2', work_portion='1'), self.item('B-3', tender=0)])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data[0], {})
+        self.assertIn('tender', response.data[1])
+        self.assertEqual(Bill.objects.count(), 1)
+
+
+class RecalculateBillsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        gr = GR.objects.create(gr_number='GR/1')
+        work = Work.objects.create(gr=gr, name_of_work='Road', aa=Decimal('1000.00'))
+        ts = TechnicalSanction.objects.create(
+            work=work, gst_percentage=Decimal('18.00'),
+            contingency_percentage=Decimal('4.00'), labour_insurance_percentage=Decimal('1.00'),
+        )
+        tender = Tender.objects.create(work=work, technical_sanction=ts, tender_id='T-1', agency_name='Agency')
+        for number in range(5):
+            Bill.objects.create(tender=tender, bill_number=f'B-{number}', work_portion=Decimal('1000.00') * (number + 1))
+        Bill.objects.create(
+            tender=tender, bill_number='B-override', work_portion=Decimal('1000.00'),
+            override_tds=True, tds=Decimal('3.00'),
+        )
+
+    def test_dry_run_lists_changes_without_saving(self):
+        processed, changed, changes = recalculate_bills(percentages={'tds_percentage': Decimal('2.50')}, dry_run=True)
+        self.assertEqual((processed, changed, len(changes)), (6, 6, 6))
+        bill, differences = next(change for change in changes if change[0].bill_number == 'B-0')
+        self.assertEqual(differences['tds'], (Decimal('20.00'), Decimal('25.00')))
+        self.assertEqual(Bill.objects.get(bill_number='B-0').tds, Decimal('20.00'))
+
+    def test_run_saves_in_batches_without_collecting_changes(self):
+        processed, changed, changes = recalculate_bills(percentages={'tds_percentage': Decimal('2.50')}, batch_size=2)
+        self.assertEqual((processed, changed, changes), (6, 6, []))
+        self.assertEqual(Bill.objects.get(bill_number='B-0').tds, Decimal('25.00'))
+        # Overridden amounts are kept
+        self.assertEqual(Bill.objects.get(bill_number='B-override').tds, Decimal('3.00'))
+        self.assertEqual(recalculate_bills(percentages={'tds_percentage': Decimal('2.50')}), (6, 0, []))
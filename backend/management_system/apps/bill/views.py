@@ -5,24 +5,34 @@ from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 from rest_framework.permissions import IsAuthenticated
 from .models import Bill
 from .serializers import BillSerializer
+from apps.previews.services import preview_validators
+from management_system.async_views import AsyncReadMixin
+from management_system.conditional import ConditionalGetMixin
+from management_system.bulk import BulkWriteMixin
+from management_system.exports import ExportMixin
+from management_system.pagination import KeysetCursorPagination
+from management_system.sparse_fields import SparseFieldsetMixin
+from management_system.values_serializer import ValuesListMixin
 
 
-class BillViewSet(viewsets.ModelViewSet):
+class BillViewSet(ConditionalGetMixin, AsyncReadMixin, ExportMixin, BulkWriteMixin, ValuesListMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = Bill.objects.filter(is_demo=False)  # Exclude demo data
     serializer_class = BillSerializer
     parser_classes = [MultiPartParser, FormParser, JSONParser]
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetCursorPagination
+    export_filename = 'bills'
+    conditional_relations = ('tender', 'tender__work', 'payment_done_from_gr')
+    conditional_validators = (preview_validators,)
     
     def get_queryset(self):
         """Return only non-demo bills, ensuring related Tenders, Works, GRs, and Technical Sanctions are not demo
         Supports filtering by: gr, work, tender (multiple filters work together)
         """
+        # effective_is_demo/gr/work are denormalized from the Tender -> Work -> GR chain
+        # (see apps/rollup/ancestors.py), so the filters below need no joins
         queryset = Bill.objects.filter(
-            is_demo=False,
-            tender__is_demo=False,  # Also exclude bills linked to demo tenders
-            tender__work__is_demo=False,  # And ensure the Work is not demo
-            tender__work__gr__is_demo=False,  # And ensure the GR is not demo
-            tender__technical_sanction__is_demo=False  # And ensure the TS is not demo
+            effective_is_demo=False  # Bill, Tender, Work, GR and TS are all non-demo
         ).select_related(
             'tender',
             'tender__work',
@@ -34,30 +44,19 @@ class BillViewSet(viewsets.ModelViewSet):
         # Filter by GR if 'gr' query parameter is provided
         gr_id = self.request.query_params.get('gr', None)
         if gr_id is not None:
-            queryset = queryset.filter(
-                tender__work__gr_id=gr_id,
-                is_demo=False,
-                tender__is_demo=False,
-                tender__work__is_demo=False,
-                tender__work__gr__is_demo=False
-            )
+            queryset = queryset.filter(gr_id=gr_id)
         
         # Filter by work if 'work' query parameter is provided
         work_id = self.request.query_params.get('work', None)
         if work_id is not None:
-            queryset = queryset.filter(
-                tender__work_id=work_id,
-                is_demo=False,
-                tender__is_demo=False,
-                tender__work__is_demo=False
-            )
+            queryset = queryset.filter(work_id=work_id)
         
         # Filter by tender if 'tender' query parameter is provided
         tender_id = self.request.query_params.get('tender', None)
         if tender_id is not None:
-            queryset = queryset.filter(tender_id=tender_id, is_demo=False, tender__is_demo=False)
+            queryset = queryset.filter(tender_id=tender_id)
         
-        return queryset.order_by('-created_at')
+        return self.sparse_queryset(queryset.order_by('-created_at'))
     
     def create(self, request, *args, **kwargs):
         """Create a new bill"""
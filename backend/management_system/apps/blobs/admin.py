@@ -0,0 +1,13 @@
+from django.contrib import admin
+from .models import Blob
+
+@admin.register(Blob)
+class BlobAdmin(admin.ModelAdmin):
+    list_display = ('sha256', 'size', 'ref_count', 'created_at', 'updated_at')
+    list_filter = ('ref_count',)
+    search_fields = ('sha256',)
+    readonly_fields = [field.name for field in Blob._meta.fields]
+
+    def has_add_permission(self, request):
+        # Rows are created by ContentAddressedStorage when a file is stored
+        return False
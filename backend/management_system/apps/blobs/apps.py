@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class BlobsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.blobs'
+
+    def ready(self):
+        # Connect the signal handlers that keep Blob.ref_count up to date
+        from . import signals  # noqa: F401
@@ -0,0 +1,45 @@
+"""
+Django management command to delete media files that no record refers to.
+
+Usage:
+    python manage.py gc_media              # files untouched for 24 hours
+    python manage.py gc_media --hours 72
+    python manage.py gc_media --dry-run    # only report what would be deleted
+
+Recounts the references of the content-addressed blobs (see
+apps/blobs/storage.py), then deletes unreferenced blobs, blob files without a
+row, files stored before content addressing that are no longer attached
+to a GR, bill or tender, and the previews of such documents. Run it
+periodically, e.g. daily from cron.
+"""
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from apps.blobs.services import collect_garbage
+
+
+class Command(BaseCommand):
+    help = 'Delete media files no GR, bill or tender refers to'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--hours',
+            type=int,
+            default=24,
+            help='Only delete files untouched for this many hours (default 24)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report what would be deleted without deleting anything',
+        )
+
+    def handle(self, *args, **options):
+        stats = collect_garbage(default_storage.location, options['hours'], dry_run=options['dry_run'])
+        verb = 'Would delete' if options['dry_run'] else 'Deleted'
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {stats['blobs']} unreferenced blob(s), {stats['orphans']} orphaned blob file(s), "
+            f"{stats['files']} unreferenced older file(s) and {stats['previews']} preview(s), "
+            f"{stats['bytes'] / 1024 / 1024:.1f} MiB in total "
+            f"({stats['recounted']} reference count(s) corrected)."
+        ))
@@ -0,0 +1,28 @@
+from django.db import models
+
+
+class Blob(models.Model):
+    """
+    A stored file's content, kept once under its SHA-256 by
+    ContentAddressedStorage (see apps/blobs/storage.py).
+    ref_count is the number of GR.document, Bill.document and
+    Tender.work_order values pointing at it; gc_media deletes blobs nothing
+    references.
+    """
+    sha256 = models.CharField(max_length=64, primary_key=True)
+    size = models.PositiveBigIntegerField(help_text="Content size in bytes")
+    ref_count = models.PositiveIntegerField(default=0, help_text="Records referencing this content")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, help_text="Last stored or reused")
+
+    class Meta:
+        verbose_name = "Blob"
+        verbose_name_plural = "Blobs"
+        ordering = ['-created_at']
+        indexes = [
+            # gc_media: unreferenced blobs older than the grace period
+            models.Index(fields=['ref_count', 'updated_at'], name='blob_refcount_updated_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.sha256} ({self.ref_count} reference(s))'
@@ -0,0 +1,140 @@
+"""
+Garbage collection of stored media (gc_media)
+
+A file is garbage when no GR.document, Bill.document or Tender.work_order
+refers to it anymore: the record was deleted or got another document. The
+collector
+
+1. recounts the references of every blob, correcting counts left stale by
+   updates that bypass signals
+2. deletes the unreferenced blobs, re-checking the records under a row lock
+   first, so a blob an upload has just reused is kept
+3. deletes blob files without a Blob row and abandoned temporary files
+4. deletes files stored before content addressing (gr_documents/...,
+   Bill documents/...) that no record refers to
+5. deletes the previews of documents no record refers to (apps/previews)
+
+Only files untouched for the grace period are deleted, which keeps the
+files of uploads whose records are still being saved.
+"""
+import os
+from collections import Counter
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from apps.previews.services import PREVIEW_DIR, collect_previews
+from management_system.media import MEDIA_OWNERS
+
+from .models import Blob
+from .storage import BLOB_DIR, INCOMING_DIR, blob_hash, blob_path
+
+
+def referenced_names():
+    """The stored names of all files, once per record referencing them"""
+    names = []
+    for label, file_field, _ in MEDIA_OWNERS:
+        names.extend(
+            apps.get_model(label).objects.exclude(**{f'{file_field}__isnull': True})
+            .exclude(**{file_field: ''}).values_list(file_field, flat=True).iterator()
+        )
+    return names
+
+
+def is_referenced(sha256):
+    prefix = f'{BLOB_DIR}/{sha256}/'
+    return any(
+        apps.get_model(label).objects.filter(**{f'{file_field}__startswith': prefix}).exists()
+        for label, file_field, _ in MEDIA_OWNERS
+    )
+
+
+def _remove(path, stats, dry_run):
+    try:
+        stats['bytes'] += os.path.getsize(path)
+        if not dry_run:
+            os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def collect_garbage(location, hours, dry_run=False):
+    """
+    Delete the media files under `location` no record refers to, see the
+    module docstring. With dry_run nothing is changed.
+
+    Returns:
+        Counter with the number of 'recounted' blobs, deleted 'blobs',
+        'orphans' (blob and temporary files without a row), 'files' stored
+        before content addressing, 'previews', and the 'bytes' freed
+    """
+    cutoff = timezone.now() - timedelta(hours=hours)
+    stats = Counter()
+    names = referenced_names()
+    counts = Counter(sha256 for sha256 in map(blob_hash, names) if sha256)
+
+    # 1. Recount
+    known = set()
+    for sha256, ref_count in Blob.objects.values_list('sha256', 'ref_count').iterator():
+        known.add(sha256)
+        if ref_count != counts[sha256]:
+            stats['recounted'] += 1
+            if not dry_run:
+                Blob.objects.filter(pk=sha256).update(ref_count=counts[sha256])
+
+    # 2. Unreferenced blobs
+    candidates = [
+        sha256 for sha256 in Blob.objects.filter(updated_at__lt=cutoff).values_list('sha256', flat=True)
+        if not counts[sha256]
+    ]
+    for sha256 in candidates:
+        with transaction.atomic():
+            blob = Blob.objects.select_for_update().filter(pk=sha256, updated_at__lt=cutoff).first()
+            if blob is None or is_referenced(sha256):
+                continue
+            _remove(blob_path(location, sha256), stats, dry_run)
+            if not dry_run:
+                blob.delete()
+            stats['blobs'] += 1
+
+    # 3. Blob files without a row, temporary files of interrupted saves
+    blob_root = os.path.join(location, BLOB_DIR)
+    for directory, _, filenames in os.walk(blob_root):
+        in_incoming = os.path.relpath(directory, blob_root).split(os.sep)[0] == INCOMING_DIR
+        for filename in filenames:
+            path = os.path.join(directory, filename)
+            if not in_incoming and (filename in known or counts[filename]):
+                continue
+            if os.path.getmtime(path) < cutoff.timestamp():
+                _remove(path, stats, dry_run)
+                stats['orphans'] += 1
+
+    # 4. Files stored before content addressing
+    referenced = set(names)
+    skip = {
+        os.path.abspath(blob_root),
+        os.path.abspath(os.path.join(location, PREVIEW_DIR)),
+        os.path.abspath(settings.UPLOAD_TEMP_DIR),
+    }
+    for directory, dirnames, filenames in os.walk(location):
+        dirnames[:] = [
+            name for name in dirnames
+            if not name.startswith('.') and os.path.abspath(os.path.join(directory, name)) not in skip
+        ]
+        for filename in filenames:
+            if filename.startswith('.'):
+                continue
+            path = os.path.join(directory, filename)
+            name = os.path.relpath(path, location).replace(os.sep, '/')
+            if name not in referenced and os.path.getmtime(path) < cutoff.timestamp():
+                _remove(path, stats, dry_run)
+                stats['files'] += 1
+
+    # 5. Previews
+    previews, freed = collect_previews(location, referenced, cutoff, dry_run)
+    stats['previews'] += previews
+    stats['bytes'] += freed
+    return stats
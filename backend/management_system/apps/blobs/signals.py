@@ -0,0 +1,87 @@
+"""
+Signal handlers that keep Blob.ref_count in sync with the file fields.
+
+The stored name of each file field is remembered when an instance is loaded;
+a save that changes it moves one reference from the old blob to the new one,
+and a delete drops the reference. Updates that bypass signals (queryset
+update, bulk_update) leave the counts stale until gc_media recounts them, and
+gc_media checks the records themselves before deleting a blob.
+
+document_changed is sent after a save that stored a new file name, e.g. to
+derive previews from the new document.
+"""
+from django.db.models import F
+from django.db.models.signals import post_init, post_save, post_delete
+from django.dispatch import Signal, receiver
+
+from apps.gr.models import GR
+from apps.tender.models import Tender
+from apps.bill.models import Bill
+from .models import Blob
+from .storage import blob_hash
+
+# Model -> file field stored in ContentAddressedStorage
+BLOB_FIELDS = {
+    GR: 'document',
+    Bill: 'document',
+    Tender: 'work_order',
+}
+
+# The field was deferred when the instance was loaded
+UNKNOWN = object()
+
+# Sent with sender=model, instance, name (the new stored name, None when removed)
+document_changed = Signal()
+
+
+def _stored_name(instance, field_name):
+    """
+    The field's name, read without loading a deferred field or wrapping the
+    value in a FieldFile; UNKNOWN if the field was deferred
+    """
+    value = instance.__dict__.get(field_name, UNKNOWN)
+    if value is UNKNOWN:
+        return UNKNOWN
+    return getattr(value, 'name', value) or None
+
+
+def _add_reference(sha256, delta):
+    if not sha256:
+        return
+    blobs = Blob.objects.filter(pk=sha256)
+    if delta < 0:
+        blobs = blobs.filter(ref_count__gt=0)
+    blobs.update(ref_count=F('ref_count') + delta)
+
+
+@receiver(post_init, sender=GR)
+@receiver(post_init, sender=Bill)
+@receiver(post_init, sender=Tender)
+def remember_blob_name(sender, instance, **kwargs):
+    instance._blob_name = _stored_name(instance, BLOB_FIELDS[sender])
+
+
+@receiver(post_save, sender=GR)
+@receiver(post_save, sender=Bill)
+@receiver(post_save, sender=Tender)
+def count_blob_reference(sender, instance, created, update_fields=None, **kwargs):
+    field_name = BLOB_FIELDS[sender]
+    if update_fields is not None and field_name not in update_fields:
+        return
+    old_name = None if created else getattr(instance, '_blob_name', UNKNOWN)
+    new_name = _stored_name(instance, field_name)
+    instance._blob_name = new_name
+    if UNKNOWN in (old_name, new_name) or old_name == new_name:
+        return
+    _add_reference(blob_hash(old_name), -1)
+    _add_reference(blob_hash(new_name), 1)
+    document_changed.send(sender=sender, instance=instance, name=new_name)
+
+
+@receiver(post_delete, sender=GR)
+@receiver(post_delete, sender=Bill)
+@receiver(post_delete, sender=Tender)
+def drop_blob_reference(sender, instance, **kwargs):
+    name = _stored_name(instance, BLOB_FIELDS[sender])
+    if name is not UNKNOWN:
+        _add_reference(blob_hash(name), -1)
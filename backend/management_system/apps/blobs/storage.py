@@ -0,0 +1,163 @@
+"""
+Content-addressed media storage
+
+The same GR PDF is often attached to several bills and tenders, and every
+upload used to become a new copy (gr_document_upload_path even adds a
+timestamp to the name). ContentAddressedStorage stores each distinct content
+once:
+
+- the SHA-256 of an upload is computed while it streams in (see
+  uploadhandlers.py), or while the storage copies it
+- the bytes are kept at blobs/<ab>/<cd>/<sha256>; storing content that is
+  already there only reuses the existing blob
+- the file field gets the name blobs/<sha256>/<name from upload_to>, e.g.
+  blobs/<sha256>/gr_documents/2025/04/scan.pdf, so names keep the field's
+  layout and links and downloads the file name; path() maps it back to the blob
+
+Names stored before (gr_documents/..., Bill documents/...) are served from
+their old location as before. Blob rows reference-count the contents (see
+signals.py), and gc_media deletes the ones no record uses anymore.
+"""
+import hashlib
+import os
+import posixpath
+import re
+import tempfile
+
+from django.core.files import File
+from django.core.files.move import file_move_safe
+from django.core.files.utils import validate_file_name
+from django.utils import timezone
+
+from management_system.media import ProtectedMediaStorage
+
+from .models import Blob
+
+BLOB_DIR = 'blobs'
+BLOB_NAME_RE = re.compile(r'^blobs/(?P<sha256>[0-9a-f]{64})/.+$')
+# Temporary files being hashed, under BLOB_DIR
+INCOMING_DIR = 'incoming'
+BLOCK_SIZE = 64 * 1024
+
+
+def blob_hash(name):
+    """SHA-256 of the blob a stored name points at, None for names stored before"""
+    match = BLOB_NAME_RE.match(name or '')
+    return match['sha256'] if match else None
+
+
+def blob_path(location, sha256):
+    """Where the blob is kept under the storage location"""
+    return os.path.join(location, BLOB_DIR, sha256[:2], sha256[2:4], sha256)
+
+
+def file_sha256(path):
+    hasher = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(BLOCK_SIZE), b''):
+            hasher.update(block)
+    return hasher.hexdigest()
+
+
+class ContentAddressedStorage(ProtectedMediaStorage):
+    """ProtectedMediaStorage keeping each distinct file content once, see the module docstring"""
+
+    def blob_path(self, sha256):
+        return blob_path(self.location, sha256)
+
+    def path(self, name):
+        sha256 = blob_hash(name)
+        if sha256:
+            return self.blob_path(sha256)
+        return super().path(name)
+
+    def delete(self, name):
+        # Blobs may be shared; gc_media deletes them once nothing references them
+        if not blob_hash(name):
+            super().delete(name)
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        validate_file_name(name, allow_relative_path=True)
+        sha256 = self._store(content)
+        return self.blob_name(sha256, name.replace('\\', '/'), max_length)
+
+    def blob_name(self, sha256, name, max_length=None):
+        """The stored name: the blob's prefix and the name upload_to generated, shortened to max_length"""
+        prefix = f'{BLOB_DIR}/{sha256}/'
+        if max_length and len(prefix) + len(name) > max_length:
+            directory, filename = posixpath.split(name)
+            root, ext = os.path.splitext(filename)
+            available = max_length - len(prefix) - len(ext) - (len(directory) + 1 if directory else 0)
+            if available < 1:
+                # No room for the layout: keep the file name only
+                directory, available = '', max_length - len(prefix) - len(ext)
+            name = posixpath.join(directory, root[:max(available, 1)] + ext)
+        return prefix + name
+
+    def _store(self, content):
+        """Store the content's blob unless it exists already; returns its SHA-256"""
+        # Set on uploads by the hashing upload handlers
+        sha256 = getattr(content, 'sha256', None)
+        if sha256 and self._reuse(sha256):
+            return sha256
+
+        if hasattr(content, 'temporary_file_path'):
+            source = content.temporary_file_path()
+            if sha256 is None:
+                sha256 = file_sha256(source)
+                if self._reuse(sha256):
+                    return sha256
+            self._place(sha256, source)
+            return sha256
+
+        # Copy into a temporary file next to the blobs, hashing on the way
+        incoming = os.path.join(self.location, BLOB_DIR, INCOMING_DIR)
+        os.makedirs(incoming, exist_ok=True)
+        hasher = hashlib.sha256()
+        with tempfile.NamedTemporaryFile(dir=incoming, delete=False) as temp:
+            try:
+                if hasattr(content, 'seek'):
+                    content.seek(0)
+                for chunk in content.chunks():
+                    if isinstance(chunk, str):
+                        chunk = chunk.encode()
+                    hasher.update(chunk)
+                    temp.write(chunk)
+            except BaseException:
+                os.remove(temp.name)
+                raise
+        sha256 = hasher.hexdigest()
+        if self._reuse(sha256):
+            os.remove(temp.name)
+        else:
+            self._place(sha256, temp.name)
+        return sha256
+
+    def _reuse(self, sha256):
+        """True if the blob is stored already; touching it keeps gc_media from deleting it now"""
+        if not os.path.exists(self.blob_path(sha256)):
+            return False
+        return Blob.objects.filter(pk=sha256).update(updated_at=timezone.now()) > 0
+
+    def _place(self, sha256, source):
+        path = self.blob_path(sha256)
+        directory = os.path.dirname(path)
+        if self.directory_permissions_mode is not None:
+            # Set the umask so that makedirs() applies the requested mode, like FileSystemStorage
+            old_umask = os.umask(0o777 & ~self.directory_permissions_mode)
+            try:
+                os.makedirs(directory, self.directory_permissions_mode, exist_ok=True)
+            finally:
+                os.umask(old_umask)
+        else:
+            os.makedirs(directory, exist_ok=True)
+
+        # Identical content may be placed concurrently; either copy wins
+        file_move_safe(source, path, allow_overwrite=True)
+        if self.file_permissions_mode is not None:
+            os.chmod(path, self.file_permissions_mode)
+        Blob.objects.update_or_create(sha256=sha256, defaults={'size': os.path.getsize(path)})
@@ -0,0 +1,239 @@
+import datetime
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from apps.bill.models import Bill
+from apps.blobs.models import Blob
+from apps.blobs.services import collect_garbage
+from apps.blobs.storage import blob_hash, blob_path
+from apps.gr.models import GR
+from apps.rollup import services as rollup_services
+from apps.technical_sanction.models import TechnicalSanction
+from apps.tender.models import Tender
+from apps.works.models import Work
+
+
+def sha256(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+class MediaTestCase(TestCase):
+    """Two GRs and a bill to attach documents to, in a temporary MEDIA_ROOT"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.gr = GR.objects.create(gr_number='GR/1', date=datetime.date(2025, 4, 1))
+        cls.other_gr = GR.objects.create(gr_number='GR/2', date=datetime.date(2025, 5, 2))
+        work = Work.objects.create(gr=cls.gr, name_of_work='Road', aa=Decimal('1000.00'))
+        ts = TechnicalSanction.objects.create(
+            work=work, gst_percentage=Decimal('18.00'),
+            contingency_percentage=Decimal('4.00'), labour_insurance_percentage=Decimal('1.00'),
+        )
+        tender = Tender.objects.create(work=work, technical_sanction=ts, tender_id='T-1', agency_name='Agency')
+        cls.bill = Bill.objects.create(tender=tender, bill_number='B-1', work_portion=Decimal('100'))
+
+    def setUp(self):
+        # GRs marked by setUpTestData, whose transaction never commits
+        rollup_services._pending.rollups = None
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        media = override_settings(MEDIA_ROOT=self.media_root, UPLOAD_TEMP_DIR=os.path.join(self.media_root, '.partial'))
+        media.enable()
+        self.addCleanup(media.disable)
+
+    def attach(self, record, filename, data):
+        record.document.save(filename, ContentFile(data), save=True)
+        return record.document.name
+
+    def ref_count(self, data):
+        return Blob.objects.get(pk=sha256(data)).ref_count
+
+    def stored_files(self, directory=''):
+        return sorted(
+            os.path.relpath(os.path.join(path, filename), self.media_root).replace(os.sep, '/')
+            for path, _, filenames in os.walk(os.path.join(self.media_root, directory)) for filename in filenames
+        )
+
+
+class ContentAddressedStorageTests(MediaTestCase):
+    """Identical uploads share one blob (apps/blobs/storage.py); signals.py counts the references"""
+
+    def test_identical_content_is_stored_once(self):
+        data = os.urandom(1000)
+        names = [
+            self.attach(self.gr, 'scan.pdf', data),
+            self.attach(self.other_gr, 'copy.pdf', data),
+            self.attach(self.bill, 'scan.pdf', data),
+        ]
+        digest = sha256(data)
+        # The stored names keep each field's upload_to layout
+        self.assertEqual(names, [
+            f'blobs/{digest}/gr_documents/2025/04/scan.pdf',
+            f'blobs/{digest}/gr_documents/2025/05/copy.pdf',
+            f'blobs/{digest}/' + Bill._meta.get_field('document').generate_filename(self.bill, 'scan.pdf'),
+        ])
+        self.assertEqual(self.stored_files('blobs'), [f'blobs/{digest[:2]}/{digest[2:4]}/{digest}'])
+        for name in names:
+            with self.subTest(name=name):
+                self.assertEqual(blob_hash(name), digest)
+                self.assertEqual(default_storage.path(name), blob_path(self.media_root, digest))
+                with default_storage.open(name) as file:
+                    self.assertEqual(file.read(), data)
+
+        blob = Blob.objects.get()
+        self.assertEqual((blob.sha256, blob.size, blob.ref_count), (digest, 1000, 3))
+
+    def test_reference_counts_follow_saves_replacements_and_deletes(self):
+        first, second = b'first', b'second'
+        first_name = self.attach(self.gr, 'scan.pdf', first)
+        self.attach(self.other_gr, 'scan.pdf', first)
+        self.assertEqual(self.ref_count(first), 2)
+
+        # Another record pointed at the stored name
+        self.bill.document = first_name
+        self.bill.save()
+        self.assertEqual(self.ref_count(first), 3)
+        # Saves that leave the document alone
+        self.bill.bill_number = 'B-1a'
+        self.bill.save()
+        GR.objects.get(pk=self.gr.pk).save()
+        self.assertEqual(self.ref_count(first), 3)
+
+        # Replacing moves the reference
+        self.attach(self.gr, 'scan-v2.pdf', second)
+        self.assertEqual((self.ref_count(first), self.ref_count(second)), (2, 1))
+
+        self.gr.document = None
+        self.gr.save()
+        self.assertEqual(self.ref_count(second), 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.bill.delete()
+        self.assertEqual(self.ref_count(first), 1)
+        # Deleting the last record referencing it loads it from the database first
+        GR.objects.get(pk=self.other_gr.pk).delete()
+        self.assertEqual(self.ref_count(first), 0)
+
+        # Unreferenced blobs stay until gc_media collects them
+        self.assertEqual(len(self.stored_files('blobs')), 2)
+
+    def test_long_names_are_shortened(self):
+        digest = '0' * 64
+        storage = default_storage
+        name = storage.blob_name(digest, 'gr_documents/2025/04/' + 'x' * 300 + '.pdf', max_length=255)
+        self.assertEqual(len(name), 255)
+        self.assertTrue(name.startswith(f'blobs/{digest}/gr_documents/2025/04/xxx'))
+        self.assertTrue(name.endswith('x.pdf'))
+        # Without room for the directories, the file name is kept
+        self.assertEqual(storage.blob_name(digest, 'd' * 300 + '/scan.pdf', max_length=255), f'blobs/{digest}/scan.pdf')
+        self.assertEqual(storage.blob_name(digest, 'gr_documents/scan.pdf', max_length=255), f'blobs/{digest}/gr_documents/scan.pdf')
+
+    def test_names_stored_before_keep_their_location(self):
+        digest = sha256(b'old')
+        # Names from before content addressing, and blob names without the layout
+        self.assertIsNone(blob_hash('gr_documents/2025/04/scan.pdf'))
+        self.assertEqual(blob_hash(f'blobs/{digest}/scan.pdf'), digest)
+        self.assertIsNone(blob_hash(f'blobs/{digest}'))
+
+        path = os.path.join(self.media_root, 'gr_documents', '2024', '01', 'old.pdf')
+        os.makedirs(os.path.dirname(path))
+        with open(path, 'wb') as file:
+            file.write(b'old')
+        self.assertEqual(default_storage.path('gr_documents/2024/01/old.pdf'), path)
+        default_storage.delete('gr_documents/2024/01/old.pdf')
+        self.assertFalse(os.path.exists(path))
+
+        # Blobs may be shared, deleting a blob name keeps the content
+        name = self.attach(self.gr, 'scan.pdf', b'shared')
+        default_storage.delete(name)
+        self.assertTrue(os.path.exists(default_storage.path(name)))
+
+
+class CollectGarbageTests(MediaTestCase):
+    """gc_media (apps/blobs/services.py collect_garbage)"""
+
+    def write(self, name, data, age_hours=0):
+        path = os.path.join(self.media_root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as file:
+            file.write(data)
+        if age_hours:
+            mtime = time.time() - age_hours * 3600
+            os.utime(path, (mtime, mtime))
+        return path
+
+    def age(self, data, hours):
+        Blob.objects.filter(pk=sha256(data)).update(updated_at=timezone.now() - timedelta(hours=hours))
+
+    def test_unreferenced_files_are_deleted_after_the_grace_period(self):
+        referenced, unreferenced, recent = b'referenced', b'unreferenced', b'recent'
+        kept_name = self.attach(self.gr, 'kept.pdf', referenced)
+        self.attach(self.other_gr, 'old.pdf', unreferenced)
+        self.attach(self.other_gr, 'new.pdf', recent)
+        self.other_gr.document = None
+        self.other_gr.save()
+        for data in (referenced, unreferenced):
+            self.age(data, 3)
+        # A count left stale by an update that bypassed the signals
+        Blob.objects.filter(pk=sha256(referenced)).update(ref_count=5)
+
+        orphan = self.write(f'blobs/ab/cd/{"ab" + "0" * 62}', b'orphan', age_hours=3)
+        incoming = self.write('blobs/incoming/tmp123', b'partial', age_hours=3)
+        legacy = self.write('Bill documents/2024/01/old.pdf', b'legacy', age_hours=3)
+        legacy_kept = self.write('Bill documents/2024/01/kept.pdf', b'legacy kept', age_hours=3)
+        legacy_new = self.write('Bill documents/2024/01/new.pdf', b'legacy new')
+        Bill.objects.filter(pk=self.bill.pk).update(document='Bill documents/2024/01/kept.pdf')
+        unreferenced_path = blob_path(self.media_root, sha256(unreferenced))
+
+        before = self.stored_files()
+        stats = collect_garbage(self.media_root, hours=2, dry_run=True)
+        self.assertEqual(
+            (stats['recounted'], stats['blobs'], stats['orphans'], stats['files']), (1, 1, 2, 1)
+        )
+        self.assertEqual(stats['bytes'], len(b'unreferenced') + len(b'orphan') + len(b'partial') + len(b'legacy'))
+        self.assertEqual(self.stored_files(), before)
+        self.assertEqual(self.ref_count(referenced), 5)
+
+        output = io.StringIO()
+        call_command('gc_media', hours=2, stdout=output)
+        self.assertIn('Deleted 1 unreferenced blob(s), 2 orphaned blob file(s), 1 unreferenced older file(s)', output.getvalue())
+        for path in (unreferenced_path, orphan, incoming, legacy):
+            self.assertFalse(os.path.exists(path), path)
+        for path in (default_storage.path(kept_name), blob_path(self.media_root, sha256(recent)), legacy_kept, legacy_new):
+            self.assertTrue(os.path.exists(path), path)
+        self.assertEqual(
+            dict(Blob.objects.values_list('sha256', 'ref_count')), {sha256(referenced): 1, sha256(recent): 0}
+        )
+
+    def test_blob_reused_during_the_grace_period_is_kept(self):
+        data = b'reused'
+        self.attach(self.gr, 'scan.pdf', data)
+        self.gr.document = None
+        self.gr.save()
+        self.age(data, 3)
+        # Uploading the same content again touches the blob before the record is saved
+        default_storage.save('gr_documents/2025/04/again.pdf', ContentFile(data))
+        self.assertEqual(collect_garbage(self.media_root, hours=2)['blobs'], 0)
+        self.assertTrue(Blob.objects.filter(pk=sha256(data)).exists())
+
+    def test_blob_referenced_despite_its_count_is_kept(self):
+        data = b'referenced'
+        name = self.attach(self.gr, 'scan.pdf', data)
+        self.age(data, 3)
+        Blob.objects.filter(pk=sha256(data)).update(ref_count=0)
+        stats = collect_garbage(self.media_root, hours=2)
+        self.assertEqual((stats['recounted'], stats['blobs']), (1, 0))
+        self.assertEqual(self.ref_count(data), 1)
+        self.assertTrue(os.path.exists(default_storage.path(name)))
@@ -0,0 +1,84 @@
+"""
+Synthetic dataset shared by the benchmark management commands
+(benchmark_list_queries, benchmark_renderers). Callers run it inside a
+transaction they roll back.
+"""
+from decimal import Decimal
+
+from django.utils import timezone
+
+from apps.gr.models import GR
+from apps.works.models import Work, Spill
+from apps.technical_sanction.models import TechnicalSanction
+from apps.tender.models import Tender
+from apps.bill.models import Bill
+from apps.rollup.ancestors import sync_all_ancestors
+
+
+def seed_benchmark_data(bill_count, batch_size=5000):
+    """
+    Bulk-create GRs -> Works -> TS -> Tenders -> Bills with ~10% demo rows and
+    ~5% cancelled works; other tables are scaled from the bill count
+    """
+    tender_count = max(bill_count // 5, 1)
+    work_count = max(tender_count // 2, 1)
+    gr_count = max(work_count // 10, 1)
+    today = timezone.now().date()
+
+    grs = GR.objects.bulk_create([
+        GR(gr_number=f'BENCH-GR-{i}', date=today, is_demo=(i % 10 == 0))
+        for i in range(gr_count)
+    ], batch_size=batch_size)
+    works = Work.objects.bulk_create([
+        Work(
+            gr=grs[i % gr_count],
+            date=today,
+            name_of_work=f'Benchmark work {i}',
+            aa=Decimal('1000000'),
+            ra=Decimal('500000'),
+            is_demo=grs[i % gr_count].is_demo,
+            is_cancelled=(i % 20 == 0),
+        )
+        for i in range(work_count)
+    ], batch_size=batch_size)
+    Spill.objects.bulk_create([
+        Spill(work=work, ara=Decimal('1000'), is_demo=work.is_demo)
+        for work in works[::4]
+    ], batch_size=batch_size)
+    sanctions = TechnicalSanction.objects.bulk_create([
+        TechnicalSanction(
+            work=work,
+            work_portion=Decimal('100000'),
+            gst_percentage=Decimal('18.00'),
+            contingency_percentage=Decimal('4.00'),
+            labour_insurance_percentage=Decimal('1.00'),
+            is_demo=work.is_demo,
+        )
+        for work in works
+    ], batch_size=batch_size)
+    tenders = Tender.objects.bulk_create([
+        Tender(
+            work=works[i % work_count],
+            technical_sanction=sanctions[i % work_count],
+            tender_id=f'BENCH-T-{i}',
+            agency_name='Benchmark Agency',
+            date=today,
+            online=True,
+            loa=(i % 3 == 0),
+            is_demo=works[i % work_count].is_demo,
+        )
+        for i in range(tender_count)
+    ], batch_size=batch_size)
+    Bill.objects.bulk_create([
+        Bill(
+            tender=tenders[i % tender_count],
+            bill_number=f'BENCH-B-{i}',
+            date=today,
+            work_portion=Decimal('10000') + i,
+            payment_done_from_gr=grs[0] if i % 2 else None,
+            is_demo=tenders[i % tender_count].is_demo,
+        )
+        for i in range(bill_count)
+    ], batch_size=batch_size)
+    # bulk_create sends no signals - fill the denormalized ancestor columns
+    sync_all_ancestors()
@@ -0,0 +1,80 @@
+"""
+Django management command to compare simplejwt's JWTAuthentication with the
+cached user lookup of CachedJWTAuthentication.
+
+Usage:
+    python manage.py benchmark_auth                  # 200 requests
+    python manage.py benchmark_auth --requests 1000
+
+The command creates a user inside a transaction, authenticates the same
+number of bearer-token requests with each class, reports the database queries
+and time per request, and finally rolls everything back.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.tokens import AccessToken
+
+from authentication.authentication import CachedJWTAuthentication, invalidate_cached_user
+from authentication.models import User
+
+
+class _Rollback(Exception):
+    """Raised to roll back the benchmark user"""
+
+
+class Command(BaseCommand):
+    help = 'Compare DB queries and time per request of JWTAuthentication and CachedJWTAuthentication'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=200,
+            help='Authenticated requests per class (default 200)',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                user = User.objects.create_user(
+                    email='benchmark-auth@example.com',
+                    username='benchmark-auth',
+                    password=None,
+                    is_approved=True,
+                )
+                header = f'Bearer {AccessToken.for_user(user)}'
+                self.stdout.write(self.style.MIGRATE_HEADING(
+                    f"\nAuthenticating {options['requests']} requests"
+                ))
+                for label, authenticator in (
+                    ('JWTAuthentication', JWTAuthentication()),
+                    ('CachedJWTAuthentication', CachedJWTAuthentication()),
+                ):
+                    self.measure(label, authenticator, header, options['requests'])
+                raise _Rollback()
+        except _Rollback:
+            # Nothing was committed, so drop the cached user explicitly
+            invalidate_cached_user(user.pk)
+            self.stdout.write(self.style.SUCCESS('Benchmark finished, benchmark user rolled back.'))
+
+    def measure(self, label, authenticator, header, count):
+        factory = APIRequestFactory()
+        requests = [
+            Request(factory.get('/api/bills/', HTTP_AUTHORIZATION=header))
+            for _ in range(count)
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            for request in requests:
+                authenticator.authenticate(request)
+            elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f'{label:<24} {len(queries) / count:6.2f} queries/request  '
+            f'{elapsed / count * 1e6:8.1f} µs/request  ({len(queries)} queries in total)'
+        )
@@ -0,0 +1,158 @@
+"""
+Django management command to load-test a running server with the parallel
+requests of the dashboard page, e.g. to compare one WSGI worker with one ASGI
+worker (async views, see management_system/async_views.py), or with a single
+endpoint, e.g. to compare runserver with gunicorn (gunicorn.conf.py).
+
+Usage:
+    python manage.py benchmark_concurrency --email admin@example.com
+    python manage.py benchmark_concurrency --email admin@example.com --url http://127.0.0.1:8000 --clients 16 --rounds 20
+    python manage.py benchmark_concurrency --email admin@example.com --path /api/bills/ --rounds 100
+
+Start the server with a single worker first, for example:
+    gunicorn management_system.wsgi -w 1                     # sync views
+    uvicorn management_system.asgi:application --workers 1  # async views
+
+Every client loads the dashboard --rounds times: it sends the dashboard's
+requests (GRs with works and spills, works, tenders, bills and the status
+counts) at once, like the frontend's Promise.all, waits for all of them and
+starts over. With --path the clients send just the given paths instead. The
+command reports loads and requests per second and the latency of single
+requests and of whole loads. The access token is minted locally, so run it
+with the server's SECRET_KEY and database.
+"""
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework_simplejwt.tokens import AccessToken
+
+from authentication.models import User
+
+# Requests the dashboard page sends in parallel (frontend/src/pages/Dashboard.tsx)
+DASHBOARD_PATHS = [
+    '/api/grs/?page_size=all&expand=works.spills',
+    '/api/works/?page_size=all',
+    '/api/tenders/?page_size=all',
+    '/api/bills/?page_size=all',
+    '/api/status/',
+]
+
+
+def _percentiles(samples):
+    """(median, 95th percentile) in milliseconds"""
+    if len(samples) < 2:
+        value = samples[0] * 1000 if samples else 0.0
+        return value, value
+    cuts = statistics.quantiles(samples, n=20)
+    return statistics.median(samples) * 1000, cuts[18] * 1000
+
+
+class Command(BaseCommand):
+    help = "Load-test a running server with the dashboard's parallel requests or single endpoints"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--url',
+            default='http://127.0.0.1:8000',
+            help='Base URL of the server (default http://127.0.0.1:8000)',
+        )
+        parser.add_argument(
+            '--email',
+            required=True,
+            help='Email of the user to send the requests as',
+        )
+        parser.add_argument(
+            '--clients',
+            type=int,
+            default=8,
+            help='Clients loading at the same time (default 8)',
+        )
+        parser.add_argument(
+            '--rounds',
+            type=int,
+            default=10,
+            help='Loads per client (default 10)',
+        )
+        parser.add_argument(
+            '--path',
+            action='append',
+            dest='paths',
+            help="Request this path instead of the dashboard's requests (repeatable, sent in parallel)",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(email=options['email'])
+        except User.DoesNotExist:
+            raise CommandError(f"No user with email {options['email']}")
+        self.base_url = options['url'].rstrip('/')
+        self.headers = {'Authorization': f'Bearer {AccessToken.for_user(user)}'}
+        clients, rounds = options['clients'], options['rounds']
+        self.paths = options['paths'] or DASHBOARD_PATHS
+
+        self.lock = threading.Lock()
+        self.request_times = []
+        self.load_times = []
+        self.errors = 0
+
+        with ThreadPoolExecutor(max_workers=clients * len(self.paths)) as pool:
+            # Warm up: connections, caches, lazy imports
+            self.load(pool)
+            self.request_times.clear()
+            self.load_times.clear()
+            self.errors = 0
+
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f'\n{clients} clients x {rounds} loads '
+                f'({len(self.paths)} parallel requests each) against {self.base_url}'
+            ))
+            started = time.perf_counter()
+            threads = [
+                threading.Thread(target=self.run_client, args=(pool, rounds))
+                for _ in range(clients)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - started
+
+        request_median, request_p95 = _percentiles(self.request_times)
+        load_median, load_p95 = _percentiles(self.load_times)
+        self.stdout.write(
+            f'{len(self.load_times) / elapsed:8.2f} loads/s  '
+            f'{len(self.request_times) / elapsed:8.2f} requests/s  ({elapsed:.2f} s in total)\n'
+            f'request latency:        median {request_median:8.1f} ms  p95 {request_p95:8.1f} ms\n'
+            f'load latency:           median {load_median:8.1f} ms  p95 {load_p95:8.1f} ms'
+        )
+        if self.errors:
+            self.stdout.write(self.style.ERROR(f'{self.errors} requests failed'))
+
+    def run_client(self, pool, rounds):
+        for _ in range(rounds):
+            self.load(pool)
+
+    def load(self, pool):
+        started = time.perf_counter()
+        list(pool.map(self.fetch, self.paths))
+        with self.lock:
+            self.load_times.append(time.perf_counter() - started)
+
+    def fetch(self, path):
+        request = urllib.request.Request(self.base_url + path, headers=self.headers)
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request, timeout=60) as response:
+                response.read()
+            failed = False
+        except (urllib.error.URLError, OSError) as e:
+            failed = True
+            self.stderr.write(f'{path}: {e}')
+        with self.lock:
+            self.request_times.append(time.perf_counter() - started)
+            self.errors += failed
@@ -0,0 +1,105 @@
+"""
+Django management command to inspect the query plans of the list endpoints.
+
+Usage:
+    python manage.py benchmark_list_queries                # seed 100k bills
+    python manage.py benchmark_list_queries --rows 20000
+    python manage.py benchmark_list_queries --analyze      # EXPLAIN ANALYZE (PostgreSQL)
+
+The command seeds a synthetic dataset (GRs -> Works -> TS -> Tenders -> Bills)
+with bulk_create inside a transaction, refreshes planner statistics, prints the
+plan and timing of every list endpoint's first page (the same queryset the
+ViewSets build), and finally rolls everything back - nothing is left behind.
+
+Run it before and after `migrate` to compare plans with and without indexes.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from apps.gr.models import GR
+from apps.works.models import Work
+from apps.tender.models import Tender
+from apps.gr.views import GRViewSet
+from apps.works.views import WorkViewSet, SpillViewSet
+from apps.technical_sanction.views import TechnicalSanctionViewSet
+from apps.tender.views import TenderViewSet
+from apps.bill.views import BillViewSet
+from apps.demo.benchmark_data import seed_benchmark_data
+
+
+class _Rollback(Exception):
+    """Raised to roll back the seeded data"""
+
+
+class Command(BaseCommand):
+    help = 'Seed a synthetic dataset, print query plans for the list endpoints, then roll back'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows',
+            type=int,
+            default=100000,
+            help='Number of bills to seed (other tables are scaled from it, default 100000)',
+        )
+        parser.add_argument(
+            '--analyze',
+            action='store_true',
+            help='Run EXPLAIN ANALYZE instead of EXPLAIN (PostgreSQL only)',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.seed(options['rows'])
+                self.explain_list_queries(options['analyze'])
+                raise _Rollback()
+        except _Rollback:
+            self.stdout.write(self.style.SUCCESS('Benchmark finished, seeded data rolled back.'))
+
+    def seed(self, bill_count):
+        """Seed the shared benchmark dataset (see apps/demo/benchmark_data.py)"""
+        self.stdout.write(f'Seeding {bill_count} bills...')
+        seed_benchmark_data(bill_count)
+
+        # Refresh planner statistics so the plans reflect the seeded sizes
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def explain_list_queries(self, analyze):
+        factory = APIRequestFactory()
+        gr_id = GR.objects.filter(is_demo=False).values_list('id', flat=True).first()
+        work_id = Work.objects.filter(is_demo=False).values_list('id', flat=True).first()
+        tender_id = Tender.objects.filter(is_demo=False).values_list('id', flat=True).first()
+
+        cases = [
+            ('GET /api/grs/', GRViewSet, {}),
+            ('GET /api/works/', WorkViewSet, {}),
+            ('GET /api/works/?gr=', WorkViewSet, {'gr': gr_id}),
+            ('GET /api/spills/', SpillViewSet, {}),
+            ('GET /api/technical-sanctions/', TechnicalSanctionViewSet, {}),
+            ('GET /api/technical-sanctions/?work=', TechnicalSanctionViewSet, {'work': work_id}),
+            ('GET /api/tenders/', TenderViewSet, {}),
+            ('GET /api/tenders/?gr=', TenderViewSet, {'gr': gr_id}),
+            ('GET /api/bills/', BillViewSet, {}),
+            ('GET /api/bills/?gr=', BillViewSet, {'gr': gr_id}),
+            ('GET /api/bills/?tender=', BillViewSet, {'tender': tender_id}),
+        ]
+        explain_options = {'analyze': True} if analyze and connection.vendor == 'postgresql' else {}
+
+        for label, viewset_class, params in cases:
+            view = viewset_class()
+            view.request = Request(factory.get('/', params))
+            view.format_kwarg = None
+            paginator = view.pagination_class()
+            queryset = view.get_queryset().order_by(*paginator.ordering)[:paginator.page_size + 1]
+
+            started = time.perf_counter()
+            list(queryset)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+
+            self.stdout.write(self.style.MIGRATE_HEADING(f'\n{label}  ({elapsed_ms:.1f} ms for first page)'))
+            self.stdout.write(queryset.explain(**explain_options))
@@ -0,0 +1,86 @@
+"""
+Django management command to compare the API response renderers.
+
+Usage:
+    python manage.py benchmark_renderers                 # 10k bills, 5 rounds
+    python manage.py benchmark_renderers --rows 50000 --rounds 3
+
+The command seeds a synthetic dataset inside a transaction, serializes the
+bill list the way GET /api/bills/?page_size=all does, then times DRF's
+JSONRenderer, the orjson renderer and (if msgpack is installed) the
+MessagePack renderer on that payload, and finally rolls everything back.
+"""
+import importlib.util
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from apps.bill.views import BillViewSet
+from apps.demo.benchmark_data import seed_benchmark_data
+from management_system.renderers import ORJSONRenderer, MessagePackRenderer
+
+
+class _Rollback(Exception):
+    """Raised to roll back the seeded data"""
+
+
+class Command(BaseCommand):
+    help = 'Time the JSON/orjson/msgpack renderers on a seeded bill list, then roll back'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows',
+            type=int,
+            default=10000,
+            help='Number of bills to seed (default 10000)',
+        )
+        parser.add_argument(
+            '--rounds',
+            type=int,
+            default=5,
+            help='Renders per renderer, the best time is reported (default 5)',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.stdout.write(f"Seeding {options['rows']} bills...")
+                seed_benchmark_data(options['rows'])
+                data = self.bill_list_data()
+                self.compare_renderers(data, options['rounds'])
+                raise _Rollback()
+        except _Rollback:
+            self.stdout.write(self.style.SUCCESS('Benchmark finished, seeded data rolled back.'))
+
+    def bill_list_data(self):
+        """Serialized bill list, as returned by the list endpoint without pagination"""
+        view = BillViewSet()
+        view.request = Request(APIRequestFactory().get('/api/bills/', {'page_size': 'all'}))
+        view.format_kwarg = None
+        view.action = 'list'
+        return view.get_serializer(view.get_queryset(), many=True).data
+
+    def compare_renderers(self, data, rounds):
+        renderers = [('DRF JSONRenderer', JSONRenderer()), ('ORJSONRenderer', ORJSONRenderer())]
+        if importlib.util.find_spec('msgpack') is not None:
+            renderers.append(('MessagePackRenderer', MessagePackRenderer()))
+        else:
+            self.stdout.write(self.style.WARNING('msgpack is not installed, skipping MessagePackRenderer'))
+
+        self.stdout.write(self.style.MIGRATE_HEADING(f'\nRendering {len(data)} bills ({rounds} rounds)'))
+        baseline = None
+        for label, renderer in renderers:
+            best = None
+            for _ in range(rounds):
+                started = time.perf_counter()
+                body = renderer.render(data, renderer.media_type, {})
+                elapsed = time.perf_counter() - started
+                best = elapsed if best is None else min(best, elapsed)
+            baseline = baseline or best
+            self.stdout.write(
+                f'{label:<22} {best * 1000:8.1f} ms  {len(body) / 1024:9.0f} KiB  x{baseline / best:.1f}'
+            )
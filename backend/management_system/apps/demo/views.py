@@ -7,7 +7,6 @@ from rest_framework.permissions import AllowAny
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 from rest_framework.exceptions import ValidationError
 from decimal import Decimal
-from django.db.models import Q, Exists, OuterRef
 
 # Import models
 from apps.gr.models import GR
@@ -23,14 +22,25 @@ from apps.technical_sanction.serializers import TechnicalSanctionSerializer
 from apps.tender.serializers import TenderSerializer
 from apps.bill.serializers import BillSerializer
 
+from apps.gr.views import GRExpandMixin
+from management_system.sparse_fields import SparseFieldsetMixin
+from management_system.values_serializer import ValuesListMixin
 
-class DemoGRViewSet(viewsets.ModelViewSet):
+from apps.rollup.services import read_rollup_counts, read_rollup_amounts
+from status_views import count_workflow_status, format_workflow_status
+
+
+class DemoGRViewSet(SparseFieldsetMixin, GRExpandMixin, viewsets.ModelViewSet):
     """Demo endpoint for GRs - returns only demo data, allows create/update/delete"""
     queryset = GR.objects.filter(is_demo=True)
     serializer_class = GRSerializer
     permission_classes = [AllowAny]
     parser_classes = [MultiPartParser, FormParser, JSONParser]
     
+    def get_queryset(self):
+        """Return demo GRs, with the works/spills requested through ?expand="""
+        return self.sparse_queryset(self.expand_queryset(GR.objects.filter(is_demo=True)))
+    
     def perform_create(self, serializer):
         """Ensure is_demo=True when creating"""
         serializer.save(is_demo=True)
@@ -40,7 +50,7 @@ class DemoGRViewSet(viewsets.ModelViewSet):
         serializer.save(is_demo=True)
 
 
-class DemoWorkViewSet(viewsets.ModelViewSet):
+class DemoWorkViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     """Demo endpoint for Works - returns only demo data, allows create/update/delete"""
     queryset = Work.objects.filter(is_demo=True).select_related('gr').prefetch_related('spills')
     serializer_class = WorkSerializer
@@ -56,7 +66,7 @@ class DemoWorkViewSet(viewsets.ModelViewSet):
         if gr_id is not None:
             queryset = queryset.filter(gr_id=gr_id, is_demo=True)
         
-        return queryset.order_by('-created_at')
+        return self.sparse_queryset(queryset.order_by('-created_at'))
     
     def perform_create(self, serializer):
         """Ensure is_demo=True and GR is demo when creating"""
@@ -104,7 +114,7 @@ class DemoSpillViewSet(viewsets.ModelViewSet):
         serializer.save(is_demo=True)
 
 
-class DemoTechnicalSanctionViewSet(viewsets.ModelViewSet):
+class DemoTechnicalSanctionViewSet(ValuesListMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     """Demo endpoint for Technical Sanctions - returns only demo data, allows create/update/delete"""
     queryset = TechnicalSanction.objects.filter(is_demo=True)
     serializer_class = TechnicalSanctionSerializer
@@ -126,7 +136,7 @@ class DemoTechnicalSanctionViewSet(viewsets.ModelViewSet):
         if work_id is not None:
             queryset = queryset.filter(work_id=work_id, is_demo=True)
         
-        return queryset.order_by('-created_at')
+        return self.sparse_queryset(queryset.order_by('-created_at'))
     
     def perform_create(self, serializer):
         """Ensure is_demo=True and Work is demo when creating"""
@@ -143,7 +153,7 @@ class DemoTechnicalSanctionViewSet(viewsets.ModelViewSet):
         serializer.save(is_demo=True)
 
 
-class DemoTenderViewSet(viewsets.ModelViewSet):
+class DemoTenderViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     """Demo endpoint for Tenders - returns only demo data, allows create/update/delete"""
     queryset = Tender.objects.filter(is_demo=True)
     serializer_class = TenderSerializer
@@ -171,7 +181,7 @@ class DemoTenderViewSet(viewsets.ModelViewSet):
         if ts_id is not None:
             queryset = queryset.filter(technical_sanction_id=ts_id, is_demo=True)
         
-        return queryset.order_by('-created_at')
+        return self.sparse_queryset(queryset.order_by('-created_at'))
     
     def perform_create(self, serializer):
         """Ensure is_demo=True and related objects are demo when creating"""
@@ -188,7 +198,7 @@ class DemoTenderViewSet(viewsets.ModelViewSet):
         serializer.save(is_demo=True)
 
 
-class DemoBillViewSet(viewsets.ModelViewSet):
+class DemoBillViewSet(ValuesListMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     """Demo endpoint for Bills - returns only demo data, allows create/update/delete"""
     queryset = Bill.objects.filter(is_demo=True)
     serializer_class = BillSerializer
@@ -231,7 +241,7 @@ class DemoBillViewSet(viewsets.ModelViewSet):
         if tender_id is not None:
             queryset = queryset.filter(tender_id=tender_id, is_demo=True, tender__is_demo=True)
         
-        return queryset.order_by('-created_at')
+        return self.sparse_queryset(queryset.order_by('-created_at'))
     
     def perform_create(self, serializer):
         """Ensure is_demo=True and Tender is demo when creating"""
@@ -282,20 +292,27 @@ class DemoDashboardView(generics.GenericAPIView):
             total_tenders = demo_tenders.count()
             total_bills = demo_bills.count()
             
-            # Total RA = sum of all work.RA + sum of all spill.ARA (for non-cancelled demo works only)
-            total_ra = Decimal('0')
-            for work in demo_works:
-                total_ra += work.ra or Decimal('0')
-                # Sum spills for this work (only demo spills)
-                demo_spills = work.spills.filter(is_demo=True)
-                for spill in demo_spills:
-                    total_ra += spill.ara or Decimal('0')
+            # Totals from the per-GR rollups (see apps/rollup), when they are complete
+            amounts = read_rollup_amounts(is_demo=True)
+            if amounts is not None:
+                total_ra = amounts['total_ra']
+                total_aa = amounts['total_aa']
+                total_expenditure = amounts['total_expenditure']
+            else:
+                # Total RA = sum of all work.RA + sum of all spill.ARA (for non-cancelled demo works only)
+                total_ra = Decimal('0')
+                for work in demo_works:
+                    total_ra += work.ra or Decimal('0')
+                    # Sum spills for this work (only demo spills)
+                    demo_spills = work.spills.filter(is_demo=True)
+                    for spill in demo_spills:
+                        total_ra += spill.ara or Decimal('0')
             
-            # Total AA = sum of all work.AA (for non-cancelled demo works only)
-            total_aa = sum(work.aa or Decimal('0') for work in demo_works)
+                # Total AA = sum of all work.AA (for non-cancelled demo works only)
+                total_aa = sum(work.aa or Decimal('0') for work in demo_works)
             
-            # Total Expenditure = sum of all bill.bill_total (for bills linked to non-cancelled works only)
-            total_expenditure = sum(bill.bill_total or Decimal('0') for bill in demo_bills)
+                # Total Expenditure = sum of all bill.bill_total (for bills linked to non-cancelled works only)
+                total_expenditure = sum(bill.bill_total or Decimal('0') for bill in demo_bills)
             
             return Response({
                 'total_grs': total_grs,
@@ -367,8 +384,11 @@ class DemoStatusDashboardView(generics.GenericAPIView):
                     work_filters['gr_id'] = gr_id
                     work_filters['gr__is_demo'] = True
                     ts_filters['work__gr_id'] = gr_id
+                    ts_filters['work__gr__is_demo'] = True
                     tender_filters['work__gr_id'] = gr_id
+                    tender_filters['work__gr__is_demo'] = True
                     bill_filters['tender__work__gr_id'] = gr_id
+                    bill_filters['tender__work__gr__is_demo'] = True
                 except ValueError:
                     return Response({
                         'error': 'Invalid GR ID. Must be an integer.'
@@ -417,133 +437,17 @@ class DemoStatusDashboardView(generics.GenericAPIView):
             if work_id is not None:
                 response_data['work_filter'] = work_id
             
-            # Determine which sections to calculate based on page parameter
-            calculate_overall = page is None
-            calculate_works_status = page is None or page == 'works'
-            calculate_ts_status = page is None or page == 'ts'
-            calculate_tenders_status = page is None
-            calculate_bills_status = page is None
-            
-            # 1. Overall Workflow Counts (only if not page-specific)
-            if calculate_overall:
-                total_grs = GR.objects.filter(**gr_filters).count()
-                active_works = Work.objects.filter(**work_filters).count()
-                technical_sanctions = TechnicalSanction.objects.filter(**ts_filters).count()
-                tenders = Tender.objects.filter(**tender_filters).count()
-                bills = Bill.objects.filter(**bill_filters).count()
-                
-                response_data.update({
-                    "total_grs": total_grs,
-                    "active_works": active_works,
-                    "technical_sanctions": technical_sanctions,
-                    "tenders": tenders,
-                    "bills": bills
-                })
-            
-            # 2. Works Status (grouped by stage)
-            if calculate_works_status:
-                # Get base works queryset
-                works_queryset = Work.objects.filter(**work_filters)
-                
-                # no_ts_yet: Works with 0 TechnicalSanctions
-                works_with_ts = TechnicalSanction.objects.filter(
-                    work=OuterRef('pk'),
-                    **ts_filters
-                )
-                no_ts_yet = works_queryset.annotate(
-                    has_ts=Exists(works_with_ts)
-                ).filter(has_ts=False).count()
-                
-                # ts_created: Works with TechnicalSanctions but no Tenders
-                works_with_tenders = Tender.objects.filter(
-                    work=OuterRef('pk'),
-                    **tender_filters
+            # Read the pre-computed per-GR rollups when possible, otherwise
+            # count the live tables (one aggregate query per model)
+            counts = None
+            if work_id is None:
+                # Without ?gr demo records are counted under every GR, like the live filters do
+                counts = read_rollup_counts(True, gr_id=gr_id, any_gr=gr_id is None)
+            if counts is None:
+                counts = count_workflow_status(
+                    gr_filters, work_filters, ts_filters, tender_filters, bill_filters, page=page
                 )
-                ts_created = works_queryset.annotate(
-                    has_ts=Exists(works_with_ts),
-                    has_tenders=Exists(works_with_tenders)
-                ).filter(has_ts=True, has_tenders=False).count()
-                
-                # tenders_open: Tenders in technical_verification stage or earlier
-                tenders_open = Tender.objects.filter(**tender_filters).filter(
-                    Q(technical_verification=False) | 
-                    Q(technical_verification=True, financial_verification=False)
-                ).count()
-                
-                # tenders_awarded: Tenders with work_order_tick=True
-                tenders_awarded = Tender.objects.filter(
-                    **tender_filters,
-                    work_order_tick=True
-                ).count()
-                
-                # bills_pending: Bills exist but payment not done (payment_done_from_gr is None)
-                bills_pending = Bill.objects.filter(
-                    **bill_filters,
-                    payment_done_from_gr__isnull=True
-                ).count()
-                
-                # completed: Bills with payment_done_from_gr=True (payment_done_from_gr is not None)
-                completed = Bill.objects.filter(
-                    **bill_filters,
-                    payment_done_from_gr__isnull=False
-                ).count()
-                
-                response_data["works_status"] = {
-                    "no_ts_yet": no_ts_yet,
-                    "ts_created": ts_created,
-                    "tenders_open": tenders_open,
-                    "tenders_awarded": tenders_awarded,
-                    "bills_pending": bills_pending,
-                    "completed": completed
-                }
-            
-            # 3. Technical Sanctions Status
-            if calculate_ts_status:
-                ts_queryset = TechnicalSanction.objects.filter(**ts_filters)
-                noting_stage = ts_queryset.filter(noting=True, order=False).count()
-                ordering_stage = ts_queryset.filter(order=True).count()
-                
-                response_data["ts_status"] = {
-                    "noting_stage": noting_stage,
-                    "ordering_stage": ordering_stage
-                }
-            
-            # 4. Tenders Status (only if not page-specific)
-            if calculate_tenders_status:
-                tender_queryset = Tender.objects.filter(**tender_filters)
-                online_pending = tender_queryset.filter(online=False).count()
-                technical_verification = tender_queryset.filter(
-                    technical_verification=True,
-                    financial_verification=False
-                ).count()
-                financial_verification = tender_queryset.filter(
-                    financial_verification=True,
-                    loa=False
-                ).count()
-                loa_issued = tender_queryset.filter(
-                    loa=True,
-                    work_order_tick=False
-                ).count()
-                work_order_issued = tender_queryset.filter(work_order_tick=True).count()
-                
-                response_data["tenders_status"] = {
-                    "online_pending": online_pending,
-                    "technical_verification": technical_verification,
-                    "financial_verification": financial_verification,
-                    "loa_issued": loa_issued,
-                    "work_order_issued": work_order_issued
-                }
-            
-            # 5. Bills Status (only if not page-specific)
-            if calculate_bills_status:
-                bill_queryset = Bill.objects.filter(**bill_filters)
-                pending_payment = bill_queryset.filter(payment_done_from_gr__isnull=True).count()
-                payment_completed = bill_queryset.filter(payment_done_from_gr__isnull=False).count()
-                
-                response_data["bills_status"] = {
-                    "pending_payment": pending_payment,
-                    "payment_completed": payment_completed
-                }
+            response_data.update(format_workflow_status(counts, page=page))
             
             return Response(response_data, status=status.HTTP_200_OK)
             
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-16 23:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gr', '0005_gr_is_demo'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='gr',
+            index=models.Index(fields=['is_demo', '-date', '-id'], name='gr_demo_date_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-17 00:08
+
+import apps.gr.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gr', '0006_gr_gr_demo_date_idx'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='gr',
+            name='document',
+            field=models.FileField(blank=True, help_text='Upload the Government Resolution document (PDF, Word, or image)', max_length=255, null=True, upload_to=apps.gr.models.gr_document_upload_path, verbose_name='GR Document'),
+        ),
+    ]
@@ -1,7 +1,6 @@
 from django.db import models
 from django.utils import timezone
 import os
-from datetime import datetime
 
 def gr_document_upload_path(instance, filename):
     """
@@ -16,21 +15,17 @@ def gr_document_upload_path(instance, filename):
     year = gr_date.strftime('%Y')
     month = gr_date.strftime('%m')
 
-    # Split filename and extension
-    name, ext = os.path.splitext(filename)
-    
-    # Add timestamp if file might already exist
-    timestamp = datetime.now().strftime('%H%M%S')
-    new_filename = f"{name}_{timestamp}{ext}"
-    
     # Generate path: gr_documents/2025/12/filename.pdf
-    return os.path.join('gr_documents', year, month, new_filename)
+    # (no timestamp suffix: the content-addressed storage keeps identical files
+    # once and names every file by its content hash)
+    return os.path.join('gr_documents', year, month, filename)
 
 class GR(models.Model):
     gr_number = models.CharField(max_length=100, unique=True, verbose_name="GR Number")
     date = models.DateField(verbose_name="GR Date", blank=True, null=True)
     document = models.FileField(
         upload_to=gr_document_upload_path,  # Changed from 'gr_documents/%Y/%m/%d/'
+        max_length=255,
         null=True,
         blank=True,
         verbose_name="GR Document",
@@ -44,6 +39,10 @@ class GR(models.Model):
         verbose_name = "Government Resolution"
         verbose_name_plural = "Government Resolutions"
         ordering = ['-date']
+        indexes = [
+            # List endpoint: filter on is_demo, newest first (matches cursor pagination)
+            models.Index(fields=['is_demo', '-date', '-id'], name='gr_demo_date_idx'),
+        ]
     
     def save(self, *args, **kwargs):
         # Auto-fill date with today if not provided
@@ -1,14 +1,17 @@
 from rest_framework import serializers
+from management_system.sparse_fields import DynamicFieldsMixin
 from .models import GR
+from apps.previews.fields import PreviewURLField
 from apps.works.serializers import WorkSerializer 
 from rest_framework.exceptions import ValidationError
 
-class GRSerializer(serializers.ModelSerializer):
+class GRSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     # ✅ Make sure these match your model fields
     grNumber = serializers.CharField(source='gr_number', read_only=True)
     grDate = serializers.DateField(source='date', read_only=True)
     document = serializers.FileField(required=False, allow_null=True)
-    works = WorkSerializer(many=True, read_only=True)
+    documentPreviewUrl = PreviewURLField(source='document')
+    # 'works' is only added when requested with ?expand=works (see get_fields)
     
     # Write fields (snake_case for POST)
     gr_number = serializers.CharField(write_only=True)
@@ -16,9 +19,24 @@ class GRSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = GR
-        fields = ['id', 'grNumber', 'grDate', 'document', 'gr_number', 'date', 'created_at', 'updated_at', 'works']
+        fields = ['id', 'grNumber', 'grDate', 'document', 'documentPreviewUrl', 'gr_number', 'date', 'created_at', 'updated_at']
         read_only_fields = ['id', 'created_at', 'updated_at']
 
+    def get_fields(self):
+        """
+        Add the nested works (and their spills) only when the view asked for them
+        through the 'expand' context, e.g. {'works'} or {'works', 'works.spills'}.
+        The view is responsible for prefetching whatever is expanded.
+        """
+        fields = super().get_fields()
+        expand = self.context.get('expand', ())
+        if 'works' in expand:
+            works = WorkSerializer(many=True, read_only=True)
+            if 'works.spills' not in expand:
+                works.child.fields.pop('spills')
+            fields['works'] = works
+        return fields
+
     def validate_gr_number(self, value):
         """
         Validate that GR number is unique (except when updating the same record)
@@ -1,3 +1,304 @@
-from django.test import TestCase
+import base64
+import datetime
+import os
+import shutil
+import tempfile
+import time
+from decimal import Decimal
+from urllib.parse import quote
 
-# Create your tests here.
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.gr.models import GR
+from apps.rollup import services as rollup_services
+from apps.works.models import Spill, Work
+from authentication.models import User
+from management_system.media import media_signature
+
+
+class DateCursorPaginationTests(TestCase):
+    """Keyset pages of /api/grs/: (date, id) newest first, undated GRs first"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='pages@example.com', username='pages', password='x', first_name='P', last_name='T'
+        )
+        dates = [
+            datetime.date(2025, 1, 5), datetime.date(2025, 3, 1), datetime.date(2025, 3, 1),
+            datetime.date(2024, 12, 31), datetime.date(2025, 2, 14), None, None,
+        ]
+        for number, date in enumerate(dates):
+            gr = GR.objects.create(gr_number=f'GR/{number}', date=datetime.date(2025, 1, 1))
+            # save() fills a missing date, rows imported or updated in bulk can still lack one
+            GR.objects.filter(pk=gr.pk).update(date=date)
+        GR.objects.create(gr_number='Demo', date=datetime.date(2026, 1, 1), is_demo=True)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def expected_ids(self):
+        grs = GR.objects.filter(is_demo=False)
+        return [
+            gr.pk for gr in sorted(grs, key=lambda gr: (gr.date is None, gr.date or datetime.date.min, gr.pk), reverse=True)
+        ]
+
+    def get_page(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def walk(self, url):
+        """Ids of every page, following the next links from url"""
+        pages = []
+        while url:
+            page = self.get_page(url)
+            pages.append([row['id'] for row in page['results']])
+            url = page['next']
+        return pages
+
+    def test_next_links_walk_the_whole_list_in_order(self):
+        pages = self.walk('/api/grs/?page_size=2')
+        self.assertEqual([len(page) for page in pages], [2, 2, 2, 1])
+        self.assertEqual(sum(pages, []), self.expected_ids())
+
+    def test_previous_links_walk_back(self):
+        url, pages = '/api/grs/?page_size=3', []
+        while url:
+            page = self.get_page(url)
+            pages.append(page)
+            url = page['next']
+        self.assertIsNone(pages[0]['previous'])
+
+        back = [[row['id'] for row in pages[-1]['results']]]
+        url = pages[-1]['previous']
+        while url:
+            page = self.get_page(url)
+            back.append([row['id'] for row in page['results']])
+            url = page['previous']
+        self.assertEqual(back[::-1], [[row['id'] for row in page['results']] for page in pages])
+
+    def test_cursor_is_stable_across_inserts(self):
+        expected = self.expected_ids()
+        first = self.get_page('/api/grs/?page_size=3')
+        self.assertEqual([row['id'] for row in first['results']], expected[:3])
+
+        # Rows added in front of and behind the cursor after the first page was read
+        GR.objects.create(gr_number='Newest', date=datetime.date(2026, 1, 1))
+        GR.objects.filter(pk=GR.objects.create(gr_number='Undated', date=datetime.date(2025, 1, 1)).pk).update(date=None)
+        oldest = GR.objects.create(gr_number='Oldest', date=datetime.date(2020, 1, 1))
+
+        # The following pages neither repeat nor skip rows; only the row behind the cursor shows up
+        rest = sum(self.walk(first['next']), [])
+        self.assertEqual(rest, expected[3:] + [oldest.pk])
+
+    def test_page_size_all_returns_the_unpaginated_list(self):
+        response = self.client.get('/api/grs/?page_size=all')
+        self.assertEqual(response.status_code, 200)
+        self.assertIsInstance(response.data, list)
+        self.assertEqual(sorted(row['id'] for row in response.data), sorted(self.expected_ids()))
+
+    def test_invalid_cursor_is_not_found(self):
+        wrong_length = base64.urlsafe_b64encode(b'{"p":["2025-01-01"]}').decode()
+        bad_value = base64.urlsafe_b64encode(b'{"p":["not a date","1"]}').decode()
+        for cursor in ('garbage', wrong_length, bad_value):
+            with self.subTest(cursor=cursor):
+                self.assertEqual(self.client.get(f'/api/grs/?cursor={cursor}').status_code, 404)
+
+
+class GRConditionalGetTests(TestCase):
+    """The ETag of /api/grs/ covers the works and spills expanded into it (GRViewSet.get_conditional_relations)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='etag@example.com', username='etag', password='x', first_name='E', last_name='T'
+        )
+        gr = GR.objects.create(gr_number='GR/1', date=datetime.date(2025, 4, 1))
+        cls.work = Work.objects.create(gr=gr, name_of_work='Road', aa=Decimal('1000.00'))
+        cls.spill = Spill.objects.create(work=cls.work, ara=Decimal('10.00'))
+
+    def setUp(self):
+        # GRs marked by setUpTestData, whose transaction never commits
+        rollup_services._pending.rollups = None
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def etags(self):
+        etags = {}
+        for expand in ('', 'works', 'works.spills'):
+            response = self.client.get(f'/api/grs/?expand={expand}')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(self.client.get(f'/api/grs/?expand={expand}', HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+            etags[expand] = response['ETag']
+        return etags
+
+    def save(self, instance, **fields):
+        for field, value in fields.items():
+            setattr(instance, field, value)
+        with self.captureOnCommitCallbacks(execute=True):
+            instance.save()
+
+    def changed(self, before):
+        after = self.etags()
+        return {expand for expand in before if after[expand] != before[expand]}
+
+    def test_etag_depends_on_expand(self):
+        etags = self.etags()
+        self.assertEqual(len(set(etags.values())), 3)
+
+    def test_only_expanded_edits_change_the_etag(self):
+        etags = self.etags()
+        self.save(self.spill, ara=Decimal('20.00'))
+        self.assertEqual(self.changed(etags), {'works.spills'})
+
+        etags = self.etags()
+        self.save(self.work, name_of_work='Renamed road')
+        self.assertEqual(self.changed(etags), {'works', 'works.spills'})
+
+        etags = self.etags()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.spill.delete()
+        self.assertEqual(self.changed(etags), {'works.spills'})
+
+
+class ProtectedMediaTests(TestCase):
+    """/media/ downloads: signed links, JWT, conditional and range requests (management_system/media.py)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='media@example.com', username='media', password='x', first_name='M', last_name='D'
+        )
+        cls.gr = GR.objects.create(gr_number='GR/1', date=datetime.date(2025, 4, 1))
+        cls.demo_gr = GR.objects.create(gr_number='Demo', date=datetime.date(2025, 4, 1), is_demo=True)
+
+    def setUp(self):
+        # GRs marked by setUpTestData, whose transaction never commits
+        rollup_services._pending.rollups = None
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        media = override_settings(MEDIA_ROOT=self.media_root, MEDIA_SENDFILE='')
+        media.enable()
+        self.addCleanup(media.disable)
+
+        self.data = os.urandom(1000)
+        self.name = self.attach(self.gr, 'Résumé-2025.pdf', self.data)
+        self.url = '/media/' + quote(self.name)
+
+    def attach(self, gr, filename, data):
+        gr.document.save(filename, ContentFile(data), save=True)
+        return gr.document.name
+
+    def bearer(self):
+        return {'HTTP_AUTHORIZATION': f'Bearer {AccessToken.for_user(self.user)}'}
+
+    def content(self, response):
+        return b''.join(response.streaming_content)
+
+    def signed(self, name, expires):
+        return f'/media/{quote(name)}?expires={expires}&signature={media_signature(name, expires)}'
+
+    def test_signed_link_is_accepted(self):
+        response = self.client.get(default_storage.url(self.name))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.content(response), self.data)
+        self.assertEqual(response['Content-Disposition'], "inline; filename*=UTF-8''" + quote('Résumé-2025.pdf'))
+        self.assertEqual(response['Cache-Control'], 'private')
+
+    def test_expired_or_tampered_link_is_rejected(self):
+        expires = int(time.time()) + 3600
+        other = self.attach(GR.objects.create(gr_number='GR/2', date=datetime.date(2025, 4, 2)), 'other.pdf', b'other')
+        for url in (
+            self.signed(self.name, int(time.time()) - 1),
+            self.signed(self.name, expires).replace('signature=', 'signature=x'),
+            self.signed(self.name, expires).replace(f'expires={expires}', f'expires={expires + 1}'),
+            # A signature is only good for the file it was issued for
+            self.signed(other, expires).replace(quote(other), quote(self.name)),
+            self.url,
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 403)
+
+    def test_jwt_and_demo_files(self):
+        response = self.client.get(self.url, **self.bearer())
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.content(response), self.data)
+        self.assertEqual(self.client.get(self.url, HTTP_AUTHORIZATION='Bearer invalid').status_code, 403)
+
+        # Demo records' files are public
+        demo_name = self.attach(self.demo_gr, 'demo.pdf', b'demo')
+        response = self.client.get('/media/' + quote(demo_name))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.content(response), b'demo')
+
+        # Files no record refers to, and paths out of the media directory
+        for url in ('/media/gr_documents/missing.pdf', '/media/../settings.py', '/media/%2e%2e/%2e%2e/etc/passwd'):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url, **self.bearer()).status_code, 404)
+
+    def test_range_requests(self):
+        for header, status, expected, content_range in (
+            ('bytes=100-199', 206, self.data[100:200], 'bytes 100-199/1000'),
+            ('bytes=900-', 206, self.data[900:], 'bytes 900-999/1000'),
+            ('bytes=-10', 206, self.data[-10:], 'bytes 990-999/1000'),
+            ('bytes=990-5000', 206, self.data[990:], 'bytes 990-999/1000'),
+            # Several ranges: the whole file
+            ('bytes=0-1,5-6', 200, self.data, None),
+        ):
+            with self.subTest(range=header):
+                response = self.client.get(self.url, HTTP_RANGE=header, **self.bearer())
+                self.assertEqual(response.status_code, status)
+                self.assertEqual(self.content(response), expected)
+                self.assertEqual(response.get('Content-Range'), content_range)
+                self.assertEqual(response['Content-Length'], str(len(expected)))
+                self.assertEqual(response['Accept-Ranges'], 'bytes')
+
+        for header in ('bytes=1000-', 'bytes=500-100'):
+            with self.subTest(range=header):
+                response = self.client.get(self.url, HTTP_RANGE=header, **self.bearer())
+                self.assertEqual(response.status_code, 416)
+                self.assertEqual(response['Content-Range'], 'bytes */1000')
+
+    def test_if_range(self):
+        full = self.client.get(self.url, **self.bearer())
+        etag, last_modified = full['ETag'], full['Last-Modified']
+        for if_range, status in ((etag, 206), (last_modified, 206), ('"stale"', 200), ('Mon, 01 Jan 2001 00:00:00 GMT', 200)):
+            with self.subTest(if_range=if_range):
+                response = self.client.get(self.url, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE=if_range, **self.bearer())
+                self.assertEqual(response.status_code, status)
+                self.assertEqual(self.content(response), self.data[:10] if status == 206 else self.data)
+
+    def test_if_none_match(self):
+        etag = self.client.get(self.url, **self.bearer())['ETag']
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag, **self.bearer())
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH='"stale"', **self.bearer()).status_code, 200)
+        # Authorization comes first
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 403)
+
+    def test_transfer_is_handed_to_the_proxy(self):
+        blob = os.path.relpath(default_storage.path(self.name), self.media_root)
+        with override_settings(MEDIA_SENDFILE='x-accel-redirect', MEDIA_ACCEL_REDIRECT_PREFIX='/internal/'):
+            response = self.client.get(self.url, **self.bearer())
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Accel-Redirect'], '/internal/' + quote(blob))
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertIn('ETag', response)
+
+        with override_settings(MEDIA_SENDFILE='x-sendfile'):
+            response = self.client.get(self.url, HTTP_RANGE='bytes=0-9', **self.bearer())
+        # The server answers the range itself
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Sendfile'], default_storage.path(self.name))
+        self.assertEqual(response.content, b'')
+
+        with override_settings(MEDIA_SENDFILE='x-sendfile'):
+            self.assertEqual(self.client.get(self.url).status_code, 403)
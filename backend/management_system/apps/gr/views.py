@@ -2,18 +2,77 @@ from rest_framework import viewsets, status
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 from rest_framework.permissions import IsAuthenticated
+from django.db.models import Prefetch
 from .models import GR
+from apps.works.models import Work, Spill
 from .serializers import GRSerializer
+from apps.previews.services import preview_validators
+from management_system.async_views import AsyncReadMixin
+from management_system.conditional import ConditionalGetMixin
+from management_system.pagination import DateCursorPagination
+from management_system.sparse_fields import SparseFieldsetMixin
 
-class GRViewSet(viewsets.ModelViewSet):
+class GRExpandMixin:
+    """
+    Opt-in nesting for GR responses.
+
+    Query Parameters:
+    - expand: Comma-separated paths to nest, 'works' or 'works.spills'
+      (expanding a path also expands its parents)
+
+    Without it GRs are returned flat in a single query. Every expanded path is
+    backed by a Prefetch, so each level costs one extra query in total.
+    """
+    expand_query_param = 'expand'
+
+    def get_expand_prefetches(self):
+        """Expandable paths and the Prefetch backing each of them"""
+        return {
+            'works': Prefetch('works', queryset=Work.objects.all()),
+            'works.spills': Prefetch('works__spills', queryset=Spill.objects.all()),
+        }
+
+    def get_expand(self):
+        """Set of requested paths, including the parents of nested ones"""
+        request = getattr(self, 'request', None)
+        if request is None:
+            return set()
+        allowed = self.get_expand_prefetches()
+        expand = set()
+        for path in request.query_params.get(self.expand_query_param, '').split(','):
+            path = path.strip()
+            if path in allowed:
+                parts = path.split('.')
+                expand.update('.'.join(parts[:depth]) for depth in range(1, len(parts) + 1))
+        return expand
+
+    def expand_queryset(self, queryset):
+        """Prefetch every expanded path, parents first"""
+        prefetches = self.get_expand_prefetches()
+        expand = self.get_expand()
+        return queryset.prefetch_related(*(prefetches[path] for path in prefetches if path in expand))
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['expand'] = self.get_expand()
+        return context
+
+
+class GRViewSet(ConditionalGetMixin, AsyncReadMixin, SparseFieldsetMixin, GRExpandMixin, viewsets.ModelViewSet):
     queryset = GR.objects.filter(is_demo=False)  # Exclude demo data
     serializer_class = GRSerializer
     parser_classes = [MultiPartParser, FormParser, JSONParser]
     permission_classes = [IsAuthenticated]
+    pagination_class = DateCursorPagination
+    conditional_validators = (preview_validators,)
     
     def get_queryset(self):
-        """Return only non-demo GRs"""
-        return GR.objects.filter(is_demo=False).order_by('-date')
+        """Return only non-demo GRs, with the works/spills requested through ?expand="""
+        return self.sparse_queryset(self.expand_queryset(GR.objects.filter(is_demo=False).order_by('-date')))
+
+    def get_conditional_relations(self):
+        """The expanded works/spills"""
+        return [path.replace('.', '__') for path in sorted(self.get_expand())]
     
     def create(self, request, *args, **kwargs):
         """Handle GR creation with file upload"""
@@ -0,0 +1,58 @@
+"""
+Django management command to import GRs, Works, Technical Sanctions, Tenders and Bills.
+
+Usage:
+    python manage.py import_workbook district.xlsx                 # one workbook, a sheet per record type
+    python manage.py import_workbook grs.csv works.csv bills.csv   # CSV files named after their sheet
+    python manage.py import_workbook district.xlsx --dry-run       # only validate
+
+The sheets and columns are described in apps/imports/services.py. Nothing is
+saved unless every row is valid; problems are listed with their sheet and row.
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.imports.services import ImportFileError, WorkbookImport, read_upload
+
+
+class Command(BaseCommand):
+    help = 'Bulk import records from an .xlsx workbook and/or .csv files'
+
+    def add_arguments(self, parser):
+        parser.add_argument('files', nargs='+', help='.xlsx workbooks and/or .csv files to import')
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Validate the files without saving anything',
+        )
+
+    def handle(self, *args, **options):
+        handles = []
+        try:
+            for path in options['files']:
+                try:
+                    handles.append((path, open(path, 'rb')))
+                except OSError as e:
+                    raise CommandError(f'Cannot open {path}: {e.strerror}')
+            sheets = read_upload(handles)
+        except ImportFileError as e:
+            raise CommandError(str(e))
+        finally:
+            for _, handle in handles:
+                handle.close()
+
+        result = WorkbookImport(sheets).run(dry_run=options['dry_run'])
+        for error in result['errors']:
+            location = error['sheet']
+            if error['row'] is not None:
+                location += f' row {error["row"]}'
+            if error['column']:
+                location += f' [{error["column"]}]'
+            self.stdout.write(self.style.WARNING(f'{location}: {error["message"]}'))
+        if result['errors']:
+            raise CommandError(f'{len(result["errors"])} problem(s) found, nothing was imported.')
+
+        counts = ', '.join(f'{count} {sheet}' for sheet, count in result['created'].items())
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING(f'Dry run: would import {counts}. Nothing was saved.'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Imported {counts}.'))
@@ -0,0 +1,470 @@
+"""
+Bulk import of GRs, Works, Technical Sanctions, Tenders and Bills
+
+An upload is one XLSX workbook with a sheet per record type and/or CSV files
+named after the sheet (grs.csv, works.csv, ...). The first row of every sheet
+holds the column names; sheets can be left out.
+
+Sheets and columns (* = required):
+- grs:                 gr_number*, date
+- works:               ref*, gr_number*, name_of_work*, aa*, ra, date
+- technical_sanctions: ref*, work_ref | work_id*, sub_name, work_portion, royalty,
+                       testing, consultancy, gst_percentage, contingency_percentage,
+                       labour_insurance_percentage, noting, noting_date, order, order_date
+- tenders:             tender_id*, agency_name*, ts_ref | technical_sanction_id*,
+                       work_ref | work_id (default: the technical sanction's work),
+                       date, and the checkbox/date columns of the Tender model
+- bills:               tender_id*, bill_number*, payment_done_from_gr, date, and the
+                       amount/percentage input columns of the Bill model
+
+`ref` is a label used only inside the upload, so works and technical sanctions
+can be referenced before they have IDs. GRs and tenders are referenced by their
+gr_number / tender_id, existing works and technical sanctions by ID.
+
+Every row is validated before anything is written: cells are cleaned with the
+model fields, uniqueness and references are checked with one query per sheet
+against in-memory lookup maps, and every problem is reported with its sheet
+and row number. Only an upload without errors is inserted, with bulk_create
+inside one transaction. Derived amounts and checkbox dates are filled in by
+the same model methods save() uses.
+"""
+import csv
+import io
+import os
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
+from django.utils import timezone
+
+from apps.gr.models import GR
+from apps.works.models import Work
+from apps.technical_sanction.models import TechnicalSanction
+from apps.tender.models import Tender
+from apps.bill.models import Bill
+from apps.rollup.ancestors import (
+    sync_bill_ancestors,
+    sync_technical_sanction_ancestors,
+    sync_tender_ancestors,
+)
+from apps.rollup.services import mark_rollups_dirty
+
+SHEETS = ('grs', 'works', 'technical_sanctions', 'tenders', 'bills')
+
+# Model fields read from each sheet (reference columns are handled separately)
+SHEET_FIELDS = {
+    'grs': (GR, ['gr_number', 'date']),
+    'works': (Work, ['name_of_work', 'aa', 'ra', 'date']),
+    'technical_sanctions': (TechnicalSanction, [
+        'sub_name', 'work_portion', 'royalty', 'testing', 'consultancy',
+        'gst_percentage', 'contingency_percentage', 'labour_insurance_percentage',
+        'noting', 'noting_date', 'order', 'order_date',
+    ]),
+    'tenders': (Tender, [
+        'tender_id', 'agency_name', 'date',
+        'online', 'online_date', 'offline', 'offline_date',
+        'technical_verification', 'technical_verification_date',
+        'financial_verification', 'financial_verification_date',
+        'loa', 'loa_date', 'work_order_tick', 'work_order_tick_date',
+        'emd_supporting', 'supporting_date', 'emd_awarded', 'awarded_date',
+    ]),
+    'bills': (Bill, [
+        'bill_number', 'date', 'work_portion', 'royalty_and_testing', 'gst_percentage',
+        'reimbursement_of_insurance', 'tds_percentage', 'gst_on_workportion_percentage',
+        'security_deposit', 'lwc_percentage', 'insurance', 'royalty',
+    ]),
+}
+REFERENCE_COLUMNS = {
+    'grs': [],
+    'works': ['ref', 'gr_number'],
+    'technical_sanctions': ['ref', 'work_ref', 'work_id'],
+    'tenders': ['work_ref', 'work_id', 'ts_ref', 'technical_sanction_id'],
+    # On the bills sheet tender_id is the tender number of the bill's tender
+    'bills': ['tender_id', 'payment_done_from_gr'],
+}
+REQUIRED_COLUMNS = {
+    'grs': ['gr_number'],
+    'works': ['ref', 'gr_number', 'name_of_work', 'aa'],
+    'technical_sanctions': ['ref'],
+    'tenders': ['tender_id', 'agency_name'],
+    'bills': ['tender_id', 'bill_number'],
+}
+
+BOOLEAN_WORDS = {'yes': True, 'y': True, 'no': False, 'n': False}
+
+
+class ImportFileError(Exception):
+    """An uploaded file that cannot be read as a workbook or CSV sheet"""
+
+
+def _normalize(name):
+    return str(name).strip().lower().replace(' ', '_').replace('-', '_')
+
+
+def _is_empty(value):
+    return value is None or (isinstance(value, str) and not value.strip())
+
+
+def read_sheets(name, fileobj):
+    """
+    Read an uploaded file into {sheet name: [(row number, {column: value})]}.
+    XLSX files contribute all their sheets, a CSV file the sheet named after it.
+    """
+    stem, ext = os.path.splitext(os.path.basename(name))
+    ext = ext.lower()
+    if ext == '.xlsx':
+        try:
+            from openpyxl import load_workbook
+        except ImportError:
+            raise ImportFileError('Reading .xlsx files requires the openpyxl package')
+        try:
+            workbook = load_workbook(fileobj, read_only=True, data_only=True)
+        except Exception as e:
+            raise ImportFileError(f'{name}: not a valid .xlsx file ({e})')
+        sheets = {
+            _normalize(sheet.title): _rows(sheet.iter_rows(values_only=True))
+            for sheet in workbook.worksheets
+        }
+        workbook.close()
+        return sheets
+    if ext == '.csv':
+        content = fileobj.read()
+        if isinstance(content, bytes):
+            try:
+                content = content.decode('utf-8-sig')
+            except UnicodeDecodeError:
+                raise ImportFileError(f'{name}: CSV files must be UTF-8 encoded')
+        return {_normalize(stem): _rows(csv.reader(io.StringIO(content)))}
+    raise ImportFileError(f'{name}: unsupported file type, upload .xlsx or .csv files')
+
+
+def read_upload(files):
+    """
+    Merge the sheets of several uploaded files ([(file name, file object)]).
+    Raises ImportFileError if a file cannot be read or a sheet appears twice.
+    """
+    sheets = {}
+    for name, fileobj in files:
+        for sheet, rows in read_sheets(name, fileobj).items():
+            if sheet in sheets:
+                raise ImportFileError(f'{name}: sheet "{sheet}" was already uploaded in another file')
+            sheets[sheet] = rows
+    return sheets
+
+
+def _rows(lines):
+    """Rows as dicts keyed by the normalized header, numbered as in the spreadsheet"""
+    rows = []
+    header = None
+    for number, line in enumerate(lines, start=1):
+        if all(_is_empty(value) for value in line):
+            continue
+        if header is None:
+            header = [_normalize(value) if not _is_empty(value) else '' for value in line]
+            continue
+        line = list(line) + [None] * (len(header) - len(line))
+        rows.append((number, {column: value for column, value in zip(header, line) if column}))
+    return rows
+
+
+def _references(sheet, row):
+    """The non-empty reference columns of a row as strings"""
+    refs = {}
+    for column in REFERENCE_COLUMNS[sheet]:
+        value = row.get(column)
+        if not _is_empty(value):
+            if isinstance(value, float) and value.is_integer():
+                value = int(value)
+            refs[column] = str(value).strip()
+    return refs
+
+
+def _clean(field, value):
+    """Convert a cell to the model field's Python value (raises ValidationError)"""
+    if isinstance(value, str):
+        value = value.strip()
+        if isinstance(field, models.BooleanField):
+            value = BOOLEAN_WORDS.get(value.lower(), value)
+    elif isinstance(value, float):
+        # Spreadsheet numbers arrive as floats; 1234.56 must not become 1234.55999...
+        value = int(value) if value.is_integer() else Decimal(repr(value))
+    return field.clean(value, None)
+
+
+class WorkbookImport:
+    """
+    Validate and insert the rows of the parsed sheets.
+
+    Usage:
+        result = WorkbookImport(sheets).run(dry_run=False)
+    result['errors'] lists {sheet, row, column, message}; when it is empty the
+    rows were inserted (unless dry_run) and result['created'] holds the counts.
+    """
+
+    def __init__(self, sheets):
+        self.sheets = sheets
+        self.errors = []
+        self.today = timezone.now().date()
+
+    def error(self, sheet, row, column, message):
+        self.errors.append({'sheet': sheet, 'row': row, 'column': column, 'message': message})
+
+    def run(self, dry_run=False):
+        for sheet in self.sheets:
+            if sheet not in SHEETS:
+                self.error(sheet, None, None, f'Unknown sheet. Expected one of: {", ".join(SHEETS)}')
+
+        rows = {sheet: self.clean_sheet(sheet) for sheet in SHEETS}
+        grs = self.build_grs(rows['grs'])
+        works = self.build_works(rows['works'])
+        sanctions = self.build_technical_sanctions(rows['technical_sanctions'])
+        tenders = self.build_tenders(rows['tenders'])
+        bills = self.build_bills(rows['bills'])
+
+        created = {
+            'grs': len(grs),
+            'works': len(works),
+            'technical_sanctions': len(sanctions),
+            'tenders': len(tenders),
+            'bills': len(bills),
+        }
+        order = {sheet: index for index, sheet in enumerate(SHEETS)}
+        self.errors.sort(key=lambda error: (order.get(error['sheet'], len(SHEETS)), error['row'] or 0))
+        if self.errors or dry_run:
+            return {'created': created, 'errors': self.errors, 'saved': False}
+
+        with transaction.atomic():
+            GR.objects.bulk_create(grs, batch_size=1000)
+            Work.objects.bulk_create(works, batch_size=1000)
+            TechnicalSanction.objects.bulk_create(sanctions, batch_size=1000)
+            Tender.objects.bulk_create(tenders, batch_size=1000)
+            Bill.objects.bulk_create(bills, batch_size=1000)
+
+            # bulk_create sends no signals - fill the denormalized columns and rollups
+            sync_technical_sanction_ancestors(TechnicalSanction.objects.filter(pk__in=[ts.pk for ts in sanctions]))
+            sync_tender_ancestors(Tender.objects.filter(pk__in=[tender.pk for tender in tenders]))
+            sync_bill_ancestors(Bill.objects.filter(pk__in=[bill.pk for bill in bills]))
+            # Imported GRs get their (possibly empty) rollup rows, as gr_saved() would create them
+            mark_rollups_dirty(
+                {gr.pk for gr in grs}
+                | {work.gr_id for work in works}
+                | {ts.work.gr_id for ts in sanctions}
+                | {tender.work.gr_id for tender in tenders}
+                | {bill.tender.work.gr_id for bill in bills}
+            )
+        return {'created': created, 'errors': [], 'saved': True}
+
+    # Parsing
+
+    def clean_sheet(self, sheet):
+        """
+        Clean every row of a sheet into (row number, field values, reference values),
+        dropping rows with invalid cells
+        """
+        model, field_names = SHEET_FIELDS[sheet]
+        references = REFERENCE_COLUMNS[sheet]
+        required = REQUIRED_COLUMNS[sheet]
+        cleaned = []
+        rows = self.sheets.get(sheet, [])
+        columns = set().union(*(row for _, row in rows))
+        unknown = columns - set(field_names) - set(references)
+        if unknown:
+            self.error(sheet, None, None, f'Unknown column(s): {", ".join(sorted(unknown))}')
+
+        for number, row in rows:
+            values = {}
+            refs = _references(sheet, row)
+            valid = True
+            for column in required:
+                if _is_empty(row.get(column)):
+                    self.error(sheet, number, column, 'This field is required.')
+                    valid = False
+            for name in field_names:
+                value = row.get(name)
+                field = model._meta.get_field(name)
+                if _is_empty(value):
+                    # Some decimal defaults are floats (e.g. 4.00), which the calculations cannot mix with Decimals
+                    if isinstance(field, models.DecimalField) and field.has_default():
+                        values[name] = Decimal(str(field.get_default()))
+                    continue
+                try:
+                    values[name] = _clean(field, value)
+                except ValidationError as e:
+                    self.error(sheet, number, name, ' '.join(e.messages))
+                    valid = False
+            if valid:
+                cleaned.append((number, values, refs))
+        return cleaned
+
+    def check_unique(self, sheet, rows, column, key, existing):
+        """Keep the rows whose `key` is unique in the sheet and not in `existing`"""
+        seen = {}
+        unique = []
+        for row in rows:
+            value = key(row)
+            if value in existing:
+                self.error(sheet, row[0], column, f'"{value}" already exists.')
+            elif value in seen:
+                self.error(sheet, row[0], column, f'"{value}" is also used on row {seen[value]}.')
+            else:
+                seen[value] = row[0]
+                unique.append(row)
+        return unique
+
+    def lookup_ids(self, sheet, number, refs, column, existing):
+        """Resolve an ID column against `existing` ({id: instance}); None if absent"""
+        value = refs.get(column)
+        if value is None:
+            return None
+        try:
+            instance = existing.get(int(value))
+        except ValueError:
+            instance = None
+        if instance is None:
+            self.error(sheet, number, column, f'No record with ID "{value}".')
+        return instance
+
+    @staticmethod
+    def id_references(rows, column):
+        ids = set()
+        for _, _, refs in rows:
+            try:
+                ids.add(int(refs[column]))
+            except (KeyError, ValueError):
+                pass
+        return ids
+
+    # Building the records
+
+    def build_grs(self, rows):
+        referenced = {refs['gr_number'] for _, _, refs in self.all_rows('works') if 'gr_number' in refs}
+        referenced |= {
+            refs['payment_done_from_gr'] for _, _, refs in self.all_rows('bills') if 'payment_done_from_gr' in refs
+        }
+        numbers = {values['gr_number'] for _, values, _ in rows}
+        self.gr_map = {gr.gr_number: gr for gr in GR.objects.filter(gr_number__in=referenced | numbers)}
+
+        grs = []
+        for number, values, _ in self.check_unique(
+            'grs', rows, 'gr_number', lambda row: row[1]['gr_number'], set(self.gr_map)
+        ):
+            gr = GR(**values)
+            if not gr.date:
+                gr.date = self.today
+            self.gr_map[gr.gr_number] = gr
+            grs.append(gr)
+        return grs
+
+    def build_works(self, rows):
+        self.work_refs = {}
+        self.works_by_id = Work.objects.in_bulk(
+            self.id_references(self.all_rows('technical_sanctions'), 'work_id')
+            | self.id_references(self.all_rows('tenders'), 'work_id')
+        )
+        works = []
+        for number, values, refs in self.check_unique('works', rows, 'ref', lambda row: row[2]['ref'], set()):
+            gr = self.gr_map.get(refs['gr_number'])
+            if gr is None:
+                self.error('works', number, 'gr_number', f'Unknown GR "{refs["gr_number"]}".')
+                continue
+            work = Work(gr=gr, **values)
+            if not work.date:
+                work.date = self.today
+            self.work_refs[refs['ref']] = work
+            works.append(work)
+        return works
+
+    def resolve_work(self, sheet, number, refs):
+        if 'work_ref' in refs:
+            work = self.work_refs.get(refs['work_ref'])
+            if work is None:
+                self.error(sheet, number, 'work_ref', f'No work with ref "{refs["work_ref"]}" on the works sheet.')
+            return work
+        return self.lookup_ids(sheet, number, refs, 'work_id', self.works_by_id)
+
+    def build_technical_sanctions(self, rows):
+        self.ts_refs = {}
+        self.ts_by_id = TechnicalSanction.objects.select_related('work').in_bulk(
+            self.id_references(self.all_rows('tenders'), 'technical_sanction_id')
+        )
+        sanctions = []
+        for number, values, refs in self.check_unique(
+            'technical_sanctions', rows, 'ref', lambda row: row[2]['ref'], set()
+        ):
+            if 'work_ref' not in refs and 'work_id' not in refs:
+                self.error('technical_sanctions', number, 'work_ref', 'Either work_ref or work_id is required.')
+                continue
+            work = self.resolve_work('technical_sanctions', number, refs)
+            if work is None:
+                continue
+            sanction = TechnicalSanction(work=work, **values)
+            sanction.fill_checkbox_dates()
+            sanction.recalculate()
+            self.ts_refs[refs['ref']] = sanction
+            sanctions.append(sanction)
+        return sanctions
+
+    def build_tenders(self, rows):
+        numbers = {values['tender_id'] for _, values, _ in rows}
+        referenced = {refs['tender_id'] for _, _, refs in self.all_rows('bills') if 'tender_id' in refs}
+        self.tender_map = {
+            tender.tender_id: tender
+            for tender in Tender.objects.select_related('work').filter(tender_id__in=numbers | referenced)
+        }
+        existing = set(self.tender_map) & numbers
+
+        tenders = []
+        for number, values, refs in self.check_unique(
+            'tenders', rows, 'tender_id', lambda row: row[1]['tender_id'], existing
+        ):
+            if 'ts_ref' in refs:
+                sanction = self.ts_refs.get(refs['ts_ref'])
+                if sanction is None:
+                    self.error('tenders', number, 'ts_ref', f'No technical sanction with ref "{refs["ts_ref"]}".')
+                    continue
+            elif 'technical_sanction_id' in refs:
+                sanction = self.lookup_ids('tenders', number, refs, 'technical_sanction_id', self.ts_by_id)
+                if sanction is None:
+                    continue
+            else:
+                self.error('tenders', number, 'ts_ref', 'Either ts_ref or technical_sanction_id is required.')
+                continue
+
+            work = sanction.work
+            if 'work_ref' in refs or 'work_id' in refs:
+                work = self.resolve_work('tenders', number, refs)
+                if work is None:
+                    continue
+                if not (work is sanction.work or (work.pk is not None and work.pk == sanction.work_id)):
+                    self.error('tenders', number, 'work_ref', 'The technical sanction belongs to another work.')
+                    continue
+
+            tender = Tender(work=work, technical_sanction=sanction, **values)
+            tender.fill_checkbox_dates()
+            self.tender_map[tender.tender_id] = tender
+            tenders.append(tender)
+        return tenders
+
+    def build_bills(self, rows):
+        bills = []
+        for number, values, refs in rows:
+            tender = self.tender_map.get(refs['tender_id'])
+            if tender is None:
+                self.error('bills', number, 'tender_id', f'Unknown tender "{refs["tender_id"]}".')
+                continue
+            payment_gr = None
+            if 'payment_done_from_gr' in refs:
+                payment_gr = self.gr_map.get(refs['payment_done_from_gr'])
+                if payment_gr is None:
+                    self.error('bills', number, 'payment_done_from_gr', f'Unknown GR "{refs["payment_done_from_gr"]}".')
+                    continue
+            bill = Bill(tender=tender, payment_done_from_gr=payment_gr, **values)
+            if not bill.date:
+                bill.date = self.today
+            bill.recalculate()
+            bills.append(bill)
+        return bills
+
+    def all_rows(self, sheet):
+        """Reference values of every row of a sheet, to collect IDs before it is cleaned"""
+        return [(number, {}, _references(sheet, row)) for number, row in self.sheets.get(sheet, [])]
@@ -0,0 +1,192 @@
+import datetime
+import io
+from decimal import Decimal
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from django.utils import timezone
+from openpyxl import Workbook
+from rest_framework.test import APIClient
+
+from apps.bill.models import Bill
+from apps.bill.services import CALCULATED_FIELDS as BILL_CALCULATED_FIELDS
+from apps.gr.models import GR
+from apps.rollup import services as rollup_services
+from apps.rollup.models import WorkflowRollup
+from apps.rollup.services import find_rollup_drift
+from apps.technical_sanction.models import TechnicalSanction
+from apps.technical_sanction.services import CALCULATED_FIELDS as TS_CALCULATED_FIELDS
+from apps.tender.models import Tender
+from apps.works.models import Work
+from authentication.models import User
+
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+
+def workbook(sheets):
+    """An uploaded .xlsx file with a sheet per {title: [header, *rows]}"""
+    book = Workbook()
+    book.remove(book.active)
+    for title, lines in sheets.items():
+        sheet = book.create_sheet(title)
+        for line in lines:
+            sheet.append(line)
+    content = io.BytesIO()
+    book.save(content)
+    return SimpleUploadedFile('import.xlsx', content.getvalue(), content_type=XLSX_CONTENT_TYPE)
+
+
+def valid_sheets():
+    return {
+        'GRs': [
+            ['gr_number', 'date'],
+            ['GR/new', datetime.date(2025, 4, 1)],
+            ['GR/payments', None],
+        ],
+        'Works': [
+            ['ref', 'gr_number', 'name_of_work', 'aa', 'ra'],
+            ['road', 'GR/new', 'Road', 1234.56, None],
+            ['bridge', 'GR/existing', 'Bridge', '99.99', 10],
+        ],
+        'Technical Sanctions': [
+            ['ref', 'work_ref', 'work_portion', 'royalty', 'gst_percentage', 'noting'],
+            ['road-ts', 'road', 5000.10, 12.5, None, 'yes'],
+            ['bridge-ts', 'bridge', '333.33', None, 12, 'no'],
+        ],
+        'Tenders': [
+            ['tender_id', 'agency_name', 'ts_ref', 'online', 'loa'],
+            ['T-road', 'Agency', 'road-ts', 'yes', None],
+            ['T-bridge', 'Agency', 'bridge-ts', None, 'y'],
+        ],
+        'Bills': [
+            ['tender_id', 'bill_number', 'work_portion', 'royalty_and_testing', 'tds_percentage', 'payment_done_from_gr'],
+            ['T-road', 'B-1', 12345.67, 0.01, None, 'GR/payments'],
+            ['T-road', 'B-2', 0.03, None, 2.5, None],
+            ['T-bridge', 'B-3', 100, None, None, None],
+        ],
+    }
+
+
+class WorkbookImportTests(TestCase):
+    """POST /api/import/ (apps/imports WorkbookImport)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='import@example.com', username='import', password='x', first_name='I', last_name='M'
+        )
+        cls.existing_gr = GR.objects.create(gr_number='GR/existing', date=datetime.date(2025, 1, 1))
+
+    def setUp(self):
+        # GRs marked by setUpTestData, whose transaction never commits
+        rollup_services._pending.rollups = None
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def upload(self, sheets, query=''):
+        return self.client.post(f'/api/import/{query}', {'file': workbook(sheets)}, format='multipart')
+
+    def counts(self):
+        return [model.objects.count() for model in (GR, Work, TechnicalSanction, Tender, Bill)]
+
+    def test_multi_sheet_workbook(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.upload(valid_sheets())
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(
+            response.data['created'],
+            {'grs': 2, 'works': 2, 'technical_sanctions': 2, 'tenders': 2, 'bills': 3},
+        )
+
+        bill = Bill.objects.get(bill_number='B-1')
+        self.assertEqual(bill.tender.tender_id, 'T-road')
+        self.assertEqual(bill.tender.technical_sanction.work.gr.gr_number, 'GR/new')
+        self.assertEqual(bill.payment_done_from_gr.gr_number, 'GR/payments')
+        self.assertEqual(bill.work_portion, Decimal('12345.67'))
+        self.assertEqual(Work.objects.get(name_of_work='Bridge').gr, self.existing_gr)
+        self.assertEqual(Work.objects.get(name_of_work='Road').aa, Decimal('1234.56'))
+        # Missing dates and checked boxes are filled in like save() does
+        today = timezone.now().date()
+        self.assertEqual(GR.objects.get(gr_number='GR/payments').date, today)
+        self.assertEqual(TechnicalSanction.objects.get(work__name_of_work='Road').noting_date, today)
+        self.assertEqual(Tender.objects.get(tender_id='T-bridge').loa_date, today)
+
+    def test_derived_amounts_match_save(self):
+        self.assertEqual(self.upload(valid_sheets()).status_code, 201)
+        for model, fields in ((TechnicalSanction, TS_CALCULATED_FIELDS), (Bill, BILL_CALCULATED_FIELDS)):
+            for record in model.objects.all():
+                imported = {field: getattr(record, field) for field in fields}
+                record.save()
+                record.refresh_from_db()
+                with self.subTest(model=model.__name__, pk=record.pk):
+                    self.assertEqual(imported, {field: getattr(record, field) for field in fields})
+
+    def test_ancestors_and_rollups_are_filled(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.upload(valid_sheets()).status_code, 201)
+
+        bill = Bill.objects.get(bill_number='B-3')
+        self.assertEqual((bill.gr, bill.work.name_of_work), (self.existing_gr, 'Bridge'))
+        tender = Tender.objects.get(tender_id='T-road')
+        self.assertEqual(tender.gr.gr_number, 'GR/new')
+        self.assertFalse(Bill.objects.filter(effective_is_demo=True).exists())
+
+        # Every GR of the upload has rollup rows, including one without works
+        for gr_number in ('GR/new', 'GR/payments', 'GR/existing'):
+            self.assertEqual(WorkflowRollup.objects.filter(gr__gr_number=gr_number).count(), 2)
+        self.assertEqual(WorkflowRollup.objects.get(gr=self.existing_gr, is_demo=False).bills, 1)
+        self.assertEqual(find_rollup_drift(), [])
+
+    def test_errors_are_reported_per_row(self):
+        sheets = valid_sheets()
+        sheets['Works'].append(['road', 'GR/new', 'Duplicate ref', 1, None])
+        sheets['Works'].append(['pier', 'GR/unknown', 'Pier', 'lots', None])
+        sheets['Technical Sanctions'].append(['orphan-ts', 'nowhere', 1, None, None, None])
+        sheets['Bills'].append(['T-missing', 'B-4', 1, None, None, None])
+        sheets['Bills'].append(['T-road', None, 1, None, None, None])
+
+        response = self.upload(sheets)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            [(error['sheet'], error['row'], error['column']) for error in response.data['errors']],
+            [
+                ('works', 4, 'ref'),
+                ('works', 5, 'aa'),
+                ('technical_sanctions', 4, 'work_ref'),
+                ('bills', 5, 'tender_id'),
+                ('bills', 6, 'bill_number'),
+            ],
+        )
+        self.assertIn('also used on row 2', response.data['errors'][0]['message'])
+
+    def test_one_bad_row_imports_nothing(self):
+        before = self.counts()
+        sheets = valid_sheets()
+        sheets['Bills'][2][4] = 'not a number'
+        response = self.upload(sheets)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            [(error['sheet'], error['row'], error['column']) for error in response.data['errors']],
+            [('bills', 3, 'tds_percentage')],
+        )
+        self.assertFalse(response.data['saved'])
+        self.assertEqual(self.counts(), before)
+
+    def test_existing_numbers_are_rejected(self):
+        self.assertEqual(self.upload(valid_sheets()).status_code, 201)
+        before = self.counts()
+        response = self.upload(valid_sheets())
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            {(error['sheet'], error['column']) for error in response.data['errors']},
+            {('grs', 'gr_number'), ('tenders', 'tender_id')},
+        )
+        self.assertEqual(self.counts(), before)
+
+    def test_dry_run_validates_without_saving(self):
+        before = self.counts()
+        response = self.upload(valid_sheets(), query='?dry_run=true')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.data['saved'])
+        self.assertEqual(response.data['created']['bills'], 3)
+        self.assertEqual(self.counts(), before)
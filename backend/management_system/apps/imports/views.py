@@ -0,0 +1,45 @@
+# apps/imports/views.py
+from rest_framework import status
+from rest_framework.parsers import MultiPartParser, FormParser
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .services import ImportFileError, WorkbookImport, read_upload
+
+
+class ImportView(APIView):
+    """
+    POST /api/import/
+    Import GRs, Works, Technical Sanctions, Tenders and Bills in bulk.
+
+    Upload one .xlsx workbook and/or .csv files (any form field names); see
+    apps/imports/services.py for the sheets and columns. Nothing is saved
+    unless every row is valid.
+
+    Query Parameters:
+    - dry_run: true to only validate the upload
+    """
+    parser_classes = [MultiPartParser, FormParser]
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        files = [(upload.name, upload) for upload in request.FILES.values()]
+        if not files:
+            return Response(
+                {'error': 'Upload a .xlsx workbook or .csv files'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            sheets = read_upload(files)
+        except ImportFileError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        dry_run = request.query_params.get('dry_run', '').lower() == 'true'
+        result = WorkbookImport(sheets).run(dry_run=dry_run)
+        if result['errors']:
+            return Response(
+                {'error': f'{len(result["errors"])} problem(s) found, nothing was imported', **result},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response(result, status=status.HTTP_200_OK if dry_run else status.HTTP_201_CREATED)
@@ -0,0 +1,22 @@
+from django.contrib import admin
+from django.utils import timezone
+from .models import DocumentPreview
+
+@admin.register(DocumentPreview)
+class DocumentPreviewAdmin(admin.ModelAdmin):
+    list_display = ('document', 'status', 'page_count', 'attempts', 'created_at', 'generated_at')
+    list_filter = ('status',)
+    search_fields = ('document', 'name')
+    readonly_fields = [field.name for field in DocumentPreview._meta.fields]
+    actions = ['regenerate_previews']
+
+    def has_add_permission(self, request):
+        # Rows are queued when a document is uploaded (see apps/previews/signals.py)
+        return False
+
+    def regenerate_previews(self, request, queryset):
+        count = queryset.update(
+            status=DocumentPreview.STATUS_PENDING, attempts=0, last_error='', next_attempt_at=timezone.now()
+        )
+        self.message_user(request, f"{count} preview(s) queued for the preview worker.")
+    regenerate_previews.short_description = "Regenerate selected previews"
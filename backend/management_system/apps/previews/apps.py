@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class PreviewsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.previews'
+
+    def ready(self):
+        # Queue a preview whenever a record gets a new document
+        from . import signals  # noqa: F401
@@ -0,0 +1,51 @@
+from rest_framework import serializers
+
+from .services import generated_previews, preview_name
+
+
+class PreviewURLField(serializers.FileField):
+    """
+    Read-only URL of the preview image of a document field, given as source;
+    null until the preview worker has generated it. A FileField, so the
+    ValuesSerializer list path maps it onto the document column as well.
+
+    Whether a preview was generated is read from DocumentPreview, one query
+    per batch of rows (see prefetch()): a list serializer's rows are looked
+    up together the first time the field renders one of them.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+        # Preview name -> generated, for the documents looked up last
+        self._generated = {}
+
+    def prefetch(self, documents):
+        """Look up the previews of these documents (FieldFiles or stored names) in one query"""
+        names = {preview_name(getattr(document, 'name', document)) for document in documents if document}
+        generated = generated_previews(names)
+        self._generated = {name: name in generated for name in names}
+
+    def _list_documents(self):
+        """The documents of all rows when this field renders the rows of a list serializer, else None"""
+        parent = self.parent
+        if parent is None or not isinstance(parent.parent, serializers.ListSerializer):
+            return None
+        instances = parent.parent.instance
+        if instances is None or isinstance(instances, dict):
+            return None
+        return [self.get_attribute(instance) for instance in instances]
+
+    def to_representation(self, value):
+        if not value:
+            return None
+        name = preview_name(value.name)
+        if name not in self._generated:
+            self.prefetch([*(self._list_documents() or ()), value])
+        if not self._generated.get(name):
+            return None
+        url = value.storage.url(name)
+        request = self.context.get('request', None)
+        if request is not None:
+            return request.build_absolute_uri(url)
+        return url
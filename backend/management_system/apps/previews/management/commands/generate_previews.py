@@ -0,0 +1,93 @@
+"""
+Django management command to generate the queued document previews.
+
+Usage:
+    python manage.py generate_previews                # run as a worker, polling every 5 seconds
+    python manage.py generate_previews --once         # generate everything that is due, then exit
+    python manage.py generate_previews --backfill     # queue previews for documents uploaded before
+    python manage.py generate_previews --interval 30 --batch-size 20
+
+Previews are queued when a document is uploaded; failed ones are retried a
+few times (PREVIEW_MAX_ATTEMPTS, see apps/previews/services.py).
+"""
+import signal
+import time
+
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from apps.previews.services import generate_due_previews, queue_preview
+from management_system.media import MEDIA_OWNERS
+
+
+class Command(BaseCommand):
+    help = 'Generate queued document previews (runs as a polling worker unless --once is given)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Generate all due previews and exit instead of polling',
+        )
+        parser.add_argument(
+            '--backfill',
+            action='store_true',
+            help='First queue previews for all documents that have none',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5,
+            help='Seconds to wait between polls when nothing is queued (default 5)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=10,
+            help='Previews claimed and generated per batch (default 10)',
+        )
+
+    def handle(self, *args, **options):
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        if options['backfill']:
+            self.backfill()
+
+        total_generated = total_failed = 0
+        if not options['once']:
+            self.stdout.write('Preview worker started.')
+        while not self.stopping:
+            # Long-running process: drop database connections past CONN_MAX_AGE
+            close_old_connections()
+            generated, failed = generate_due_previews(batch_size=options['batch_size'])
+            total_generated += generated
+            total_failed += failed
+            if generated or failed:
+                self.stdout.write(f'Generated {generated} preview(s), {failed} failed.')
+                continue
+            if options['once']:
+                break
+            time.sleep(options['interval'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Preview worker stopped: {total_generated} generated, {total_failed} failed.'
+        ))
+
+    def backfill(self):
+        queued = 0
+        for label, file_field, _ in MEDIA_OWNERS:
+            names = (
+                apps.get_model(label).objects.exclude(**{f'{file_field}__isnull': True})
+                .exclude(**{file_field: ''}).values_list(file_field, flat=True).distinct()
+            )
+            for name in names.iterator():
+                queue_preview(name)
+                queued += 1
+        self.stdout.write(f'Checked {queued} document(s) for missing previews.')
+
+    def stop(self, signum, frame):
+        # Finish the current batch, then exit
+        self.stopping = True
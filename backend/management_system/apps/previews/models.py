@@ -0,0 +1,46 @@
+from django.db import models
+from django.utils import timezone
+
+
+class DocumentPreview(models.Model):
+    """
+    A first-page preview image of an uploaded document, generated by the
+    generate_previews worker (see apps/previews/services.py). Documents with
+    the same content share one preview.
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_DONE = 'done'
+    STATUS_UNSUPPORTED = 'unsupported'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_UNSUPPORTED, 'Unsupported'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    name = models.CharField(max_length=255, unique=True, help_text="Stored name of the preview image")
+    document = models.CharField(max_length=255, help_text="Stored name of the document it is made from")
+    status = models.CharField(max_length=12, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    page_count = models.PositiveIntegerField(null=True, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True, default='')
+    next_attempt_at = models.DateTimeField(default=timezone.now, help_text="Earliest time of the next attempt")
+    created_at = models.DateTimeField(auto_now_add=True)
+    generated_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Document Preview"
+        verbose_name_plural = "Document Previews"
+        ordering = ['-created_at']
+        indexes = [
+            # Worker query: pending previews that are due, oldest first
+            models.Index(
+                fields=['next_attempt_at', 'id'],
+                name='preview_pending_due_idx',
+                condition=models.Q(status='pending'),
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.document} ({self.status})'
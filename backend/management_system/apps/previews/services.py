@@ -0,0 +1,240 @@
+"""
+Document previews
+
+The tables only need to show which document was uploaded, not the document
+itself. When a GR, bill or tender gets a new document, queue_preview() adds a
+DocumentPreview row; the generate_previews worker then renders the first page
+into a small JPEG (at most PREVIEW_SIZE pixels on the long side) and records
+the page count:
+
+- PDFs are rendered with poppler's pdftoppm and counted with pdfinfo
+  (poppler-utils, installed in the Docker image); Pillow cannot rasterize PDFs
+- images (JPEG, PNG, TIFF, ...) are opened with Pillow; multi-page TIFFs
+  report their frame count
+- other documents (e.g. Word files) are marked unsupported
+
+Preview images are written next to the documents under MEDIA_ROOT/previews/
+and served by the protected media view with the same access rules as the
+document. Documents with the same content (see apps/blobs) share a preview.
+"""
+import logging
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Count, Max
+from django.utils import timezone
+from PIL import Image, UnidentifiedImageError
+
+from apps.blobs.storage import BLOB_DIR, blob_hash
+from .models import DocumentPreview
+
+logger = logging.getLogger(__name__)
+
+PREVIEW_DIR = 'previews'
+PREVIEW_BLOB_RE = re.compile(r'^previews/[0-9a-f]{2}/[0-9a-f]{2}/(?P<sha256>[0-9a-f]{64})\.jpg$')
+
+
+class PreviewUnsupported(Exception):
+    """The document's format cannot be previewed"""
+
+
+def preview_name(name):
+    """Stored name of the preview image of the document stored as `name`"""
+    sha256 = blob_hash(name)
+    if sha256:
+        return f'{PREVIEW_DIR}/{sha256[:2]}/{sha256[2:4]}/{sha256}.jpg'
+    return f'{PREVIEW_DIR}/{name}.jpg'
+
+
+def preview_document_lookup(name):
+    """
+    (lookup suffix, value) matching the file field of the records whose
+    document a preview was made from, None if `name` is not a preview
+    """
+    match = PREVIEW_BLOB_RE.match(name)
+    if match:
+        return '__startswith', f"{BLOB_DIR}/{match['sha256']}/"
+    if name.startswith(f'{PREVIEW_DIR}/') and name.endswith('.jpg'):
+        return '', name[len(PREVIEW_DIR) + 1:-len('.jpg')]
+    return None
+
+
+def queue_preview(document):
+    """Queue a preview of the stored document unless it has one already"""
+    if not document:
+        return None
+    preview, _ = DocumentPreview.objects.get_or_create(
+        name=preview_name(document), defaults={'document': document}
+    )
+    return preview
+
+
+def generated_previews(names):
+    """The preview names among `names` whose image has been generated, in one query"""
+    return set(
+        DocumentPreview.objects.filter(status=DocumentPreview.STATUS_DONE, name__in=names)
+        .values_list('name', flat=True)
+    )
+
+
+def preview_validators():
+    """
+    Count and latest generation time of the generated previews, which change
+    whenever a preview URL appears (for ConditionalGetMixin.conditional_validators)
+    """
+    return DocumentPreview.objects.filter(status=DocumentPreview.STATUS_DONE).aggregate(
+        previews=Count('pk'), previews_generated=Max('generated_at'),
+    )
+
+
+def _pdf_page(path, size):
+    pdftoppm, pdfinfo = shutil.which('pdftoppm'), shutil.which('pdfinfo')
+    if not pdftoppm or not pdfinfo:
+        raise PreviewUnsupported('PDF previews need pdftoppm and pdfinfo (poppler-utils)')
+    timeout = getattr(settings, 'PREVIEW_TIMEOUT', 60)
+
+    info = subprocess.run([pdfinfo, path], capture_output=True, check=True, timeout=timeout, text=True)
+    match = re.search(r'^Pages:\s+(\d+)', info.stdout, re.MULTILINE)
+    page_count = int(match.group(1)) if match else None
+
+    with tempfile.TemporaryDirectory() as directory:
+        output = os.path.join(directory, 'page')
+        subprocess.run(
+            [pdftoppm, '-f', '1', '-l', '1', '-singlefile', '-scale-to', str(size), '-jpeg', path, output],
+            capture_output=True, check=True, timeout=timeout,
+        )
+        with Image.open(f'{output}.jpg') as image:
+            image.load()
+            return image.copy(), page_count
+
+
+def _image_page(path):
+    try:
+        with Image.open(path) as image:
+            page_count = getattr(image, 'n_frames', 1)
+            image.seek(0)
+            image.load()
+            return image.copy(), page_count
+    except (UnidentifiedImageError, Image.DecompressionBombError) as e:
+        raise PreviewUnsupported(str(e))
+
+
+def render_preview(path, target):
+    """
+    Write the first page of the document at `path` to `target` as a JPEG
+    thumbnail.
+
+    Returns:
+        The document's page count (None if it could not be determined)
+    """
+    size = getattr(settings, 'PREVIEW_SIZE', 400)
+    with open(path, 'rb') as document:
+        is_pdf = document.read(5) == b'%PDF-'
+    image, page_count = _pdf_page(path, size) if is_pdf else _image_page(path)
+
+    image.thumbnail((size, size))
+    if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+        # JPEG has no alpha channel: flatten onto white
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, 'white')
+        background.paste(image, mask=image.getchannel('A'))
+        image = background
+    elif image.mode != 'RGB':
+        image = image.convert('RGB')
+
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    with tempfile.NamedTemporaryFile(dir=os.path.dirname(target), suffix='.jpg', delete=False) as temp:
+        try:
+            image.save(temp, 'JPEG', quality=75, optimize=True)
+        except BaseException:
+            os.remove(temp.name)
+            raise
+    os.chmod(temp.name, 0o644)
+    os.replace(temp.name, target)
+    return page_count
+
+
+def generate_due_previews(batch_size=10):
+    """
+    Generate one batch of due previews. The rows stay locked meanwhile, so
+    several workers can run side by side on PostgreSQL.
+
+    Returns:
+        (generated count, failed count) - 0, 0 when nothing was due
+    """
+    now = timezone.now()
+    max_attempts = getattr(settings, 'PREVIEW_MAX_ATTEMPTS', 3)
+    generated = failed = 0
+    with transaction.atomic():
+        previews = list(
+            DocumentPreview.objects.select_for_update(skip_locked=True)
+            .filter(status=DocumentPreview.STATUS_PENDING, next_attempt_at__lte=now)
+            .order_by('next_attempt_at', 'id')[:batch_size]
+        )
+        for preview in previews:
+            preview.attempts += 1
+            try:
+                preview.page_count = render_preview(
+                    default_storage.path(preview.document), default_storage.path(preview.name)
+                )
+            except PreviewUnsupported as e:
+                failed += 1
+                preview.status = DocumentPreview.STATUS_UNSUPPORTED
+                preview.last_error = str(e)
+            except Exception as e:
+                failed += 1
+                preview.last_error = f'{type(e).__name__}: {e}'
+                if preview.attempts >= max_attempts:
+                    preview.status = DocumentPreview.STATUS_FAILED
+                    logger.error(f'Giving up on preview of {preview.document} after {preview.attempts} attempts: {e}')
+                else:
+                    preview.next_attempt_at = timezone.now() + timedelta(minutes=5 * preview.attempts)
+                    logger.warning(f'Preview of {preview.document} failed (attempt {preview.attempts}), will retry: {e}')
+            else:
+                generated += 1
+                preview.status = DocumentPreview.STATUS_DONE
+                preview.generated_at = timezone.now()
+                preview.last_error = ''
+        if previews:
+            DocumentPreview.objects.bulk_update(
+                previews, ['status', 'page_count', 'attempts', 'last_error', 'next_attempt_at', 'generated_at']
+            )
+    return generated, failed
+
+
+def collect_previews(location, referenced, cutoff, dry_run=False):
+    """
+    Delete the previews queued before `cutoff` of documents no record refers
+    to anymore (see gc_media).
+
+    Args:
+        referenced: set of the stored names all records refer to
+
+    Returns:
+        (previews deleted, bytes freed)
+    """
+    keep = {preview_name(name) for name in referenced}
+    stale = [
+        (pk, name) for pk, name in DocumentPreview.objects.filter(created_at__lt=cutoff)
+        .values_list('pk', 'name').iterator()
+        if name not in keep
+    ]
+    freed = 0
+    for _, name in stale:
+        path = os.path.join(location, name)
+        try:
+            freed += os.path.getsize(path)
+            if not dry_run:
+                os.remove(path)
+        except FileNotFoundError:
+            pass
+    if stale and not dry_run:
+        DocumentPreview.objects.filter(pk__in=[pk for pk, _ in stale]).delete()
+    return len(stale), freed
@@ -0,0 +1,13 @@
+"""
+Signal handlers that queue a preview when a GR, bill or tender gets a new
+document (see apps/previews/services.py).
+"""
+from django.dispatch import receiver
+
+from apps.blobs.signals import document_changed
+from .services import queue_preview
+
+
+@receiver(document_changed)
+def queue_document_preview(sender, instance, name, **kwargs):
+    queue_preview(name)
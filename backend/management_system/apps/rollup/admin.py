@@ -0,0 +1,13 @@
+from django.contrib import admin
+from .models import WorkflowRollup
+
+@admin.register(WorkflowRollup)
+class WorkflowRollupAdmin(admin.ModelAdmin):
+    list_display = ('gr', 'is_demo', 'active_works', 'technical_sanctions', 'tenders', 'bills', 'total_expenditure', 'updated_at')
+    list_filter = ('is_demo',)
+    search_fields = ('gr__gr_number',)
+    readonly_fields = [field.name for field in WorkflowRollup._meta.fields]
+
+    def has_add_permission(self, request):
+        # Rows are maintained automatically (see apps/rollup/signals.py)
+        return False
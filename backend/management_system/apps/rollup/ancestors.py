@@ -0,0 +1,136 @@
+"""
+Maintenance of the denormalized ancestor columns on TechnicalSanction, Tender and Bill
+
+Each of those tables carries copies of the ids and flags of the records above it
+(gr, work, effective_is_demo, effective_is_cancelled), so the list endpoints can
+filter on a single table instead of joining Bill -> Tender -> Work -> GR.
+
+The sync_* helpers recompute the columns of a whole queryset with one UPDATE,
+always from the real FK chain (never from other denormalized columns), so they
+can be applied in any order. cascade_ancestor_change() is called by the signal
+handlers in apps/rollup/signals.py after a record is saved.
+
+Call the sync_* helpers (or cascade_bulk_change()) yourself after
+queryset.update()/bulk_create()/bulk_update() on any table of the chain, which
+do not send the model signals.
+"""
+from django.db.models import BooleanField, Exists, ExpressionWrapper, OuterRef, Q, Subquery
+
+from apps.gr.models import GR
+from apps.works.models import Work
+from apps.technical_sanction.models import TechnicalSanction
+from apps.tender.models import Tender
+from apps.bill.models import Bill
+
+
+def _any(condition):
+    return ExpressionWrapper(condition, output_field=BooleanField())
+
+
+def sync_technical_sanction_ancestors(queryset):
+    """Recompute gr / effective_* on the given technical sanctions"""
+    works = Work.objects.filter(pk=OuterRef('work_id'))
+    return queryset.update(
+        gr=Subquery(works.values('gr_id')[:1]),
+        effective_is_demo=_any(
+            Q(is_demo=True) | Exists(works.filter(Q(is_demo=True) | Q(gr__is_demo=True)))
+        ),
+        effective_is_cancelled=Exists(works.filter(is_cancelled=True)),
+    )
+
+
+def sync_tender_ancestors(queryset):
+    """Recompute gr / effective_* on the given tenders"""
+    works = Work.objects.filter(pk=OuterRef('work_id'))
+    return queryset.update(
+        gr=Subquery(works.values('gr_id')[:1]),
+        effective_is_demo=_any(
+            Q(is_demo=True)
+            | Exists(works.filter(Q(is_demo=True) | Q(gr__is_demo=True)))
+            | Exists(TechnicalSanction.objects.filter(pk=OuterRef('technical_sanction_id'), is_demo=True))
+        ),
+        effective_is_cancelled=Exists(works.filter(is_cancelled=True)),
+    )
+
+
+def sync_bill_ancestors(queryset):
+    """Recompute work / gr / effective_* on the given bills"""
+    tenders = Tender.objects.filter(pk=OuterRef('tender_id'))
+    return queryset.update(
+        work=Subquery(tenders.values('work_id')[:1]),
+        gr=Subquery(tenders.values('work__gr_id')[:1]),
+        effective_is_demo=_any(
+            Q(is_demo=True)
+            | Exists(tenders.filter(
+                Q(is_demo=True)
+                | Q(work__is_demo=True)
+                | Q(work__gr__is_demo=True)
+                | Q(technical_sanction__is_demo=True)
+            ))
+        ),
+        effective_is_cancelled=Exists(tenders.filter(work__is_cancelled=True)),
+    )
+
+
+def sync_all_ancestors():
+    """Recompute the denormalized columns of every row (backfills, bulk loads)"""
+    sync_technical_sanction_ancestors(TechnicalSanction.objects.all())
+    sync_tender_ancestors(Tender.objects.all())
+    sync_bill_ancestors(Bill.objects.all())
+
+
+def cascade_ancestor_change(instance, created=False):
+    """
+    Refresh the denormalized columns affected by saving `instance`: its own
+    (for TS/Tender/Bill) and those of every record below it.
+    A newly created record has no descendants yet.
+    """
+    if isinstance(instance, Bill):
+        sync_bill_ancestors(Bill.objects.filter(pk=instance.pk))
+        return
+
+    if isinstance(instance, Tender):
+        sync_tender_ancestors(Tender.objects.filter(pk=instance.pk))
+        if not created:
+            sync_bill_ancestors(Bill.objects.filter(tender_id=instance.pk))
+        return
+
+    if isinstance(instance, TechnicalSanction):
+        sync_technical_sanction_ancestors(TechnicalSanction.objects.filter(pk=instance.pk))
+        if not created:
+            sync_tender_ancestors(Tender.objects.filter(technical_sanction_id=instance.pk))
+            sync_bill_ancestors(Bill.objects.filter(tender__technical_sanction_id=instance.pk))
+        return
+
+    if created:
+        return
+
+    if isinstance(instance, Work):
+        sync_technical_sanction_ancestors(TechnicalSanction.objects.filter(work_id=instance.pk))
+        sync_tender_ancestors(Tender.objects.filter(work_id=instance.pk))
+        sync_bill_ancestors(Bill.objects.filter(tender__work_id=instance.pk))
+    elif isinstance(instance, GR):
+        sync_technical_sanction_ancestors(TechnicalSanction.objects.filter(work__gr_id=instance.pk))
+        sync_tender_ancestors(Tender.objects.filter(work__gr_id=instance.pk))
+        sync_bill_ancestors(Bill.objects.filter(tender__work__gr_id=instance.pk))
+
+
+def cascade_bulk_change(model, pks, created=False):
+    """
+    cascade_ancestor_change() for many rows of one model at once, after
+    bulk_create()/bulk_update() (with one UPDATE per affected table)
+    """
+    pks = list(pks)
+    if not pks:
+        return
+    if model is Bill:
+        sync_bill_ancestors(Bill.objects.filter(pk__in=pks))
+    elif model is Tender:
+        sync_tender_ancestors(Tender.objects.filter(pk__in=pks))
+        if not created:
+            sync_bill_ancestors(Bill.objects.filter(tender_id__in=pks))
+    elif model is TechnicalSanction:
+        sync_technical_sanction_ancestors(TechnicalSanction.objects.filter(pk__in=pks))
+        if not created:
+            sync_tender_ancestors(Tender.objects.filter(technical_sanction_id__in=pks))
+            sync_bill_ancestors(Bill.objects.filter(tender__technical_sanction_id__in=pks))
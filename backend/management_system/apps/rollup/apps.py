@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class RollupConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.rollup'
+
+    def ready(self):
+        # Connect the signal handlers that keep WorkflowRollup up to date
+        from . import signals  # noqa: F401
@@ -0,0 +1,2 @@
+# Management commands for rollup app
+
@@ -0,0 +1,51 @@
+"""
+Django management command to recompute the workflow rollup table.
+
+Usage:
+    python manage.py rebuild_rollups              # recompute every GR
+    python manage.py rebuild_rollups --gr 3 7     # recompute selected GRs
+    python manage.py rebuild_rollups --check      # only report drift, exit 1 if any
+
+Rollups are normally kept up to date by signal handlers; run this after
+deploying the rollup app, after raw SQL changes, or to verify drift.
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.rollup.services import rebuild_rollups, find_rollup_drift
+
+
+class Command(BaseCommand):
+    help = 'Recompute WorkflowRollup rows from the workflow tables (or check them for drift)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--gr',
+            type=int,
+            nargs='+',
+            help='Only process the given GR IDs',
+        )
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Compare stored rollups with the live tables without writing; exits with status 1 on drift',
+        )
+
+    def handle(self, *args, **options):
+        gr_ids = options['gr']
+
+        if options['check']:
+            drift = find_rollup_drift(gr_ids)
+            if not drift:
+                self.stdout.write(self.style.SUCCESS('Rollups are up to date.'))
+                return
+            for gr_id, is_demo, differences in drift:
+                mode = 'demo' if is_demo else 'live'
+                details = ', '.join(
+                    f'{field}: {stored} -> {actual}' for field, (stored, actual) in differences.items()
+                )
+                self.stdout.write(self.style.WARNING(f'GR {gr_id} ({mode}): {details}'))
+            raise CommandError(f'{len(drift)} rollup row(s) out of date. Run without --check to rebuild.')
+
+        self.stdout.write('Rebuilding workflow rollups...')
+        rebuild_rollups(gr_ids)
+        self.stdout.write(self.style.SUCCESS('Workflow rollups rebuilt successfully!'))
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.7 on 2026-10-16 23:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('gr', '0005_gr_is_demo'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WorkflowRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('is_demo', models.BooleanField(default=False, help_text='Counts cover demo records when set, non-demo records otherwise', verbose_name='Is Demo')),
+                ('active_works', models.PositiveIntegerField(default=0)),
+                ('technical_sanctions', models.PositiveIntegerField(default=0)),
+                ('tenders', models.PositiveIntegerField(default=0)),
+                ('bills', models.PositiveIntegerField(default=0)),
+                ('no_ts_yet', models.PositiveIntegerField(default=0)),
+                ('ts_created', models.PositiveIntegerField(default=0)),
+                ('tenders_open', models.PositiveIntegerField(default=0)),
+                ('noting_stage', models.PositiveIntegerField(default=0)),
+                ('ordering_stage', models.PositiveIntegerField(default=0)),
+                ('online_pending', models.PositiveIntegerField(default=0)),
+                ('technical_verification', models.PositiveIntegerField(default=0)),
+                ('financial_verification', models.PositiveIntegerField(default=0)),
+                ('loa_issued', models.PositiveIntegerField(default=0)),
+                ('work_order_issued', models.PositiveIntegerField(default=0)),
+                ('pending_payment', models.PositiveIntegerField(default=0)),
+                ('payment_completed', models.PositiveIntegerField(default=0)),
+                ('total_aa', models.DecimalField(decimal_places=2, default=0, max_digits=18, verbose_name='Total AA')),
+                ('total_ra', models.DecimalField(decimal_places=2, default=0, max_digits=18, verbose_name='Total RA (incl. spills)')),
+                ('total_expenditure', models.DecimalField(decimal_places=2, default=0, max_digits=18, verbose_name='Total Expenditure')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('gr', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='workflow_rollups', to='gr.gr')),
+            ],
+            options={
+                'verbose_name': 'Workflow Rollup',
+                'verbose_name_plural': 'Workflow Rollups',
+                'unique_together': {('gr', 'is_demo')},
+            },
+        ),
+    ]
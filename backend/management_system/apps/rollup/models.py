@@ -0,0 +1,68 @@
+from django.db import models
+from apps.gr.models import GR
+
+
+class WorkflowRollup(models.Model):
+    """
+    Pre-computed workflow counts and sums for one GR, per demo mode.
+
+    Count fields are named after the keys of the status dashboard response
+    (see status_views.py). Rows are refreshed by the signal handlers in
+    apps/rollup/signals.py and can be rebuilt with `manage.py rebuild_rollups`.
+    """
+    # Fields summed by the status dashboards
+    COUNT_FIELDS = (
+        'active_works', 'technical_sanctions', 'tenders', 'bills',
+        'no_ts_yet', 'ts_created', 'tenders_open',
+        'noting_stage', 'ordering_stage',
+        'online_pending', 'technical_verification', 'financial_verification',
+        'loa_issued', 'work_order_issued',
+        'pending_payment', 'payment_completed',
+    )
+    # Fields summed by the demo dashboard
+    AMOUNT_FIELDS = ('total_aa', 'total_ra', 'total_expenditure')
+
+    gr = models.ForeignKey(GR, on_delete=models.CASCADE, related_name='workflow_rollups')
+    is_demo = models.BooleanField(default=False, verbose_name="Is Demo", help_text="Counts cover demo records when set, non-demo records otherwise")
+
+    # Overall counts (non-cancelled works only)
+    active_works = models.PositiveIntegerField(default=0)
+    technical_sanctions = models.PositiveIntegerField(default=0)
+    tenders = models.PositiveIntegerField(default=0)
+    bills = models.PositiveIntegerField(default=0)
+
+    # Works by stage
+    no_ts_yet = models.PositiveIntegerField(default=0)
+    ts_created = models.PositiveIntegerField(default=0)
+    tenders_open = models.PositiveIntegerField(default=0)
+
+    # Technical sanctions by stage
+    noting_stage = models.PositiveIntegerField(default=0)
+    ordering_stage = models.PositiveIntegerField(default=0)
+
+    # Tenders by stage
+    online_pending = models.PositiveIntegerField(default=0)
+    technical_verification = models.PositiveIntegerField(default=0)
+    financial_verification = models.PositiveIntegerField(default=0)
+    loa_issued = models.PositiveIntegerField(default=0)
+    work_order_issued = models.PositiveIntegerField(default=0)
+
+    # Bills by payment status
+    pending_payment = models.PositiveIntegerField(default=0)
+    payment_completed = models.PositiveIntegerField(default=0)
+
+    # Amounts
+    total_aa = models.DecimalField(max_digits=18, decimal_places=2, default=0, verbose_name="Total AA")
+    total_ra = models.DecimalField(max_digits=18, decimal_places=2, default=0, verbose_name="Total RA (incl. spills)")
+    total_expenditure = models.DecimalField(max_digits=18, decimal_places=2, default=0, verbose_name="Total Expenditure")
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Workflow Rollup"
+        verbose_name_plural = "Workflow Rollups"
+        unique_together = ('gr', 'is_demo')
+
+    def __str__(self):
+        mode = 'demo' if self.is_demo else 'live'
+        return f"Rollup for GR {self.gr_id} ({mode})"
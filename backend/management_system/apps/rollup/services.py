@@ -0,0 +1,253 @@
+"""
+Maintenance and read helpers for WorkflowRollup
+"""
+import threading
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from apps.gr.models import GR
+from apps.works.models import Work, Spill
+from apps.technical_sanction.models import TechnicalSanction
+from apps.tender.models import Tender
+from apps.bill.models import Bill
+from .models import WorkflowRollup
+
+# (GR id, demo mode) pairs touched in the current transaction with the rollup
+# parts to recompute for each, refreshed once on commit
+_pending = threading.local()
+
+# Parts of a rollup row that can be recomputed on their own, named after the
+# model whose query fills them (see compute_rollup)
+ROLLUP_PARTS = frozenset({'works', 'technical_sanctions', 'tenders', 'bills'})
+_MODEL_PARTS = {
+    Work: 'works',
+    TechnicalSanction: 'technical_sanctions',
+    Tender: 'tenders',
+    Bill: 'bills',
+}
+
+
+def compute_rollup(gr_id, is_demo, parts=ROLLUP_PARTS):
+    """
+    Compute the rollup field values for one GR and demo mode from the live tables.
+
+    Only the fields of the given parts are returned: 'works' (work counts and
+    AA/RA totals, which also depend on the GR's TS, tenders and spills),
+    'technical_sanctions', 'tenders' and 'bills' (bill counts and expenditure).
+    """
+    from status_views import workflow_status_aggregates
+
+    # Same filters as the status dashboards, scoped to one GR
+    work_filters = {'is_demo': is_demo, 'is_cancelled': False, 'gr_id': gr_id}
+    ts_filters = {
+        'is_demo': is_demo,
+        'work__is_demo': is_demo,
+        'work__is_cancelled': False,
+        'work__gr_id': gr_id,
+    }
+    tender_filters = {
+        'is_demo': is_demo,
+        'work__is_demo': is_demo,
+        'work__is_cancelled': False,
+        'technical_sanction__is_demo': is_demo,
+        'work__gr_id': gr_id,
+    }
+    bill_filters = {
+        'is_demo': is_demo,
+        'tender__is_demo': is_demo,
+        'tender__work__is_demo': is_demo,
+        'tender__work__is_cancelled': False,
+        'tender__technical_sanction__is_demo': is_demo,
+        'tender__work__gr_id': gr_id,
+    }
+
+    zero = Decimal('0')
+    values = {}
+    for model, filters, aggregates in workflow_status_aggregates(
+        None, work_filters, ts_filters, tender_filters, bill_filters
+    ):
+        if _MODEL_PARTS[model] not in parts:
+            continue
+        if model is Work:
+            # AA/RA totals ride along with the work counts
+            aggregates = dict(aggregates, total_aa=Coalesce(Sum('aa'), zero), total_ra=Coalesce(Sum('ra'), zero))
+        counts = model.objects.filter(**filters).aggregate(**aggregates)
+        values.update({
+            field: value for field, value in counts.items()
+            if field in WorkflowRollup.COUNT_FIELDS or field in WorkflowRollup.AMOUNT_FIELDS
+        })
+
+    # Amounts, matching the demo dashboard totals
+    if 'works' in parts:
+        values['total_ra'] += Spill.objects.filter(
+            is_demo=is_demo,
+            work__is_demo=is_demo,
+            work__is_cancelled=False,
+            work__gr_id=gr_id,
+        ).aggregate(total=Coalesce(Sum('ara'), zero))['total']
+    if 'bills' in parts:
+        values['total_expenditure'] = Bill.objects.filter(
+            is_demo=is_demo,
+            tender__is_demo=is_demo,
+            tender__work__is_demo=is_demo,
+            tender__work__is_cancelled=False,
+            tender__work__gr_id=gr_id,
+        ).aggregate(total=Coalesce(Sum('bill_total'), zero))['total']
+
+    # Rounded to the column's 2 decimal places so drift checks compare like with like
+    cents = Decimal('0.01')
+    for field in WorkflowRollup.AMOUNT_FIELDS:
+        if field in values:
+            values[field] = Decimal(values[field]).quantize(cents)
+    return values
+
+
+def refresh_rollups(gr_ids, modes=(False, True), parts=ROLLUP_PARTS):
+    """Recompute the given parts of the rollup rows of the given GRs and demo modes"""
+    _refresh({(gr_id, is_demo): set(parts) for gr_id in gr_ids for is_demo in modes})
+
+
+def _refresh(dirty):
+    gr_ids = {gr_id for gr_id, is_demo in dirty}
+    existing = set(GR.objects.filter(id__in=gr_ids).values_list('id', flat=True))
+    # GRs deleted in the meantime - their rows are removed by the FK cascade,
+    # this only catches rows left behind by raw deletes
+    if gr_ids - existing:
+        WorkflowRollup.objects.filter(gr_id__in=gr_ids - existing).delete()
+
+    for (gr_id, is_demo), parts in sorted(dirty.items()):
+        if gr_id not in existing:
+            continue
+        with transaction.atomic():
+            values = compute_rollup(gr_id, is_demo, parts)
+            updated = WorkflowRollup.objects.filter(gr_id=gr_id, is_demo=is_demo).update(
+                updated_at=timezone.now(), **values
+            )
+            if not updated:
+                # No row yet (new GR or rows removed by hand): create it whole
+                if parts != ROLLUP_PARTS:
+                    values = compute_rollup(gr_id, is_demo)
+                WorkflowRollup.objects.update_or_create(gr_id=gr_id, is_demo=is_demo, defaults=values)
+
+
+def mark_rollups_dirty(gr_ids, modes=(False, True), parts=ROLLUP_PARTS):
+    """
+    Schedule a refresh of the given GRs' rollups once the current transaction
+    commits (immediately in autocommit mode). Many changes to the same GR in
+    one transaction - e.g. a cascade delete - cost a single refresh.
+
+    Pass the demo modes and rollup parts (see compute_rollup) a change can
+    affect to recompute less; the defaults recompute the whole rows.
+
+    Call this after queryset.update()/bulk_create()/bulk_update(), which do not
+    send the model signals.
+    """
+    gr_ids = {gr_id for gr_id in gr_ids if gr_id is not None}
+    if not gr_ids:
+        return
+    pending = getattr(_pending, 'rollups', None)
+    if pending is None:
+        pending = _pending.rollups = {}
+    for gr_id in gr_ids:
+        for is_demo in modes:
+            pending.setdefault((gr_id, is_demo), set()).update(parts)
+    # Every call schedules a flush, the first one to run takes the whole set.
+    # If the transaction rolls back, leftover ids are flushed with the next commit.
+    transaction.on_commit(_flush_pending)
+
+
+def _flush_pending():
+    dirty = getattr(_pending, 'rollups', None)
+    _pending.rollups = None
+    if dirty:
+        _refresh(dirty)
+
+
+def rebuild_rollups(gr_ids=None):
+    """Recompute rollups for the given GRs, or for every GR if None"""
+    if gr_ids is None:
+        gr_ids = GR.objects.values_list('id', flat=True)
+    refresh_rollups(gr_ids)
+
+
+def find_rollup_drift(gr_ids=None):
+    """
+    Compare stored rollups with freshly computed values.
+    Returns a list of (gr_id, is_demo, {field: (stored, actual)}) for rows that differ
+    or are missing (stored is None for missing rows).
+    """
+    grs = GR.objects.all()
+    if gr_ids is not None:
+        grs = grs.filter(id__in=gr_ids)
+    stored = {
+        (rollup.gr_id, rollup.is_demo): rollup
+        for rollup in WorkflowRollup.objects.filter(gr__in=grs)
+    }
+
+    drift = []
+    for gr_id in grs.order_by('id').values_list('id', flat=True):
+        for is_demo in (False, True):
+            actual = compute_rollup(gr_id, is_demo)
+            rollup = stored.get((gr_id, is_demo))
+            differences = {
+                field: (getattr(rollup, field) if rollup else None, value)
+                for field, value in actual.items()
+                if rollup is None or getattr(rollup, field) != value
+            }
+            if differences:
+                drift.append((gr_id, is_demo, differences))
+    return drift
+
+
+def read_rollup_counts(is_demo, gr_id=None, any_gr=False):
+    """
+    Return the flat dashboard counts (same keys as status_views.count_workflow_status)
+    summed from the rollup table, or None if some GR has no rollup row yet -
+    callers then fall back to counting the live tables.
+
+    Records are counted under GRs of the same demo mode only, like /api/status/
+    does; pass any_gr=True to count them under every GR (the demo dashboard
+    counts demo works wherever they are filed). total_grs always counts the
+    GRs of the requested mode.
+    """
+    grs = GR.objects.all()
+    rollups = WorkflowRollup.objects.filter(is_demo=is_demo)
+    if not any_gr:
+        rollups = rollups.filter(gr__is_demo=is_demo)
+    if gr_id is not None:
+        grs = grs.filter(id=gr_id)
+        rollups = rollups.filter(gr_id=gr_id)
+
+    totals = rollups.aggregate(
+        rollup_rows=Count('id'),
+        **{field: Coalesce(Sum(field), 0) for field in WorkflowRollup.COUNT_FIELDS}
+    )
+    total_grs = grs.filter(is_demo=is_demo).count()
+    if totals.pop('rollup_rows') != (grs.count() if any_gr else total_grs):
+        return None
+
+    totals['total_grs'] = total_grs
+    # Keys reported twice by the dashboard under different sections
+    totals['tenders_awarded'] = totals['work_order_issued']
+    totals['bills_pending'] = totals['pending_payment']
+    totals['completed'] = totals['payment_completed']
+    return totals
+
+
+def read_rollup_amounts(is_demo):
+    """
+    Return total_aa, total_ra and total_expenditure summed over all GRs of a
+    demo mode, or None if some GR has no rollup row yet
+    """
+    zero = Decimal('0')
+    totals = WorkflowRollup.objects.filter(is_demo=is_demo).aggregate(
+        rollup_rows=Count('id'),
+        **{field: Coalesce(Sum(field), zero) for field in WorkflowRollup.AMOUNT_FIELDS}
+    )
+    if totals.pop('rollup_rows') != GR.objects.count():
+        return None
+    return totals
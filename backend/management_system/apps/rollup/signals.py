@@ -0,0 +1,127 @@
+"""
+Signal handlers that keep WorkflowRollup in sync with the workflow tables.
+
+Every save/delete marks the rollup of the owning GR in the record's demo mode
+as dirty; it is recomputed once when the transaction commits (see
+services.mark_rollups_dirty). Only the counters fed by the record's own table
+are recomputed, unless the save moves the record to another parent or flips
+its demo flag - then the old GR and mode are refreshed too, in full.
+
+Saves also refresh the denormalized ancestor columns (see ancestors.py).
+"""
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from apps.gr.models import GR
+from apps.works.models import Work, Spill
+from apps.technical_sanction.models import TechnicalSanction
+from apps.tender.models import Tender
+from apps.bill.models import Bill
+from .services import ROLLUP_PARTS, mark_rollups_dirty
+from .ancestors import cascade_ancestor_change
+
+# Lookup from each tracked model to its GR id (TS, Tender and Bill carry a
+# denormalized copy, kept up to date by ancestors.py)
+GR_ID_PATHS = {
+    Work: 'gr_id',
+    Spill: 'work__gr_id',
+    TechnicalSanction: 'gr_id',
+    Tender: 'gr_id',
+    Bill: 'gr_id',
+}
+
+# Foreign keys placing each tracked model in the GR -> Work -> TS -> Tender -> Bill chain
+PARENT_FIELDS = {
+    Work: ('gr_id',),
+    Spill: ('work_id',),
+    TechnicalSanction: ('work_id',),
+    Tender: ('work_id', 'technical_sanction_id'),
+    Bill: ('tender_id',),
+}
+
+# Rollup parts (see services.compute_rollup) counting each tracked model's rows.
+# Work rows are filtered on their TS and tenders, spills add to the works' RA.
+ROLLUP_PARTS_BY_MODEL = {
+    Work: ROLLUP_PARTS,
+    Spill: {'works'},
+    TechnicalSanction: {'technical_sanctions', 'works'},
+    Tender: {'tenders', 'works'},
+    Bill: {'bills'},
+}
+
+
+def _current_gr_id(instance):
+    """GR id of an unsaved instance from its parent's stored row"""
+    if isinstance(instance, Work):
+        return instance.gr_id
+    if isinstance(instance, Bill):
+        return Tender.objects.filter(pk=instance.tender_id).values_list('gr_id', flat=True).first()
+    return Work.objects.filter(pk=instance.work_id).values_list('gr_id', flat=True).first()
+
+
+@receiver(pre_save, sender=Work)
+@receiver(pre_save, sender=Spill)
+@receiver(pre_save, sender=TechnicalSanction)
+@receiver(pre_save, sender=Tender)
+@receiver(pre_save, sender=Bill)
+def remember_previous_gr(sender, instance, raw=False, **kwargs):
+    """Remember the GR, demo flag and parents of the stored row, in case the save changes them"""
+    instance._rollup_previous = None
+    if raw or instance.pk is None:
+        return
+    instance._rollup_previous = sender.objects.filter(pk=instance.pk).values_list(
+        GR_ID_PATHS[sender], 'is_demo', *PARENT_FIELDS[sender]
+    ).first()
+
+
+@receiver(post_save, sender=Work)
+@receiver(post_save, sender=Spill)
+@receiver(post_save, sender=TechnicalSanction)
+@receiver(post_save, sender=Tender)
+@receiver(post_save, sender=Bill)
+def workflow_record_saved(sender, instance, **kwargs):
+    previous = getattr(instance, '_rollup_previous', None)
+    parents = tuple(getattr(instance, field) for field in PARENT_FIELDS[sender])
+    if previous is None:
+        mark_rollups_dirty(
+            [_current_gr_id(instance)], modes=[instance.is_demo], parts=ROLLUP_PARTS_BY_MODEL[sender]
+        )
+        return
+
+    previous_gr_id, previous_is_demo, *previous_parents = previous
+    if previous_gr_id is not None and tuple(previous_parents) == parents and previous_is_demo == instance.is_demo:
+        # Same place in the chain, same mode: only the record's own counters changed
+        mark_rollups_dirty([previous_gr_id], modes=[instance.is_demo], parts=ROLLUP_PARTS_BY_MODEL[sender])
+        return
+
+    # Moved or flipped: the records below it moved along, refresh both places in full
+    mark_rollups_dirty(
+        [_current_gr_id(instance), previous_gr_id], modes={instance.is_demo, previous_is_demo},
+    )
+
+
+@receiver(post_delete, sender=Work)
+@receiver(post_delete, sender=Spill)
+@receiver(post_delete, sender=TechnicalSanction)
+@receiver(post_delete, sender=Tender)
+@receiver(post_delete, sender=Bill)
+def workflow_record_deleted(sender, instance, **kwargs):
+    # Deleted rows other than spills still hold their (denormalized) GR id
+    gr_id = getattr(instance, 'gr_id', None) or _current_gr_id(instance)
+    mark_rollups_dirty([gr_id], modes=[instance.is_demo], parts=ROLLUP_PARTS_BY_MODEL[sender])
+
+
+@receiver(post_save, sender=GR)
+def gr_saved(sender, instance, created, **kwargs):
+    # Create the (empty) rollup rows for new GRs so the dashboards can use them
+    if created:
+        mark_rollups_dirty([instance.pk])
+
+
+@receiver(post_save, sender=GR)
+@receiver(post_save, sender=Work)
+@receiver(post_save, sender=TechnicalSanction)
+@receiver(post_save, sender=Tender)
+@receiver(post_save, sender=Bill)
+def sync_denormalized_ancestors(sender, instance, created, **kwargs):
+    cascade_ancestor_change(instance, created=created)
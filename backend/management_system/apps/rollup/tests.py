@@ -0,0 +1,332 @@
+import datetime
+import importlib
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+from django.apps import apps as django_apps
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from apps.gr.models import GR
+from apps.works.models import Work, Spill
+from apps.technical_sanction.models import TechnicalSanction
+from apps.tender.models import Tender
+from apps.bill.models import Bill
+from apps.rollup import services
+from apps.rollup.models import WorkflowRollup
+from apps.rollup.services import find_rollup_drift, mark_rollups_dirty, rebuild_rollups
+from authentication.models import User
+
+
+def create_chain(gr, name, is_demo=False, bills=(), **tender_fields):
+    """A Work with one TS, one tender and a bill per payment GR in bills (None for unpaid)"""
+    work = Work.objects.create(gr=gr, name_of_work=name, aa=Decimal('1000.00'), ra=Decimal('900.00'), is_demo=is_demo)
+    ts = TechnicalSanction.objects.create(
+        work=work, work_portion=Decimal('500.00'), gst_percentage=Decimal('18.00'),
+        contingency_percentage=Decimal('4.00'), labour_insurance_percentage=Decimal('1.00'),
+        noting=True, is_demo=is_demo,
+    )
+    tender = Tender.objects.create(
+        work=work, technical_sanction=ts, tender_id=f'T-{name}', agency_name='Agency', is_demo=is_demo, **tender_fields
+    )
+    for number, paid_from in enumerate(bills):
+        Bill.objects.create(
+            tender=tender, bill_number=f'{name}-{number}', work_portion=Decimal('100.00'),
+            payment_done_from_gr=paid_from, is_demo=is_demo,
+        )
+    return work
+
+
+class RollupParityTests(TestCase):
+    """The dashboards report the same counts from the rollups as from the live tables"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='rollup@example.com', username='rollup', password='x', first_name='R', last_name='U'
+        )
+        cls.live_gr = GR.objects.create(gr_number='GR/live', date=datetime.date(2025, 4, 1))
+        cls.demo_gr = GR.objects.create(gr_number='GR/demo', date=datetime.date(2025, 4, 2), is_demo=True)
+
+        road = create_chain(cls.live_gr, 'Road', bills=(None, cls.live_gr), technical_verification=True)
+        Spill.objects.create(work=road, ara=Decimal('50.00'))
+        Work.objects.create(gr=cls.live_gr, name_of_work='No TS yet', aa=Decimal('10.00'))
+        cancelled = create_chain(cls.live_gr, 'Cancelled', bills=(None,))
+        cancelled.is_cancelled = True
+        cancelled.save()
+        # Demo records filed under a live GR and the other way round
+        create_chain(cls.live_gr, 'Demo under live GR', is_demo=True, bills=(None,))
+        Work.objects.create(gr=cls.live_gr, name_of_work='Demo, no TS', aa=Decimal('1.00'), is_demo=True)
+        create_chain(cls.demo_gr, 'Demo', is_demo=True, bills=(cls.demo_gr,), loa=True)
+        create_chain(cls.demo_gr, 'Live under demo GR', bills=(None,))
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def assert_rollups_match_live_counts(self, url):
+        rebuild_rollups()
+        # The views must answer from the rollups, not the live fallback
+        with mock.patch('status_views.count_workflow_status', side_effect=AssertionError('live count')), \
+                mock.patch('apps.demo.views.count_workflow_status', side_effect=AssertionError('live count')):
+            rolled_up = self.client.get(url)
+        self.assertEqual(rolled_up.status_code, 200, rolled_up.data)
+
+        with mock.patch('status_views.read_rollup_counts', return_value=None), \
+                mock.patch('apps.demo.views.read_rollup_counts', return_value=None):
+            live = self.client.get(url)
+        self.assertEqual(live.status_code, 200, live.data)
+        self.assertEqual(rolled_up.data, live.data)
+        return live.data
+
+    def test_status_dashboard(self):
+        for url in ('/api/status/', '/api/status/?demo=true', f'/api/status/?gr={self.live_gr.pk}',
+                    f'/api/status/?demo=true&gr={self.demo_gr.pk}', f'/api/status/?demo=true&gr={self.live_gr.pk}'):
+            with self.subTest(url=url):
+                self.assert_rollups_match_live_counts(url)
+
+    def test_demo_status_dashboard(self):
+        for url in ('/api/demo/status/', f'/api/demo/status/?gr={self.demo_gr.pk}',
+                    f'/api/demo/status/?gr={self.live_gr.pk}'):
+            with self.subTest(url=url):
+                self.assert_rollups_match_live_counts(url)
+
+    def test_demo_status_counts_demo_works_under_live_grs(self):
+        data = self.assert_rollups_match_live_counts('/api/demo/status/')
+        self.assertEqual(data['total_grs'], 1)
+        self.assertEqual(data['active_works'], 3)
+        self.assertEqual(data['works_status']['no_ts_yet'], 1)
+
+    def test_demo_status_of_a_live_gr_is_empty(self):
+        data = self.assert_rollups_match_live_counts(f'/api/demo/status/?gr={self.live_gr.pk}')
+        self.assertEqual(
+            [data['total_grs'], data['active_works'], data['technical_sanctions'], data['tenders'], data['bills']],
+            [0, 0, 0, 0, 0],
+        )
+
+
+class RollupMaintenanceTests(TestCase):
+    """Signal handlers, mark_rollups_dirty() and rebuild_rollups keep the rollups current"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.gr = GR.objects.create(gr_number='GR/1', date=datetime.date(2025, 4, 1))
+        cls.other_gr = GR.objects.create(gr_number='GR/2', date=datetime.date(2025, 4, 2))
+        cls.work = create_chain(cls.gr, 'Road', bills=(None, None))
+        create_chain(cls.gr, 'Demo', is_demo=True, bills=(None,))
+        rebuild_rollups()
+
+    def setUp(self):
+        # GRs marked by setUpTestData, whose transaction never commits
+        services._pending.rollups = None
+
+    def rollup(self, gr, is_demo=False):
+        return WorkflowRollup.objects.get(gr=gr, is_demo=is_demo)
+
+    def assertNoDrift(self):
+        self.assertEqual(find_rollup_drift(), [])
+
+    def test_new_gr_gets_rollup_rows(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            gr = GR.objects.create(gr_number='GR/3')
+        self.assertEqual(WorkflowRollup.objects.filter(gr=gr).count(), 2)
+        self.assertNoDrift()
+
+    def test_bill_save_refreshes_only_its_counters_and_mode(self):
+        # Counters a bill cannot change are left alone, so stale values there survive
+        WorkflowRollup.objects.filter(gr=self.gr, is_demo=False).update(active_works=99)
+        WorkflowRollup.objects.filter(gr=self.gr, is_demo=True).update(bills=99)
+
+        bill = Bill.objects.filter(tender__work=self.work).first()
+        bill.payment_done_from_gr = self.gr
+        with self.captureOnCommitCallbacks(execute=True):
+            bill.save()
+
+        rollup = self.rollup(self.gr)
+        self.assertEqual((rollup.bills, rollup.pending_payment, rollup.payment_completed), (2, 1, 1))
+        self.assertEqual(rollup.total_expenditure, sum(Bill.objects.filter(is_demo=False).values_list('bill_total', flat=True)))
+        self.assertEqual(rollup.active_works, 99)
+        self.assertEqual(self.rollup(self.gr, is_demo=True).bills, 99)
+
+    def test_new_ts_refreshes_work_counters(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            work = Work.objects.create(gr=self.gr, name_of_work='Bridge', aa=Decimal('5.00'))
+        self.assertEqual(self.rollup(self.gr).no_ts_yet, 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            TechnicalSanction.objects.create(
+                work=work, gst_percentage=Decimal('18.00'), contingency_percentage=Decimal('4.00'),
+                labour_insurance_percentage=Decimal('1.00'),
+            )
+        self.assertEqual(self.rollup(self.gr).ts_created, 1)
+        self.assertNoDrift()
+
+    def test_moving_a_work_refreshes_both_grs(self):
+        self.work.gr = self.other_gr
+        with self.captureOnCommitCallbacks(execute=True):
+            self.work.save()
+        self.assertEqual(self.rollup(self.gr).active_works, 0)
+        self.assertEqual(self.rollup(self.other_gr).bills, 2)
+        self.assertNoDrift()
+
+    def test_flipping_demo_refreshes_both_modes(self):
+        self.work.is_demo = True
+        with self.captureOnCommitCallbacks(execute=True):
+            self.work.save()
+        # The work's TS, tender and bills are still live, so they no longer count anywhere
+        self.assertEqual(self.rollup(self.gr).active_works, 0)
+        self.assertEqual(self.rollup(self.gr, is_demo=True).active_works, 2)
+        self.assertNoDrift()
+
+    def test_cascade_delete(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.work.delete()
+        rollup = self.rollup(self.gr)
+        self.assertEqual((rollup.active_works, rollup.technical_sanctions, rollup.bills), (0, 0, 0))
+        self.assertEqual(rollup.total_aa, 0)
+        self.assertNoDrift()
+
+    def test_mark_rollups_dirty_after_queryset_update(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Bill.objects.filter(is_demo=False).update(payment_done_from_gr=self.gr)
+        self.assertEqual(self.rollup(self.gr).payment_completed, 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            mark_rollups_dirty([self.gr.pk])
+        self.assertEqual(self.rollup(self.gr).payment_completed, 2)
+        self.assertNoDrift()
+
+    def test_rebuild_rollups_check(self):
+        out = StringIO()
+        call_command('rebuild_rollups', '--check', stdout=out)
+        self.assertIn('up to date', out.getvalue())
+
+        WorkflowRollup.objects.filter(gr=self.gr, is_demo=False).update(bills=7)
+        WorkflowRollup.objects.filter(gr=self.other_gr, is_demo=True).delete()
+        out = StringIO()
+        with self.assertRaisesMessage(CommandError, '2 rollup row(s) out of date'):
+            call_command('rebuild_rollups', '--check', stdout=out)
+        self.assertIn(f'GR {self.gr.pk} (live): bills: 7 -> 2', out.getvalue())
+        # --check does not write
+        self.assertEqual(self.rollup(self.gr).bills, 7)
+
+        call_command('rebuild_rollups', '--gr', str(self.gr.pk), stdout=StringIO())
+        self.assertEqual(find_rollup_drift([self.gr.pk]), [])
+        self.assertEqual(len(find_rollup_drift()), 1)
+
+
+class DenormalizedAncestorTests(TestCase):
+    """gr / work / effective_* on TS, Tender and Bill follow changes further up the chain"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.gr = GR.objects.create(gr_number='GR/1', date=datetime.date(2025, 4, 1))
+        cls.other_gr = GR.objects.create(gr_number='GR/2', date=datetime.date(2025, 4, 2))
+        cls.work = create_chain(cls.gr, 'Road', bills=(None, None))
+        create_chain(cls.other_gr, 'Bridge', bills=(None,))
+        # A demo TS (with its tender and bill) under a live work
+        demo_ts = TechnicalSanction.objects.create(
+            work=cls.work, gst_percentage=Decimal('18.00'), contingency_percentage=Decimal('4.00'),
+            labour_insurance_percentage=Decimal('1.00'), is_demo=True,
+        )
+        demo_tender = Tender.objects.create(work=cls.work, technical_sanction=demo_ts, tender_id='T-demo', agency_name='Agency')
+        Bill.objects.create(tender=demo_tender, bill_number='Demo-0', work_portion=Decimal('1.00'))
+
+    def assertAncestorsSynced(self):
+        """Every denormalized column equals the value read through the FK chain"""
+        for ts in TechnicalSanction.objects.select_related('work__gr'):
+            work = ts.work
+            self.assertEqual(
+                (ts.gr_id, ts.effective_is_demo, ts.effective_is_cancelled),
+                (work.gr_id, ts.is_demo or work.is_demo or work.gr.is_demo, work.is_cancelled),
+            )
+        for tender in Tender.objects.select_related('work__gr', 'technical_sanction'):
+            work = tender.work
+            self.assertEqual(
+                (tender.gr_id, tender.effective_is_demo, tender.effective_is_cancelled),
+                (work.gr_id, tender.is_demo or work.is_demo or work.gr.is_demo or tender.technical_sanction.is_demo,
+                 work.is_cancelled),
+            )
+        for bill in Bill.objects.select_related('tender__work__gr', 'tender__technical_sanction'):
+            tender, work = bill.tender, bill.tender.work
+            self.assertEqual(
+                (bill.work_id, bill.gr_id, bill.effective_is_demo, bill.effective_is_cancelled),
+                (work.pk, work.gr_id,
+                 bill.is_demo or tender.is_demo or work.is_demo or work.gr.is_demo or tender.technical_sanction.is_demo,
+                 work.is_cancelled),
+            )
+
+    def live_bill_ids(self, **filters):
+        return set(Bill.objects.filter(effective_is_demo=False, **filters).values_list('pk', flat=True))
+
+    def test_new_records_are_synced(self):
+        self.assertAncestorsSynced()
+        self.assertEqual(len(self.live_bill_ids(gr=self.gr)), 2)
+
+    def test_flipping_work_demo(self):
+        self.work.is_demo = True
+        self.work.save()
+        self.assertAncestorsSynced()
+        self.assertEqual(self.live_bill_ids(gr=self.gr), set())
+
+        self.work.is_demo = False
+        self.work.save()
+        self.assertAncestorsSynced()
+        self.assertEqual(len(self.live_bill_ids(gr=self.gr)), 2)
+
+    def test_flipping_gr_demo(self):
+        self.gr.is_demo = True
+        self.gr.save()
+        self.assertAncestorsSynced()
+        self.assertFalse(TechnicalSanction.objects.filter(gr=self.gr, effective_is_demo=False).exists())
+        self.assertEqual(len(self.live_bill_ids()), 1)
+
+    def test_cancelling_work(self):
+        self.work.is_cancelled = True
+        self.work.save()
+        self.assertAncestorsSynced()
+        self.assertEqual(Bill.objects.filter(work=self.work, effective_is_cancelled=True).count(), 3)
+
+    def test_moving_work_to_another_gr(self):
+        self.work.gr = self.other_gr
+        self.work.save()
+        self.assertAncestorsSynced()
+        self.assertEqual(self.live_bill_ids(gr=self.gr), set())
+        self.assertEqual(len(self.live_bill_ids(gr=self.other_gr)), 3)
+
+    def test_backfill_matches_the_join_filters(self):
+        """bill/0010 fills the columns so they select what the list endpoints' joins used to"""
+        backfill = importlib.import_module('apps.bill.migrations.0010_backfill_denormalized_ancestors')
+        self.other_gr.is_demo = True
+        self.other_gr.save()
+        TechnicalSanction.objects.update(gr=None, effective_is_demo=False, effective_is_cancelled=True)
+        Tender.objects.update(gr=None, effective_is_demo=False, effective_is_cancelled=True)
+        Bill.objects.update(gr=None, work=None, effective_is_demo=False, effective_is_cancelled=True)
+
+        backfill.backfill_denormalized_ancestors(django_apps, None)
+
+        self.assertAncestorsSynced()
+        for gr in (self.gr, self.other_gr):
+            self.assertQuerySetEqual(
+                TechnicalSanction.objects.filter(effective_is_demo=False, gr=gr),
+                TechnicalSanction.objects.filter(is_demo=False, work__is_demo=False, work__gr__is_demo=False, work__gr=gr),
+                ordered=False,
+            )
+            self.assertQuerySetEqual(
+                Tender.objects.filter(effective_is_demo=False, gr=gr),
+                Tender.objects.filter(
+                    is_demo=False, work__is_demo=False, work__gr__is_demo=False, technical_sanction__is_demo=False,
+                    work__gr=gr,
+                ),
+                ordered=False,
+            )
+            self.assertQuerySetEqual(
+                Bill.objects.filter(effective_is_demo=False, gr=gr),
+                Bill.objects.filter(
+                    is_demo=False, tender__is_demo=False, tender__work__is_demo=False,
+                    tender__work__gr__is_demo=False, tender__technical_sanction__is_demo=False, tender__work__gr=gr,
+                ),
+                ordered=False,
+            )
@@ -0,0 +1 @@
+# Management commands for technical_sanction app
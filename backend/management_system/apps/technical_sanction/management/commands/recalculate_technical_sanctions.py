@@ -0,0 +1,115 @@
+"""
+Django management command to recalculate the amounts of technical sanctions.
+
+Usage:
+    python manage.py recalculate_technical_sanctions                             # recompute every TS
+    python manage.py recalculate_technical_sanctions --gst-percentage 12         # apply a new GST rate, then recompute
+    python manage.py recalculate_technical_sanctions --gst-percentage 12 --dry-run  # only show what would change
+    python manage.py recalculate_technical_sanctions --check                     # verify, exit 1 on drift
+    python manage.py recalculate_technical_sanctions --gr 3 --contingency-percentage 5  # only TS of GR 3
+
+Amounts with their override flag set are kept as entered; everything else is
+recomputed with set-based UPDATEs that follow TechnicalSanction.save().
+"""
+from decimal import Decimal, InvalidOperation
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.technical_sanction.models import TechnicalSanction
+from apps.technical_sanction.services import (
+    PERCENTAGE_FIELDS,
+    find_technical_sanction_drift,
+    recalculate_technical_sanctions,
+)
+
+
+def percentage(value):
+    try:
+        value = Decimal(value)
+    except InvalidOperation:
+        raise ValueError(value)
+    if not 0 <= value <= 100:
+        raise ValueError(value)
+    return value
+
+
+class Command(BaseCommand):
+    help = 'Recalculate work portion totals, GST, contingency, labour insurance and final totals of technical sanctions'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ts', type=int, nargs='+', help='Only process the given technical sanction IDs')
+        parser.add_argument('--work', type=int, nargs='+', help='Only process technical sanctions of the given work IDs')
+        parser.add_argument('--gr', type=int, nargs='+', help='Only process technical sanctions of the given GR IDs')
+        parser.add_argument('--gst-percentage', type=percentage, help='New GST rate to set before recalculating')
+        parser.add_argument(
+            '--contingency-percentage',
+            type=percentage,
+            help='New contingency rate to set before recalculating',
+        )
+        parser.add_argument(
+            '--labour-insurance-percentage',
+            type=percentage,
+            help='New labour insurance rate to set before recalculating',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Print the changes without saving them',
+        )
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Compare the stored amounts with TechnicalSanction.save() without writing; exits with status 1 on drift',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Rows per UPDATE (default 1000)',
+        )
+
+    def handle(self, *args, **options):
+        queryset = TechnicalSanction.objects.all()
+        if options['ts']:
+            queryset = queryset.filter(id__in=options['ts'])
+        if options['work']:
+            queryset = queryset.filter(work_id__in=options['work'])
+        if options['gr']:
+            queryset = queryset.filter(gr_id__in=options['gr'])
+
+        percentages = {field: options[field] for field in PERCENTAGE_FIELDS if options[field] is not None}
+        if options['batch_size'] <= 0:
+            raise CommandError('--batch-size must be positive')
+
+        if options['dry_run'] or options['check']:
+            processed, drift = find_technical_sanction_drift(
+                queryset, percentages=percentages, batch_size=options['batch_size']
+            )
+            for sanction, differences in drift:
+                self.stdout.write(self.style.MIGRATE_HEADING(f'Technical Sanction {sanction.pk}'))
+                for field, (old, new) in differences.items():
+                    self.stdout.write(f'  {field}: {old} -> {new}')
+            if options['check'] and drift:
+                raise CommandError(
+                    f'{len(drift)} of {processed} technical sanction(s) out of date. Run without --check to recalculate.'
+                )
+            if options['check']:
+                self.stdout.write(self.style.SUCCESS(f'All {processed} technical sanction(s) are up to date.'))
+            else:
+                self.stdout.write(self.style.WARNING(
+                    f'Dry run: {len(drift)} of {processed} technical sanction(s) would change. Nothing was saved.'
+                ))
+            return
+
+        processed, updated = recalculate_technical_sanctions(
+            queryset,
+            percentages=percentages,
+            batch_size=options['batch_size'],
+            progress=self.report_progress,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Recalculated {processed} technical sanction(s), {updated} updated.'
+        ))
+
+    def report_progress(self, processed, total):
+        self.stdout.write(f'  {processed}/{total} ({processed * 100 // total}%)')
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.7 on 2026-10-16 23:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('technical_sanction', '0005_technicalsanction_is_demo'),
+        ('works', '0005_spill_spill_demo_created_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='technicalsanction',
+            index=models.Index(fields=['is_demo', '-created_at', '-id'], name='ts_demo_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='technicalsanction',
+            index=models.Index(fields=['work', 'is_demo'], name='ts_work_demo_idx'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.7 on 2026-10-16 23:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gr', '0006_gr_gr_demo_date_idx'),
+        ('technical_sanction', '0006_technicalsanction_ts_demo_created_idx_and_more'),
+        ('works', '0005_spill_spill_demo_created_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='technicalsanction',
+            name='effective_is_cancelled',
+            field=models.BooleanField(default=False, editable=False, help_text='True if the Work is cancelled'),
+        ),
+        migrations.AddField(
+            model_name='technicalsanction',
+            name='effective_is_demo',
+            field=models.BooleanField(default=False, editable=False, help_text='True if this TS, its Work or its GR is demo data'),
+        ),
+        migrations.AddField(
+            model_name='technicalsanction',
+            name='gr',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='gr.gr'),
+        ),
+        migrations.AddIndex(
+            model_name='technicalsanction',
+            index=models.Index(condition=models.Q(('effective_is_demo', False)), fields=['-created_at', '-id'], name='ts_live_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='technicalsanction',
+            index=models.Index(condition=models.Q(('effective_is_demo', False)), fields=['gr', '-created_at', '-id'], name='ts_live_gr_created_idx'),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from django.utils import timezone
+from apps.gr.models import GR
 from apps.works.models import Work
 from decimal import Decimal
 from django.core.validators import MinValueValidator, MaxValueValidator
@@ -46,12 +47,26 @@ class TechnicalSanction(models.Model):
     
     is_demo = models.BooleanField(default=False, verbose_name="Is Demo", help_text="Mark this record as demo data for testing")
     
+    # Denormalized from the Work/GR chain (kept in sync by apps/rollup/ancestors.py)
+    gr = models.ForeignKey(GR, on_delete=models.CASCADE, null=True, blank=True, editable=False, related_name='+')
+    effective_is_demo = models.BooleanField(default=False, editable=False, help_text="True if this TS, its Work or its GR is demo data")
+    effective_is_cancelled = models.BooleanField(default=False, editable=False, help_text="True if the Work is cancelled")
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         verbose_name = "Technical Sanction"
         verbose_name_plural = "Technical Sanctions"
+        indexes = [
+            # List endpoint: filter on is_demo, newest first (matches cursor pagination)
+            models.Index(fields=['is_demo', '-created_at', '-id'], name='ts_demo_created_idx'),
+            # ?work= filter and joins from Work
+            models.Index(fields=['work', 'is_demo'], name='ts_work_demo_idx'),
+            # Live list endpoint on the denormalized flags (no joins)
+            models.Index(fields=['-created_at', '-id'], name='ts_live_created_idx', condition=models.Q(effective_is_demo=False)),
+            models.Index(fields=['gr', '-created_at', '-id'], name='ts_live_gr_created_idx', condition=models.Q(effective_is_demo=False)),
+        ]
     
     def calculate_work_portion_total(self):
         """Calculate work_portion + royalty + testing"""
@@ -80,6 +95,12 @@ class TechnicalSanction(models.Model):
 
     def save(self, *args, **kwargs):
         """Auto-populate dates when checkboxes are checked"""
+        self.fill_checkbox_dates()
+        self.recalculate()
+        super().save(*args, **kwargs)
+    
+    def fill_checkbox_dates(self):
+        """Fill/clear the noting and order dates; also used by the bulk import (apps/imports)"""
         today = timezone.now().date()
         
         # If checkbox is checked and date is empty, auto-fill with today's date
@@ -95,7 +116,12 @@ class TechnicalSanction(models.Model):
         
         if not self.order:
             self.order_date = None
-        
+    
+    def recalculate(self):
+        """
+        Normalize the percentages and recalculate every non-overridden amount.
+        Called by save(); apps/technical_sanction/services.py mirrors it in SQL.
+        """
         # Ensure percentage fields have default values if None or empty
         if self.gst_percentage is None or self.gst_percentage == 0:
             self.gst_percentage = Decimal('18.00')
@@ -123,8 +149,6 @@ class TechnicalSanction(models.Model):
         
         if not self.override_final_total:
             self.final_total = self.calculate_final_total()
-            
-        super().save(*args, **kwargs)
     
     def __str__(self):
         return f"TS for {self.work.name_of_work} - ₹{self.final_total}"
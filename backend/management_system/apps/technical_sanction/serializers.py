@@ -1,10 +1,11 @@
 # apps/technical_sanction/serializers.py
 from rest_framework import serializers
+from management_system.sparse_fields import DynamicFieldsMixin
 from .models import TechnicalSanction
 from apps.works.models import Work
 
 
-class TechnicalSanctionSerializer(serializers.ModelSerializer):
+class TechnicalSanctionSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     # For reads - return calculated values (must include max_digits/decimal_places even for read_only!)
     # work field: returns work.id in responses, accepts integer ID in writes
     work = serializers.PrimaryKeyRelatedField(
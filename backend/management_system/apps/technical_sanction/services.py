@@ -0,0 +1,195 @@
+"""
+Set-based recalculation of Technical Sanction amounts
+
+TechnicalSanction.recalculate() is translated into SQL expressions, so a rate
+change or a recompute updates each chunk of rows with a single UPDATE instead
+of loading and saving every record. Intermediate values are not rounded, as in
+save(); the final assignment rounds to cents like the decimal(…, 2) columns do.
+
+find_technical_sanction_drift() runs the Python calculations on the stored
+rows and is used to preview a change and to check that both paths agree.
+"""
+from decimal import Decimal, ROUND_HALF_EVEN, ROUND_HALF_UP
+
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, Q, Value, When
+from django.db.models.functions import Now, Round
+
+from .models import TechnicalSanction
+
+# Amounts computed by TechnicalSanction.recalculate() unless their override_* flag is set
+CALCULATED_FIELDS = (
+    'work_portion_total', 'gst', 'grand_total', 'contingency', 'labour_insurance', 'final_total',
+)
+# Rates recalculate() normalizes (0/empty -> default)
+PERCENTAGE_DEFAULTS = {
+    'gst_percentage': Decimal('18.00'),
+    'contingency_percentage': Decimal('4.00'),
+    'labour_insurance_percentage': Decimal('1.00'),
+}
+PERCENTAGE_FIELDS = tuple(PERCENTAGE_DEFAULTS)
+# Inputs read by the calculations
+INPUT_FIELDS = (
+    'work_portion', 'royalty', 'testing', 'consultancy',
+    *(f'override_{field}' for field in CALCULATED_FIELDS),
+)
+
+CENTS = Decimal('0.01')
+# x * rate * 0.01 equals save()'s x * rate / 100 exactly, and never turns into
+# integer division on backends that store whole amounts as integers
+PERCENT = Value(Decimal('0.01'))
+AMOUNT = DecimalField(max_digits=15, decimal_places=2)
+PERCENTAGE = DecimalField(max_digits=5, decimal_places=2)
+
+
+def _check_percentages(percentages):
+    unknown = set(percentages) - set(PERCENTAGE_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown percentage field(s): {', '.join(sorted(unknown))}")
+
+
+def _percentage(field, percentages):
+    """The rate recalculate() uses: the new one if given, else the stored one (0/empty -> default)"""
+    default = PERCENTAGE_DEFAULTS[field]
+    if field in percentages:
+        return Value(percentages[field] or default, output_field=PERCENTAGE)
+    return Case(
+        When(Q(**{f'{field}__isnull': True}) | Q(**{field: 0}), then=Value(default)),
+        default=F(field),
+        output_field=PERCENTAGE,
+    )
+
+
+def _unless_overridden(field, calculation):
+    return Case(
+        When(**{f'override_{field}': True}, then=F(field)),
+        default=calculation,
+        output_field=AMOUNT,
+    )
+
+
+def recalculation_expressions(percentages=None):
+    """
+    SQL expressions for the new value of every percentage and calculated column,
+    following TechnicalSanction.recalculate() step by step.
+
+    An UPDATE reads the old row in every SET clause, so later steps embed the
+    expressions of the earlier ones (e.g. grand_total uses the new GST) instead
+    of referring to the columns.
+    """
+    percentages = percentages or {}
+    _check_percentages(percentages)
+    rates = {field: _percentage(field, percentages) for field in PERCENTAGE_FIELDS}
+
+    base = F('work_portion') + F('royalty') + F('testing')
+    gst = _unless_overridden('gst', F('work_portion') * rates['gst_percentage'] * PERCENT)
+    contingency = _unless_overridden(
+        'contingency', F('work_portion') * rates['contingency_percentage'] * PERCENT
+    )
+    labour_insurance = _unless_overridden(
+        'labour_insurance', F('work_portion') * rates['labour_insurance_percentage'] * PERCENT
+    )
+    return {
+        **rates,
+        'work_portion_total': _unless_overridden('work_portion_total', base),
+        'gst': gst,
+        'grand_total': _unless_overridden('grand_total', base + gst),
+        'contingency': contingency,
+        'labour_insurance': labour_insurance,
+        'final_total': _unless_overridden(
+            'final_total', base + gst + F('consultancy') + contingency + labour_insurance
+        ),
+    }
+
+
+def recalculate_technical_sanctions(queryset=None, percentages=None, batch_size=1000, progress=None):
+    """
+    Recompute the calculated amounts of many technical sanctions with set-based UPDATEs.
+
+    Rows are processed in chunks of `batch_size` primary keys, each chunk in its
+    own transaction with one UPDATE that only touches rows whose values change
+    (their updated_at is bumped). Overridden amounts are kept, and a run can be
+    repeated safely after an interruption.
+
+    Args:
+        queryset: Technical sanctions to process (default: all)
+        percentages: Optional new rates to apply first, e.g. {'gst_percentage': Decimal('12.00')}
+        batch_size: Rows per UPDATE
+        progress: Optional callable(processed, total) called after every chunk
+
+    Returns:
+        (processed count, updated count)
+    """
+    if queryset is None:
+        queryset = TechnicalSanction.objects.all()
+    expressions = recalculation_expressions(percentages)
+    assignments = {field: Round(expression, 2) for field, expression in expressions.items()}
+    changed = Q()
+    for field, value in assignments.items():
+        changed |= ~Q(**{field: value})
+
+    pks = list(queryset.order_by('pk').values_list('pk', flat=True))
+    total = len(pks)
+    updated = 0
+    for start in range(0, total, batch_size):
+        chunk = pks[start:start + batch_size]
+        with transaction.atomic():
+            updated += TechnicalSanction.objects.filter(pk__in=chunk).filter(changed).update(
+                **assignments, updated_at=Now()
+            )
+        if progress:
+            progress(start + len(chunk), total)
+    return total, updated
+
+
+def _stored(value):
+    """Value as the decimal(…, 2) column will hold it (numeric rounds half away from zero)"""
+    return Decimal(str(value)).quantize(CENTS, rounding=ROUND_HALF_UP)
+
+
+def _unchanged(old, new):
+    """
+    True if the stored value already is `new` rounded to cents. Half-even is
+    accepted too: SQLite keeps decimals as floats and rounds them that way on read.
+    """
+    new = Decimal(str(new))
+    return old in (new.quantize(CENTS, rounding=ROUND_HALF_UP), new.quantize(CENTS, rounding=ROUND_HALF_EVEN))
+
+
+def find_technical_sanction_drift(queryset=None, percentages=None, batch_size=1000):
+    """
+    Compare the stored amounts with TechnicalSanction.recalculate() - the code
+    save() runs - without writing anything. With `percentages` this previews a
+    rate change; without, it verifies that the stored rows are consistent.
+
+    Returns:
+        (processed count, drift) where drift is a list of
+        (technical sanction, {field: (stored, expected)}) for every row that differs
+    """
+    if queryset is None:
+        queryset = TechnicalSanction.objects.all()
+    percentages = percentages or {}
+    _check_percentages(percentages)
+
+    compared_fields = PERCENTAGE_FIELDS + CALCULATED_FIELDS
+    sanctions = queryset.only(
+        'work', *INPUT_FIELDS, *compared_fields
+    ).order_by('pk').iterator(chunk_size=batch_size)
+
+    processed = 0
+    drift = []
+    for sanction in sanctions:
+        processed += 1
+        old = {field: _stored(getattr(sanction, field)) for field in compared_fields}
+        for field, value in percentages.items():
+            setattr(sanction, field, value)
+        sanction.recalculate()
+
+        differences = {}
+        for field in compared_fields:
+            new = getattr(sanction, field)
+            if not _unchanged(old[field], new):
+                differences[field] = (old[field], _stored(new))
+        if differences:
+            drift.append((sanction, differences))
+    return processed, drift
@@ -1,3 +1,180 @@
-from django.test import TestCase
+import datetime
+import random
+from decimal import Decimal, ROUND_HALF_EVEN, ROUND_HALF_UP
 
-# Create your tests here.
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from apps.gr.models import GR
+from apps.technical_sanction.models import TechnicalSanction
+from apps.technical_sanction.services import CALCULATED_FIELDS, PERCENTAGE_FIELDS, recalculate_technical_sanctions
+from apps.works.models import Work
+from authentication.models import User
+
+
+def make_sanction(work, **fields):
+    """A saved TS; the model's float percentage defaults cannot be multiplied with Decimals"""
+    fields = {
+        'gst_percentage': Decimal('18.00'),
+        'contingency_percentage': Decimal('4.00'),
+        'labour_insurance_percentage': Decimal('1.00'),
+        **fields,
+    }
+    return TechnicalSanction.objects.create(work=work, **fields)
+
+
+class TechnicalSanctionValuesListParityTests(TestCase):
+    """The .values() list path (ValuesListMixin) renders exactly what TechnicalSanctionSerializer renders"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='parity@example.com', username='parity', password='x', first_name='P', last_name='T'
+        )
+        gr = GR.objects.create(gr_number='GR/1', date=datetime.date(2025, 4, 1))
+        work = Work.objects.create(gr=gr, name_of_work='Road', aa=Decimal('1000000.55'))
+        cancelled = Work.objects.create(
+            gr=gr, name_of_work='Bridge', aa=Decimal('20.00'), is_cancelled=True,
+            cancel_reason='SHIFTED_TO_OTHER_WORK', cancel_details='Moved',
+        )
+
+        # Noting and order dates set, fractional amounts
+        make_sanction(
+            work, sub_name='Phase 1', work_portion=Decimal('12345.67'), royalty=Decimal('0.01'),
+            testing=Decimal('10.50'), consultancy=Decimal('99.99'), gst_percentage=Decimal('12.50'),
+            noting=True, noting_date=datetime.date(2025, 5, 1), order=True, order_date=datetime.date(2025, 5, 2),
+        )
+        # Null sub name and dates, overridden amounts
+        make_sanction(
+            work, work_portion=Decimal('0.03'), override_gst=True, gst=Decimal('5.00'),
+            override_final_total=True, final_total=Decimal('1.00'),
+        )
+        # On a cancelled work
+        make_sanction(cancelled, sub_name='', work_portion=Decimal('100'))
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def get_response(self, url, values_list):
+        with override_settings(API_VALUES_LIST=values_list):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def assert_same_rows(self, url):
+        values_response = self.get_response(url, values_list=True)
+        model_response = self.get_response(url, values_list=False)
+        # The rendered bytes: same keys in the same order, numbers and dates formatted alike
+        self.assertEqual(values_response.content.decode(), model_response.content.decode())
+        # ?page_size=all returns a plain list, other pages {'results': [...], ...}
+        data = values_response.json()
+        return data['results'] if isinstance(data, dict) else data
+
+    def test_list_matches_model_serializer(self):
+        rows = self.assert_same_rows('/api/technical-sanctions/?page_size=all')
+        self.assertEqual(len(rows), 3)
+        by_portion = {row['workPortion']: row for row in rows}
+        # The cases the fixtures are meant to cover
+        self.assertEqual(by_portion['12345.67']['notingDate'], '2025-05-01')
+        self.assertIsNone(by_portion['0.03']['notingDate'])
+        self.assertIsNone(by_portion['0.03']['subName'])
+        self.assertEqual(by_portion['0.03']['gstAmount'], '5.00')
+        self.assertTrue(by_portion['100.00']['work_is_cancelled'])
+        self.assertIsNone(by_portion['12345.67']['work_cancel_reason'])
+
+    def test_sparse_and_paginated_lists_match_model_serializer(self):
+        self.assert_same_rows('/api/technical-sanctions/?page_size=all&fields=id,work_name,gr_name,aa,orderDate')
+        self.assert_same_rows('/api/technical-sanctions/?page_size=all&omit=finalTotal')
+        self.assertEqual(len(self.assert_same_rows('/api/technical-sanctions/?page_size=2')), 2)
+
+
+class SetBasedRecalculationParityTests(TestCase):
+    """
+    recalculate_technical_sanctions() (SQL) stores the same amounts as
+    TechnicalSanction.save() (Python) for randomized rows, overrides included
+    """
+    ROWS = 150
+    COMPARED_FIELDS = PERCENTAGE_FIELDS + CALCULATED_FIELDS
+
+    def setUp(self):
+        gr = GR.objects.create(gr_number='GR/1')
+        # Every random row is created twice: one copy per path
+        self.saved_work = Work.objects.create(gr=gr, name_of_work='Saved', aa=Decimal('1.00'))
+        self.sql_work = Work.objects.create(gr=gr, name_of_work='SQL', aa=Decimal('1.00'))
+        rng = random.Random(20251017)
+        for _ in range(self.ROWS):
+            fields = self.random_fields(rng)
+            make_sanction(self.saved_work, **fields)
+            make_sanction(self.sql_work, **fields)
+
+    @staticmethod
+    def random_amount(rng, high=1000000):
+        return Decimal(rng.randint(0, high * 100)) / 100
+
+    def random_fields(self, rng):
+        rates = [Decimal('0'), Decimal('0.25'), Decimal('1.00'), Decimal('4.50'), Decimal('12.50'), Decimal('18.00'), Decimal('33.33')]
+        fields = {
+            'work_portion': self.random_amount(rng),
+            'royalty': self.random_amount(rng, 10000),
+            'testing': self.random_amount(rng, 10000),
+            'consultancy': self.random_amount(rng, 10000),
+            **{field: rng.choice(rates) for field in PERCENTAGE_FIELDS},
+        }
+        for field in CALCULATED_FIELDS:
+            if rng.random() < 0.25:
+                fields[f'override_{field}'] = True
+                fields[field] = self.random_amount(rng)
+        return fields
+
+    def recalculate_both(self, percentages):
+        for sanction in TechnicalSanction.objects.filter(work=self.saved_work).order_by('pk'):
+            for field, value in percentages.items():
+                setattr(sanction, field, value)
+            sanction.save()
+        recalculate_technical_sanctions(
+            TechnicalSanction.objects.filter(work=self.sql_work), percentages=percentages, batch_size=40,
+        )
+
+    def assert_same_amounts(self):
+        saved = TechnicalSanction.objects.filter(work=self.saved_work).order_by('pk')
+        sql = TechnicalSanction.objects.filter(work=self.sql_work).order_by('pk')
+        self.assertEqual(len(saved), self.ROWS)
+        overridden = 0
+        for row, (saved_row, sql_row) in enumerate(zip(saved, sql)):
+            # The exact (unrounded) amounts the stored values are rounded from
+            exact = TechnicalSanction(**{
+                field.attname: getattr(saved_row, field.attname)
+                for field in TechnicalSanction._meta.concrete_fields
+                if field.attname not in CALCULATED_FIELDS or getattr(saved_row, f'override_{field.attname}')
+            })
+            exact.recalculate()
+            for field in self.COMPARED_FIELDS:
+                overridden += field in CALCULATED_FIELDS and getattr(saved_row, f'override_{field}')
+                with self.subTest(row=row, field=field):
+                    self.assert_same_stored(getattr(saved_row, field), getattr(sql_row, field), getattr(exact, field))
+        self.assertGreater(overridden, 0)
+
+    def assert_same_stored(self, saved, sql, exact):
+        exact = Decimal(str(exact))
+        half_up = exact.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+        half_even = exact.quantize(Decimal('0.01'), rounding=ROUND_HALF_EVEN)
+        if half_up == half_even:
+            self.assertEqual(saved, sql)
+        else:
+            # Half-cent tie: SQLite rounds Python values half-even and SQL ones half-up
+            self.assertIn(saved, (half_up, half_even))
+            self.assertIn(sql, (half_up, half_even))
+
+    def test_recompute_matches_save(self):
+        # Stale stored amounts (overridden ones are kept by both paths)
+        TechnicalSanction.objects.update(
+            work_portion_total=Decimal('1.00'), gst=Decimal('2.00'), grand_total=Decimal('3.00'),
+            contingency=Decimal('4.00'), labour_insurance=Decimal('5.00'), final_total=Decimal('6.00'),
+        )
+        self.recalculate_both({})
+        self.assert_same_amounts()
+
+    def test_rate_change_matches_save(self):
+        self.recalculate_both({'gst_percentage': Decimal('12.00'), 'contingency_percentage': Decimal('0')})
+        self.assert_same_amounts()
@@ -2,30 +2,39 @@ from rest_framework import viewsets
 from rest_framework.permissions import IsAuthenticated
 from .models import TechnicalSanction
 from .serializers import TechnicalSanctionSerializer
+from management_system.async_views import AsyncReadMixin
+from management_system.conditional import ConditionalGetMixin
+from management_system.exports import ExportMixin
+from management_system.pagination import KeysetCursorPagination
+from management_system.sparse_fields import SparseFieldsetMixin
+from management_system.values_serializer import ValuesListMixin
 
-class TechnicalSanctionViewSet(viewsets.ModelViewSet):
+class TechnicalSanctionViewSet(ConditionalGetMixin, AsyncReadMixin, ExportMixin, ValuesListMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = TechnicalSanction.objects.filter(is_demo=False)  # Exclude demo data
     serializer_class = TechnicalSanctionSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetCursorPagination
+    export_filename = 'technical-sanctions'
+    conditional_relations = ('work', 'work__gr')
     
     def get_queryset(self):
         """Return only non-demo technical sanctions, ensuring related Works and GRs are not demo
         Supports filtering by: gr, work (multiple filters work together)
         """
+        # effective_is_demo/gr are denormalized from the Work -> GR chain
+        # (see apps/rollup/ancestors.py), so the filters below need no joins
         queryset = TechnicalSanction.objects.filter(
-            is_demo=False,
-            work__is_demo=False,  # Also exclude TS linked to demo works
-            work__gr__is_demo=False  # And ensure the GR is not demo
+            effective_is_demo=False  # TS, Work and GR are all non-demo
         ).select_related('work', 'work__gr')
         
         # Filter by GR if 'gr' query parameter is provided
         gr_id = self.request.query_params.get('gr', None)
         if gr_id is not None:
-            queryset = queryset.filter(work__gr_id=gr_id, is_demo=False, work__is_demo=False, work__gr__is_demo=False)
+            queryset = queryset.filter(gr_id=gr_id)
         
         # Filter by work if 'work' query parameter is provided
         work_id = self.request.query_params.get('work', None)
         if work_id is not None:
-            queryset = queryset.filter(work_id=work_id, is_demo=False)
+            queryset = queryset.filter(work_id=work_id)
         
-        return queryset.order_by('-created_at')
+        return self.sparse_queryset(queryset.order_by('-created_at'))
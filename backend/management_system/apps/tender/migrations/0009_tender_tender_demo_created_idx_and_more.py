@@ -0,0 +1,27 @@
+# Generated by Django 5.2.7 on 2026-10-16 23:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('technical_sanction', '0006_technicalsanction_ts_demo_created_idx_and_more'),
+        ('tender', '0008_tender_is_demo'),
+        ('works', '0005_spill_spill_demo_created_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='tender',
+            index=models.Index(fields=['is_demo', '-created_at', '-id'], name='tender_demo_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tender',
+            index=models.Index(fields=['work', 'is_demo'], name='tender_work_demo_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tender',
+            index=models.Index(fields=['technical_sanction', 'is_demo'], name='tender_ts_demo_idx'),
+        ),
+    ]
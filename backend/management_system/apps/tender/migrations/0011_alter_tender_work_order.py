@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-17 00:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tender', '0010_tender_denormalized_ancestors'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='tender',
+            name='work_order',
+            field=models.FileField(blank=True, max_length=255, null=True, upload_to='Tender work orders/%Y/%m/'),
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from apps.gr.models import GR
 from apps.works.models import Work
 from django.utils import timezone
 from apps.technical_sanction.models import TechnicalSanction
@@ -37,18 +38,42 @@ class Tender(models.Model):
     date = models.DateField(null=True, blank=True)
     agency_name = models.CharField(max_length=300)
     # Organize by year and month only
-    work_order = models.FileField(upload_to='Tender work orders/%Y/%m/', null=True, blank=True)
+    work_order = models.FileField(upload_to='Tender work orders/%Y/%m/', max_length=255, null=True, blank=True)
     is_demo = models.BooleanField(default=False, verbose_name="Is Demo", help_text="Mark this record as demo data for testing")
     
+    # Denormalized from the Work/GR/TS chain (kept in sync by apps/rollup/ancestors.py)
+    gr = models.ForeignKey(GR, on_delete=models.CASCADE, null=True, blank=True, editable=False, related_name='+')
+    effective_is_demo = models.BooleanField(default=False, editable=False, help_text="True if this tender, its Work, GR or Technical Sanction is demo data")
+    effective_is_cancelled = models.BooleanField(default=False, editable=False, help_text="True if the Work is cancelled")
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         verbose_name = "Tender"
         verbose_name_plural = "Tenders"
+        indexes = [
+            # List endpoint: filter on is_demo, newest first (matches cursor pagination)
+            models.Index(fields=['is_demo', '-created_at', '-id'], name='tender_demo_created_idx'),
+            # ?work= / ?technical_sanction= filters and joins from Work/TS
+            models.Index(fields=['work', 'is_demo'], name='tender_work_demo_idx'),
+            models.Index(fields=['technical_sanction', 'is_demo'], name='tender_ts_demo_idx'),
+            # Live list endpoint on the denormalized flags (no joins)
+            models.Index(fields=['-created_at', '-id'], name='tender_live_created_idx', condition=models.Q(effective_is_demo=False)),
+            models.Index(fields=['gr', '-created_at', '-id'], name='tender_live_gr_created_idx', condition=models.Q(effective_is_demo=False)),
+        ]
 
     def save(self, *args, **kwargs):
         """Auto-populate dates when checkboxes are checked"""
+        self.fill_checkbox_dates()
+        super().save(*args, **kwargs)
+    
+    def fill_checkbox_dates(self):
+        """
+        Default the tender date and fill/clear the date of every checkbox.
+        Called by save(); also used by the bulk import (apps/imports) and the
+        bulk routes (TenderSerializer.apply_save_rules).
+        """
         today = timezone.now().date()
         
         if not self.date:
@@ -102,8 +127,6 @@ class Tender(models.Model):
         
         if not self.emd_awarded:
             self.awarded_date = None
-        
-        super().save(*args, **kwargs)
     
     def __str__(self):
         return f"Tender {self.tender_id} - {self.agency_name}"
@@ -1,9 +1,12 @@
 from rest_framework import serializers
+from management_system.bulk import BulkListSerializer, BulkSerializerMixin
+from management_system.sparse_fields import DynamicFieldsMixin
 from .models import Tender
 from apps.works.models import Work
 from apps.technical_sanction.models import TechnicalSanction
+from apps.previews.fields import PreviewURLField
 
-class TenderSerializer(serializers.ModelSerializer):
+class TenderSerializer(BulkSerializerMixin, DynamicFieldsMixin, serializers.ModelSerializer):
     # For reads: return these formatted fields
     workId = serializers.IntegerField(source='work.id', read_only=True)
     workName = serializers.CharField(source='work.name_of_work', read_only=True)
@@ -19,6 +22,7 @@ class TenderSerializer(serializers.ModelSerializer):
     technicalSanctionId = serializers.IntegerField(source='technical_sanction.id', read_only=True)
     technicalSanctionSubName = serializers.CharField(source='technical_sanction.sub_name', read_only=True)
     workOrderUrl = serializers.FileField(source='work_order', read_only=True)
+    documentPreviewUrl = PreviewURLField(source='work_order')
     workOrderUploaded = serializers.SerializerMethodField()
     technicalVerification = serializers.BooleanField(source='technical_verification', read_only=True)
     technicalVerificationDate = serializers.DateField(source='technical_verification_date', read_only=True)
@@ -78,7 +82,7 @@ class TenderSerializer(serializers.ModelSerializer):
             'work_is_cancelled', 'work_cancel_reason', 'work_cancel_details',
             'id', 'tenderNumber', 'tenderName', 'openingDate', 'status', 
             'Online', 'onlineDate', 'Offline', 'offlineDate',
-            'technicalSanctionId', 'technicalSanctionSubName', 'workOrderUrl', 'workOrderUploaded',
+            'technicalSanctionId', 'technicalSanctionSubName', 'workOrderUrl', 'documentPreviewUrl', 'workOrderUploaded',
             'technicalVerification', 'technicalVerificationDate','financialVerification', 'financialVerificationDate',
             'loa', 'loaDate',
             'workOrderTick', 'workOrderTickDate',
@@ -97,6 +101,19 @@ class TenderSerializer(serializers.ModelSerializer):
             'created_at', 'updated_at',
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
+        list_serializer_class = BulkListSerializer
+        # Model fields read by the method fields (used by ?fields= to narrow the query)
+        field_sources = {
+            'status': ['loa', 'work_order'],
+            'workOrderUploaded': ['work_order'],
+        }
+
+    # Columns Tender.save() may change besides the submitted ones (for bulk_update)
+    bulk_derived_fields = (
+        'date', 'online_date', 'offline_date', 'technical_verification_date',
+        'financial_verification_date', 'loa_date', 'work_order_tick_date',
+        'supporting_date', 'awarded_date',
+    )
 
     def get_status(self, obj):
         if obj.loa:
@@ -110,3 +127,6 @@ class TenderSerializer(serializers.ModelSerializer):
     
     def create(self, validated_data):
         return Tender.objects.create(**validated_data)
+
+    def apply_save_rules(self, instance):
+        instance.fill_checkbox_dates()
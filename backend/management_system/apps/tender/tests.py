@@ -1,3 +1,195 @@
+import csv
+import datetime
+import io
+from decimal import Decimal
+
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.bill.models import Bill
+from apps.gr.models import GR
+from apps.rollup import services as rollup_services
+from apps.rollup.models import WorkflowRollup
+from apps.rollup.services import find_rollup_drift, rebuild_rollups
+from apps.technical_sanction.models import TechnicalSanction
+from apps.tender.models import Tender
+from apps.works.models import Work
+from authentication.models import User
+
+
+def make_tender(work, tender_id, **fields):
+    ts = TechnicalSanction.objects.create(
+        work=work, gst_percentage=Decimal('18.00'),
+        contingency_percentage=Decimal('4.00'), labour_insurance_percentage=Decimal('1.00'),
+    )
+    return Tender.objects.create(work=work, technical_sanction=ts, tender_id=tender_id, agency_name='Agency', **fields)
+
+
+class TenderExportTests(TestCase):
+    """Tenders are exported from model instances (the serializer has nested fields)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='export@example.com', username='export', password='x', first_name='E', last_name='X'
+        )
+        gr = GR.objects.create(gr_number='GR/1', date=datetime.date(2025, 4, 1))
+        cls.work = Work.objects.create(gr=gr, name_of_work='Road', aa=Decimal('1000.00'))
+        other_work = Work.objects.create(gr=gr, name_of_work='Bridge', aa=Decimal('10.00'))
+        make_tender(cls.work, 'T-1', online=True, online_date=datetime.date(2025, 5, 1))
+        make_tender(cls.work, 'T-2')
+        make_tender(other_work, 'T-3')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_csv_matches_json_list(self):
+        for query, count in (('', 3), (f'?work={self.work.pk}', 2)):
+            with self.subTest(query=query):
+                response = self.client.get(f'/api/tenders/export/{query}')
+                self.assertEqual(response.status_code, 200)
+                text = b''.join(response.streaming_content).decode('utf-8')
+                header, *lines = csv.reader(io.StringIO(text.removeprefix('\ufeff')))
+
+                separator = '&' if query else '?'
+                rows = self.client.get(f'/api/tenders/{query}{separator}page_size=all').json()
+                self.assertEqual(len(rows), count)
+                self.assertEqual(header, list(rows[0]))
+                self.assertEqual(lines, [['' if value is None else str(value) for value in row.values()] for row in rows])
+
+
+class TenderBulkWriteTests(TestCase):
+    """POST / PATCH / DELETE /api/tenders/bulk/ (BulkWriteMixin, BulkListSerializer)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='bulk@example.com', username='bulk', password='x', first_name='B', last_name='U'
+        )
+        cls.gr = GR.objects.create(gr_number='GR/1', date=datetime.date(2025, 4, 1))
+        cls.other_gr = GR.objects.create(gr_number='GR/2', date=datetime.date(2025, 4, 2))
+        cls.work = Work.objects.create(gr=cls.gr, name_of_work='Road', aa=Decimal('1000.00'))
+        cls.other_work = Work.objects.create(gr=cls.other_gr, name_of_work='Bridge', aa=Decimal('10.00'))
+        cls.tender = make_tender(cls.work, 'T-1')
+        cls.other_tender = make_tender(cls.work, 'T-2')
+        cls.demo_tender = make_tender(cls.work, 'T-demo', is_demo=True)
+        cls.ts = cls.tender.technical_sanction
+        cls.other_ts = TechnicalSanction.objects.create(
+            work=cls.other_work, gst_percentage=Decimal('18.00'),
+            contingency_percentage=Decimal('4.00'), labour_insurance_percentage=Decimal('1.00'),
+        )
+        Bill.objects.create(tender=cls.tender, bill_number='B-1', work_portion=Decimal('100'))
+        rebuild_rollups()
+
+    def setUp(self):
+        # GRs marked by setUpTestData, whose transaction never commits
+        rollup_services._pending.rollups = None
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.today = timezone.now().date()
+
+    def bulk(self, method, items):
+        with self.captureOnCommitCallbacks(execute=True):
+            return getattr(self.client, method)('/api/tenders/bulk/', items, format='json')
+
+    def new_item(self, tender_id, **fields):
+        return {'tender_id': tender_id, 'agency_name': 'Agency', 'work': self.work.pk, 'technical_sanction': self.ts.pk, **fields}
+
+    def test_create_fills_checkbox_dates_ancestors_and_rollups(self):
+        response = self.bulk('post', [
+            self.new_item('T-new', online=True, loa=True, loa_date='2025-05-01'),
+            self.new_item('T-other', date='2025-04-30'),
+        ])
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual([row['tenderNumber'] for row in response.data], ['T-new', 'T-other'])
+
+        new = Tender.objects.get(tender_id='T-new')
+        self.assertEqual((new.date, new.online_date, new.loa_date), (self.today, self.today, datetime.date(2025, 5, 1)))
+        self.assertEqual(Tender.objects.get(tender_id='T-other').date, datetime.date(2025, 4, 30))
+        self.assertEqual((new.gr, new.effective_is_demo), (self.gr, False))
+        self.assertEqual(WorkflowRollup.objects.get(gr=self.gr, is_demo=False).tenders, 4)
+        self.assertEqual(find_rollup_drift(), [])
+
+    def test_tender_ids_must_be_unique_in_the_batch_and_the_table(self):
+        response = self.bulk('post', [
+            self.new_item('T-new'), self.new_item('T-ok'), self.new_item('T-new'), self.new_item('T-1'),
+        ])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data[1], {})
+        self.assertIn('more than once', response.data[0]['tender_id'][0])
+        self.assertIn('more than once', response.data[2]['tender_id'][0])
+        self.assertIn('already exists', response.data[3]['tender_id'][0])
+        self.assertFalse(Tender.objects.filter(tender_id__in=['T-new', 'T-ok']).exists())
+
+        # An update may keep its own number, not take another row's
+        response = self.bulk('patch', [{'id': self.tender.pk, 'tender_id': 'T-1'}])
+        self.assertEqual(response.status_code, 200, response.data)
+        response = self.bulk('patch', [{'id': self.tender.pk, 'tender_id': 'T-2'}])
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('already exists', response.data[0]['tender_id'][0])
+
+    def test_an_invalid_item_writes_nothing(self):
+        before = Tender.objects.count()
+        response = self.bulk('post', [self.new_item('T-new'), {'tender_id': 'T-broken', 'work': self.work.pk}])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data[0], {})
+        self.assertIn('technical_sanction', response.data[1])
+        self.assertEqual(Tender.objects.count(), before)
+
+        response = self.bulk('patch', [
+            {'id': self.tender.pk, 'agency_name': 'Renamed'},
+            {'id': self.other_tender.pk, 'date': 'not a date'},
+        ])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data[0], {})
+        self.assertIn('date', response.data[1])
+        self.assertEqual(Tender.objects.get(pk=self.tender.pk).agency_name, 'Agency')
+
+    def test_update_fills_checkbox_dates(self):
+        response = self.bulk('patch', [
+            {'id': self.tender.pk, 'online': True, 'technical_verification': True},
+            {'id': self.other_tender.pk, 'agency_name': 'Renamed'},
+        ])
+        self.assertEqual(response.status_code, 200, response.data)
+        tender = Tender.objects.get(pk=self.tender.pk)
+        self.assertEqual((tender.online_date, tender.technical_verification_date), (self.today, self.today))
+        self.assertEqual(Tender.objects.get(pk=self.other_tender.pk).agency_name, 'Renamed')
+        self.assertEqual(WorkflowRollup.objects.get(gr=self.gr, is_demo=False).technical_verification, 1)
+        self.assertEqual(find_rollup_drift(), [])
+
+    def test_moving_tenders_refreshes_ancestors_and_both_grs(self):
+        response = self.bulk('patch', [{'id': self.tender.pk, 'work': self.other_work.pk, 'technical_sanction': self.other_ts.pk}])
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(Tender.objects.get(pk=self.tender.pk).gr, self.other_gr)
+        # The tender's bill moves along
+        self.assertEqual(Bill.objects.get(bill_number='B-1').gr, self.other_gr)
+        self.assertEqual(WorkflowRollup.objects.get(gr=self.other_gr, is_demo=False).bills, 1)
+        self.assertEqual(WorkflowRollup.objects.get(gr=self.gr, is_demo=False).bills, 0)
+        self.assertEqual(find_rollup_drift(), [])
+
+    def test_unknown_and_repeated_ids(self):
+        # Demo tenders are outside the route's queryset
+        response = self.bulk('patch', [{'id': self.tender.pk, 'online': True}, {'id': self.demo_tender.pk}, {'id': 0}])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data, [{}, {'id': ['Not found.']}, {'id': ['Not found.']}])
+
+        response = self.bulk('patch', [{'id': self.tender.pk}, {'id': self.tender.pk}, {'agency_name': 'No id'}])
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('more than once', response.data[1]['id'][0])
+        self.assertIn('id', response.data[2])
+
+        response = self.bulk('delete', [self.tender.pk, self.demo_tender.pk])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data, [{}, {'id': ['Not found.']}])
+        self.assertFalse(Tender.objects.get(pk=self.tender.pk).online)
+        self.assertTrue(Tender.objects.filter(pk=self.tender.pk).exists())
 
-# Create your tests here.
+    def test_delete(self):
+        response = self.bulk('delete', [self.tender.pk, self.other_tender.pk])
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(list(Tender.objects.values_list('tender_id', flat=True)), ['T-demo'])
+        # The bill went with its tender
+        self.assertEqual(WorkflowRollup.objects.get(gr=self.gr, is_demo=False).bills, 0)
+        self.assertEqual(find_rollup_drift(), [])
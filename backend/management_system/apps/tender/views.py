@@ -4,45 +4,50 @@ from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 from rest_framework.permissions import IsAuthenticated
 from .models import Tender
 from .serializers import TenderSerializer
+from apps.previews.services import preview_validators
+from management_system.async_views import AsyncReadMixin
+from management_system.conditional import ConditionalGetMixin
+from management_system.bulk import BulkWriteMixin
+from management_system.exports import ExportMixin
+from management_system.pagination import KeysetCursorPagination
+from management_system.sparse_fields import SparseFieldsetMixin
 
-class TenderViewSet(viewsets.ModelViewSet):
+class TenderViewSet(ConditionalGetMixin, AsyncReadMixin, ExportMixin, BulkWriteMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = Tender.objects.filter(is_demo=False)  # Exclude demo data
     serializer_class = TenderSerializer
     parser_classes = [MultiPartParser, FormParser, JSONParser]
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetCursorPagination
+    export_filename = 'tenders'
+    conditional_relations = ('work', 'technical_sanction')
+    conditional_validators = (preview_validators,)
     
     def get_queryset(self):
         """Return only non-demo tenders, ensuring related Works, GRs, and Technical Sanctions are not demo
         Supports filtering by: gr, work, technical_sanction (multiple filters work together)
         """
+        # effective_is_demo/gr are denormalized from the Work -> GR chain
+        # (see apps/rollup/ancestors.py), so the filters below need no joins
         queryset = Tender.objects.filter(
-            is_demo=False,
-            work__is_demo=False,  # Also exclude tenders linked to demo works
-            work__gr__is_demo=False,  # And ensure the GR is not demo
-            technical_sanction__is_demo=False  # And ensure the TS is not demo
+            effective_is_demo=False  # Tender, Work, GR and TS are all non-demo
         ).select_related('work', 'work__gr', 'technical_sanction')
         
         # Filter by GR if 'gr' query parameter is provided
         gr_id = self.request.query_params.get('gr', None)
         if gr_id is not None:
-            queryset = queryset.filter(
-                work__gr_id=gr_id,
-                is_demo=False,
-                work__is_demo=False,
-                work__gr__is_demo=False
-            )
+            queryset = queryset.filter(gr_id=gr_id)
         
         # Filter by work if 'work' query parameter is provided
         work_id = self.request.query_params.get('work', None)
         if work_id is not None:
-            queryset = queryset.filter(work_id=work_id, is_demo=False, work__is_demo=False)
+            queryset = queryset.filter(work_id=work_id)
         
         # Filter by technical_sanction if 'technical_sanction' query parameter is provided
         ts_id = self.request.query_params.get('technical_sanction', None)
         if ts_id is not None:
-            queryset = queryset.filter(technical_sanction_id=ts_id, is_demo=False, technical_sanction__is_demo=False)
+            queryset = queryset.filter(technical_sanction_id=ts_id)
         
-        return queryset.order_by('-created_at')
+        return self.sparse_queryset(queryset.order_by('-created_at'))
     
     def create(self, request, *args, **kwargs):
         """Create a new tender"""
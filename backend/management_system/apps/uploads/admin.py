@@ -0,0 +1,13 @@
+from django.contrib import admin
+from .models import ChunkedUpload
+
+@admin.register(ChunkedUpload)
+class ChunkedUploadAdmin(admin.ModelAdmin):
+    list_display = ('filename', 'target', 'object_id', 'user', 'offset', 'size', 'updated_at')
+    list_filter = ('target',)
+    search_fields = ('filename', 'user__email')
+    readonly_fields = [field.name for field in ChunkedUpload._meta.fields]
+
+    def has_add_permission(self, request):
+        # Rows are created through the upload API (see apps/uploads/views.py)
+        return False
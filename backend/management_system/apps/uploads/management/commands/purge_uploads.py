@@ -0,0 +1,33 @@
+"""
+Django management command to delete abandoned chunked uploads.
+
+Usage:
+    python manage.py purge_uploads              # uploads idle for UPLOAD_EXPIRY_HOURS
+    python manage.py purge_uploads --hours 6
+
+Deletes the uploads nobody has written to for the given time, with their
+partial files, and partial files left without an upload. Run it
+periodically, e.g. daily from cron.
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.uploads.services import purge_stale_uploads
+
+
+class Command(BaseCommand):
+    help = 'Delete chunked uploads that were abandoned, and their partial files'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--hours',
+            type=int,
+            default=settings.UPLOAD_EXPIRY_HOURS,
+            help=f'Idle time after which an upload is abandoned (default {settings.UPLOAD_EXPIRY_HOURS})',
+        )
+
+    def handle(self, *args, **options):
+        uploads, orphans = purge_stale_uploads(options['hours'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Deleted {uploads} abandoned upload(s) and {orphans} orphaned partial file(s).'
+        ))
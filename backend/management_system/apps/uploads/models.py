@@ -0,0 +1,47 @@
+import os
+import uuid
+
+from django.conf import settings
+from django.db import models
+
+
+class ChunkedUpload(models.Model):
+    """
+    A document being uploaded in chunks (see apps/uploads/services.py).
+    Chunks are written to a partial file under UPLOAD_TEMP_DIR; on finalize the
+    file is attached to the target record and this row is deleted.
+    """
+    TARGET_GR = 'gr'
+    TARGET_BILL = 'bill'
+    TARGET_TENDER = 'tender'
+    TARGET_CHOICES = [
+        (TARGET_GR, 'GR document'),
+        (TARGET_BILL, 'Bill document'),
+        (TARGET_TENDER, 'Tender work order'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='chunked_uploads')
+    target = models.CharField(max_length=10, choices=TARGET_CHOICES, help_text="Record type the file is attached to")
+    object_id = models.PositiveBigIntegerField(help_text="ID of the GR, Bill or Tender")
+    filename = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField(help_text="Total file size in bytes")
+    offset = models.PositiveBigIntegerField(default=0, help_text="Bytes received so far")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Chunked Upload"
+        verbose_name_plural = "Chunked Uploads"
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f'{self.filename} ({self.offset}/{self.size} bytes)'
+
+    @property
+    def temp_path(self):
+        return os.path.join(settings.UPLOAD_TEMP_DIR, f'{self.id}.part')
+
+    @property
+    def is_complete(self):
+        return self.offset == self.size
@@ -0,0 +1,41 @@
+import os
+
+from django.conf import settings
+from rest_framework import serializers
+
+from .models import ChunkedUpload
+from .services import target_queryset
+
+
+class ChunkedUploadSerializer(serializers.ModelSerializer):
+    """Serializer for starting a chunked upload and reporting its progress"""
+    # Frontend-compatible field names (camelCase) for reading
+    objectId = serializers.IntegerField(source='object_id', read_only=True)
+    createdAt = serializers.DateTimeField(source='created_at', read_only=True)
+
+    # Backend field names (snake_case) for writing
+    object_id = serializers.IntegerField(write_only=True, min_value=1)
+
+    class Meta:
+        model = ChunkedUpload
+        fields = ['id', 'target', 'objectId', 'object_id', 'filename', 'size', 'offset', 'createdAt']
+        read_only_fields = ['id', 'offset']
+
+    def validate_filename(self, value):
+        # Only the name, the directory comes from the field's upload_to
+        name = os.path.basename(value.replace('\\', '/')).strip()
+        if not name:
+            raise serializers.ValidationError('A file name is required.')
+        return name
+
+    def validate_size(self, value):
+        if value < 1:
+            raise serializers.ValidationError('The file is empty.')
+        if value > settings.UPLOAD_MAX_SIZE:
+            raise serializers.ValidationError(f'Files can be at most {settings.UPLOAD_MAX_SIZE} bytes.')
+        return value
+
+    def validate(self, attrs):
+        if not target_queryset(attrs['target']).filter(pk=attrs['object_id']).exists():
+            raise serializers.ValidationError({'object_id': [f'No {attrs["target"]} with this id.']})
+        return attrs
@@ -0,0 +1,176 @@
+"""
+Chunked, resumable document uploads
+
+A client uploading a large scan over an unreliable connection:
+
+1. creates an upload for a record (target gr/bill/tender + object id) with the
+   file name and total size
+2. sends the file in chunks, each one PUT at the offset the server has
+   received so far; after a failure it asks for the offset and continues there
+3. finalizes the upload, which attaches the file to GR.document,
+   Bill.document or Tender.work_order through the field's upload_to
+
+Chunks are copied from the request stream to the partial file in small
+blocks, so no chunk is held in memory. The partial file is locked while a
+chunk is written, and the stored offset only advances by the bytes actually
+written, so a chunk cut off halfway can be resumed from where it stopped.
+"""
+import fcntl
+import os
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+
+from .models import ChunkedUpload
+
+# Upload target -> (model, file field, field that is True for demo records)
+TARGETS = {
+    ChunkedUpload.TARGET_GR: ('gr.GR', 'document', 'is_demo'),
+    ChunkedUpload.TARGET_BILL: ('bill.Bill', 'document', 'effective_is_demo'),
+    ChunkedUpload.TARGET_TENDER: ('tender.Tender', 'work_order', 'effective_is_demo'),
+}
+
+BLOCK_SIZE = 64 * 1024
+
+
+class UploadError(Exception):
+    """A chunk or finalize request that does not fit the upload's state"""
+
+    def __init__(self, message, offset=None):
+        super().__init__(message)
+        self.offset = offset
+
+
+class UploadConflict(UploadError):
+    """The chunk does not start at the received offset, or another chunk is being written"""
+
+
+class PartialFile(File):
+    """The completed partial file; storages move it into place instead of copying it"""
+
+    def temporary_file_path(self):
+        return self.file.name
+
+
+def target_queryset(target):
+    """Non-demo records of an upload target, like the API's ViewSets"""
+    label, _, demo_field = TARGETS[target]
+    return apps.get_model(label).objects.filter(**{demo_field: False})
+
+
+def write_chunk(upload, offset, stream, length):
+    """
+    Write `length` bytes read from `stream` at `offset` of the partial file.
+
+    Returns:
+        The upload's new offset. It is smaller than offset + length when the
+        stream ended early (the client disconnected).
+    """
+    if offset != upload.offset:
+        raise UploadConflict(f'Expected a chunk at offset {upload.offset}', offset=upload.offset)
+    if offset + length > upload.size:
+        raise UploadError(f'Chunk ends after the declared size of {upload.size} bytes', offset=upload.offset)
+
+    os.makedirs(settings.UPLOAD_TEMP_DIR, exist_ok=True)
+    fd = os.open(upload.temp_path, os.O_RDWR | os.O_CREAT, 0o600)
+    with os.fdopen(fd, 'r+b') as partial:
+        try:
+            fcntl.flock(partial, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            raise UploadConflict('Another chunk of this upload is being written', offset=upload.offset)
+        # Drop the bytes of an interrupted chunk that were never recorded
+        partial.seek(offset)
+        partial.truncate()
+
+        written = 0
+        try:
+            while written < length:
+                data = stream.read(min(BLOCK_SIZE, length - written))
+                if not data:
+                    break
+                partial.write(data)
+                written += len(data)
+        except OSError:
+            # Client went away: keep what arrived
+            pass
+        partial.flush()
+        os.fsync(partial.fileno())
+
+        # Advance the offset while the file is still locked
+        new_offset = offset + written
+        updated = ChunkedUpload.objects.filter(pk=upload.pk, offset=offset).update(
+            offset=new_offset, updated_at=timezone.now()
+        )
+    if not updated:
+        upload.refresh_from_db()
+        raise UploadConflict(f'Expected a chunk at offset {upload.offset}', offset=upload.offset)
+    upload.offset = new_offset
+    return new_offset
+
+
+def finalize_upload(upload):
+    """
+    Attach the completed file to its record and delete the upload.
+
+    Returns:
+        The updated record
+    """
+    with transaction.atomic():
+        # Lock the upload so that it is finalized only once
+        upload = ChunkedUpload.objects.select_for_update().filter(pk=upload.pk).first()
+        if upload is None:
+            raise UploadError('Upload was already finalized or aborted')
+        if not upload.is_complete:
+            raise UploadError(
+                f'Upload is incomplete: {upload.offset} of {upload.size} bytes received', offset=upload.offset
+            )
+        _, field_name, _ = TARGETS[upload.target]
+        instance = target_queryset(upload.target).filter(pk=upload.object_id).first()
+        if instance is None:
+            raise UploadError('The record this upload belongs to no longer exists')
+
+        with open(upload.temp_path, 'rb') as partial:
+            # Stored under the field's upload_to, saving the record
+            getattr(instance, field_name).save(upload.filename, PartialFile(partial), save=True)
+        discard_partial_file(upload)
+        upload.delete()
+    return instance
+
+
+def discard_partial_file(upload):
+    # Call before upload.delete(), which clears the id the path is built from
+    try:
+        os.remove(upload.temp_path)
+    except FileNotFoundError:
+        pass
+
+
+def purge_stale_uploads(hours):
+    """
+    Delete uploads not written to for `hours` hours with their partial files,
+    and partial files left without an upload (e.g. deleted in the admin)
+
+    Returns:
+        (uploads deleted, orphaned partial files deleted)
+    """
+    cutoff = timezone.now() - timedelta(hours=hours)
+    stale = list(ChunkedUpload.objects.filter(updated_at__lt=cutoff))
+    for upload in stale:
+        discard_partial_file(upload)
+        upload.delete()
+
+    orphans = 0
+    if os.path.isdir(settings.UPLOAD_TEMP_DIR):
+        known = {f'{pk}.part' for pk in ChunkedUpload.objects.values_list('pk', flat=True)}
+        for entry in os.scandir(settings.UPLOAD_TEMP_DIR):
+            if (
+                entry.name.endswith('.part') and entry.name not in known
+                and entry.stat().st_mtime < cutoff.timestamp()
+            ):
+                os.remove(entry.path)
+                orphans += 1
+    return len(stale), orphans
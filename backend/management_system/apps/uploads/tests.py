@@ -0,0 +1,197 @@
+import datetime
+import io
+import os
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.gr.models import GR
+from apps.rollup import services as rollup_services
+from apps.uploads.models import ChunkedUpload
+from apps.uploads.services import purge_stale_uploads, write_chunk
+from authentication.models import User
+
+
+class InterruptedStream(io.BytesIO):
+    """A request body whose client disconnects after `sent` bytes"""
+
+    def __init__(self, data, sent):
+        super().__init__(data[:sent])
+
+    def read(self, size=-1):
+        data = super().read(size)
+        if not data:
+            raise OSError('Connection reset by peer')
+        return data
+
+
+class ChunkedUploadTests(TestCase):
+    """/api/uploads/: create, PUT chunks, finalize (apps/uploads)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='upload@example.com', username='upload', password='x', first_name='U', last_name='P'
+        )
+        cls.gr = GR.objects.create(gr_number='GR/1', date=datetime.date(2025, 4, 1))
+        cls.demo_gr = GR.objects.create(gr_number='Demo', date=datetime.date(2025, 4, 1), is_demo=True)
+
+    def setUp(self):
+        # GRs marked by setUpTestData, whose transaction never commits
+        rollup_services._pending.rollups = None
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        self.temp_dir = os.path.join(self.media_root, '.partial')
+        media = override_settings(MEDIA_ROOT=self.media_root, UPLOAD_TEMP_DIR=self.temp_dir)
+        media.enable()
+        self.addCleanup(media.disable)
+
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.data = os.urandom(1000)
+
+    def start(self, filename='scan.pdf', **fields):
+        response = self.client.post(
+            '/api/uploads/',
+            {'target': 'gr', 'object_id': self.gr.pk, 'filename': filename, 'size': len(self.data), **fields},
+            format='json',
+        )
+        self.assertEqual(response.status_code, 201, response.data)
+        return response.data
+
+    def put(self, upload_id, offset, chunk):
+        return self.client.put(
+            f'/api/uploads/{upload_id}/?offset={offset}', chunk, content_type='application/octet-stream'
+        )
+
+    def finalize(self, upload_id):
+        return self.client.post(f'/api/uploads/{upload_id}/finalize/')
+
+    def test_chunks_are_attached_to_the_record(self):
+        upload = self.start()
+        self.assertEqual(upload['offset'], 0)
+        for offset in (0, 400, 800):
+            response = self.put(upload['id'], offset, self.data[offset:offset + 400])
+            self.assertEqual(response.status_code, 200, response.data)
+            self.assertEqual(response.data['offset'], min(offset + 400, len(self.data)))
+
+        response = self.finalize(upload['id'])
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual((response.data['target'], response.data['objectId']), ('gr', self.gr.pk))
+
+        gr = GR.objects.get(pk=self.gr.pk)
+        self.assertEqual(os.path.basename(gr.document.name), 'scan.pdf')
+        with gr.document.open('rb') as document:
+            self.assertEqual(document.read(), self.data)
+        self.assertIn(gr.document.name.replace(' ', '%20'), response.data['url'])
+        # The upload and its partial file are gone
+        self.assertFalse(ChunkedUpload.objects.exists())
+        self.assertEqual(os.listdir(self.temp_dir), [])
+        self.assertEqual(self.finalize(upload['id']).status_code, 404)
+
+    def test_chunk_at_the_wrong_offset_is_a_conflict(self):
+        upload = self.start()
+        self.assertEqual(self.put(upload['id'], 0, self.data[:100]).status_code, 200)
+        for offset in (0, 200):
+            with self.subTest(offset=offset):
+                response = self.put(upload['id'], offset, self.data[offset:offset + 100])
+                self.assertEqual(response.status_code, 409)
+                self.assertEqual(response.data['offset'], 100)
+        record = ChunkedUpload.objects.get()
+        self.assertEqual(record.offset, 100)
+        with open(record.temp_path, 'rb') as partial:
+            self.assertEqual(partial.read(), self.data[:100])
+
+        # Past the declared size, or without an offset
+        response = self.put(upload['id'], 100, self.data[100:] + b'extra')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['offset'], 100)
+        self.assertEqual(self.client.put(f'/api/uploads/{upload["id"]}/', b'x', content_type='application/octet-stream').status_code, 400)
+
+    def test_resume_after_an_interrupted_chunk(self):
+        upload = ChunkedUpload.objects.get(pk=self.start()['id'])
+        # The client disconnects 300 bytes into a 600 byte chunk
+        self.assertEqual(write_chunk(upload, 0, InterruptedStream(self.data, 300), 600), 300)
+        self.assertEqual(self.client.get(f'/api/uploads/{upload.pk}/').data['offset'], 300)
+
+        response = self.put(upload.pk, 300, self.data[300:])
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data['offset'], len(self.data))
+        self.assertEqual(self.finalize(upload.pk).status_code, 200)
+        with GR.objects.get(pk=self.gr.pk).document.open('rb') as document:
+            self.assertEqual(document.read(), self.data)
+
+    def test_rewritten_chunk_replaces_unrecorded_bytes(self):
+        upload = ChunkedUpload.objects.get(pk=self.start()['id'])
+        self.assertEqual(write_chunk(upload, 0, io.BytesIO(self.data[:500]), 500), 500)
+        # Bytes written past the recorded offset by a chunk that never finished, beyond the end
+        with open(upload.temp_path, 'ab') as partial:
+            partial.write(b'garbage' * 100)
+        self.assertEqual(write_chunk(upload, 500, io.BytesIO(self.data[500:]), 500), len(self.data))
+        with open(upload.temp_path, 'rb') as partial:
+            self.assertEqual(partial.read(), self.data)
+
+    def test_incomplete_upload_is_not_finalized(self):
+        upload = self.start()
+        self.assertEqual(self.put(upload['id'], 0, self.data[:999]).status_code, 200)
+        response = self.finalize(upload['id'])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['offset'], 999)
+        self.assertIn('incomplete', response.data['error'])
+        self.assertFalse(GR.objects.get(pk=self.gr.pk).document)
+        self.assertTrue(ChunkedUpload.objects.filter(pk=upload['id']).exists())
+
+    def test_filename_is_reduced_to_its_base_name(self):
+        for filename, expected in (
+            ('../../etc/passwd', 'passwd'),
+            ('C:\\Users\\clerk\\GR scan.pdf', 'GR scan.pdf'),
+            ('  report.pdf  ', 'report.pdf'),
+        ):
+            with self.subTest(filename=filename):
+                self.assertEqual(self.start(filename=filename)['filename'], expected)
+
+        for filename in ('uploads/', '..\\', '   '):
+            with self.subTest(filename=filename):
+                response = self.client.post(
+                    '/api/uploads/',
+                    {'target': 'gr', 'object_id': self.gr.pk, 'filename': filename, 'size': 10},
+                    format='json',
+                )
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('filename', response.data)
+
+    def test_demo_and_missing_records_are_rejected(self):
+        for object_id in (self.demo_gr.pk, 0, 999999):
+            with self.subTest(object_id=object_id):
+                response = self.client.post(
+                    '/api/uploads/',
+                    {'target': 'gr', 'object_id': object_id, 'filename': 'scan.pdf', 'size': 10},
+                    format='json',
+                )
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('object_id', response.data)
+
+    def test_purge_stale_uploads(self):
+        stale = ChunkedUpload.objects.get(pk=self.start()['id'])
+        fresh = ChunkedUpload.objects.get(pk=self.start()['id'])
+        for upload in (stale, fresh):
+            write_chunk(upload, 0, io.BytesIO(self.data[:10]), 10)
+        ChunkedUpload.objects.filter(pk=stale.pk).update(updated_at=timezone.now() - timedelta(hours=3))
+
+        # Partial files without an upload: one abandoned, one possibly still being created
+        old_orphan = os.path.join(self.temp_dir, 'old.part')
+        new_orphan = os.path.join(self.temp_dir, 'new.part')
+        for path in (old_orphan, new_orphan):
+            with open(path, 'wb') as file:
+                file.write(b'x')
+        three_hours_ago = time.time() - 3 * 3600
+        os.utime(old_orphan, (three_hours_ago, three_hours_ago))
+
+        self.assertEqual(purge_stale_uploads(hours=2), (1, 1))
+        self.assertEqual(list(ChunkedUpload.objects.values_list('pk', flat=True)), [fresh.pk])
+        self.assertEqual(sorted(os.listdir(self.temp_dir)), sorted([os.path.basename(fresh.temp_path), 'new.part']))
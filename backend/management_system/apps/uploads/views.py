@@ -0,0 +1,91 @@
+# apps/uploads/views.py
+from django.conf import settings
+from rest_framework import mixins, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from .models import ChunkedUpload
+from .serializers import ChunkedUploadSerializer
+from .services import (
+    TARGETS,
+    UploadConflict,
+    UploadError,
+    discard_partial_file,
+    finalize_upload,
+    write_chunk,
+)
+
+
+class ChunkedUploadViewSet(mixins.CreateModelMixin,
+                           mixins.RetrieveModelMixin,
+                           mixins.ListModelMixin,
+                           viewsets.GenericViewSet):
+    """
+    Resumable uploads of GR documents, bill documents and tender work orders
+    (see apps/uploads/services.py):
+
+    - POST   /api/uploads/                 {"target": "gr"|"bill"|"tender", "object_id", "filename", "size"}
+    - PUT    /api/uploads/{id}/?offset=N   raw bytes of the next chunk (Content-Length required)
+    - GET    /api/uploads/{id}/            progress; "offset" is where to resume
+    - POST   /api/uploads/{id}/finalize/   attach the completed file to the record
+    - DELETE /api/uploads/{id}/            abort
+
+    GET /api/uploads/ lists the current user's unfinished uploads.
+    """
+    serializer_class = ChunkedUploadSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = None
+
+    def get_queryset(self):
+        return ChunkedUpload.objects.filter(user=self.request.user)
+
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user)
+
+    def update(self, request, *args, **kwargs):
+        """Write one chunk, streamed from the request body (request.data is never read)"""
+        upload = self.get_object()
+        offset = request.query_params.get('offset', '')
+        if not offset.isdigit():
+            return Response(
+                {'error': 'offset query parameter is required', 'offset': upload.offset},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        length = request.META.get('CONTENT_LENGTH', '')
+        if not length.isdigit():
+            return Response({'error': 'Content-Length header is required'}, status=status.HTTP_411_LENGTH_REQUIRED)
+        length = int(length)
+        if length > settings.UPLOAD_MAX_CHUNK_SIZE:
+            return Response(
+                {'error': f'Chunks can be at most {settings.UPLOAD_MAX_CHUNK_SIZE} bytes'},
+                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+            )
+
+        try:
+            write_chunk(upload, int(offset), request.stream, length)
+        except UploadConflict as e:
+            return Response({'error': str(e), 'offset': e.offset}, status=status.HTTP_409_CONFLICT)
+        except UploadError as e:
+            return Response({'error': str(e), 'offset': e.offset}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(self.get_serializer(upload).data)
+
+    @action(detail=True, methods=['post'])
+    def finalize(self, request, *args, **kwargs):
+        upload = self.get_object()
+        try:
+            instance = finalize_upload(upload)
+        except UploadError as e:
+            return Response({'error': str(e), 'offset': e.offset}, status=status.HTTP_400_BAD_REQUEST)
+        field = getattr(instance, TARGETS[upload.target][1])
+        return Response({
+            'target': upload.target,
+            'objectId': instance.pk,
+            'url': request.build_absolute_uri(field.url),
+        })
+
+    def destroy(self, request, *args, **kwargs):
+        upload = self.get_object()
+        discard_partial_file(upload)
+        upload.delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
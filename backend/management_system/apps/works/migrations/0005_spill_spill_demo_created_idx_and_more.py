@@ -0,0 +1,34 @@
+# Generated by Django 5.2.7 on 2026-10-16 23:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gr', '0006_gr_gr_demo_date_idx'),
+        ('works', '0004_work_cancel_details_work_cancel_reason_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='spill',
+            index=models.Index(fields=['is_demo', '-created_at', '-id'], name='spill_demo_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='spill',
+            index=models.Index(fields=['work', 'is_demo'], name='spill_work_demo_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='work',
+            index=models.Index(fields=['is_demo', '-created_at', '-id'], name='work_demo_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='work',
+            index=models.Index(fields=['gr', 'is_demo'], name='work_gr_demo_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='work',
+            index=models.Index(condition=models.Q(('is_cancelled', False), ('is_demo', False)), fields=['gr'], name='work_live_active_gr_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-17 00:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('works', '0005_spill_spill_demo_created_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='spill',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -27,6 +27,18 @@ class Work(models.Model):
         verbose_name = "Work"
         verbose_name_plural = "Works"
         ordering = ['-created_at']
+        indexes = [
+            # List endpoint: filter on is_demo, newest first (matches cursor pagination)
+            models.Index(fields=['is_demo', '-created_at', '-id'], name='work_demo_created_idx'),
+            # ?gr= filter and joins from GR
+            models.Index(fields=['gr', 'is_demo'], name='work_gr_demo_idx'),
+            # Dashboard counts only look at live, non-cancelled works
+            models.Index(
+                fields=['gr'],
+                name='work_live_active_gr_idx',
+                condition=models.Q(is_demo=False, is_cancelled=False),
+            ),
+        ]
     
     def __str__(self):
         return f"{self.name_of_work} (GR: {self.gr.gr_number})"
@@ -50,10 +62,17 @@ class Spill(models.Model):
     ara = models.DecimalField(max_digits=15, decimal_places=2, help_text="Additional Revised Approval")
     is_demo = models.BooleanField(default=False, verbose_name="Is Demo", help_text="Mark this record as demo data for testing")
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         verbose_name = "Spill (ARA)"
         verbose_name_plural = "Spills (ARA)"
+        indexes = [
+            # List endpoint: filter on is_demo, newest first (matches cursor pagination)
+            models.Index(fields=['is_demo', '-created_at', '-id'], name='spill_demo_created_idx'),
+            # ?work= filter and joins from Work
+            models.Index(fields=['work', 'is_demo'], name='spill_work_demo_idx'),
+        ]
     
     def __str__(self):
         return f"Spill {self.ara} for {self.work.name_of_work}"
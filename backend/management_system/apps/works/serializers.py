@@ -1,5 +1,6 @@
 # apps/works/serializers.py
 from rest_framework import serializers
+from management_system.sparse_fields import DynamicFieldsMixin
 from .models import Work, Spill
 from apps.gr.models import GR
 from django.core.exceptions import ValidationError as DjangoValidationError
@@ -57,7 +58,7 @@ class SpillSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at']
 
 
-class WorkSerializer(serializers.ModelSerializer):
+class WorkSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     # For reads
     workName = serializers.CharField(source='name_of_work', read_only=True)
     workDate = serializers.DateField(source='date', read_only=True) 
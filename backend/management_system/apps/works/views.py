@@ -5,13 +5,19 @@ from rest_framework.permissions import IsAuthenticated
 from decimal import Decimal
 from .models import Work, Spill
 from .serializers import WorkSerializer, SpillSerializer
+from management_system.async_views import AsyncReadMixin
+from management_system.conditional import ConditionalGetMixin
+from management_system.pagination import KeysetCursorPagination
+from management_system.sparse_fields import SparseFieldsetMixin
 
 
-class WorkViewSet(viewsets.ModelViewSet):
+class WorkViewSet(ConditionalGetMixin, AsyncReadMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     """ViewSet for Work CRUD operations"""
     queryset = Work.objects.filter(is_demo=False)  # Exclude demo data
     serializer_class = WorkSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetCursorPagination
+    conditional_relations = ('spills',)
 
     def get_queryset(self):
         """Return only non-demo works, ensuring related GRs are not demo
@@ -29,13 +35,14 @@ class WorkViewSet(viewsets.ModelViewSet):
             # Filter works by the specified GR ID (and ensure GR is not demo)
             queryset = queryset.filter(gr_id=gr_id, gr__is_demo=False, is_demo=False)
         
-        return queryset.order_by('-created_at')
+        return self.sparse_queryset(queryset.order_by('-created_at'))
 
 
-class SpillViewSet(viewsets.ModelViewSet):
+class SpillViewSet(ConditionalGetMixin, AsyncReadMixin, viewsets.ModelViewSet):
     queryset = Spill.objects.filter(is_demo=False)  # Exclude demo data
     serializer_class = SpillSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetCursorPagination
 
     def get_queryset(self):
         """
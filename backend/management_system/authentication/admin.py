@@ -1,6 +1,8 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from .models import User
+from django.utils import timezone
+from .authentication import invalidate_cached_user
+from .models import OutboxEmail, User
 
 
 @admin.register(User)
@@ -29,12 +31,39 @@ class UserAdmin(BaseUserAdmin):
     
     def approve_users(self, request, queryset):
         """Admin action to approve selected users"""
+        user_ids = list(queryset.values_list('pk', flat=True))
         updated = queryset.update(is_approved=True)
+        # update() sends no post_save signal
+        for user_id in user_ids:
+            invalidate_cached_user(user_id)
         self.message_user(request, f'{updated} user(s) approved successfully.')
     approve_users.short_description = "Approve selected users"
     
     def disapprove_users(self, request, queryset):
         """Admin action to disapprove selected users"""
+        user_ids = list(queryset.values_list('pk', flat=True))
         updated = queryset.update(is_approved=False)
+        # update() sends no post_save signal
+        for user_id in user_ids:
+            invalidate_cached_user(user_id)
         self.message_user(request, f'{updated} user(s) disapproved successfully.')
     disapprove_users.short_description = "Disapprove selected users"
+
+
+@admin.register(OutboxEmail)
+class OutboxEmailAdmin(admin.ModelAdmin):
+    """Queued emails; delivered by the send_outbox management command"""
+    list_display = ['subject', 'status', 'attempts', 'next_attempt_at', 'created_at', 'sent_at']
+    list_filter = ['status', 'created_at']
+    search_fields = ['subject', 'last_error']
+    readonly_fields = ['created_at', 'sent_at', 'last_error']
+    ordering = ['-created_at']
+    actions = ['retry_emails']
+    
+    def retry_emails(self, request, queryset):
+        """Admin action to send failed emails again"""
+        updated = queryset.exclude(status=OutboxEmail.STATUS_SENT).update(
+            status=OutboxEmail.STATUS_PENDING, attempts=0, next_attempt_at=timezone.now()
+        )
+        self.message_user(request, f'{updated} email(s) queued for another attempt.')
+    retry_emails.short_description = "Retry selected emails"
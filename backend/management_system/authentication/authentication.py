@@ -0,0 +1,163 @@
+"""
+Cached user lookup for JWT authentication
+
+simplejwt's JWTAuthentication loads the user row on every request; a page of
+the frontend fires several API calls at once, each repeating the same lookup.
+CachedJWTAuthentication resolves the user through two cache layers instead:
+
+1. a bounded in-process LRU (AUTH_USER_CACHE_SIZE entries)
+2. Django's cache (shared between the server processes when REDIS_URL is
+   set), entries expire after AUTH_USER_CACHE_TIMEOUT seconds
+
+Only CACHED_USER_FIELDS are cached, never the password hash: request.user is
+built from them as a deferred instance, which loads any other field from the
+database when it is accessed and saves only the fields it has.
+
+Invalidation has to reach every server process, so settings.py enables the
+class (AUTH_USER_CACHE) by default only with REDIS_URL.
+
+Both layers are keyed by the user id and the user's version stamp. The stamp
+lives in Django's cache and is replaced whenever the user is saved, deleted or
+bulk-updated (see invalidate_cached_user), so older entries simply stop
+matching. Checking the stamp is one cache read per request, no database query.
+"""
+import threading
+import uuid
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import router, transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+VERSION_KEY = 'auth:user-version:{}'
+USER_KEY = 'auth:user:{}:{}'
+
+# What authentication, the permission checks and UserSerializer read
+CACHED_USER_FIELDS = (
+    'id', 'email', 'username', 'first_name', 'last_name', 'date_joined',
+    'is_active', 'is_staff', 'is_superuser', 'is_approved',
+)
+
+
+class LRUCache:
+    """Small thread-safe LRU mapping, shared by the threads of one process"""
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+local_users = LRUCache(getattr(settings, 'AUTH_USER_CACHE_SIZE', 1000))
+
+
+def user_version(user_id):
+    """Current version stamp of a user, created on first use"""
+    key = VERSION_KEY.format(user_id)
+    version = cache.get(key)
+    if version is None:
+        # add() keeps the stamp another process may have just created. Stamps
+        # expire too, which bounds staleness when CACHES is process-local.
+        cache.add(key, uuid.uuid4().hex, getattr(settings, 'AUTH_USER_CACHE_TIMEOUT', 300))
+        version = cache.get(key)
+    return version
+
+
+def _cached_field_names(user_model):
+    """CACHED_USER_FIELDS in the model's field order, as Model.from_db() expects them"""
+    return [field.attname for field in user_model._meta.concrete_fields if field.attname in CACHED_USER_FIELDS]
+
+
+def _load_user_fields(user_model, user_id):
+    """CACHED_USER_FIELDS of the user as a tuple, None if it does not exist"""
+    fields = _cached_field_names(user_model)
+    if api_settings.CHECK_REVOKE_TOKEN:
+        fields.insert(0, 'password')
+    row = user_model.objects.filter(**{api_settings.USER_ID_FIELD: user_id}).values_list(*fields).first()
+    if row is None or not api_settings.CHECK_REVOKE_TOKEN:
+        return row
+    # Tokens carry this hash of the password hash, the hash itself is not cached
+    return (get_md5_hash_password(row[0]), *row[1:])
+
+
+def get_cached_user(user_model, user_id):
+    """
+    Return the user with this id from the caches or the database,
+    or None if it does not exist
+    """
+    version = user_version(user_id)
+    local_key = (user_id, version)
+    row = local_users.get(local_key)
+    if row is None:
+        shared_key = USER_KEY.format(user_id, version)
+        row = cache.get(shared_key)
+        if row is None:
+            row = _load_user_fields(user_model, user_id)
+            if row is None:
+                return None
+            cache.set(shared_key, row, getattr(settings, 'AUTH_USER_CACHE_TIMEOUT', 300))
+        local_users.set(local_key, row)
+
+    # Each request gets its own instance, so request.user can be modified safely
+    revoke_hash = None
+    if api_settings.CHECK_REVOKE_TOKEN:
+        revoke_hash, *row = row
+    user = user_model.from_db(router.db_for_read(user_model), _cached_field_names(user_model), row)
+    user.revoke_hash = revoke_hash
+    return user
+
+
+def invalidate_cached_user(user_id):
+    """
+    Replace the user's version stamp once the current transaction commits, so
+    no request can cache the row as it was before the change
+    """
+    transaction.on_commit(lambda: cache.delete(VERSION_KEY.format(user_id)))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication resolving the token's user through get_cached_user()"""
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+        user = get_cached_user(self.user_model, user_id)
+        if user is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != user.revoke_hash:
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+        return user
@@ -0,0 +1,157 @@
+"""
+Refresh token blacklist lookups without a database query per refresh
+
+simplejwt checks every refresh token against the token_blacklist tables
+before accepting it. BlacklistChecker answers that check from memory:
+
+- a bloom filter of the blacklisted jtis, built from the database on first
+  use and rebuilt whenever the blacklist generation changes (rows removed,
+  compact_token_blacklist) or the recent set grows too large
+- a recent-jti set of the tokens blacklisted since the filter was built: the
+  ones blacklisted by this process, plus one cache key per jti written by
+  every process
+
+A jti that is neither recent nor in the filter is not blacklisted. The
+database is only consulted when the filter answers "maybe" (a blacklisted
+token, or the rare false positive).
+
+Other processes only learn about new blacklist entries through Django's
+cache, so the checker is used when TOKEN_BLACKLIST_FILTER is on, which is the
+default when REDIS_URL is set. Otherwise tokens are checked with simplejwt's
+database lookup.
+"""
+import hashlib
+import math
+import threading
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+from rest_framework_simplejwt.tokens import RefreshToken
+
+GENERATION_KEY = 'auth:blacklist-generation'
+RECENT_KEY = 'auth:blacklisted:{}:{}'
+
+
+class BloomFilter:
+    """Bit array answering "maybe present" / "definitely absent" for strings"""
+
+    def __init__(self, capacity, error_rate=0.01):
+        capacity = max(capacity, 1)
+        self.size = max(int(-capacity * math.log(error_rate) / math.log(2) ** 2), 8)
+        self.hash_count = max(round(self.size / capacity * math.log(2)), 1)
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, value):
+        # Double hashing: position i = h1 + i * h2
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hash_count))
+
+    def add(self, value):
+        for position in self._positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, value):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+
+
+class BlacklistChecker:
+    """Per-process blacklist filter, see the module docstring"""
+
+    def __init__(self):
+        self.generation = None
+        self.filter = None
+        self.recent = set()
+        self._lock = threading.Lock()
+
+    def is_blacklisted(self, jti):
+        # Read the filter once: record() or another thread may replace it meanwhile
+        bloom = self.filter
+        values = cache.get_many([GENERATION_KEY, RECENT_KEY.format(self.generation, jti)])
+        generation = values.get(GENERATION_KEY)
+        if bloom is None or generation is None or generation != self.generation:
+            bloom = self.rebuild(stale=bloom)
+        elif RECENT_KEY.format(generation, jti) in values:
+            return True
+
+        if jti in self.recent:
+            return True
+        if jti not in bloom:
+            return False
+        return BlacklistedToken.objects.filter(token__jti=jti).exists()
+
+    def rebuild(self, stale=None):
+        """
+        Load the unexpired blacklisted jtis from the database into a new filter
+        and return it. Threads that found the same stale filter wait for the
+        first one's rebuild instead of repeating it.
+        """
+        with self._lock:
+            # Take the generation before reading, so entries added meanwhile
+            # are found through their recent keys
+            generation = cache.get(GENERATION_KEY)
+            if generation is None:
+                cache.add(GENERATION_KEY, uuid.uuid4().hex, timeout=None)
+                generation = cache.get(GENERATION_KEY)
+            if self.filter is not None and self.filter is not stale and self.generation == generation:
+                return self.filter
+            jtis = list(
+                BlacklistedToken.objects.filter(token__expires_at__gt=timezone.now())
+                .values_list('token__jti', flat=True)
+            )
+            bloom = BloomFilter(
+                max(len(jtis) * 2, getattr(settings, 'TOKEN_BLACKLIST_RECENT_SIZE', 10000)),
+                getattr(settings, 'TOKEN_BLACKLIST_FILTER_ERROR_RATE', 0.01),
+            )
+            for jti in jtis:
+                bloom.add(jti)
+            self.filter = bloom
+            self.recent = set()
+            self.generation = generation
+            return bloom
+
+    def record(self, jti, expires_at):
+        """Remember a newly blacklisted token in this process and in the cache"""
+        # Under the lock, so a rebuild in progress cannot drop the jti
+        with self._lock:
+            self.recent.add(jti)
+            if len(self.recent) > getattr(settings, 'TOKEN_BLACKLIST_RECENT_SIZE', 10000):
+                # Fold the recent tokens into a new filter on the next check
+                self.filter = None
+        generation = cache.get(GENERATION_KEY)
+        timeout = int((expires_at - timezone.now()).total_seconds())
+        if generation is not None and timeout > 0:
+            cache.set(RECENT_KEY.format(generation, jti), True, timeout)
+
+    def invalidate(self):
+        """Make every process rebuild its filter, e.g. after blacklist rows were deleted"""
+        cache.set(GENERATION_KEY, uuid.uuid4().hex, timeout=None)
+
+
+blacklist_checker = BlacklistChecker()
+
+
+def record_blacklisted_token(jti, expires_at):
+    transaction.on_commit(lambda: blacklist_checker.record(jti, expires_at))
+
+
+def invalidate_blacklist():
+    transaction.on_commit(blacklist_checker.invalidate)
+
+
+class FilteredRefreshToken(RefreshToken):
+    """RefreshToken checking the blacklist through blacklist_checker when TOKEN_BLACKLIST_FILTER is on"""
+
+    def check_blacklist(self):
+        if not getattr(settings, 'TOKEN_BLACKLIST_FILTER', False):
+            return super().check_blacklist()
+        if blacklist_checker.is_blacklisted(self.payload[api_settings.JTI_CLAIM]):
+            raise TokenError(_("Token is blacklisted"))
@@ -0,0 +1,76 @@
+"""
+Django management command to remove expired tokens from the token blacklist tables.
+
+Usage:
+    python manage.py compact_token_blacklist                  # compact once (e.g. from cron)
+    python manage.py compact_token_blacklist --interval 3600  # keep running, compact every hour
+    python manage.py compact_token_blacklist --batch-size 500
+
+Like simplejwt's flushexpiredtokens, it deletes the outstanding tokens that
+have expired together with their blacklist entries - an expired token is
+rejected anyway. Rows are deleted in batches, each in its own transaction, so
+the tables are never locked for long. Afterwards the in-memory blacklist
+filters (see authentication/blacklist.py) are rebuilt without the removed
+tokens.
+"""
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+
+from authentication.blacklist import invalidate_blacklist
+
+
+class Command(BaseCommand):
+    help = 'Delete expired outstanding/blacklisted tokens in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval',
+            type=float,
+            help='Keep running and compact every INTERVAL seconds',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Tokens deleted per transaction (default 1000)',
+        )
+
+    def handle(self, *args, **options):
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        while not self.stopping:
+            close_old_connections()
+            deleted = self.compact(options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} expired token(s).'))
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
+
+    def compact(self, batch_size):
+        now = timezone.now()
+        deleted = 0
+        while not self.stopping:
+            pks = list(
+                OutstandingToken.objects.filter(expires_at__lte=now)
+                .order_by('pk').values_list('pk', flat=True)[:batch_size]
+            )
+            if not pks:
+                break
+            with transaction.atomic():
+                # Cascades to the BlacklistedToken rows
+                OutstandingToken.objects.filter(pk__in=pks).delete()
+            deleted += len(pks)
+        if deleted:
+            invalidate_blacklist()
+        return deleted
+
+    def stop(self, signum, frame):
+        # Finish the current batch, then exit
+        self.stopping = True
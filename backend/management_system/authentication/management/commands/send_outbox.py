@@ -0,0 +1,78 @@
+"""
+Django management command to deliver the queued outbox emails.
+
+Usage:
+    python manage.py send_outbox                   # run as a worker, polling every 5 seconds
+    python manage.py send_outbox --once            # send everything that is due, then exit
+    python manage.py send_outbox --interval 30 --batch-size 100
+
+Mails are sent over one mail backend connection (EMAIL_BACKEND), reused for
+as long as there is work and closed while the outbox is idle. Failed mails
+are retried with exponential backoff (see authentication/outbox.py).
+"""
+import signal
+import time
+
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from authentication.outbox import send_due_emails
+
+
+class Command(BaseCommand):
+    help = 'Send queued outbox emails (runs as a polling worker unless --once is given)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Send all due emails and exit instead of polling',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5,
+            help='Seconds to wait between polls when the outbox is empty (default 5)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=50,
+            help='Emails claimed and sent per batch (default 50)',
+        )
+
+    def handle(self, *args, **options):
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        connection = get_connection()
+        total_sent = total_failed = 0
+        if not options['once']:
+            self.stdout.write('Outbox worker started.')
+        try:
+            while not self.stopping:
+                # Long-running process: drop database connections past CONN_MAX_AGE
+                close_old_connections()
+                sent, failed = send_due_emails(connection, batch_size=options['batch_size'])
+                total_sent += sent
+                total_failed += failed
+                if sent or failed:
+                    self.stdout.write(f'Sent {sent} email(s), {failed} failed.')
+                    continue
+                # Nothing due: release the SMTP connection while idle
+                connection.close()
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+        finally:
+            connection.close()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Outbox worker stopped: {total_sent} sent, {total_failed} failed.'
+        ))
+
+    def stop(self, signum, frame):
+        # Finish the current batch, then exit
+        self.stopping = True
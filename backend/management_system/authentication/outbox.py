@@ -0,0 +1,92 @@
+"""
+Email outbox
+
+queue_email() stores a message as an OutboxEmail row instead of talking to the
+SMTP server during the request. The send_outbox management command delivers
+the queued mails in batches over one reused backend connection; a failed mail
+is retried with exponential backoff until EMAIL_OUTBOX_MAX_ATTEMPTS is reached.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage
+from django.db import transaction
+from django.utils import timezone
+
+from .models import OutboxEmail
+
+logger = logging.getLogger(__name__)
+
+
+def queue_email(subject, message, recipient_list, from_email=None):
+    """Add a mail to the outbox; it is sent once the current transaction commits"""
+    return OutboxEmail.objects.create(
+        subject=subject,
+        body=message,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        recipients=list(recipient_list),
+    )
+
+
+def retry_delay(attempts):
+    """Backoff before the next attempt: base, 2x base, 4x base, ... capped"""
+    base = getattr(settings, 'EMAIL_OUTBOX_RETRY_SECONDS', 60)
+    cap = getattr(settings, 'EMAIL_OUTBOX_MAX_RETRY_SECONDS', 3600)
+    return timedelta(seconds=min(base * 2 ** (attempts - 1), cap))
+
+
+def send_due_emails(connection, batch_size=50):
+    """
+    Send one batch of due outbox mails over `connection` (an open or openable
+    mail backend). The rows stay locked while they are sent, so several workers
+    can run side by side on PostgreSQL.
+
+    Returns:
+        (sent count, failed count) - 0, 0 when nothing was due
+    """
+    now = timezone.now()
+    max_attempts = getattr(settings, 'EMAIL_OUTBOX_MAX_ATTEMPTS', 5)
+    sent = failed = 0
+    with transaction.atomic():
+        emails = list(
+            OutboxEmail.objects.select_for_update(skip_locked=True)
+            .filter(status=OutboxEmail.STATUS_PENDING, next_attempt_at__lte=now)
+            .order_by('next_attempt_at', 'id')[:batch_size]
+        )
+        for email in emails:
+            email.attempts += 1
+            try:
+                # No-op while the connection is open; reconnects after a failure
+                connection.open()
+                EmailMessage(
+                    subject=email.subject,
+                    body=email.body,
+                    from_email=email.from_email,
+                    to=email.recipients,
+                    connection=connection,
+                ).send()
+            except Exception as e:
+                failed += 1
+                email.last_error = f'{type(e).__name__}: {e}'
+                if email.attempts >= max_attempts:
+                    email.status = OutboxEmail.STATUS_FAILED
+                    logger.error(f'Giving up on outbox email {email.id} after {email.attempts} attempts: {e}')
+                else:
+                    email.next_attempt_at = timezone.now() + retry_delay(email.attempts)
+                    logger.warning(f'Outbox email {email.id} failed (attempt {email.attempts}), will retry: {e}')
+                # Drop a connection the server may have closed
+                try:
+                    connection.close()
+                except Exception:
+                    pass
+            else:
+                sent += 1
+                email.status = OutboxEmail.STATUS_SENT
+                email.sent_at = timezone.now()
+                email.last_error = ''
+        if emails:
+            OutboxEmail.objects.bulk_update(
+                emails, ['status', 'attempts', 'last_error', 'next_attempt_at', 'sent_at']
+            )
+    return sent, failed
@@ -2,7 +2,12 @@ from rest_framework import serializers
 from rest_framework.exceptions import PermissionDenied
 from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.serializers import (
+    TokenObtainPairSerializer,
+    TokenRefreshSerializer,
+    TokenBlacklistSerializer,
+)
+from .blacklist import FilteredRefreshToken
 
 User = get_user_model()
 
@@ -125,3 +130,12 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
         
         return data
 
+
+class FilteredTokenRefreshSerializer(TokenRefreshSerializer):
+    """Token refresh checking the blacklist through the in-memory filter (see blacklist.py)"""
+    token_class = FilteredRefreshToken
+
+
+class FilteredTokenBlacklistSerializer(TokenBlacklistSerializer):
+    """Token blacklisting checking the blacklist through the in-memory filter (see blacklist.py)"""
+    token_class = FilteredRefreshToken
@@ -0,0 +1,32 @@
+"""
+Signal handlers that keep the in-memory authentication caches current:
+
+- cached users (see authentication/authentication.py) are dropped when the
+  user row changes, e.g. when ApproveUserView sets is_approved
+- the token blacklist filter (see authentication/blacklist.py) learns about
+  newly blacklisted tokens, and is rebuilt when blacklist rows are removed
+"""
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+from .authentication import invalidate_cached_user
+from .blacklist import invalidate_blacklist, record_blacklisted_token
+from .models import User
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def drop_cached_user(sender, instance, **kwargs):
+    invalidate_cached_user(instance.pk)
+
+
+@receiver(post_save, sender=BlacklistedToken)
+def remember_blacklisted_token(sender, instance, created, **kwargs):
+    if created:
+        record_blacklisted_token(instance.token.jti, instance.token.expires_at)
+
+
+@receiver(post_delete, sender=BlacklistedToken)
+def forget_blacklisted_token(sender, instance, **kwargs):
+    invalidate_blacklist()
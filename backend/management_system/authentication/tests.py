@@ -1,3 +1,279 @@
-from django.test import TestCase
+import threading
+from datetime import timedelta
+from io import StringIO
+from smtplib import SMTPServerDisconnected
+from unittest import mock
 
-# Create your tests here.
+from django.core import mail
+from django.core.cache import cache
+from django.core.mail import get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings, skipUnlessDBFeature
+from django.utils import timezone
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from . import blacklist
+from .authentication import USER_KEY, CachedJWTAuthentication, local_users, user_version
+from .models import OutboxEmail, User
+from .outbox import queue_email, send_due_emails
+
+
+def register():
+    return APIClient().post('/api/auth/register/', {
+        'email': 'new@example.com',
+        'username': 'new',
+        'first_name': 'New',
+        'last_name': 'User',
+        'password': 'Str0ng-enough-pass',
+        'password2': 'Str0ng-enough-pass',
+    }, format='json')
+
+
+class FailingEmailBackend(BaseEmailBackend):
+    """Mail backend whose server is unreachable"""
+
+    def send_messages(self, email_messages):
+        raise SMTPServerDisconnected('Connection unexpectedly closed')
+
+
+@override_settings(
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    ADMIN_APPROVAL_EMAIL='admin@example.com',
+    EMAIL_OUTBOX_RETRY_SECONDS=60,
+    EMAIL_OUTBOX_MAX_RETRY_SECONDS=3600,
+    EMAIL_OUTBOX_MAX_ATTEMPTS=3,
+)
+class OutboxTests(TestCase):
+    def test_registration_queues_approval_email_without_sending(self):
+        response = register()
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(mail.outbox), 0)
+
+        email = OutboxEmail.objects.get()
+        self.assertEqual(email.status, OutboxEmail.STATUS_PENDING)
+        self.assertEqual(email.recipients, ['admin@example.com'])
+        self.assertEqual(email.subject, 'New User Registration: new@example.com')
+        self.assertIn('/api/admin/approve-user/', email.body)
+
+    def test_sent_email_is_not_sent_again(self):
+        queue_email('Once', 'Body', ['someone@example.com'])
+        backend = get_connection()
+        self.assertEqual(send_due_emails(backend), (1, 0))
+        self.assertEqual(send_due_emails(backend), (0, 0))
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_failed_email_is_retried_with_backoff(self):
+        email = queue_email('Retry', 'Body', ['someone@example.com'])
+        failing = FailingEmailBackend()
+
+        started = timezone.now()
+        with self.assertLogs('authentication.outbox', 'WARNING'):
+            self.assertEqual(send_due_emails(failing), (0, 1))
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), (OutboxEmail.STATUS_PENDING, 1))
+        self.assertIn('SMTPServerDisconnected', email.last_error)
+        self.assertGreaterEqual(email.next_attempt_at, started + timedelta(seconds=60))
+
+        # Not due before the backoff has passed
+        self.assertEqual(send_due_emails(failing), (0, 0))
+
+        # Second failure doubles the delay
+        OutboxEmail.objects.filter(pk=email.pk).update(next_attempt_at=timezone.now())
+        started = timezone.now()
+        with self.assertLogs('authentication.outbox', 'WARNING'):
+            self.assertEqual(send_due_emails(failing), (0, 1))
+        email.refresh_from_db()
+        self.assertEqual(email.attempts, 2)
+        self.assertGreaterEqual(email.next_attempt_at, started + timedelta(seconds=120))
+        self.assertLess(email.next_attempt_at, started + timedelta(seconds=180))
+
+        # Delivered once the server is back
+        OutboxEmail.objects.filter(pk=email.pk).update(next_attempt_at=timezone.now())
+        self.assertEqual(send_due_emails(get_connection()), (1, 0))
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts, email.last_error), (OutboxEmail.STATUS_SENT, 3, ''))
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_failed_email_is_given_up_after_max_attempts(self):
+        email = queue_email('Broken', 'Body', ['someone@example.com'])
+        failing = FailingEmailBackend()
+        with self.assertLogs('authentication.outbox', 'WARNING') as logs:
+            for _ in range(3):
+                OutboxEmail.objects.filter(pk=email.pk).update(next_attempt_at=timezone.now())
+                self.assertEqual(send_due_emails(failing), (0, 1))
+        self.assertIn('Giving up', logs.output[-1])
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), (OutboxEmail.STATUS_FAILED, 3))
+        OutboxEmail.objects.filter(pk=email.pk).update(next_attempt_at=timezone.now())
+        self.assertEqual(send_due_emails(get_connection()), (0, 0))
+        self.assertEqual(len(mail.outbox), 0)
+
+
+@override_settings(
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    ADMIN_APPROVAL_EMAIL='admin@example.com',
+)
+class OutboxWorkerTests(TransactionTestCase):
+    """The worker outside a test transaction: it closes stale database connections between batches"""
+
+    def test_send_outbox_delivers_queued_emails(self):
+        register()
+        queue_email('Second', 'Body', ['someone@example.com'])
+
+        out = StringIO()
+        call_command('send_outbox', '--once', stdout=out)
+
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertEqual(mail.outbox[0].to, ['admin@example.com'])
+        self.assertEqual(mail.outbox[1].subject, 'Second')
+        self.assertEqual(mail.outbox[1].body, 'Body')
+        self.assertFalse(OutboxEmail.objects.exclude(status=OutboxEmail.STATUS_SENT).exists())
+        self.assertFalse(OutboxEmail.objects.filter(sent_at__isnull=True).exists())
+        self.assertIn('2 sent, 0 failed', out.getvalue())
+
+    @skipUnlessDBFeature('has_select_for_update_skip_locked')
+    def test_locked_rows_are_skipped_by_other_workers(self):
+        claimed = queue_email('Claimed', 'Body', ['someone@example.com'])
+        free = queue_email('Free', 'Body', ['someone@example.com'])
+
+        locked = threading.Event()
+        release = threading.Event()
+
+        def other_worker():
+            # Holds the row lock like a worker in the middle of sending
+            try:
+                with transaction.atomic():
+                    list(OutboxEmail.objects.select_for_update().filter(pk=claimed.pk))
+                    locked.set()
+                    release.wait(10)
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=other_worker)
+        thread.start()
+        try:
+            self.assertTrue(locked.wait(10))
+            self.assertEqual(send_due_emails(get_connection()), (1, 0))
+        finally:
+            release.set()
+            thread.join()
+
+        self.assertEqual([message.subject for message in mail.outbox], ['Free'])
+        claimed.refresh_from_db()
+        free.refresh_from_db()
+        self.assertEqual(claimed.status, OutboxEmail.STATUS_PENDING)
+        self.assertEqual(free.status, OutboxEmail.STATUS_SENT)
+
+
+class CachedJWTAuthenticationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='cached@example.com', username='cached', password='Str0ng-enough-pass',
+            first_name='Cached', last_name='User', is_approved=True,
+        )
+
+    def setUp(self):
+        cache.clear()
+        local_users.clear()
+        self.addCleanup(local_users.clear)
+        self.addCleanup(cache.clear)
+
+    def authenticate(self):
+        request = APIRequestFactory().get('/api/auth/user/', HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+        return CachedJWTAuthentication().authenticate(request)[0]
+
+    def test_cached_user_has_no_password_hash(self):
+        user = self.authenticate()
+        self.assertEqual((user.pk, user.email, user.is_approved), (self.user.pk, 'cached@example.com', True))
+        cached = cache.get(USER_KEY.format(self.user.pk, user_version(self.user.pk)))
+        self.assertIsNotNone(cached)
+        self.assertNotIn(self.user.password, map(str, cached))
+        self.assertIn('password', user.get_deferred_fields())
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.authenticate().email, 'cached@example.com')
+
+    def test_saving_cached_user_keeps_other_fields(self):
+        user = self.authenticate()
+        user.first_name = 'Renamed'
+        user.save()
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.first_name, 'Renamed')
+        self.assertTrue(self.user.check_password('Str0ng-enough-pass'))
+
+    def test_changed_user_is_reloaded(self):
+        self.authenticate()
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.filter(pk=self.user.pk).update(is_active=False)
+            self.user.refresh_from_db()
+            self.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+    def test_password_change_revokes_tokens(self):
+        # simplejwt modules keep the api_settings object they imported, so patch it in place
+        with mock.patch.object(api_settings, 'CHECK_REVOKE_TOKEN', True):
+            token = AccessToken.for_user(self.user)
+            request = APIRequestFactory().get('/api/auth/user/', HTTP_AUTHORIZATION=f'Bearer {token}')
+            self.assertEqual(CachedJWTAuthentication().authenticate(request)[0].pk, self.user.pk)
+
+            with self.captureOnCommitCallbacks(execute=True):
+                self.user.set_password('An0ther-strong-pass')
+                self.user.save()
+            with self.assertRaises(AuthenticationFailed):
+                CachedJWTAuthentication().authenticate(request)
+
+
+@override_settings(TOKEN_BLACKLIST_RECENT_SIZE=2)
+class BlacklistCheckerTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='blacklist@example.com', username='blacklist', password='x', is_approved=True,
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.checker = blacklist.BlacklistChecker()
+        patcher = mock.patch.object(blacklist, 'blacklist_checker', self.checker)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def blacklisted_jti(self):
+        token = RefreshToken.for_user(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            token.blacklist()
+        return token['jti']
+
+    def test_recent_tokens_are_folded_into_the_filter(self):
+        self.assertFalse(self.checker.is_blacklisted(RefreshToken.for_user(self.user)['jti']))
+        jtis = [self.blacklisted_jti() for _ in range(5)]
+        self.assertIsNone(self.checker.filter)
+        for jti in jtis:
+            self.assertTrue(self.checker.is_blacklisted(jti))
+        self.assertEqual(self.checker.recent, set())
+        self.assertFalse(self.checker.is_blacklisted(RefreshToken.for_user(self.user)['jti']))
+
+    def test_fold_during_check_does_not_break_it(self):
+        checker = self.checker
+        self.assertFalse(checker.is_blacklisted('unknown'))
+        expires_at = timezone.now() + timedelta(days=1)
+
+        class FoldingSet(set):
+            # Another thread records tokens past the limit while the check runs
+            def __contains__(self, jti):
+                for number in range(3):
+                    checker.record(f'other-{number}', expires_at)
+                return False
+
+        checker.recent = FoldingSet()
+        self.assertFalse(checker.is_blacklisted('unknown'))
+        self.assertIsNone(checker.filter)
+        self.assertFalse(checker.is_blacklisted('unknown'))
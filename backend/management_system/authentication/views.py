@@ -6,14 +6,16 @@ from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.exceptions import TokenError
 from django.contrib.auth import get_user_model
-from django.core.mail import send_mail
 from django.conf import settings
+from django.db import transaction
 from django.http import JsonResponse
 from .serializers import (
     UserSerializer,
     UserRegistrationSerializer,
     CustomTokenObtainPairSerializer
 )
+from .blacklist import FilteredRefreshToken
+from .outbox import queue_email
 from .utils import get_approval_url, verify_approval_token
 
 logger = logging.getLogger(__name__)
@@ -33,10 +35,11 @@ class RegisterView(generics.CreateAPIView):
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        user = serializer.save()
-        
-        # Send email notification to admin
-        self._send_approval_email(user, request)
+        with transaction.atomic():
+            user = serializer.save()
+            
+            # Queue email notification to admin (sent by the send_outbox worker)
+            self._queue_approval_email(user, request)
         
         # Generate JWT tokens
         refresh = RefreshToken.for_user(user)
@@ -50,10 +53,10 @@ class RegisterView(generics.CreateAPIView):
             'message': 'User registered successfully'
         }, status=status.HTTP_201_CREATED)
     
-    def _send_approval_email(self, user, request):
+    def _queue_approval_email(self, user, request):
         """
-        Send email to admin with user details and approval link.
-        If email fails, log the error but don't fail registration.
+        Queue an email to admin with user details and approval link.
+        If queueing fails, log the error but don't fail registration.
         """
         try:
             # Get admin email from settings or use default
@@ -93,20 +96,20 @@ This approval link will expire in 7 days.
             
             from_email = getattr(settings, 'DEFAULT_FROM_EMAIL', 'noreply@example.com')
             
-            # Send email
-            send_mail(
-                subject=subject,
-                message=message,
-                from_email=from_email,
-                recipient_list=[admin_email],
-                fail_silently=False,
-            )
+            # Queue email in its own savepoint, so a failure keeps the user row
+            with transaction.atomic():
+                queue_email(
+                    subject=subject,
+                    message=message,
+                    from_email=from_email,
+                    recipient_list=[admin_email],
+                )
             
-            logger.info(f'Approval email sent to {admin_email} for user {user.id} ({user.email})')
+            logger.info(f'Approval email queued for {admin_email} for user {user.id} ({user.email})')
             
         except Exception as e:
             # Log error but don't fail registration
-            logger.error(f'Failed to send approval email for user {user.id}: {str(e)}', exc_info=True)
+            logger.error(f'Failed to queue approval email for user {user.id}: {str(e)}', exc_info=True)
 
 
 class LoginView(TokenObtainPairView):
@@ -135,7 +138,7 @@ class LogoutView(generics.GenericAPIView):
                     status=status.HTTP_400_BAD_REQUEST
                 )
             
-            token = RefreshToken(refresh_token)
+            token = FilteredRefreshToken(refresh_token)
             token.blacklist()
             
             return Response(
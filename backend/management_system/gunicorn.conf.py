@@ -0,0 +1,61 @@
+"""
+Gunicorn configuration - the production WSGI server
+
+Usage (gunicorn reads this file from the working directory by itself):
+    gunicorn management_system.wsgi
+    kill -HUP <master pid>   # graceful reload
+
+The master imports the application once (preload) and forks the workers,
+which share its memory and start serving at once. Every worker runs several
+threads, so requests waiting on the database do not hold up the others, and
+is replaced after max_requests requests to bound slow memory growth. On
+SIGHUP the master rereads this file and the environment, starts new workers
+and lets the old ones finish their requests (graceful_timeout). Preloaded
+code stays loaded; set GUNICORN_PRELOAD=False to have SIGHUP pick up new code
+as well, or restart the container.
+
+Environment variables (defaults in brackets):
+- GUNICORN_BIND: address to listen on [0.0.0.0:8000]
+- GUNICORN_WORKERS: worker processes [one per CPU core, plus one]
+- GUNICORN_THREADS: threads per worker [4]
+- GUNICORN_MAX_REQUESTS: requests before a worker is replaced [1000], 0 to never replace
+- GUNICORN_MAX_REQUESTS_JITTER: random extra requests, so workers are not replaced together [100]
+- GUNICORN_TIMEOUT: seconds before a silent worker is killed and replaced [60]
+- GUNICORN_GRACEFUL_TIMEOUT: seconds old workers get to finish on reload/shutdown [30]
+- GUNICORN_KEEPALIVE: seconds to keep idle connections from the proxy open [5]
+- GUNICORN_PRELOAD: import the application in the master before forking [True]
+"""
+import os
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
+
+# Prefork workers sized to the CPU count, with threads for the database waits
+workers = int(os.getenv('GUNICORN_WORKERS', str((os.cpu_count() or 1) + 1)))
+threads = int(os.getenv('GUNICORN_THREADS', '4'))
+worker_class = 'gthread'
+
+# Recycle workers
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', '1000'))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', '100'))
+
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '60'))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', '30'))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', '5'))
+
+preload_app = os.getenv('GUNICORN_PRELOAD', 'True').lower() == 'true'
+
+# Logs to stdout/stderr for docker logs
+accesslog = '-'
+errorlog = '-'
+
+
+def pre_fork(server, worker):
+    # A preloaded application may have connected to the database while
+    # starting; the workers must open their own connections, and pools
+    # (DB_POOL_MAX), whose threads do not survive the fork, their own pools
+    if server.cfg.preload_app:
+        from django.db import connections
+        connections.close_all()
+        for connection in connections.all(initialized_only=True):
+            if getattr(connection, 'pool', None) is not None:
+                connection.close_pool()
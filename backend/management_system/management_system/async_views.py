@@ -0,0 +1,189 @@
+"""
+Async read paths for the ASGI deployment
+
+The dashboard pages fire several list requests (and the status dashboard) at
+once. A sync worker serves them one after another; under ASGI
+(management_system/asgi.py turns settings.ASYNC_VIEWS on) the views below run
+them as coroutines on the worker's event loop instead, so one process keeps
+many of them in flight while they wait on the database:
+
+- AsyncReadMixin.as_view() returns an async view. GET/HEAD requests whose
+  handler has an async counterpart (alist, aretrieve, or aget on plain API
+  views) are dispatched to it; all other requests run the regular sync view
+  through sync_to_async, exactly as before
+- the async handlers fetch rows with Django's async ORM; authentication,
+  permission checks and serialization (fields may load relations lazily)
+  stay sync and run behind sync_to_async
+
+Without ASYNC_VIEWS (WSGI servers, runserver) as_view() returns the sync view
+unchanged.
+
+Streaming responses (protected media, exports) need an async iterator under
+ASGI: Django consumes a sync one completely into memory before sending the
+first byte. stream_asynchronously() switches them to one that reads the file,
+or pulls the rows, a block at a time in a thread.
+"""
+import asyncio
+import functools
+import itertools
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.handlers.asgi import ASGIRequest
+from django.http import FileResponse, Http404
+from rest_framework.response import Response
+
+
+def _in_event_loop():
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+# Bytes read from a file per thread hop, and items pulled from other iterators
+FILE_BLOCK_SIZE = 64 * 1024
+ITEMS_PER_BLOCK = 100
+
+
+def is_asgi_request(request):
+    """True for requests served by the ASGI handler (also for DRF's Request wrapper)"""
+    return isinstance(getattr(request, '_request', request), ASGIRequest)
+
+
+async def aiter_blocks(iterator, block_size=ITEMS_PER_BLOCK, thread_sensitive=True):
+    """
+    Async iterator over a sync one, taking block_size items per sync_to_async
+    call. Thread-sensitive by default, so database cursors stay in the
+    request's thread.
+    """
+    iterator = iter(iterator)
+    take = sync_to_async(lambda: list(itertools.islice(iterator, block_size)), thread_sensitive=thread_sensitive)
+    while block := await take():
+        for item in block:
+            yield item
+
+
+def stream_asynchronously(response):
+    """Give a streaming response an async iterator, so ASGI sends it block by block"""
+    if isinstance(response, FileResponse) and response.file_to_stream is not None:
+        file = response.file_to_stream
+        # The response keeps closing the file; headers were set from it already
+        response.streaming_content = aiter_blocks(
+            iter(lambda: file.read(FILE_BLOCK_SIZE), b''), block_size=1, thread_sensitive=False
+        )
+    elif response.streaming and not response.is_async:
+        response.streaming_content = aiter_blocks(response.streaming_content)
+    return response
+
+
+class AsyncReadMixin:
+    """
+    View/ViewSet mixin serving GET and HEAD requests through async handlers,
+    see the module docstring. Put it before the DRF base classes.
+    """
+
+    @classmethod
+    def async_handler_name(cls, method, actions=None):
+        """Name of the async handler for an HTTP method, None if it has none"""
+        method = method.lower()
+        if method == 'head':
+            method = 'get'
+        if method != 'get':
+            return None
+        name = actions.get(method) if actions is not None else method
+        if name and callable(getattr(cls, f'a{name}', None)):
+            return f'a{name}'
+        return None
+
+    @classmethod
+    def as_view(cls, *args, **initkwargs):
+        view = super().as_view(*args, **initkwargs)
+        if not getattr(settings, 'ASYNC_VIEWS', False):
+            return view
+
+        # ViewSets are routed with an {http method: action} map
+        actions = getattr(view, 'actions', None)
+        sync_view = sync_to_async(view)
+
+        async def async_view(request, *args, **kwargs):
+            if cls.async_handler_name(request.method, actions):
+                # dispatch() runs on the event loop and returns adispatch()
+                return await view(request, *args, **kwargs)
+            return await sync_view(request, *args, **kwargs)
+
+        # Keep csrf_exempt, cls, initkwargs and actions
+        functools.update_wrapper(async_view, view)
+        return async_view
+
+    def dispatch(self, request, *args, **kwargs):
+        if _in_event_loop():
+            return self.adispatch(request, *args, **kwargs)
+        return super().dispatch(request, *args, **kwargs)
+
+    async def adispatch(self, request, *args, **kwargs):
+        """APIView.dispatch() for the requests with an async handler"""
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            # Authentication, permissions and throttling may query the database
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+            name = self.async_handler_name(request.method, getattr(self, 'action_map', None))
+            response = await getattr(self, name)(request, *args, **kwargs)
+        except Exception as exc:
+            response = await sync_to_async(self.handle_exception)(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    async def aserialize(self, instance, many=False):
+        """The serializer's data, built in a thread as fields may query the database"""
+        return await sync_to_async(lambda: self.get_serializer(instance, many=many).data)()
+
+    async def apaginate_queryset(self, queryset):
+        """paginate_queryset() through the paginator's async variant when it has one"""
+        paginator = self.paginator
+        if paginator is None:
+            return None
+        if hasattr(paginator, 'apaginate_queryset'):
+            return await paginator.apaginate_queryset(queryset, self.request, view=self)
+        return await sync_to_async(paginator.paginate_queryset)(queryset, self.request, view=self)
+
+    async def aget_object(self):
+        """get_object() with the async ORM"""
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        filter_kwargs = {self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        try:
+            obj = await queryset.aget(**filter_kwargs)
+        except (queryset.model.DoesNotExist, TypeError, ValueError, ValidationError):
+            raise Http404(f'No {queryset.model._meta.object_name} matches the given query.')
+        await sync_to_async(self.check_object_permissions)(self.request, obj)
+        return obj
+
+    async def alist(self, request, *args, **kwargs):
+        # ValuesListMixin's .values() rows when the serializer compiles
+        get_values_serializer = getattr(self, 'get_values_serializer', None)
+        values_serializer = get_values_serializer() if get_values_serializer else None
+        if values_serializer is not None:
+            queryset = self.get_values_rows(values_serializer)
+            # Converters of file fields sign URLs and look up previews
+            represent = sync_to_async(values_serializer.represent)
+        else:
+            queryset = self.filter_queryset(self.get_queryset())
+            represent = functools.partial(self.aserialize, many=True)
+
+        page = await self.apaginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(await represent(page))
+        return Response(await represent([row async for row in queryset]))
+
+    async def aretrieve(self, request, *args, **kwargs):
+        instance = await self.aget_object()
+        return Response(await self.aserialize(instance))
@@ -0,0 +1,231 @@
+"""
+Bulk create / update / delete routes for the ViewSets
+
+- POST   <list route>/bulk/  [{...}, {...}]                    create many
+- PATCH  <list route>/bulk/  [{"id": 1, ...}, {"id": 2, ...}]  partially update many
+- DELETE <list route>/bulk/  [1, 2, 3]                         delete many
+
+Items are validated with the ViewSet's serializer (many=True). If any item is
+invalid nothing is written and the errors are returned as a list in request
+order ({} for valid items). A valid batch is written in one transaction with
+a single bulk_create / bulk_update.
+
+bulk_create / bulk_update skip Model.save() and the model signals, so the
+serializer applies the model's save() rules itself (BulkSerializerMixin) and
+BulkWriteMixin refreshes the denormalized ancestor columns and the GR rollups
+afterwards. Deletes go through QuerySet.delete(), which still sends the
+signals.
+"""
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import prefetch_related_objects
+from django.utils import timezone
+from rest_framework import serializers, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+from apps.rollup.ancestors import cascade_bulk_change
+from apps.rollup.services import mark_rollups_dirty
+
+
+class BulkListSerializer(serializers.ListSerializer):
+    """
+    many=True serializer writing with bulk_create / bulk_update.
+    For updates, `instance` is a {pk: instance} dict of the rows being updated.
+    """
+
+    def run_child_validation(self, data):
+        # Validate every item against the row it updates
+        if self.instance is not None:
+            self.child.instance = self.instance.get(data.get('id')) if isinstance(data, dict) else None
+        return super().run_child_validation(data)
+
+    def to_internal_value(self, data):
+        attrs = super().to_internal_value(data)
+        self.validate_unique_fields(attrs)
+        return attrs
+
+    def validate_unique_fields(self, attrs):
+        """
+        Unique model fields must be unique within the batch and against the other
+        rows; errors are reported per item like the field errors
+        """
+        model = self.child.Meta.model
+        updated_pks = self._item_ids() if self.instance is not None else []
+        errors = [{} for _ in attrs]
+        for field in model._meta.concrete_fields:
+            if not field.unique or field.primary_key:
+                continue
+            values = [item.get(field.name) for item in attrs]
+            counts = Counter(value for value in values if value is not None)
+            taken = set(
+                model.objects.filter(**{f'{field.name}__in': list(counts)})
+                .exclude(pk__in=updated_pks)
+                .values_list(field.name, flat=True)
+            ) if counts else set()
+            for index, value in enumerate(values):
+                if value is None:
+                    continue
+                if counts[value] > 1:
+                    errors[index][field.name] = [f'"{value}" appears more than once in this batch.']
+                elif value in taken:
+                    errors[index][field.name] = [f'{model._meta.verbose_name} with this {field.name} already exists.']
+        if any(errors):
+            raise serializers.ValidationError(errors)
+
+    def create(self, validated_data):
+        instances = []
+        for attrs in validated_data:
+            instance = self.child.Meta.model(**self.child.bulk_attrs(attrs))
+            self.child.apply_save_rules(instance)
+            instances.append(instance)
+        return self.child.Meta.model.objects.bulk_create(instances, batch_size=1000)
+
+    def update(self, instances, validated_data):
+        now = timezone.now()
+        updated = []
+        fields = {'updated_at', *self.child.bulk_derived_fields}
+        for pk, attrs in zip(self._item_ids(), validated_data):
+            instance = instances[pk]
+            for name, value in self.child.bulk_attrs(attrs).items():
+                setattr(instance, name, value)
+                fields.add(name)
+            self.child.apply_save_rules(instance)
+            instance.updated_at = now
+            updated.append(instance)
+        self.child.Meta.model.objects.bulk_update(updated, sorted(fields), batch_size=1000)
+        return updated
+
+    def _item_ids(self):
+        return [item['id'] for item in self.initial_data]
+
+
+class BulkSerializerMixin:
+    """
+    ModelSerializer mixin for the bulk routes; set
+    Meta.list_serializer_class = BulkListSerializer as well. Serializers of
+    models whose save() changes the row override apply_save_rules() with what
+    save() does before writing, and list the columns it may change in
+    bulk_derived_fields.
+    """
+    bulk_derived_fields = ()
+
+    def bulk_attrs(self, validated_data):
+        """Model attributes to set from one item's validated data"""
+        return dict(validated_data)
+
+    def apply_save_rules(self, instance):
+        """What Model.save() does to the instance before writing; nothing by default"""
+
+
+def _select_related_lookups(select_related, prefix=''):
+    """Turn Query.select_related ({'tender': {'work': {}}}) into lookups (['tender', 'tender__work'])"""
+    if not isinstance(select_related, dict):
+        return []
+    lookups = []
+    for name, nested in select_related.items():
+        lookups.append(prefix + name)
+        lookups.extend(_select_related_lookups(nested, f'{prefix}{name}__'))
+    return lookups
+
+
+class BulkWriteMixin:
+    """
+    ViewSet mixin adding the <list route>/bulk/ route. The serializer must use
+    BulkSerializerMixin. Updates and deletes only reach rows in get_queryset().
+    """
+
+    @action(detail=False, methods=['post', 'patch', 'delete'], url_path='bulk')
+    def bulk(self, request, *args, **kwargs):
+        if request.method == 'POST':
+            return self.bulk_create(request)
+        if request.method == 'PATCH':
+            return self.bulk_update(request)
+        return self.bulk_destroy(request)
+
+    def bulk_create(self, request):
+        serializer = self.get_serializer(
+            data=request.data, many=True, max_length=getattr(settings, 'API_BULK_MAX_ITEMS', 500)
+        )
+        serializer.is_valid(raise_exception=True)
+        model = serializer.child.Meta.model
+        with transaction.atomic():
+            instances = serializer.save()
+            pks = [instance.pk for instance in instances]
+            cascade_bulk_change(model, pks, created=True)
+            mark_rollups_dirty(self._gr_ids(model, pks))
+        return Response(self._represent(instances), status=status.HTTP_201_CREATED)
+
+    def bulk_update(self, request):
+        ids, errors = self._parse_ids(request.data, items_are_objects=True)
+        if errors:
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+        instances = self.get_queryset().in_bulk(ids)
+        missing = [{} if pk in instances else {'id': ['Not found.']} for pk in ids]
+        if any(missing):
+            return Response(missing, status=status.HTTP_400_BAD_REQUEST)
+
+        serializer = self.get_serializer(instances, data=request.data, many=True, partial=True)
+        serializer.is_valid(raise_exception=True)
+        model = serializer.child.Meta.model
+        with transaction.atomic():
+            previous_gr_ids = self._gr_ids(model, ids)
+            updated = serializer.save()
+            cascade_bulk_change(model, ids)
+            mark_rollups_dirty(previous_gr_ids | self._gr_ids(model, ids))
+        return Response(self._represent(updated))
+
+    def bulk_destroy(self, request):
+        ids, errors = self._parse_ids(request.data, items_are_objects=False)
+        if errors:
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+        queryset = self.get_queryset().filter(pk__in=ids)
+        found = set(queryset.values_list('pk', flat=True))
+        missing = [{} if pk in found else {'id': ['Not found.']} for pk in ids]
+        if any(missing):
+            return Response(missing, status=status.HTTP_400_BAD_REQUEST)
+        with transaction.atomic():
+            # QuerySet.delete() sends the post_delete signals that update the rollups
+            queryset.model.objects.filter(pk__in=ids).delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    def _parse_ids(self, data, items_are_objects):
+        """Return (ids, None) or (None, error response body) for a list of items or ids"""
+        if not isinstance(data, list) or not data:
+            return None, {'error': 'Expected a non-empty list'}
+        max_items = getattr(settings, 'API_BULK_MAX_ITEMS', 500)
+        if len(data) > max_items:
+            return None, {'error': f'At most {max_items} items per request'}
+
+        ids = []
+        errors = []
+        for item in data:
+            value = item.get('id') if items_are_objects and isinstance(item, dict) else item
+            if items_are_objects and not isinstance(item, dict):
+                errors.append({'non_field_errors': ['Expected an object.']})
+            elif isinstance(value, bool) or not isinstance(value, int):
+                errors.append({'id': ['A valid integer id is required.']})
+            else:
+                errors.append({})
+            ids.append(value)
+        counts = Counter(ids)
+        for index, value in enumerate(ids):
+            if not errors[index] and counts[value] > 1:
+                errors[index] = {'id': ['Appears more than once in this batch.']}
+        if any(errors):
+            return None, errors
+        return ids, None
+
+    def _gr_ids(self, model, pks):
+        # Bill, Tender and TechnicalSanction carry their GR in the denormalized gr column
+        return set(model.objects.filter(pk__in=pks).values_list('gr_id', flat=True))
+
+    def _represent(self, instances):
+        # Load the related rows the serializer reads with one query per relation,
+        # like the select_related() of get_queryset() does for single objects
+        lookups = _select_related_lookups(self.get_queryset().query.select_related)
+        if lookups:
+            prefetch_related_objects(instances, *lookups)
+        return self.get_serializer(instances, many=True).data
@@ -0,0 +1,139 @@
+"""
+Conditional GET for the list and detail endpoints
+
+The frontend refetches whole tables after every save, mostly getting back
+what it already has. ConditionalGetMixin gives list and retrieve responses an
+ETag computed from one aggregate query over the filtered queryset - row
+count and latest updated_at, plus the same for every related table the
+serializer reads (conditional_relations) - and answers If-None-Match with
+304 Not Modified before any row is fetched or serialized. Browsers send
+If-None-Match by themselves (Cache-Control: private, no-cache makes them
+revalidate every time), so the frontend needs no changes.
+
+The ETag also covers:
+- the signed media links in the rows, which change every MEDIA_URL_MAX_AGE
+  window (see management_system/media.py)
+- values read from other tables, e.g. preview URLs, through
+  conditional_validators: callables returning a dict of values
+- the negotiated media type
+
+Last-Modified is sent as well, but If-Modified-Since alone is not answered
+with 304: a deleted row does not move any timestamp, only the row count.
+"""
+import datetime
+import hashlib
+import json
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+from .media import _link_expiry
+
+
+def _joins_many(model, path):
+    """True if following the relation path may yield several rows per row of model"""
+    for name in path.split('__'):
+        field = model._meta.get_field(name)
+        if field.one_to_many or field.many_to_many:
+            return True
+        model = field.related_model
+    return False
+
+
+class ConditionalGetMixin:
+    """
+    ViewSet mixin answering list/retrieve requests with 304 Not Modified when
+    the client's copy is current, see the module docstring. Put it first, so
+    it wraps the async handlers of AsyncReadMixin as well.
+    """
+    # Relation paths (e.g. 'tender__work') whose updated_at the serializer output depends on
+    conditional_relations = ()
+    # Callables returning a dict of further values the output depends on
+    conditional_validators = ()
+
+    def get_conditional_relations(self):
+        return self.conditional_relations
+
+    def get_validator_queryset(self):
+        """The rows of the response: the filtered queryset, narrowed to the object for retrieve"""
+        queryset = self.filter_queryset(self.get_queryset())
+        if self.action == 'retrieve':
+            lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+            queryset = queryset.filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        return queryset
+
+    def get_validators(self):
+        """(ETag, last modification time) of the response, None to answer unconditionally"""
+        try:
+            queryset = self.get_validator_queryset()
+        except (TypeError, ValueError, ValidationError):
+            # Malformed lookups fail in the handler as usual
+            return None
+
+        relations = self.get_conditional_relations()
+        many = any(_joins_many(queryset.model, relation) for relation in relations)
+        aggregates = {'count': Count('pk', distinct=many), 'updated': Max('updated_at')}
+        for index, relation in enumerate(relations):
+            aggregates[f'related{index}_count'] = Count(relation, distinct=True)
+            aggregates[f'related{index}_updated'] = Max(f'{relation}__updated_at')
+        values = queryset.order_by().aggregate(**aggregates)
+        if self.action == 'retrieve' and not values['count']:
+            return None
+        for validator in self.conditional_validators:
+            values.update(validator())
+
+        values['model'] = queryset.model._meta.label
+        values['action'] = self.action
+        values['media_type'] = getattr(self.request, 'accepted_media_type', '')
+        values['link_expiry'] = _link_expiry()
+        etag = hashlib.md5(
+            json.dumps(values, sort_keys=True, default=str).encode(), usedforsecurity=False
+        ).hexdigest()
+        timestamps = [value for value in values.values() if isinstance(value, datetime.datetime)]
+        return f'W/"{etag}"', max(timestamps, default=None)
+
+    def not_modified(self, validators):
+        """304 response if the client's copy is current, None otherwise"""
+        if validators is None:
+            return None
+        return get_conditional_response(self.request, etag=validators[0])
+
+    def add_validators(self, response, validators):
+        if validators is not None and response.status_code in (200, 304):
+            etag, last_modified = validators
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified.timestamp())
+            patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        validators = self.get_validators()
+        response = self.not_modified(validators)
+        if response is None:
+            response = super().list(request, *args, **kwargs)
+        return self.add_validators(response, validators)
+
+    def retrieve(self, request, *args, **kwargs):
+        validators = self.get_validators()
+        response = self.not_modified(validators)
+        if response is None:
+            response = super().retrieve(request, *args, **kwargs)
+        return self.add_validators(response, validators)
+
+    async def alist(self, request, *args, **kwargs):
+        validators = await sync_to_async(self.get_validators)()
+        response = self.not_modified(validators)
+        if response is None:
+            response = await super().alist(request, *args, **kwargs)
+        return self.add_validators(response, validators)
+
+    async def aretrieve(self, request, *args, **kwargs):
+        validators = await sync_to_async(self.get_validators)()
+        response = self.not_modified(validators)
+        if response is None:
+            response = await super().aretrieve(request, *args, **kwargs)
+        return self.add_validators(response, validators)
@@ -0,0 +1,41 @@
+"""
+Database connection pool stats
+
+GET /api/db-pool/ (staff users only) reports how the serving process
+connects to each database: the persistent connection and health check
+settings, and - with pooled connections (DB_POOL_MAX, see settings.py) - the
+psycopg pool's counters, e.g. pool_size and pool_available (connections open
+and idle), requests_waiting, requests_wait_ms and connections_errors. Every
+server process has its own pool, so repeated calls may be answered by
+different processes (see pid).
+"""
+import os
+
+from django.db import connections
+from rest_framework import permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+
+def pool_stats():
+    """Connection settings and pool counters of every database, for this process"""
+    databases = {}
+    for connection in connections.all():
+        settings_dict = connection.settings_dict
+        pool = getattr(connection, 'pool', None)
+        databases[connection.alias] = {
+            'vendor': connection.vendor,
+            'conn_max_age': settings_dict['CONN_MAX_AGE'],
+            'health_checks': settings_dict['CONN_HEALTH_CHECKS'],
+            'pooled': pool is not None,
+            'pool': pool.get_stats() if pool is not None else None,
+        }
+    return {'pid': os.getpid(), 'databases': databases}
+
+
+class DatabasePoolStatsView(APIView):
+    """Connection pool stats of the process serving the request"""
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(pool_stats(), status=status.HTTP_200_OK)
@@ -0,0 +1,146 @@
+"""
+Streaming CSV / XLSX exports of the list endpoints
+
+Query Parameters:
+- file_format: csv (default) or xlsx
+- The list filters of the ViewSet (gr, work, tender, ...) and ?fields= / ?omit=
+
+ExportMixin adds an `export` list route (e.g. /api/bills/export/) that reads
+the filtered queryset with .iterator(chunk_size=...) - a server-side cursor on
+PostgreSQL - and writes every row as soon as it is fetched, so memory stays
+constant however many rows match. Columns and values are the same as in the
+JSON list response.
+
+CSV rows are streamed to the client with StreamingHttpResponse. An XLSX file
+cannot be sent before it is complete (it is a zip archive), so it is built
+with openpyxl's write-only workbook in a temporary file and then streamed
+from disk; openpyxl is optional and XLSX returns 400 without it. Under ASGI
+both are streamed through async iterators (stream_asynchronously), which
+Django would otherwise read completely into memory first.
+"""
+import csv
+import importlib.util
+import itertools
+import tempfile
+from datetime import date
+from decimal import Decimal
+
+from django.conf import settings
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils import timezone
+from rest_framework import serializers, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+from .async_views import is_asgi_request, stream_asynchronously
+from .values_serializer import ValuesSerializer
+
+FORMAT_QUERY_PARAM = 'file_format'
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+
+class Echo:
+    """File-like object returning what is written, for csv.writer in a generator"""
+
+    def write(self, value):
+        return value
+
+
+def _chunks(iterable, size):
+    """Lists of up to `size` consecutive items of iterable"""
+    iterator = iter(iterable)
+    while chunk := list(itertools.islice(iterator, size)):
+        yield chunk
+
+
+def _xlsx_cell(field):
+    """
+    Convert a JSON representation back to a typed cell value for XLSX, so
+    amounts and dates are numbers and dates in the spreadsheet
+    """
+    if isinstance(field, serializers.DecimalField):
+        return Decimal
+    if isinstance(field, serializers.IntegerField):
+        return int
+    if isinstance(field, serializers.DateField):
+        return date.fromisoformat
+    return None
+
+
+class ExportMixin:
+    """
+    ViewSet mixin adding GET <list route>/export/ with the list filters applied.
+    Set export_filename to name the downloaded file.
+    """
+    export_filename = 'export'
+
+    @action(detail=False, methods=['get'], url_path='export')
+    def export(self, request, *args, **kwargs):
+        file_format = request.query_params.get(FORMAT_QUERY_PARAM, 'csv').lower()
+        if file_format not in ('csv', 'xlsx'):
+            return Response(
+                {'error': f'Unsupported {FORMAT_QUERY_PARAM} "{file_format}". Use csv or xlsx.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if file_format == 'xlsx' and importlib.util.find_spec('openpyxl') is None:
+            return Response(
+                {'error': 'XLSX export requires the openpyxl package.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        serializer = self.get_serializer()
+        readable = {name: field for name, field in serializer.fields.items() if not field.write_only}
+        header = list(readable)
+        rows = self.export_rows(serializer, self.filter_queryset(self.get_queryset()))
+
+        filename = f'{self.export_filename}-{timezone.localdate().isoformat()}.{file_format}'
+        if file_format == 'xlsx':
+            response = self.xlsx_response(header, readable, rows, filename)
+        else:
+            response = StreamingHttpResponse(self.csv_lines(header, rows), content_type='text/csv; charset=utf-8')
+            response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        if is_asgi_request(request):
+            stream_asynchronously(response)
+        return response
+
+    def export_rows(self, serializer, queryset):
+        """Yield the list representation of every row, one chunk of rows in memory at a time"""
+        chunk_size = getattr(settings, 'EXPORT_CHUNK_SIZE', 2000)
+        values_serializer = ValuesSerializer.compile(serializer)
+        if values_serializer is not None:
+            for chunk in _chunks(values_serializer.values(queryset).iterator(chunk_size=chunk_size), chunk_size):
+                yield from values_serializer.represent(chunk)
+            return
+        prefetching = [field for field in serializer.fields.values() if hasattr(field, 'prefetch')]
+        for chunk in _chunks(queryset.iterator(chunk_size=chunk_size), chunk_size):
+            for field in prefetching:
+                field.prefetch(field.get_attribute(instance) for instance in chunk)
+            for instance in chunk:
+                yield serializer.to_representation(instance)
+
+    def csv_lines(self, header, rows):
+        writer = csv.writer(Echo())
+        # BOM so that Excel opens the file as UTF-8 (₹, Devanagari names)
+        yield '\ufeff' + writer.writerow(header)
+        for row in rows:
+            yield writer.writerow(['' if row[name] is None else row[name] for name in header])
+
+    def xlsx_response(self, header, fields, rows, filename):
+        from openpyxl import Workbook
+
+        converters = {name: _xlsx_cell(field) for name, field in fields.items()}
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet(self.export_filename[:31])
+        sheet.append(header)
+        for row in rows:
+            cells = []
+            for name in header:
+                value = row[name]
+                convert = converters[name]
+                cells.append(convert(value) if convert and value not in (None, '') else value)
+            sheet.append(cells)
+
+        output = tempfile.TemporaryFile()
+        workbook.save(output)
+        output.seek(0)
+        return FileResponse(output, as_attachment=True, filename=filename, content_type=XLSX_CONTENT_TYPE)
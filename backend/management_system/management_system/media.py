@@ -0,0 +1,267 @@
+"""
+Protected media downloads
+
+Uploaded documents (GR documents, bill documents, tender work orders) are
+served by protected_media() instead of django.views.static.serve:
+
+- Authorization per file: the file (or the document a preview image was
+  made from) must belong to a GR, Bill or Tender. Demo records' files are public; other files need a valid signed link or a
+  JWT (Authorization: Bearer ...). API responses contain signed links
+  (ProtectedMediaStorage.url), so the frontend can keep using plain <a href>.
+- Conditional requests: ETag / Last-Modified, answered with 304 when the
+  client's copy is current.
+- Range requests (single byte range, with If-Range) for resuming downloads
+  and PDF viewers fetching pages on demand.
+- With MEDIA_SENDFILE set, the transfer itself is handed to the front proxy
+  (X-Accel-Redirect for nginx, X-Sendfile for Apache/lighttpd), so no Python
+  worker is tied up while a large scan downloads. Otherwise a FileResponse
+  streams the file; WSGI servers with wsgi.file_wrapper (gunicorn) send it
+  with os.sendfile, and under ASGI it is read a block at a time in a thread
+  (see stream_asynchronously in management_system/async_views.py).
+"""
+import io
+import mimetypes
+import os
+import posixpath
+import re
+import time
+from urllib.parse import quote
+
+from django.apps import apps
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.core.signing import Signer
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse
+from django.utils.cache import get_conditional_response
+from django.utils.crypto import constant_time_compare
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.decorators.http import require_safe
+from rest_framework import status
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.settings import api_settings
+
+from .async_views import is_asgi_request, stream_asynchronously
+
+# (model, file field, field that is True for demo records)
+MEDIA_OWNERS = [
+    ('gr.GR', 'document', 'is_demo'),
+    ('bill.Bill', 'document', 'effective_is_demo'),
+    ('tender.Tender', 'work_order', 'effective_is_demo'),
+]
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+signer = Signer(salt='management_system.media')
+
+
+def _link_expiry(now=None):
+    """
+    Expiry of the links issued now. Links are issued per time window, so the
+    same file gets the same URL for a whole MEDIA_URL_MAX_AGE window (API
+    responses stay cacheable) and each link is valid for 1-2 windows.
+    """
+    max_age = getattr(settings, 'MEDIA_URL_MAX_AGE', 43200)
+    now = int(now or time.time())
+    return (now // max_age + 2) * max_age
+
+
+def media_signature(name, expires):
+    return signer.signature(f'{name}:{expires}')
+
+
+def has_valid_signature(request, name):
+    expires = request.GET.get('expires', '')
+    signature = request.GET.get('signature', '')
+    if not expires.isdigit() or int(expires) < time.time():
+        return False
+    return constant_time_compare(signature, media_signature(name, expires))
+
+
+class ProtectedMediaStorage(FileSystemStorage):
+    """FileSystemStorage whose URLs carry a signature accepted by protected_media()"""
+
+    def url(self, name):
+        url = super().url(name)
+        if name is None:
+            return url
+        expires = _link_expiry()
+        return f'{url}?expires={expires}&signature={media_signature(name, expires)}'
+
+
+def media_owner_is_demo(name):
+    """True/False for the demo flag of the record owning the file, None if no record owns it"""
+    from apps.previews.services import preview_document_lookup
+
+    # A preview image belongs to the records of the document it was made from
+    suffix, value = preview_document_lookup(name) or ('', name)
+    for label, file_field, demo_field in MEDIA_OWNERS:
+        model = apps.get_model(label)
+        is_demo = model.objects.filter(**{file_field + suffix: value}).values_list(demo_field, flat=True).first()
+        if is_demo is not None:
+            return is_demo
+    return None
+
+
+def _jwt_user(request):
+    """The user of the request's bearer token, authenticated like API requests"""
+    for authentication_class in api_settings.DEFAULT_AUTHENTICATION_CLASSES:
+        try:
+            result = authentication_class().authenticate(request)
+        except AuthenticationFailed:
+            return None
+        if result:
+            return result[0]
+    return None
+
+
+class FileRange(io.RawIOBase):
+    """Read-only view of bytes [start, start + length) of an open file"""
+
+    def __init__(self, file, start, length):
+        super().__init__()
+        self.file = file
+        self.start = start
+        self.length = length
+        self.file.seek(start)
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def fileno(self):
+        # For os.sendfile in the WSGI server, which sends Content-Length bytes
+        # from the file's current position
+        return self.file.fileno()
+
+    def tell(self):
+        return self.file.tell() - self.start
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self.tell()
+        elif whence == io.SEEK_END:
+            offset += self.length
+        self.file.seek(self.start + min(max(offset, 0), self.length))
+        return self.tell()
+
+    def readinto(self, buffer):
+        remaining = self.length - self.tell()
+        if remaining <= 0:
+            return 0
+        data = self.file.read(min(len(buffer), remaining))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def close(self):
+        self.file.close()
+        super().close()
+
+
+def _requested_range(request, size, etag, last_modified):
+    """
+    (start, end) of a satisfiable single-range request, None to send the whole
+    file, or False when the range cannot be satisfied
+    """
+    header = request.META.get('HTTP_RANGE', '')
+    match = RANGE_RE.match(header.strip())
+    if not match or match.groups() == ('', ''):
+        # No range, or several ranges: send the whole file
+        return None
+
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if if_range:
+        if if_range.startswith(('"', 'W/')):
+            if if_range != etag:
+                return None
+        elif parse_http_date_safe(if_range) != int(last_modified):
+            return None
+
+    first, last = match.groups()
+    if first == '':
+        # Suffix range: the last N bytes
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+@require_safe
+def protected_media(request, path):
+    name = posixpath.normpath(path).lstrip('/')
+    try:
+        # The storage maps content-addressed names to their blob
+        full_path = default_storage.path(name)
+    except SuspiciousFileOperation:
+        raise Http404('File not found')
+
+    if not has_valid_signature(request, name):
+        is_demo = media_owner_is_demo(name)
+        if is_demo is None:
+            raise Http404('File not found')
+        if not is_demo:
+            user = _jwt_user(request)
+            if user is None or not user.is_authenticated:
+                return JsonResponse(
+                    {'error': 'Authentication credentials were not provided or the link has expired.'},
+                    status=status.HTTP_403_FORBIDDEN
+                )
+
+    try:
+        stat = os.stat(full_path)
+    except (FileNotFoundError, NotADirectoryError):
+        raise Http404('File not found')
+    if not os.path.isfile(full_path):
+        raise Http404('File not found')
+
+    # Same format as nginx, so the ETag does not change when the proxy serves the file
+    etag = f'"{int(stat.st_mtime):x}-{stat.st_size:x}"'
+    not_modified = get_conditional_response(request, etag=etag, last_modified=int(stat.st_mtime))
+    if not_modified is not None:
+        # A 304 carries the validator the client revalidated with
+        not_modified['ETag'] = etag
+        not_modified['Cache-Control'] = 'private'
+        return not_modified
+
+    filename = posixpath.basename(name)
+    content_type = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    sendfile = getattr(settings, 'MEDIA_SENDFILE', '')
+    if sendfile:
+        # The proxy reads the file and handles Range itself
+        response = HttpResponse(content_type=content_type)
+        if sendfile == 'x-accel-redirect':
+            prefix = getattr(settings, 'MEDIA_ACCEL_REDIRECT_PREFIX', '/protected-media/')
+            location = os.path.relpath(full_path, default_storage.location).replace(os.sep, '/')
+            response['X-Accel-Redirect'] = prefix.rstrip('/') + '/' + quote(location)
+        else:
+            response['X-Sendfile'] = full_path
+    else:
+        byte_range = _requested_range(request, stat.st_size, etag, stat.st_mtime)
+        if byte_range is False:
+            response = HttpResponse(status=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+            response['Content-Range'] = f'bytes */{stat.st_size}'
+            return response
+        file = open(full_path, 'rb')
+        if byte_range is None:
+            response = FileResponse(file, content_type=content_type, filename=filename)
+        else:
+            start, end = byte_range
+            response = FileResponse(
+                FileRange(file, start, end - start + 1), content_type=content_type, filename=filename
+            )
+            response.status_code = status.HTTP_206_PARTIAL_CONTENT
+            response['Content-Range'] = f'bytes {start}-{end}/{stat.st_size}'
+        response['Accept-Ranges'] = 'bytes'
+        if is_asgi_request(request):
+            stream_asynchronously(response)
+
+    response['Content-Disposition'] = f"inline; filename*=UTF-8''{quote(filename)}"
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    response['Cache-Control'] = 'private'
+    return response
@@ -0,0 +1,33 @@
+"""
+Middleware for the ASGI deployment (settings.ASYNC_VIEWS)
+
+WhiteNoise 6 only has a sync middleware. In an otherwise async middleware
+stack Django would run it - and switch every request passing through it -
+through a thread, so AsyncWhiteNoiseMiddleware takes its place there.
+"""
+from asgiref.sync import markcoroutinefunction, sync_to_async
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+
+class AsyncWhiteNoiseMiddleware:
+    """
+    Serves static files with WhiteNoise in a thread and hands every other
+    request straight on to the async handler
+    """
+    sync_capable = False
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.whitenoise = WhiteNoiseMiddleware(get_response)
+        markcoroutinefunction(self)
+
+    async def __call__(self, request):
+        whitenoise = self.whitenoise
+        if whitenoise.autorefresh:
+            static_file = await sync_to_async(whitenoise.find_file)(request.path_info)
+        else:
+            static_file = whitenoise.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(whitenoise.serve)(static_file, request)
+        return await self.get_response(request)
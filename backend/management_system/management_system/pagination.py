@@ -0,0 +1,223 @@
+"""
+Keyset (cursor) pagination for the list endpoints
+
+Pages are addressed by the position of the last row seen on the ordering
+columns, e.g. (created_at, id), so the cost of fetching a page does not grow
+with how deep into the table the client is. Nullable ordering columns (GR
+date) sort their NULLs before every value of the descending ordering, the
+same on every database (PostgreSQL's default, so its DESC indexes match).
+
+Query Parameters:
+- cursor: Opaque cursor taken from the 'next'/'previous' links of a response
+- page_size: Number of rows per page (capped at max_page_size),
+  or 'all' to return the full unpaginated list (legacy behaviour)
+"""
+import base64
+import json
+
+from django.conf import settings
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetCursorPagination(BasePagination):
+    """
+    Cursor pagination keyed on (created_at, id), newest first.
+    The trailing 'id' makes every position unique, so cursors stay stable
+    even when many rows share the same timestamp.
+    """
+    ordering = ('-created_at', '-id')
+    page_size = getattr(settings, 'API_PAGE_SIZE', 50)
+    max_page_size = getattr(settings, 'API_MAX_PAGE_SIZE', 500)
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset = self.page_queryset(queryset, request)
+        if queryset is None:
+            return None
+        return self.take_page(list(queryset))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """paginate_queryset() for async views, fetching the page with the async ORM"""
+        queryset = self.page_queryset(queryset, request)
+        if queryset is None:
+            return None
+        return self.take_page([row async for row in queryset])
+
+    def page_queryset(self, queryset, request):
+        """
+        The (unevaluated) queryset of the requested page plus one extra row,
+        None when the whole list was requested
+        """
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if self.page_size is None:
+            # ?page_size=all - return the whole list as before
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.model = queryset.model
+        self.position, self.reverse = self.decode_cursor(request)
+
+        ordering = self.ordering
+        if self.reverse:
+            ordering = tuple(self._flip(field) for field in ordering)
+        queryset = queryset.order_by(*(self._order_by(field) for field in ordering))
+        if self.position is not None:
+            queryset = queryset.filter(self._after(ordering, self.position))
+
+        # Fetch one extra row to know whether there is another page
+        return queryset[:self.page_size + 1]
+
+    def take_page(self, results):
+        """Cut the rows fetched by page_queryset() down to the page"""
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if self.reverse:
+            results.reverse()
+
+        self.page = results
+        if self.reverse:
+            self.has_next = self.position is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = self.position is not None
+        return results
+
+    def get_page_size(self, request):
+        value = request.query_params.get(self.page_size_query_param)
+        if value is None:
+            return self.page_size
+        if value.lower() == 'all':
+            return None
+        try:
+            page_size = int(value)
+        except ValueError:
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def encode_cursor(self, instance, reverse):
+        """Build the URL pointing at the page after/before the given row"""
+        position = [self._field_to_str(self._name(field), instance) for field in self.ordering]
+        payload = {'p': position}
+        if reverse:
+            payload['r'] = 1
+        encoded = base64.urlsafe_b64encode(
+            json.dumps(payload, separators=(',', ':')).encode('ascii')
+        ).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def decode_cursor(self, request):
+        """Return (position values, reverse) from the cursor parameter"""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')).decode('ascii'))
+            raw_position = payload['p']
+            if len(raw_position) != len(self.ordering):
+                raise ValueError
+            position = [
+                self.model._meta.get_field(self._name(field)).to_python(value)
+                for field, value in zip(self.ordering, raw_position)
+            ]
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+        return position, bool(payload.get('r'))
+
+    def _nullable(self, name):
+        return self.model._meta.get_field(name).null
+
+    def _order_by(self, field):
+        """
+        Ordering expression: NULLs come first in the (descending) ordering,
+        so last when it is flipped for a previous page
+        """
+        name = self._name(field)
+        if not self._nullable(name):
+            return field
+        if field.startswith('-'):
+            return F(name).desc(nulls_first=True)
+        return F(name).asc(nulls_last=True)
+
+    def _after(self, ordering, position):
+        """
+        Lexicographic "comes after" filter for the ordering columns:
+        (a > x) OR (a = x AND b > y) ...
+        with NULL placed before every value of a descending column
+        """
+        condition = Q()
+        equal_so_far = Q()
+        for field, value in zip(ordering, position):
+            name = self._name(field)
+            descending = field.startswith('-')
+            if value is None:
+                # Every value follows NULL when descending, nothing when ascending
+                if descending:
+                    condition |= equal_so_far & Q(**{name + '__isnull': False})
+                equal_so_far &= Q(**{name + '__isnull': True})
+                continue
+            after = Q(**{name + ('__lt' if descending else '__gt'): value})
+            if not descending and self._nullable(name):
+                after |= Q(**{name + '__isnull': True})
+            condition |= equal_so_far & after
+            equal_so_far &= Q(**{name: value})
+        return condition
+
+    def _field_to_str(self, name, instance):
+        # Rows are model instances, or dicts when the view paginates a .values() queryset
+        value = instance[name] if isinstance(instance, dict) else getattr(instance, name)
+        if value is None:
+            return None
+        if hasattr(value, 'isoformat'):
+            return value.isoformat()
+        return str(value)
+
+    @staticmethod
+    def _name(field):
+        return field.lstrip('-')
+
+    @staticmethod
+    def _flip(field):
+        return field[1:] if field.startswith('-') else '-' + field
+
+
+class DateCursorPagination(KeysetCursorPagination):
+    """Cursor pagination keyed on (date, id) - matches GR ordering"""
+    ordering = ('-date', '-id')
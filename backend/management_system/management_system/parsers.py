@@ -0,0 +1,20 @@
+"""
+Request parsers for the API
+
+MessagePackParser accepts `Content-Type: application/msgpack` bodies and is
+enabled in settings only when the optional msgpack package is installed.
+"""
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+
+class MessagePackParser(BaseParser):
+    media_type = 'application/msgpack'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        import msgpack
+
+        try:
+            return msgpack.unpackb(stream.read(), raw=False)
+        except Exception as exc:
+            raise ParseError(f'MessagePack parse error - {exc}')
@@ -0,0 +1,52 @@
+"""
+Response renderers for the API
+
+ORJSONRenderer is the default JSON renderer: the same bytes as DRF's
+JSONRenderer, produced by orjson. MessagePackRenderer serves clients sending
+`Accept: application/msgpack` and is enabled in settings only when the
+optional msgpack package is installed.
+"""
+import orjson
+from rest_framework.utils import encoders
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+# Values orjson/msgpack cannot encode natively (Decimal, lazy strings, querysets,
+# datetimes...) go through DRF's encoder so they render exactly as before
+_drf_encoder = encoders.JSONEncoder()
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    Compact JSON through orjson. Indented output (`Accept: application/json;
+    indent=4`, browsable API) is left to DRF.
+    """
+    options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        renderer_context = renderer_context or {}
+        if self.get_indent(accepted_media_type, renderer_context) is not None or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        ret = orjson.dumps(data, default=_drf_encoder.default, option=self.options)
+        # Same escaping as DRF, so the output stays a strict JavaScript subset
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+class MessagePackRenderer(BaseRenderer):
+    """Binary MessagePack responses, values converted as for JSON"""
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        import msgpack
+
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=_drf_encoder.default, use_bin_type=True)
@@ -1,5 +1,8 @@
+import importlib.util
 import os
 from pathlib import Path
+from asgiref.sync import iscoroutinefunction
+from django.utils.decorators import sync_and_async_middleware
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -48,6 +51,11 @@ INSTALLED_APPS = [
     'apps.tender.apps.TenderConfig',
     'apps.bill.apps.BillConfig',
     'apps.demo.apps.DemoConfig',
+    'apps.rollup.apps.RollupConfig',
+    'apps.imports.apps.ImportsConfig',
+    'apps.uploads.apps.UploadsConfig',
+    'apps.blobs.apps.BlobsConfig',
+    'apps.previews.apps.PreviewsConfig',
 ]
 
 # Custom User Model
@@ -66,6 +74,15 @@ MIDDLEWARE = [
     'management_system.settings.security_headers_middleware',  # Custom security headers
 ]
 
+# Serve the read endpoints with async views (see management_system/async_views.py).
+# asgi.py turns it on; WSGI servers and runserver keep the sync views
+ASYNC_VIEWS = os.getenv('ASYNC_VIEWS', 'False').lower() == 'true'
+if ASYNC_VIEWS:
+    # WhiteNoise's middleware is sync-only (see management_system/middleware.py)
+    MIDDLEWARE[MIDDLEWARE.index('whitenoise.middleware.WhiteNoiseMiddleware')] = (
+        'management_system.middleware.AsyncWhiteNoiseMiddleware'
+    )
+
 # CORS Configuration for React
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:5173",
@@ -87,6 +104,15 @@ CSRF_TRUSTED_ORIGINS = [
 ]
 
 # Database Configuration
+# DB_POOL_MAX > 0 turns on pooled connections (psycopg 3 with psycopg-pool):
+# every server process keeps DB_POOL_MIN to DB_POOL_MAX connections open and
+# lends one to each request, so requests skip the connection and
+# authentication handshake. Requests wait up to DB_POOL_TIMEOUT seconds for a
+# free connection. Pool stats: /api/db-pool/ (see management_system/db_pool.py)
+DB_POOL_MIN = int(os.getenv('DB_POOL_MIN', '2'))
+DB_POOL_MAX = int(os.getenv('DB_POOL_MAX', '0'))
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '10'))
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.postgresql',
@@ -95,8 +121,24 @@ DATABASES = {
         'PASSWORD': os.getenv('POSTGRES_PASSWORD'),
         'HOST': os.getenv('POSTGRES_HOST'),
         'PORT': os.getenv('POSTGRES_PORT'),
+        # Without a pool, seconds a connection is kept open for the next
+        # requests of the same thread (0 closes it after every request).
+        # Pools keep their connections themselves, and under ASGI every request
+        # runs in a new thread, so both default to 0
+        'CONN_MAX_AGE': int(os.getenv('CONN_MAX_AGE', '0' if DB_POOL_MAX or ASYNC_VIEWS else '60')),
+        # Check kept or pooled connections before handing them to a request
+        'CONN_HEALTH_CHECKS': os.getenv('CONN_HEALTH_CHECKS', 'True').lower() == 'true',
     }
 }
+if DB_POOL_MAX:
+    DATABASES['default']['OPTIONS'] = {
+        'pool': {
+            'name': 'default',
+            'min_size': DB_POOL_MIN,
+            'max_size': DB_POOL_MAX,
+            'timeout': DB_POOL_TIMEOUT,
+        },
+    }
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
@@ -110,8 +152,33 @@ REST_FRAMEWORK = {
         'rest_framework.parsers.MultiPartParser',
         'rest_framework.parsers.FormParser',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'management_system.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
 }
 
+# Optional MessagePack support (Accept / Content-Type: application/msgpack)
+# when the msgpack package is installed
+if importlib.util.find_spec('msgpack') is not None:
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'].insert(1, 'management_system.renderers.MessagePackRenderer')
+    REST_FRAMEWORK['DEFAULT_PARSER_CLASSES'].append('management_system.parsers.MessagePackParser')
+
+# List pagination (see management_system/pagination.py)
+# Clients can pass ?page_size=all to get the full unpaginated list
+API_PAGE_SIZE = int(os.getenv('API_PAGE_SIZE', '50'))
+API_MAX_PAGE_SIZE = int(os.getenv('API_MAX_PAGE_SIZE', '500'))
+
+# Serialize Bill/TS list responses straight from .values() rows
+# (see management_system/values_serializer.py); set to False to use the DRF serializers
+API_VALUES_LIST = os.getenv('API_VALUES_LIST', 'True').lower() == 'true'
+
+# Rows fetched per round trip by the CSV/XLSX exports (see management_system/exports.py)
+EXPORT_CHUNK_SIZE = int(os.getenv('EXPORT_CHUNK_SIZE', '2000'))
+
+# Largest list accepted by the bulk create/update/delete routes (see management_system/bulk.py)
+API_BULK_MAX_ITEMS = int(os.getenv('API_BULK_MAX_ITEMS', '500'))
+
 # JWT Configuration
 from datetime import timedelta
 
@@ -140,6 +207,10 @@ SIMPLE_JWT = {
     'TOKEN_TYPE_CLAIM': 'token_type',
     'TOKEN_USER_CLASS': 'rest_framework_simplejwt.models.TokenUser',
 
+    # Check the blacklist through the in-memory filter (authentication/blacklist.py)
+    'TOKEN_REFRESH_SERIALIZER': 'authentication.serializers.FilteredTokenRefreshSerializer',
+    'TOKEN_BLACKLIST_SERIALIZER': 'authentication.serializers.FilteredTokenBlacklistSerializer',
+
     'JTI_CLAIM': 'jti',
 
     'SLIDING_TOKEN_REFRESH_EXP_CLAIM': 'refresh_exp',
@@ -147,6 +218,42 @@ SIMPLE_JWT = {
     'SLIDING_TOKEN_REFRESH_LIFETIME': timedelta(days=1),
 }
 
+# Cache (Django's cache framework). Set REDIS_URL (requires the redis package)
+# to share it between the server processes; otherwise each process keeps its own
+REDIS_URL = os.getenv('REDIS_URL')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Cached user lookup for JWT authentication (see authentication/authentication.py):
+# users kept in the in-process LRU, and seconds before cached users/stamps expire.
+# A changed user is dropped from the cache of every process only through a
+# shared cache, so this is on by default only with REDIS_URL (a single server
+# process can enable it without Redis)
+AUTH_USER_CACHE = os.getenv('AUTH_USER_CACHE', 'True' if REDIS_URL else 'False').lower() == 'true'
+if AUTH_USER_CACHE:
+    REST_FRAMEWORK['DEFAULT_AUTHENTICATION_CLASSES'] = ['authentication.authentication.CachedJWTAuthentication']
+AUTH_USER_CACHE_SIZE = int(os.getenv('AUTH_USER_CACHE_SIZE', '1000'))
+AUTH_USER_CACHE_TIMEOUT = int(os.getenv('AUTH_USER_CACHE_TIMEOUT', '300'))
+
+# Answer refresh token blacklist checks from an in-memory bloom filter plus the
+# recently blacklisted jtis (authentication/blacklist.py). Processes share new
+# entries through the cache, so this is on by default only with REDIS_URL
+# (a single server process can enable it without Redis)
+TOKEN_BLACKLIST_FILTER = os.getenv('TOKEN_BLACKLIST_FILTER', 'True' if REDIS_URL else 'False').lower() == 'true'
+TOKEN_BLACKLIST_FILTER_ERROR_RATE = float(os.getenv('TOKEN_BLACKLIST_FILTER_ERROR_RATE', '0.01'))
+TOKEN_BLACKLIST_RECENT_SIZE = int(os.getenv('TOKEN_BLACKLIST_RECENT_SIZE', '10000'))
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -167,6 +274,46 @@ TEMPLATES = [
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Resumable chunked uploads (apps/uploads): largest file, largest chunk per PUT,
+# where partial files are kept (same filesystem as MEDIA_ROOT, so finalizing
+# moves instead of copying) and hours after which idle uploads are purged
+UPLOAD_MAX_SIZE = int(os.getenv('UPLOAD_MAX_SIZE', str(500 * 1024 * 1024)))
+UPLOAD_MAX_CHUNK_SIZE = int(os.getenv('UPLOAD_MAX_CHUNK_SIZE', str(16 * 1024 * 1024)))
+UPLOAD_TEMP_DIR = os.getenv('UPLOAD_TEMP_DIR', os.path.join(MEDIA_ROOT, '.partial'))
+UPLOAD_EXPIRY_HOURS = int(os.getenv('UPLOAD_EXPIRY_HOURS', '48'))
+
+# Uploaded files are stored once per distinct content (apps/blobs/storage.py) and get
+# signed URLs checked by the protected media view (management_system/media.py)
+STORAGES = {
+    'default': {
+        'BACKEND': 'apps.blobs.storage.ContentAddressedStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+}
+
+# Compute the SHA-256 of uploaded files while they stream in, for the content-addressed storage
+FILE_UPLOAD_HANDLERS = [
+    'apps.blobs.uploadhandlers.HashingMemoryFileUploadHandler',
+    'apps.blobs.uploadhandlers.HashingTemporaryFileUploadHandler',
+]
+
+# Document previews (apps/previews): longest side of the preview image in pixels, attempts
+# before a preview is given up, and seconds pdftoppm/pdfinfo may take per document
+PREVIEW_SIZE = int(os.getenv('PREVIEW_SIZE', '400'))
+PREVIEW_MAX_ATTEMPTS = int(os.getenv('PREVIEW_MAX_ATTEMPTS', '3'))
+PREVIEW_TIMEOUT = int(os.getenv('PREVIEW_TIMEOUT', '60'))
+
+# Seconds a signed media link in an API response stays valid (at least; at most twice as long)
+MEDIA_URL_MAX_AGE = int(os.getenv('MEDIA_URL_MAX_AGE', '43200'))
+
+# Let the front proxy send media files: 'x-accel-redirect' (nginx) or 'x-sendfile'
+# (Apache mod_xsendfile, lighttpd); empty streams them from Django
+MEDIA_SENDFILE = os.getenv('MEDIA_SENDFILE', '').lower()
+# nginx internal location aliasing MEDIA_ROOT, used with 'x-accel-redirect'
+MEDIA_ACCEL_REDIRECT_PREFIX = os.getenv('MEDIA_ACCEL_REDIRECT_PREFIX', '/protected-media/')
+
 # Static files
 STATIC_URL = '/static/'
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
@@ -187,6 +334,12 @@ DEFAULT_FROM_EMAIL = os.getenv('DEFAULT_FROM_EMAIL', 'noreply@example.com')
 # Falls back to DEFAULT_FROM_EMAIL or first admin email if not set
 ADMIN_APPROVAL_EMAIL = os.getenv('ADMIN_APPROVAL_EMAIL', None)
 
+# Email outbox (authentication/outbox.py): requests queue mails, the
+# send_outbox worker delivers them and retries failures with exponential backoff
+EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.getenv('EMAIL_OUTBOX_MAX_ATTEMPTS', '5'))
+EMAIL_OUTBOX_RETRY_SECONDS = int(os.getenv('EMAIL_OUTBOX_RETRY_SECONDS', '60'))
+EMAIL_OUTBOX_MAX_RETRY_SECONDS = int(os.getenv('EMAIL_OUTBOX_MAX_RETRY_SECONDS', '3600'))
+
 # Backend domain for generating approval URLs (optional, defaults to request host)
 BACKEND_DOMAIN = os.getenv('BACKEND_DOMAIN', None)  # e.g., 'https://api.example.com'
 
@@ -227,11 +380,10 @@ else:
     SECURE_SSL_REDIRECT = False
     SECURE_HSTS_SECONDS = 0
 
-# Custom security headers middleware
+# Custom security headers middleware (sync and async, so ASGI requests stay on the event loop)
+@sync_and_async_middleware
 def security_headers_middleware(get_response):
-    def middleware(request):
-        response = get_response(request)
-        
+    def add_headers(response):
         # Only set strict CSP for HTTPS
         if USE_HTTPS:
             response['Content-Security-Policy'] = "default-src 'self'; frame-ancestors 'self';"
@@ -242,4 +394,11 @@ def security_headers_middleware(get_response):
         response['X-Frame-Options'] = 'SAMEORIGIN'
         
         return response
+
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            return add_headers(await get_response(request))
+    else:
+        def middleware(request):
+            return add_headers(get_response(request))
     return middleware
@@ -0,0 +1,172 @@
+"""
+Sparse fieldsets for the API responses
+
+Query Parameters:
+- fields: Comma-separated response fields to return, e.g. ?fields=id,billNumber
+- omit: Comma-separated response fields to leave out, e.g. ?omit=documentUrl
+
+DynamicFieldsMixin trims the serializer, SparseFieldsetMixin trims the
+queryset to match: select_related is reduced to the relations the remaining
+fields read, .only() loads just their columns and prefetches of nested
+fields that were dropped are skipped. Without either parameter
+nothing changes. Write-only fields are never affected, so request bodies are
+validated exactly as before.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.relations import RelatedField
+from rest_framework.serializers import BaseSerializer, ListSerializer
+
+FIELDS_QUERY_PARAM = 'fields'
+OMIT_QUERY_PARAM = 'omit'
+
+
+def _split(value):
+    return {name.strip() for name in value.split(',') if name.strip()}
+
+
+def get_sparse_fieldset(request):
+    """Return (requested field names or None, omitted field names) for a request"""
+    if request is None:
+        return None, set()
+    params = request.query_params
+    requested = _split(params[FIELDS_QUERY_PARAM]) if params.get(FIELDS_QUERY_PARAM) else None
+    omitted = _split(params.get(OMIT_QUERY_PARAM, ''))
+    return requested, omitted
+
+
+def resolve_source(model, source, pk_only=False):
+    """
+    Map a dotted serializer source ('tender.work.name_of_work') to an ORM
+    column ('tender__work__name_of_work'), the forward relations it traverses
+    ({'tender', 'tender__work'}) and the model field it ends on. Returns None
+    for anything that is not a plain model field (properties, reverse relations...).
+    """
+    parts = source.split('.')
+    path = []
+    current = model
+    for index, part in enumerate(parts):
+        try:
+            field = current._meta.get_field(part)
+        except FieldDoesNotExist:
+            return None
+        is_last = index == len(parts) - 1
+        if field.is_relation:
+            if not (field.many_to_one or field.one_to_one) or not field.concrete:
+                return None
+            if is_last and pk_only:
+                # PrimaryKeyRelatedField reads just the FK column
+                break
+            if not is_last:
+                path.append('__'.join(parts[:index + 1]))
+                current = field.related_model
+                continue
+            return None
+    return '__'.join(parts), set(path), field
+
+
+class DynamicFieldsMixin:
+    """
+    Serializer mixin applying ?fields= / ?omit= to the readable fields.
+    Only the top-level serializer of a response is trimmed, nested ones are
+    left whole.
+
+    Meta.field_sources can list the model attributes a SerializerMethodField
+    reads (e.g. {'status': ['loa', 'work_order']}) so the view can still
+    narrow the queryset when such a field is requested.
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if not self._is_response_root():
+            return fields
+        requested, omitted = get_sparse_fieldset(self.context.get('request'))
+        if requested is None and not omitted:
+            return fields
+        for name, field in list(fields.items()):
+            if field.write_only:
+                continue
+            if (requested is not None and name not in requested) or name in omitted:
+                fields.pop(name)
+        return fields
+
+    def _is_response_root(self):
+        parent = self.parent
+        if isinstance(parent, ListSerializer):
+            parent = parent.parent
+        return parent is None
+
+
+class SparseFieldsetMixin:
+    """
+    ViewSet mixin narrowing the queryset to the fields kept by ?fields= / ?omit=.
+    Call self.sparse_queryset(queryset) at the end of get_queryset().
+
+    Only read requests are narrowed - saving an instance with deferred fields
+    would skip the calculations in Model.save().
+    """
+
+    def sparse_queryset(self, queryset):
+        request = getattr(self, 'request', None)
+        if request is None or request.method not in SAFE_METHODS:
+            return queryset
+        requested, omitted = get_sparse_fieldset(request)
+        if requested is None and not omitted:
+            return queryset
+
+        lookups = self.get_sparse_lookups(queryset.model, self.get_serializer())
+        if lookups is None:
+            return queryset
+        columns, relations, nested = lookups
+
+        # Columns the paginator reads to build the next/previous cursors
+        paginator = self.paginator
+        for field in getattr(paginator, 'ordering', ()):
+            columns.add(field.lstrip('-'))
+
+        prefetches = [
+            lookup for lookup in queryset._prefetch_related_lookups
+            if getattr(lookup, 'prefetch_through', lookup).split('__')[0] in nested
+        ]
+        queryset = queryset.prefetch_related(None).prefetch_related(*prefetches)
+
+        queryset = queryset.select_related(None)
+        if relations:
+            queryset = queryset.select_related(*sorted(relations))
+        # Relations are loaded along with their FK column, which .only() must keep
+        return queryset.only(*sorted(columns | relations))
+
+    def get_sparse_lookups(self, model, serializer):
+        """
+        Return (columns, relations, nested) needed to render the serializer's
+        readable fields as ORM lookups - nested being the prefetched reverse
+        relations still rendered - or None if some field cannot be mapped - the
+        queryset is then left untouched.
+        """
+        field_sources = getattr(getattr(serializer, 'Meta', None), 'field_sources', {})
+        columns = {model._meta.pk.name}
+        relations = set()
+        nested = set()
+
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if name in field_sources:
+                sources = field_sources[name]
+            elif isinstance(field, ListSerializer):
+                # Prefetched reverse relation (e.g. GR works) - needs only the pk
+                nested.add(field.source)
+                continue
+            elif field.source == '*' or isinstance(field, BaseSerializer):
+                return None
+            else:
+                sources = [field.source]
+
+            for source in sources:
+                resolved = resolve_source(model, source, pk_only=isinstance(field, RelatedField))
+                if resolved is None:
+                    return None
+                column, path, _ = resolved
+                columns.add(column)
+                relations.update(path)
+        return columns, relations, nested
@@ -1,6 +1,5 @@
 from django.contrib import admin
 from django.urls import path, include, re_path
-from django.views.static import serve
 from rest_framework import routers
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView, TokenBlacklistView
 from apps.gr.views import GRViewSet
@@ -8,9 +7,13 @@ from apps.works.views import SpillViewSet, WorkViewSet
 from apps.technical_sanction.views import TechnicalSanctionViewSet
 from apps.tender.views import TenderViewSet
 from apps.bill.views import BillViewSet
+from apps.imports.views import ImportView
+from apps.uploads.views import ChunkedUploadViewSet
 from authentication.views import ApproveUserView
 from django.conf import settings
 from django.conf.urls.static import static
+from management_system.db_pool import DatabasePoolStatsView
+from management_system.media import protected_media
 from status_views import StatusDashboardView
 
 router = routers.DefaultRouter()
@@ -20,12 +23,17 @@ router.register(r'spills', SpillViewSet)
 router.register(r'technical-sanctions', TechnicalSanctionViewSet)
 router.register(r'tenders', TenderViewSet)
 router.register(r'bills', BillViewSet)
+router.register(r'uploads', ChunkedUploadViewSet, basename='upload')
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include(router.urls)),
     # Status dashboard endpoint
     path('api/status/', StatusDashboardView.as_view(), name='status_dashboard'),
+    # Database connection pool stats of the serving process (staff only)
+    path('api/db-pool/', DatabasePoolStatsView.as_view(), name='db_pool_stats'),
+    # Bulk import of GRs/Works/TS/Tenders/Bills from .xlsx/.csv files
+    path('api/import/', ImportView.as_view(), name='import'),
     # Demo endpoints (public, no authentication required)
     path('api/demo/', include('apps.demo.urls')),
     # Authentication endpoints
@@ -37,13 +45,9 @@ urlpatterns = [
     path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('api/token/blacklist/', TokenBlacklistView.as_view(), name='token_blacklist'),
 
-    # Serve media files in production (until nginx is configured)
-    re_path(r'^media/(?P<path>.*)$', serve, {'document_root': settings.MEDIA_ROOT}),
+    # Uploaded documents, with per-file authorization (see management_system/media.py)
+    re_path(r'^media/(?P<path>.*)$', protected_media, name='protected_media'),
 ]
 
 # Static files (admin CSS/JS) - also serve in production
 urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
-
-# For serving media files in development
-if settings.DEBUG or True:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
@@ -0,0 +1,139 @@
+"""
+Read-only list serialization from .values() rows
+
+For list actions, building a model instance per row (plus one per joined
+Tender/Work/GR) and running every DRF field's get_attribute/to_representation
+costs more than the query itself on large lists. ValuesSerializer compiles a
+DRF serializer's readable fields once per request into a mapping table of
+(response key, ORM column, converter), fetches just those columns with
+.values() and builds the same camelCase dicts from the rows.
+
+Fields that look up further data per value (e.g. PreviewURLField) can define
+prefetch(values): represent() passes it the column of all rows first, so the
+lookup is one query per page instead of one per row.
+
+Writes, retrieve and serializers with fields that cannot be read from a single
+column (method fields, nested serializers, properties) keep using DRF.
+"""
+from django.conf import settings
+from django.db.models import FileField as ModelFileField
+from rest_framework import serializers
+from rest_framework.relations import RelatedField
+from rest_framework.response import Response
+
+from .sparse_fields import resolve_source
+
+
+def _identity(value):
+    return value
+
+
+def _file_converter(drf_field, model_field):
+    """Rebuild the FieldFile from the stored name so DRF renders the same URL"""
+    def convert(name):
+        return drf_field.to_representation(model_field.attr_class(None, model_field, name))
+    return convert
+
+
+class ValuesSerializer:
+    """
+    Compiled read path of a DRF serializer. Build it with compile(), which
+    returns None when the serializer has a field it cannot map.
+    """
+
+    def __init__(self, plan, prefetchers=()):
+        # [(response key, column, converter)] in the serializer's field order
+        self.plan = plan
+        self.columns = list(dict.fromkeys(column for _, column, _ in plan))
+        # [(column, the field's prefetch method)]
+        self.prefetchers = prefetchers
+
+    @classmethod
+    def compile(cls, serializer):
+        model = serializer.Meta.model
+        plan = []
+        prefetchers = []
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if field.source == '*' or isinstance(field, serializers.BaseSerializer):
+                return None
+            is_related = isinstance(field, RelatedField)
+            if is_related and not isinstance(field, serializers.PrimaryKeyRelatedField):
+                return None
+
+            resolved = resolve_source(model, field.source, pk_only=is_related)
+            if resolved is None:
+                return None
+            column, _, model_field = resolved
+            plan.append((name, column, cls._converter(field, model_field, is_related)))
+            if hasattr(field, 'prefetch'):
+                prefetchers.append((column, field.prefetch))
+        return cls(plan, prefetchers)
+
+    @staticmethod
+    def _converter(field, model_field, is_related):
+        # Same output as field.to_representation(), without the per-call overhead
+        # where the value from the database already has the right type
+        if is_related:
+            return _identity  # PrimaryKeyRelatedField renders the FK id
+        if isinstance(field, serializers.FileField) and isinstance(model_field, ModelFileField):
+            return _file_converter(field, model_field)
+        if isinstance(field, serializers.BooleanField):
+            return bool
+        if isinstance(field, serializers.IntegerField):
+            return int
+        if isinstance(field, serializers.CharField) and not isinstance(field, serializers.ChoiceField):
+            return str
+        return field.to_representation
+
+    def values(self, queryset, extra_columns=()):
+        """The queryset as .values() rows holding every mapped column"""
+        columns = list(dict.fromkeys([*self.columns, *extra_columns]))
+        return queryset.select_related(None).prefetch_related(None).values(*columns)
+
+    def to_representation(self, row):
+        data = {}
+        for name, column, convert in self.plan:
+            value = row[column]
+            # DRF renders None without calling the field (also for a null FK along the source)
+            data[name] = None if value is None else convert(value)
+        return data
+
+    def represent(self, rows):
+        rows = list(rows)
+        for column, prefetch in self.prefetchers:
+            prefetch(row[column] for row in rows)
+        return [self.to_representation(row) for row in rows]
+
+
+class ValuesListMixin:
+    """
+    ViewSet mixin serving the list action through ValuesSerializer.
+    Falls back to the regular DRF list when the serializer cannot be compiled
+    or settings.API_VALUES_LIST is off.
+    """
+
+    def get_values_serializer(self):
+        """The compiled list serializer, None to use the regular DRF list"""
+        if not getattr(settings, 'API_VALUES_LIST', True):
+            return None
+        return ValuesSerializer.compile(self.get_serializer())
+
+    def get_values_rows(self, values_serializer):
+        """The filtered queryset as .values() rows"""
+        queryset = self.filter_queryset(self.get_queryset())
+        # The paginator reads the ordering columns from the rows to build cursors
+        ordering = [field.lstrip('-') for field in getattr(self.paginator, 'ordering', ())]
+        return values_serializer.values(queryset, extra_columns=ordering)
+
+    def list(self, request, *args, **kwargs):
+        values_serializer = self.get_values_serializer()
+        if values_serializer is None:
+            return super().list(request, *args, **kwargs)
+
+        rows = self.get_values_rows(values_serializer)
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(values_serializer.represent(page))
+        return Response(values_serializer.represent(rows))
@@ -3,19 +3,307 @@
 Status Dashboard API endpoint
 Returns comprehensive workflow progress statistics
 """
+from asgiref.sync import sync_to_async
 from rest_framework import generics, status
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.db.models import Q, Exists, OuterRef
+from django.db.models import Q, Count, Exists, OuterRef
 
 from apps.gr.models import GR
 from apps.works.models import Work
 from apps.technical_sanction.models import TechnicalSanction
 from apps.tender.models import Tender
 from apps.bill.models import Bill
+from apps.rollup.services import read_rollup_counts
+from management_system.async_views import AsyncReadMixin
 
 
-class StatusDashboardView(generics.GenericAPIView):
+def _requested_sections(page):
+    """Determine which sections to calculate based on page parameter"""
+    return {
+        'overall': page is None,
+        'works_status': page is None or page == 'works',
+        'ts_status': page is None or page == 'ts',
+        'tenders_status': page is None,
+        'bills_status': page is None,
+    }
+
+
+def workflow_status_aggregates(gr_filters, work_filters, ts_filters, tender_filters, bill_filters, page=None):
+    """
+    Return the (model, filters, aggregates) of the queries count_workflow_status()
+    runs for the requested page, one per model
+    """
+    sections = _requested_sections(page)
+
+    # Aggregates to run per model, keyed by response field name
+    gr_aggregates = {}
+    work_aggregates = {}
+    ts_aggregates = {}
+    tender_aggregates = {}
+    bill_aggregates = {}
+
+    # 1. Overall Workflow Counts
+    if sections['overall']:
+        if gr_filters is not None:
+            gr_aggregates['total_grs'] = Count('id')
+        work_aggregates['active_works'] = Count('id')
+        ts_aggregates['technical_sanctions'] = Count('id')
+        tender_aggregates['tenders'] = Count('id')
+        bill_aggregates['bills'] = Count('id')
+
+    # 2. Works Status (grouped by stage)
+    if sections['works_status']:
+        works_with_ts = Exists(TechnicalSanction.objects.filter(work=OuterRef('pk'), **ts_filters))
+        works_with_tenders = Exists(Tender.objects.filter(work=OuterRef('pk'), **tender_filters))
+        # no_ts_yet: Works with 0 TechnicalSanctions
+        work_aggregates['no_ts_yet'] = Count('id', filter=~works_with_ts)
+        # ts_created: Works with TechnicalSanctions but no Tenders
+        work_aggregates['ts_created'] = Count('id', filter=works_with_ts & ~works_with_tenders)
+        # tenders_open: Tenders in technical_verification stage or earlier
+        tender_aggregates['tenders_open'] = Count('id', filter=(
+            Q(technical_verification=False) |
+            Q(technical_verification=True, financial_verification=False)
+        ))
+        # tenders_awarded: Tenders with work_order_tick=True
+        tender_aggregates['tenders_awarded'] = Count('id', filter=Q(work_order_tick=True))
+        # bills_pending / completed: payment_done_from_gr is None / not None
+        bill_aggregates['bills_pending'] = Count('id', filter=Q(payment_done_from_gr__isnull=True))
+        bill_aggregates['completed'] = Count('id', filter=Q(payment_done_from_gr__isnull=False))
+
+    # 3. Technical Sanctions Status
+    if sections['ts_status']:
+        ts_aggregates['noting_stage'] = Count('id', filter=Q(noting=True, order=False))
+        ts_aggregates['ordering_stage'] = Count('id', filter=Q(order=True))
+
+    # 4. Tenders Status
+    if sections['tenders_status']:
+        tender_aggregates['online_pending'] = Count('id', filter=Q(online=False))
+        tender_aggregates['technical_verification'] = Count('id', filter=Q(
+            technical_verification=True, financial_verification=False
+        ))
+        tender_aggregates['financial_verification'] = Count('id', filter=Q(
+            financial_verification=True, loa=False
+        ))
+        tender_aggregates['loa_issued'] = Count('id', filter=Q(loa=True, work_order_tick=False))
+        tender_aggregates['work_order_issued'] = Count('id', filter=Q(work_order_tick=True))
+
+    # 5. Bills Status
+    if sections['bills_status']:
+        bill_aggregates['pending_payment'] = Count('id', filter=Q(payment_done_from_gr__isnull=True))
+        bill_aggregates['payment_completed'] = Count('id', filter=Q(payment_done_from_gr__isnull=False))
+
+    return [
+        (model, filters, aggregates)
+        for model, filters, aggregates in (
+            (GR, gr_filters, gr_aggregates),
+            (Work, work_filters, work_aggregates),
+            (TechnicalSanction, ts_filters, ts_aggregates),
+            (Tender, tender_filters, tender_aggregates),
+            (Bill, bill_filters, bill_aggregates),
+        )
+        if aggregates
+    ]
+
+
+def count_workflow_status(gr_filters, work_filters, ts_filters, tender_filters, bill_filters, page=None):
+    """
+    Return the flat dashboard counts (total_grs, active_works, no_ts_yet, ...)
+    needed for the requested page. Pass gr_filters=None to skip counting GRs.
+    """
+    counts = {}
+    for model, filters, aggregates in workflow_status_aggregates(
+        gr_filters, work_filters, ts_filters, tender_filters, bill_filters, page=page
+    ):
+        counts.update(model.objects.filter(**filters).aggregate(**aggregates))
+    return counts
+
+
+async def acount_workflow_status(gr_filters, work_filters, ts_filters, tender_filters, bill_filters, page=None):
+    """count_workflow_status() with the async ORM"""
+    counts = {}
+    for model, filters, aggregates in workflow_status_aggregates(
+        gr_filters, work_filters, ts_filters, tender_filters, bill_filters, page=page
+    ):
+        counts.update(await model.objects.filter(**filters).aaggregate(**aggregates))
+    return counts
+
+
+def format_workflow_status(counts, page=None):
+    """Shape flat counts into the dashboard response sections"""
+    sections = _requested_sections(page)
+    response_data = {}
+    if sections['overall']:
+        response_data.update({
+            "total_grs": counts['total_grs'],
+            "active_works": counts['active_works'],
+            "technical_sanctions": counts['technical_sanctions'],
+            "tenders": counts['tenders'],
+            "bills": counts['bills']
+        })
+    if sections['works_status']:
+        response_data["works_status"] = {
+            "no_ts_yet": counts['no_ts_yet'],
+            "ts_created": counts['ts_created'],
+            "tenders_open": counts['tenders_open'],
+            "tenders_awarded": counts['tenders_awarded'],
+            "bills_pending": counts['bills_pending'],
+            "completed": counts['completed']
+        }
+    if sections['ts_status']:
+        response_data["ts_status"] = {
+            "noting_stage": counts['noting_stage'],
+            "ordering_stage": counts['ordering_stage']
+        }
+    if sections['tenders_status']:
+        response_data["tenders_status"] = {
+            "online_pending": counts['online_pending'],
+            "technical_verification": counts['technical_verification'],
+            "financial_verification": counts['financial_verification'],
+            "loa_issued": counts['loa_issued'],
+            "work_order_issued": counts['work_order_issued']
+        }
+    if sections['bills_status']:
+        response_data["bills_status"] = {
+            "pending_payment": counts['pending_payment'],
+            "payment_completed": counts['payment_completed']
+        }
+    return response_data
+
+
+class StatusQueryError(Exception):
+    """Invalid status dashboard query, answered with {'error': message}"""
+
+    def __init__(self, message, status_code=status.HTTP_400_BAD_REQUEST):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def parse_status_query(params):
+    """
+    Read the demo/gr/work/page query parameters of the status dashboard into
+    the filters of each model. A work filter is completed by
+    apply_work_filter() once the work has been loaded.
+    """
+    is_demo_param = params.get('demo', None)
+    gr_id = params.get('gr', None)
+    work_id = params.get('work', None)
+    page = params.get('page', None)
+
+    # Determine if we're in demo mode
+    # If demo=true is passed, use demo data, otherwise use non-demo data (is_demo=False)
+    if is_demo_param and is_demo_param.lower() in ('true', '1', 'yes'):
+        is_demo = True
+    else:
+        is_demo = False  # Default to non-demo (production) data when no parameter or invalid value
+
+    # Base filters for related objects
+    # IMPORTANT: Always ensure related objects match the demo status
+    gr_filters = {'is_demo': is_demo}
+    work_filters = {
+        'is_demo': is_demo,
+        'is_cancelled': False,
+        'gr__is_demo': is_demo  # Ensure GR is also non-demo/demo as required
+    }
+    ts_filters = {
+        'is_demo': is_demo,
+        'work__is_demo': is_demo,
+        'work__is_cancelled': False,
+        'work__gr__is_demo': is_demo  # Ensure GR is also non-demo/demo as required
+    }
+    tender_filters = {
+        'is_demo': is_demo,
+        'work__is_demo': is_demo,
+        'work__is_cancelled': False,
+        'work__gr__is_demo': is_demo,  # Ensure GR is also non-demo/demo as required
+        'technical_sanction__is_demo': is_demo
+    }
+    bill_filters = {
+        'is_demo': is_demo,
+        'tender__is_demo': is_demo,
+        'tender__work__is_demo': is_demo,
+        'tender__work__is_cancelled': False,
+        'tender__work__gr__is_demo': is_demo,  # Ensure GR is also non-demo/demo as required
+        'tender__technical_sanction__is_demo': is_demo
+    }
+
+    # Apply GR filter if provided
+    if gr_id is not None:
+        try:
+            gr_id = int(gr_id)
+        except ValueError:
+            raise StatusQueryError('Invalid GR ID. Must be an integer.')
+        gr_filters['id'] = gr_id
+        work_filters['gr_id'] = gr_id
+        work_filters['gr__is_demo'] = is_demo
+        ts_filters['work__gr_id'] = gr_id
+        tender_filters['work__gr_id'] = gr_id
+        bill_filters['tender__work__gr_id'] = gr_id
+
+    if work_id is not None:
+        try:
+            work_id = int(work_id)
+        except ValueError:
+            raise StatusQueryError('Invalid Work ID. Must be an integer.')
+
+    return {
+        'is_demo': is_demo,
+        'gr_id': gr_id,
+        'work_id': work_id,
+        'page': page,
+        'filters': {
+            'gr_filters': gr_filters,
+            'work_filters': work_filters,
+            'ts_filters': ts_filters,
+            'tender_filters': tender_filters,
+            'bill_filters': bill_filters,
+        },
+    }
+
+
+def status_work_lookup(query):
+    """Filters loading the work a status query is restricted to"""
+    return {'id': query['work_id'], 'is_demo': query['is_demo'], 'is_cancelled': False}
+
+
+def apply_work_filter(query, work):
+    """Restrict the query to its work (None if it was not found)"""
+    gr_id, work_id = query['gr_id'], query['work_id']
+    if work is None:
+        raise StatusQueryError(f'Work with ID {work_id} not found.', status.HTTP_404_NOT_FOUND)
+
+    # If GR filter is also provided, validate that work belongs to that GR
+    if gr_id is not None and work.gr_id != gr_id:
+        raise StatusQueryError(f'Work {work_id} does not belong to GR {gr_id}.')
+
+    # Apply work filter
+    filters = query['filters']
+    filters['work_filters']['id'] = work_id
+    filters['ts_filters']['work_id'] = work_id
+    filters['tender_filters']['work_id'] = work_id
+    filters['bill_filters']['tender__work_id'] = work_id
+
+    # If work filter is applied but GR filter is not, auto-set GR filter
+    if gr_id is None:
+        filters['gr_filters']['id'] = work.gr_id
+        query['gr_id'] = work.gr_id
+
+
+def status_response_data(query, counts):
+    """The dashboard response: filter indicators and the counted sections"""
+    response_data = {}
+
+    # Add filter indicators if filters are applied
+    if query['gr_id'] is not None:
+        response_data['gr_filter'] = query['gr_id']
+    if query['work_id'] is not None:
+        response_data['work_filter'] = query['work_id']
+
+    response_data.update(format_workflow_status(counts, page=query['page']))
+    return response_data
+
+
+class StatusDashboardView(AsyncReadMixin, generics.GenericAPIView):
     """
     Status Dashboard endpoint that returns workflow progress statistics
     
@@ -35,6 +323,8 @@ class StatusDashboardView(generics.GenericAPIView):
     - /api/status/?demo=true - Full status for demo data
     
     Always excludes cancelled works (is_cancelled=False)
+    
+    Served by aget() with the async ORM under ASGI (see management_system/async_views.py)
     """
     permission_classes = [IsAuthenticated]
     
@@ -48,240 +338,50 @@ class StatusDashboardView(generics.GenericAPIView):
         - page: Return only specific section (works, ts)
         """
         try:
-            # Get query parameters
-            is_demo_param = request.query_params.get('demo', None)
-            gr_id = request.query_params.get('gr', None)
-            work_id = request.query_params.get('work', None)
-            page = request.query_params.get('page', None)
-            
-            # Determine if we're in demo mode
-            # If demo=true is passed, use demo data, otherwise use non-demo data (is_demo=False)
-            if is_demo_param and is_demo_param.lower() in ('true', '1', 'yes'):
-                is_demo = True
-            else:
-                is_demo = False  # Default to non-demo (production) data when no parameter or invalid value
-            
-            # Base filters for related objects
-            # IMPORTANT: Always ensure related objects match the demo status
-            gr_filters = {'is_demo': is_demo}
-            work_filters = {
-                'is_demo': is_demo,
-                'is_cancelled': False,
-                'gr__is_demo': is_demo  # Ensure GR is also non-demo/demo as required
-            }
-            ts_filters = {
-                'is_demo': is_demo,
-                'work__is_demo': is_demo,
-                'work__is_cancelled': False,
-                'work__gr__is_demo': is_demo  # Ensure GR is also non-demo/demo as required
-            }
-            tender_filters = {
-                'is_demo': is_demo,
-                'work__is_demo': is_demo,
-                'work__is_cancelled': False,
-                'work__gr__is_demo': is_demo,  # Ensure GR is also non-demo/demo as required
-                'technical_sanction__is_demo': is_demo
-            }
-            bill_filters = {
-                'is_demo': is_demo,
-                'tender__is_demo': is_demo,
-                'tender__work__is_demo': is_demo,
-                'tender__work__is_cancelled': False,
-                'tender__work__gr__is_demo': is_demo,  # Ensure GR is also non-demo/demo as required
-                'tender__technical_sanction__is_demo': is_demo
-            }
-            
-            # Apply GR filter if provided
-            if gr_id is not None:
-                try:
-                    gr_id = int(gr_id)
-                    gr_filters['id'] = gr_id
-                    work_filters['gr_id'] = gr_id
-                    work_filters['gr__is_demo'] = is_demo
-                    ts_filters['work__gr_id'] = gr_id
-                    tender_filters['work__gr_id'] = gr_id
-                    bill_filters['tender__work__gr_id'] = gr_id
-                except ValueError:
-                    return Response({
-                        'error': 'Invalid GR ID. Must be an integer.'
-                    }, status=status.HTTP_400_BAD_REQUEST)
+            query = parse_status_query(request.query_params)
+            if query['work_id'] is not None:
+                # Validate work exists and get its GR
+                apply_work_filter(query, Work.objects.filter(**status_work_lookup(query)).first())
             
-            # Apply Work filter if provided
-            if work_id is not None:
-                try:
-                    work_id = int(work_id)
-                    # Validate work exists and get its GR
-                    try:
-                        work = Work.objects.get(id=work_id, is_demo=is_demo, is_cancelled=False)
-                        work_gr_id = work.gr_id
-                    except Work.DoesNotExist:
-                        return Response({
-                            'error': f'Work with ID {work_id} not found.'
-                        }, status=status.HTTP_404_NOT_FOUND)
-                    
-                    # If GR filter is also provided, validate that work belongs to that GR
-                    if gr_id is not None and work_gr_id != gr_id:
-                        return Response({
-                            'error': f'Work {work_id} does not belong to GR {gr_id}.'
-                        }, status=status.HTTP_400_BAD_REQUEST)
-                    
-                    # Apply work filter
-                    work_filters['id'] = work_id
-                    ts_filters['work_id'] = work_id
-                    tender_filters['work_id'] = work_id
-                    bill_filters['tender__work_id'] = work_id
-                    
-                    # If work filter is applied but GR filter is not, auto-set GR filter
-                    if gr_id is None:
-                        gr_filters['id'] = work_gr_id
-                        gr_id = work_gr_id
-                except ValueError:
-                    return Response({
-                        'error': 'Invalid Work ID. Must be an integer.'
-                    }, status=status.HTTP_400_BAD_REQUEST)
+            # Read the pre-computed per-GR rollups when possible, otherwise
+            # count the live tables (one aggregate query per model)
+            counts = None
+            if query['work_id'] is None:
+                counts = read_rollup_counts(query['is_demo'], gr_id=query['gr_id'])
+            if counts is None:
+                counts = count_workflow_status(**query['filters'], page=query['page'])
             
-            # Initialize response data with filter indicators
-            response_data = {}
+            return Response(status_response_data(query, counts), status=status.HTTP_200_OK)
             
-            # Add filter indicators if filters are applied
-            if gr_id is not None:
-                response_data['gr_filter'] = gr_id
-            if work_id is not None:
-                response_data['work_filter'] = work_id
-            
-            # Determine which sections to calculate based on page parameter
-            calculate_overall = page is None
-            calculate_works_status = page is None or page == 'works'
-            calculate_ts_status = page is None or page == 'ts'
-            calculate_tenders_status = page is None
-            calculate_bills_status = page is None
-            
-            # 1. Overall Workflow Counts (only if not page-specific)
-            if calculate_overall:
-                total_grs = GR.objects.filter(**gr_filters).count()
-                active_works = Work.objects.filter(**work_filters).count()
-                technical_sanctions = TechnicalSanction.objects.filter(**ts_filters).count()
-                tenders = Tender.objects.filter(**tender_filters).count()
-                bills = Bill.objects.filter(**bill_filters).count()
-                
-                response_data.update({
-                    "total_grs": total_grs,
-                    "active_works": active_works,
-                    "technical_sanctions": technical_sanctions,
-                    "tenders": tenders,
-                    "bills": bills
-                })
-            
-            # 2. Works Status (grouped by stage)
-            if calculate_works_status:
-                # Get base works queryset
-                works_queryset = Work.objects.filter(**work_filters)
-                
-                # no_ts_yet: Works with 0 TechnicalSanctions
-                works_with_ts = TechnicalSanction.objects.filter(
-                    work=OuterRef('pk'),
-                    **ts_filters
-                )
-                no_ts_yet = works_queryset.annotate(
-                    has_ts=Exists(works_with_ts)
-                ).filter(has_ts=False).count()
-                
-                # ts_created: Works with TechnicalSanctions but no Tenders
-                works_with_tenders = Tender.objects.filter(
-                    work=OuterRef('pk'),
-                    **tender_filters
-                )
-                ts_created = works_queryset.annotate(
-                    has_ts=Exists(works_with_ts),
-                    has_tenders=Exists(works_with_tenders)
-                ).filter(has_ts=True, has_tenders=False).count()
-                
-                # tenders_open: Tenders in technical_verification stage or earlier
-                # (technical_verification=False OR technical_verification=True, financial_verification=False)
-                tenders_open = Tender.objects.filter(**tender_filters).filter(
-                    Q(technical_verification=False) | 
-                    Q(technical_verification=True, financial_verification=False)
-                ).count()
-                
-                # tenders_awarded: Tenders with work_order_tick=True
-                tenders_awarded = Tender.objects.filter(
-                    **tender_filters,
-                    work_order_tick=True
-                ).count()
-                
-                # bills_pending: Bills exist but payment not done (payment_done_from_gr is None)
-                bills_pending = Bill.objects.filter(
-                    **bill_filters,
-                    payment_done_from_gr__isnull=True
-                ).count()
-                
-                # completed: Bills with payment_done_from_gr=True (payment_done_from_gr is not None)
-                completed = Bill.objects.filter(
-                    **bill_filters,
-                    payment_done_from_gr__isnull=False
-                ).count()
-                
-                response_data["works_status"] = {
-                    "no_ts_yet": no_ts_yet,
-                    "ts_created": ts_created,
-                    "tenders_open": tenders_open,
-                    "tenders_awarded": tenders_awarded,
-                    "bills_pending": bills_pending,
-                    "completed": completed
-                }
-            
-            # 3. Technical Sanctions Status
-            if calculate_ts_status:
-                ts_queryset = TechnicalSanction.objects.filter(**ts_filters)
-                noting_stage = ts_queryset.filter(noting=True, order=False).count()
-                ordering_stage = ts_queryset.filter(order=True).count()
-                
-                response_data["ts_status"] = {
-                    "noting_stage": noting_stage,
-                    "ordering_stage": ordering_stage
-                }
-            
-            # 4. Tenders Status (only if not page-specific)
-            if calculate_tenders_status:
-                tender_queryset = Tender.objects.filter(**tender_filters)
-                online_pending = tender_queryset.filter(online=False).count()
-                technical_verification = tender_queryset.filter(
-                    technical_verification=True,
-                    financial_verification=False
-                ).count()
-                financial_verification = tender_queryset.filter(
-                    financial_verification=True,
-                    loa=False
-                ).count()
-                loa_issued = tender_queryset.filter(
-                    loa=True,
-                    work_order_tick=False
-                ).count()
-                work_order_issued = tender_queryset.filter(work_order_tick=True).count()
-                
-                response_data["tenders_status"] = {
-                    "online_pending": online_pending,
-                    "technical_verification": technical_verification,
-                    "financial_verification": financial_verification,
-                    "loa_issued": loa_issued,
-                    "work_order_issued": work_order_issued
-                }
+        except StatusQueryError as e:
+            return Response({
+                'error': str(e)
+            }, status=e.status_code)
+        except Exception as e:
+            return Response({
+                'error': str(e)
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    
+    async def aget(self, request):
+        """get() with the async ORM"""
+        try:
+            query = parse_status_query(request.query_params)
+            if query['work_id'] is not None:
+                apply_work_filter(query, await Work.objects.filter(**status_work_lookup(query)).afirst())
             
-            # 5. Bills Status (only if not page-specific)
-            if calculate_bills_status:
-                bill_queryset = Bill.objects.filter(**bill_filters)
-                pending_payment = bill_queryset.filter(payment_done_from_gr__isnull=True).count()
-                payment_completed = bill_queryset.filter(payment_done_from_gr__isnull=False).count()
-                
-                response_data["bills_status"] = {
-                    "pending_payment": pending_payment,
-                    "payment_completed": payment_completed
-                }
+            counts = None
+            if query['work_id'] is None:
+                counts = await sync_to_async(read_rollup_counts)(query['is_demo'], gr_id=query['gr_id'])
+            if counts is None:
+                counts = await acount_workflow_status(**query['filters'], page=query['page'])
             
-            return Response(response_data, status=status.HTTP_200_OK)
+            return Response(status_response_data(query, counts), status=status.HTTP_200_OK)
             
+        except StatusQueryError as e:
+            return Response({
+                'error': str(e)
+            }, status=e.status_code)
         except Exception as e:
             return Response({
                 'error': str(e)
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-
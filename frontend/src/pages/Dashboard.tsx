@@ -76,7 +76,7 @@ const Dashboard: React.FC<{
       setError(null);
       // Fetch all data in parallel (use demo endpoints if in demo mode)
       const [grsData, worksData, tendersData, billsData] = await Promise.all([
-        grService.fetchAllGRs(isDemoMode),
+        grService.fetchAllGRs(isDemoMode, 'works.spills'), // GRTable shows each GR's works and spills
         workService.fetchAllWorks(isDemoMode),
         tenderService.fetchAllTenders(isDemoMode),
         billService.fetchAllBills(isDemoMode)
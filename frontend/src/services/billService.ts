@@ -7,7 +7,7 @@ export const billService = {
   // Get all bills
   fetchAllBills: async (isDemoMode: boolean = false) => {
     const apiInstance = getApi(isDemoMode);
-    const response = await apiInstance.get('/bills/');
+    const response = await apiInstance.get('/bills/', { params: { page_size: 'all' } });
     return response.data;
   },
 
@@ -21,7 +21,7 @@ export const billService = {
   // ✅ NEW: Get all bills for a specific tender
   fetchBillsByTender: async (tenderId: string, isDemoMode: boolean = false) => {
     const apiInstance = getApi(isDemoMode);
-    const response = await apiInstance.get(`/bills/?tender=${tenderId}`);
+    const response = await apiInstance.get(`/bills/?tender=${tenderId}&page_size=all`);
     return response.data;
   },
 
@@ -4,10 +4,14 @@ import demoApi from './demoApi';
 const getApi = (isDemoMode: boolean) => isDemoMode ? demoApi : api;
 
 export const grService = {
-  // Get all GRs
-  fetchAllGRs: async (isDemoMode: boolean = false) => {
+  // Get all GRs (flat; pass expand='works' or 'works.spills' to nest works/spills)
+  fetchAllGRs: async (isDemoMode: boolean = false, expand?: string) => {
     const apiInstance = getApi(isDemoMode);
-    const response = await apiInstance.get('/grs/');
+    const params: Record<string, string> = { page_size: 'all' };
+    if (expand) {
+      params.expand = expand;
+    }
+    const response = await apiInstance.get('/grs/', { params });
     return response.data;
   },
 
@@ -21,14 +25,14 @@ export const grService = {
   // ✅ NEW: Get all works for a specific GR
   fetchWorksByGR: async (grId: string, isDemoMode: boolean = false) => {
     const apiInstance = getApi(isDemoMode);
-    const response = await apiInstance.get(`/works/?gr=${grId}`);
+    const response = await apiInstance.get(`/works/?gr=${grId}&page_size=all`);
     return response.data;
   },
 
     // ✅ NEW: Get GRs by Work ID
   fetchGRsByWork: async (workId: string, isDemoMode: boolean = false) => {
     const apiInstance = getApi(isDemoMode);
-    const response = await apiInstance.get(`/grs/?work=${workId}`);
+    const response = await apiInstance.get(`/grs/?work=${workId}&page_size=all`);
     return response.data;
   },
 
@@ -7,7 +7,7 @@ export const spillService = {
   // Get all spills
   fetchAllSpills: async (isDemoMode: boolean = false) => {
     const apiInstance = getApi(isDemoMode);
-    const response = await apiInstance.get('/spills/');
+    const response = await apiInstance.get('/spills/', { params: { page_size: 'all' } });
     return response.data;
   },
 
@@ -21,7 +21,7 @@ export const spillService = {
   // ✅ NEW: Get all spills for a specific work
   fetchSpillsByWork: async (workId: string, isDemoMode: boolean = false) => {
     const apiInstance = getApi(isDemoMode);
-    const response = await apiInstance.get(`/spills/?work=${workId}`);
+    const response = await apiInstance.get(`/spills/?work=${workId}&page_size=all`);
     return response.data;
   },
 
@@ -55,7 +55,7 @@ export const technicalSanctionService = {
   // Get all technical sanctions
   fetchAllTechnicalSanctions: async (isDemoMode: boolean = false) => {
     const apiInstance = getApi(isDemoMode);
-    const response = await apiInstance.get('/technical-sanctions/');
+    const response = await apiInstance.get('/technical-sanctions/', { params: { page_size: 'all' } });
     return response.data;
   },
 
@@ -69,7 +69,7 @@ export const technicalSanctionService = {
   // ✅ NEW: Get all technical sanctions for a specific work
   fetchTechnicalSanctionsByWork: async (workId: string, isDemoMode: boolean = false) => {
     const apiInstance = getApi(isDemoMode);
-    const response = await apiInstance.get(`/technical-sanctions/?work=${workId}`);
+    const response = await apiInstance.get(`/technical-sanctions/?work=${workId}&page_size=all`);
     return response.data;
   },
 
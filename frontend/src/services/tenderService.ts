@@ -7,7 +7,7 @@ export const tenderService = {
   // Get all tenders
   fetchAllTenders: async (isDemoMode: boolean = false) => {
     const apiInstance = getApi(isDemoMode);
-    const response = await apiInstance.get('/tenders/');
+    const response = await apiInstance.get('/tenders/', { params: { page_size: 'all' } });
     return response.data;
   },
 
@@ -21,7 +21,7 @@ export const tenderService = {
   // ✅ NEW: Get all tenders for a specific work
   fetchTendersByWork: async (workId: string, isDemoMode: boolean = false) => {
     const apiInstance = getApi(isDemoMode);
-    const response = await apiInstance.get(`/tenders/?work=${workId}`);
+    const response = await apiInstance.get(`/tenders/?work=${workId}&page_size=all`);
     return response.data;
   },
 
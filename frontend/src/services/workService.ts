@@ -7,7 +7,7 @@ export const workService = {
   // Get all works
   fetchAllWorks: async (isDemoMode: boolean = false) => {
     const apiInstance = getApi(isDemoMode);
-    const response = await apiInstance.get('/works/');
+    const response = await apiInstance.get('/works/', { params: { page_size: 'all' } });
     return response.data;
   },
 